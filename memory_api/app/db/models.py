@@ -2,21 +2,25 @@
 Modèles SQLAlchemy pour PostgreSQL - NextGeneration Memory API
 Enterprise-grade models for multi-agent system
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Boolean, Index, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Boolean, Index, Float, Uuid
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import JSONB as PG_JSONB
 from datetime import datetime, timezone
 
 Base = declarative_base()
 
+# JSONB sur PostgreSQL, JSON générique ailleurs (SQLite de développement/tests)
+# Uuid : type UUID natif sur PostgreSQL, CHAR(32) sur SQLite
+JSONB = PG_JSONB().with_variant(JSON(), "sqlite")
+
 class AgentSession(Base):
     """Table des sessions d'agents - Enterprise optimized"""
     __tablename__ = "agent_sessions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     session_id = Column(String(255), unique=True, nullable=False, index=True)
     agent_id = Column(String(255), nullable=False, index=True)
     agent_type = Column(String(100), nullable=False, index=True)  # supervisor, code_generation, documentation, etc.
@@ -27,7 +31,7 @@ class AgentSession(Base):
     status = Column(String(50), default="running", index=True)  # running, paused, completed, failed
     total_tokens_used = Column(Integer, default=0)
     total_cost = Column(Float, default=0.0)
-    metadata = Column(JSONB)
+    metadata_ = Column("metadata", JSONB)  # "metadata" est réservé par Declarative
     
     # Relations
     memory_items = relationship("MemoryItem", back_populates="session", cascade="all, delete-orphan")
@@ -43,8 +47,8 @@ class MemoryItem(Base):
     """Table des éléments de mémoire - Enterprise optimized"""
     __tablename__ = "memory_items"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    session_id = Column(UUID(as_uuid=True), ForeignKey("agent_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    session_id = Column(Uuid(as_uuid=True), ForeignKey("agent_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
     content = Column(Text, nullable=False)
     content_hash = Column(String(64), index=True)  # SHA256 pour déduplication
     content_type = Column(String(100), default="text", index=True)  # text, code, analysis, error, result
@@ -57,7 +61,7 @@ class MemoryItem(Base):
     accessed_at = Column(DateTime(timezone=True), server_default=func.now())
     access_count = Column(Integer, default=0)
     is_archived = Column(Boolean, default=False, index=True)
-    metadata = Column(JSONB)
+    metadata_ = Column("metadata", JSONB)  # "metadata" est réservé par Declarative
     
     # Relations
     session = relationship("AgentSession", back_populates="memory_items")
@@ -74,8 +78,8 @@ class StateItem(Base):
     """Table des états d'agents - Enterprise optimized"""
     __tablename__ = "state_items"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    session_id = Column(UUID(as_uuid=True), ForeignKey("agent_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    session_id = Column(Uuid(as_uuid=True), ForeignKey("agent_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
     key = Column(String(255), nullable=False, index=True)
     value = Column(JSONB, nullable=False)
     data_type = Column(String(50), default="json", index=True)  # json, string, int, config, checkpoint
@@ -100,12 +104,12 @@ class AgentCommunication(Base):
     """Table des communications inter-agents - Enterprise optimized"""
     __tablename__ = "agent_communications"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     from_agent = Column(String(255), nullable=False, index=True)
     to_agent = Column(String(255), nullable=False, index=True)
     session_id = Column(String(255), index=True)  # Pour regrouper les communications par session
-    conversation_id = Column(UUID(as_uuid=True), index=True)  # Pour chaîner les messages
-    parent_message_id = Column(UUID(as_uuid=True), ForeignKey("agent_communications.id"))
+    conversation_id = Column(Uuid(as_uuid=True), index=True)  # Pour chaîner les messages
+    parent_message_id = Column(Uuid(as_uuid=True), ForeignKey("agent_communications.id"))
     message_type = Column(String(100), nullable=False, index=True)  # task, result, error, query, response
     subject = Column(String(500))  # Sujet du message
     message_content = Column(JSONB, nullable=False)
@@ -118,7 +122,7 @@ class AgentCommunication(Base):
     delivered_at = Column(DateTime(timezone=True))
     processed_at = Column(DateTime(timezone=True))
     response_time_ms = Column(Integer)  # Temps de réponse en millisecondes
-    metadata = Column(JSONB)
+    metadata_ = Column("metadata", JSONB)  # "metadata" est réservé par Declarative
     
     # Relations
     replies = relationship("AgentCommunication", backref="parent", remote_side=[id])
@@ -135,7 +139,7 @@ class AgentMetrics(Base):
     """Table des métriques d'agents - Enterprise optimized"""
     __tablename__ = "agent_metrics"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     agent_id = Column(String(255), nullable=False, index=True)
     agent_type = Column(String(100), index=True)  # supervisor, worker, specialist
     metric_name = Column(String(255), nullable=False, index=True)
@@ -148,7 +152,7 @@ class AgentMetrics(Base):
     task_id = Column(String(255), index=True)
     duration_ms = Column(Integer)  # Durée de la métrique si applicable
     status = Column(String(50), default="active")  # active, archived, error
-    metadata = Column(JSONB)
+    metadata_ = Column("metadata", JSONB)  # "metadata" est réservé par Declarative
     
     # Index pour performance et analytics
     __table_args__ = (
@@ -163,7 +167,7 @@ class KnowledgeBase(Base):
     """Table de la base de connaissances - Enterprise optimized"""
     __tablename__ = "knowledge_base"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(500), nullable=False, index=True)
     content = Column(Text, nullable=False)
     content_hash = Column(String(64), unique=True, index=True)  # Pour éviter les doublons
@@ -185,7 +189,7 @@ class KnowledgeBase(Base):
     related_documents = Column(JSONB)  # IDs de documents liés
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    metadata = Column(JSONB)
+    metadata_ = Column("metadata", JSONB)  # "metadata" est réservé par Declarative
     
     # Index pour recherche et performance
     __table_args__ = (
@@ -0,0 +1,491 @@
+"""
+Repositories async pour PostgreSQL - NextGeneration Memory API
+Accès non bloquant (asyncpg) aux sessions, mémoires, états et communications
+"""
+import hashlib
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, literal_column, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .models import AgentCommunication, AgentSession, KnowledgeBase, MemoryItem, StateItem
+from .session import AsyncSessionLocal
+
+# Session technique pour les états/mémoires sans session_id
+GLOBAL_SESSION_ID = "global"
+
+
+class BaseRepository:
+    """Base commune : une transaction courte par opération"""
+
+    def __init__(self, session_factory: Optional[async_sessionmaker] = None):
+        self.session_factory = session_factory or AsyncSessionLocal
+
+    @staticmethod
+    async def _persist(db: AsyncSession, instance):
+        """Insère puis recharge les valeurs générées côté serveur (created_at...)"""
+        db.add(instance)
+        await db.flush()
+        await db.refresh(instance)
+        return instance
+
+    @asynccontextmanager
+    async def _transaction(self) -> AsyncIterator[AsyncSession]:
+        async with self.session_factory() as db:
+            async with db.begin():
+                yield db
+
+
+async def ensure_agent_session(
+    db: AsyncSession,
+    session_id: Optional[str],
+    agent_id: str = "memory_api",
+    agent_type: str = "memory_api"
+) -> AgentSession:
+    """Retourne l'AgentSession d'un session_id, en la créant au besoin"""
+    session_id = session_id or GLOBAL_SESSION_ID
+    result = await db.execute(select(AgentSession).where(AgentSession.session_id == session_id))
+    agent_session = result.scalar_one_or_none()
+    if agent_session is not None:
+        return agent_session
+
+    agent_session = AgentSession(session_id=session_id, agent_id=agent_id, agent_type=agent_type)
+    try:
+        # Savepoint : une création concurrente ne doit pas annuler la transaction
+        async with db.begin_nested():
+            db.add(agent_session)
+    except IntegrityError:
+        result = await db.execute(select(AgentSession).where(AgentSession.session_id == session_id))
+        agent_session = result.scalar_one()
+    return agent_session
+
+
+class AgentSessionRepository(BaseRepository):
+    """Repository des sessions d'agents"""
+
+    async def get_or_create(self, session_id: str, agent_id: str = "memory_api",
+                            agent_type: str = "memory_api") -> AgentSession:
+        async with self._transaction() as db:
+            return await ensure_agent_session(db, session_id, agent_id, agent_type)
+
+    async def get(self, session_id: str) -> Optional[AgentSession]:
+        async with self.session_factory() as db:
+            result = await db.execute(select(AgentSession).where(AgentSession.session_id == session_id))
+            return result.scalar_one_or_none()
+
+    async def list_active(self, agent_type: Optional[str] = None, limit: int = 100) -> List[AgentSession]:
+        async with self.session_factory() as db:
+            query = select(AgentSession).where(AgentSession.is_active.is_(True))
+            if agent_type:
+                query = query.where(AgentSession.agent_type == agent_type)
+            result = await db.execute(query.order_by(AgentSession.created_at.desc()).limit(limit))
+            return list(result.scalars())
+
+    async def update_status(self, session_id: str, status: str, tokens_used: int = 0,
+                            cost: float = 0.0) -> bool:
+        async with self._transaction() as db:
+            result = await db.execute(select(AgentSession).where(AgentSession.session_id == session_id))
+            agent_session = result.scalar_one_or_none()
+            if agent_session is None:
+                return False
+            agent_session.status = status
+            agent_session.is_active = status in ("running", "paused")
+            agent_session.total_tokens_used = (agent_session.total_tokens_used or 0) + tokens_used
+            agent_session.total_cost = (agent_session.total_cost or 0.0) + cost
+            agent_session.last_activity = datetime.now(timezone.utc)
+            return True
+
+
+class MemoryItemRepository(BaseRepository):
+    """Repository des éléments de mémoire (dédupliqués par hash SHA256)"""
+
+    @staticmethod
+    def hash_content(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    async def add(
+        self,
+        content: str,
+        session_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        content_type: str = "text",
+        category: Optional[str] = None,
+        importance_score: int = 1,
+        embeddings_vector: Optional[List[float]] = None
+    ) -> MemoryItem:
+        """Ajoute un élément ; un contenu déjà présent dans la session est réutilisé"""
+        content_hash = self.hash_content(content)
+        async with self._transaction() as db:
+            agent_session = await ensure_agent_session(db, session_id)
+            result = await db.execute(select(MemoryItem).where(
+                MemoryItem.session_id == agent_session.id,
+                MemoryItem.content_hash == content_hash
+            ))
+            item = result.scalar_one_or_none()
+            if item is not None:
+                item.access_count = (item.access_count or 0) + 1
+                item.accessed_at = datetime.now(timezone.utc)
+                return item
+
+            item = MemoryItem(
+                session_id=agent_session.id,
+                content=content,
+                content_hash=content_hash,
+                content_type=content_type,
+                category=category,
+                importance_score=importance_score,
+                token_count=len(content.split()),
+                embeddings_vector=embeddings_vector,
+                metadata_=metadata
+            )
+            return await self._persist(db, item)
+
+    async def add_many(self, items: List[Dict[str, Any]]) -> int:
+        """
+        Ajoute un lot (clés content, session_id, metadata, embeddings_vector...)
+        en une transaction ; les contenus déjà présents sont ignorés.
+        """
+        inserted = 0
+        async with self._transaction() as db:
+            sessions: Dict[Optional[str], AgentSession] = {}
+            for session_id in dict.fromkeys(item.get("session_id") for item in items):
+                sessions[session_id] = await ensure_agent_session(db, session_id)
+
+            hashes = {self.hash_content(item["content"]) for item in items}
+            result = await db.execute(select(MemoryItem.session_id, MemoryItem.content_hash).where(
+                MemoryItem.session_id.in_([session.id for session in sessions.values()]),
+                MemoryItem.content_hash.in_(hashes)
+            ))
+            seen = set(result.all())
+
+            for item in items:
+                agent_session = sessions[item.get("session_id")]
+                content_hash = self.hash_content(item["content"])
+                if (agent_session.id, content_hash) in seen:
+                    continue
+                seen.add((agent_session.id, content_hash))
+                db.add(MemoryItem(
+                    session_id=agent_session.id,
+                    content=item["content"],
+                    content_hash=content_hash,
+                    content_type=item.get("content_type", "text"),
+                    category=item.get("category"),
+                    importance_score=item.get("importance_score", 1),
+                    token_count=len(item["content"].split()),
+                    embeddings_vector=item.get("embeddings_vector"),
+                    metadata_=item.get("metadata")
+                ))
+                inserted += 1
+        return inserted
+
+    async def get_by_hash(self, content_hash: str, session_id: Optional[str] = None) -> Optional[MemoryItem]:
+        async with self.session_factory() as db:
+            query = select(MemoryItem).where(MemoryItem.content_hash == content_hash)
+            if session_id:
+                query = query.join(AgentSession).where(AgentSession.session_id == session_id)
+            result = await db.execute(query.limit(1))
+            return result.scalar_one_or_none()
+
+    async def list_by_session(self, session_id: Optional[str] = None, limit: int = 100,
+                              include_archived: bool = False) -> List[MemoryItem]:
+        async with self.session_factory() as db:
+            query = select(MemoryItem)
+            if session_id:
+                query = query.join(AgentSession).where(AgentSession.session_id == session_id)
+            if not include_archived:
+                query = query.where(MemoryItem.is_archived.is_(False))
+            result = await db.execute(query.order_by(MemoryItem.created_at.desc()).limit(limit))
+            return list(result.scalars())
+
+    async def delete_by_session(self, session_id: Optional[str] = None) -> int:
+        async with self._transaction() as db:
+            query = delete(MemoryItem)
+            if session_id:
+                subquery = select(AgentSession.id).where(AgentSession.session_id == session_id)
+                query = query.where(MemoryItem.session_id.in_(subquery))
+            result = await db.execute(query)
+            return result.rowcount or 0
+
+
+class KnowledgeBaseRepository(BaseRepository):
+    """Repository de la base de connaissances (recherche plein texte)"""
+
+    async def add(self, title: str, content: str, summary: Optional[str] = None,
+                  category: Optional[str] = None, tags: Optional[List[str]] = None,
+                  source: Optional[str] = None, is_public: bool = True) -> KnowledgeBase:
+        async with self._transaction() as db:
+            return await self._persist(db, KnowledgeBase(
+                title=title,
+                content=content,
+                content_hash=MemoryItemRepository.hash_content(content),
+                summary=summary,
+                category=category,
+                tags=tags,
+                source=source,
+                is_public=is_public
+            ))
+
+    async def search_text(self, query: str, limit: int = 10) -> List[Tuple[KnowledgeBase, float]]:
+        """
+        Recherche lexicale sur les documents publics, triée par score décroissant.
+        PostgreSQL : index GIN tsvector (idx_knowledge_content_search) et
+        pg_trgm sur le titre ; autres bases : correspondance ILIKE par terme.
+        """
+        async with self.session_factory() as db:
+            if db.bind.dialect.name == "postgresql":
+                return await self._search_postgres(db, query, limit)
+            return await self._search_fallback(db, query, limit)
+
+    @staticmethod
+    def _postgres_search_statement(query: str, limit: int):
+        # Expression identique à celle de l'index GIN créé par init_postgres.py : constantes en ligne,
+        # un paramètre lié ($n) rendrait l'expression différente et forcerait un parcours séquentiel
+        language = literal_column("'french'")
+        document = func.to_tsvector(
+            language,
+            KnowledgeBase.title.op("||")(literal_column("' '")).op("||")(
+                func.coalesce(KnowledgeBase.summary, literal_column("''"))
+            )
+        )
+        tsquery = func.plainto_tsquery(language, query)
+        score = func.ts_rank(document, tsquery) + func.similarity(KnowledgeBase.title, query)
+        return (
+            select(KnowledgeBase, score.label("score"))
+            .where(KnowledgeBase.is_public.is_(True), or_(document.op("@@")(tsquery), KnowledgeBase.title.op("%")(query)))
+            .order_by(score.desc())
+            .limit(limit)
+        )
+
+    @classmethod
+    async def _search_postgres(cls, db: AsyncSession, query: str, limit: int) -> List[Tuple[KnowledgeBase, float]]:
+        result = await db.execute(cls._postgres_search_statement(query, limit))
+        return [(row[0], float(row[1])) for row in result.all()]
+
+    @staticmethod
+    async def _search_fallback(db: AsyncSession, query: str, limit: int) -> List[Tuple[KnowledgeBase, float]]:
+        terms = list(dict.fromkeys(term for term in query.lower().split() if len(term) > 2))
+        if not terms:
+            return []
+        columns = (KnowledgeBase.title, KnowledgeBase.summary, KnowledgeBase.content)
+        result = await db.execute(
+            select(KnowledgeBase)
+            .where(KnowledgeBase.is_public.is_(True), or_(*(column.ilike(f"%{term}%") for term in terms for column in columns)))
+            .limit(limit * 4)
+        )
+        scored = []
+        for document in result.scalars():
+            text = " ".join(filter(None, (document.title, document.summary, document.content))).lower()
+            scored.append((document, sum(term in text for term in terms) / len(terms)))
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        return scored[:limit]
+
+
+class StateItemRepository(BaseRepository):
+    """Repository des états d'agents (clé unique par session)"""
+
+    async def upsert(
+        self,
+        key: str,
+        value: Any,
+        session_id: Optional[str] = None,
+        namespace: Optional[str] = None,
+        data_type: str = "json",
+        version: Optional[int] = None
+    ) -> StateItem:
+        """Crée ou remplace un état ; la version est incrémentée si non fournie"""
+        async with self._transaction() as db:
+            agent_session = await ensure_agent_session(db, session_id)
+            result = await db.execute(select(StateItem).where(
+                StateItem.session_id == agent_session.id,
+                StateItem.key == key
+            ))
+            item = result.scalar_one_or_none()
+            if item is None:
+                item = StateItem(session_id=agent_session.id, key=key, value=value,
+                                 data_type=data_type, namespace=namespace, version=version or 1)
+                await self._persist(db, item)
+            else:
+                item.value = value
+                item.data_type = data_type
+                item.namespace = namespace
+                item.version = version if version is not None else (item.version or 0) + 1
+                item.updated_at = datetime.now(timezone.utc)
+            return item
+
+    async def put_many(self, session_id: str, items: List[Dict[str, Any]], namespace: str,
+                       data_type: str = "json") -> Dict[str, int]:
+        """
+        Écrit un lot d'états d'un namespace en une transaction.
+        Les nouvelles clés reçoivent des versions croissantes (max + 1).
+        """
+        versions: Dict[str, int] = {}
+        async with self._transaction() as db:
+            agent_session = await ensure_agent_session(db, session_id)
+            keys = [entry["key"] for entry in items]
+            result = await db.execute(select(StateItem).where(
+                StateItem.session_id == agent_session.id,
+                StateItem.key.in_(keys)
+            ))
+            existing = {item.key: item for item in result.scalars()}
+            result = await db.execute(select(func.max(StateItem.version)).where(
+                StateItem.session_id == agent_session.id,
+                StateItem.namespace == namespace
+            ))
+            next_version = (result.scalar() or 0) + 1
+
+            for entry in items:
+                item = existing.get(entry["key"])
+                if item is None:
+                    item = StateItem(session_id=agent_session.id, key=entry["key"], value=entry["value"],
+                                     data_type=data_type, namespace=namespace, version=next_version)
+                    db.add(item)
+                    existing[entry["key"]] = item
+                    next_version += 1
+                else:
+                    item.value = entry["value"]
+                    item.updated_at = datetime.now(timezone.utc)
+                versions[entry["key"]] = item.version
+        return versions
+
+    async def get(self, key: str, session_id: Optional[str] = None) -> Optional[StateItem]:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(StateItem).join(AgentSession).where(
+                    AgentSession.session_id == (session_id or GLOBAL_SESSION_ID),
+                    StateItem.key == key
+                )
+            )
+            return result.scalar_one_or_none()
+
+    async def latest(self, session_id: str, namespace: str) -> Optional[StateItem]:
+        """Élément de plus haute version d'un namespace"""
+        items = await self.list(session_id, namespace=namespace, limit=1)
+        return items[0] if items else None
+
+    async def list(
+        self,
+        session_id: Optional[str] = None,
+        namespace: Optional[str] = None,
+        limit: Optional[int] = None,
+        before_key: Optional[str] = None,
+        exclude_namespace: Optional[str] = None
+    ) -> List[StateItem]:
+        """Liste les états, du plus récent (version) au plus ancien"""
+        async with self.session_factory() as db:
+            query = select(StateItem, AgentSession.session_id).join(AgentSession)
+            if session_id:
+                query = query.where(AgentSession.session_id == session_id)
+            if namespace:
+                query = query.where(StateItem.namespace == namespace)
+            if exclude_namespace:
+                query = query.where((StateItem.namespace.is_(None)) | (StateItem.namespace != exclude_namespace))
+            if before_key:
+                query = query.where(StateItem.key < before_key)
+            query = query.order_by(StateItem.version.desc(), StateItem.created_at.desc())
+            if limit is not None:
+                query = query.limit(limit)
+            result = await db.execute(query)
+            items = []
+            for item, owner in result.all():
+                # session_id métier exposé sans relation paresseuse (incompatible async)
+                item.owner_session_id = owner
+                items.append(item)
+            return items
+
+    async def delete(self, key: str, session_id: Optional[str] = None) -> bool:
+        async with self._transaction() as db:
+            subquery = select(AgentSession.id).where(AgentSession.session_id == (session_id or GLOBAL_SESSION_ID))
+            result = await db.execute(delete(StateItem).where(
+                StateItem.session_id.in_(subquery),
+                StateItem.key == key
+            ))
+            return (result.rowcount or 0) > 0
+
+    async def clear(self, session_id: Optional[str] = None, exclude_namespace: Optional[str] = None) -> int:
+        async with self._transaction() as db:
+            query = delete(StateItem)
+            if session_id:
+                subquery = select(AgentSession.id).where(AgentSession.session_id == session_id)
+                query = query.where(StateItem.session_id.in_(subquery))
+            if exclude_namespace:
+                query = query.where((StateItem.namespace.is_(None)) | (StateItem.namespace != exclude_namespace))
+            result = await db.execute(query)
+            return result.rowcount or 0
+
+
+class AgentCommunicationRepository(BaseRepository):
+    """Repository des communications inter-agents"""
+
+    async def send(
+        self,
+        from_agent: str,
+        to_agent: str,
+        message_type: str,
+        content: Dict[str, Any],
+        session_id: Optional[str] = None,
+        subject: Optional[str] = None,
+        priority: str = "normal",
+        conversation_id: Optional[uuid.UUID] = None,
+        parent_message_id: Optional[uuid.UUID] = None,
+        expires_at: Optional[datetime] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> AgentCommunication:
+        async with self._transaction() as db:
+            message = AgentCommunication(
+                from_agent=from_agent,
+                to_agent=to_agent,
+                message_type=message_type,
+                message_content=content,
+                session_id=session_id,
+                subject=subject,
+                priority=priority,
+                conversation_id=conversation_id,
+                parent_message_id=parent_message_id,
+                expires_at=expires_at,
+                metadata_=metadata
+            )
+            return await self._persist(db, message)
+
+    async def get(self, message_id: uuid.UUID) -> Optional[AgentCommunication]:
+        async with self.session_factory() as db:
+            return await db.get(AgentCommunication, message_id)
+
+    async def list_for_agent(self, to_agent: str, status: Optional[str] = "sent",
+                             limit: int = 100) -> List[AgentCommunication]:
+        async with self.session_factory() as db:
+            query = select(AgentCommunication).where(AgentCommunication.to_agent == to_agent)
+            if status:
+                query = query.where(AgentCommunication.status == status)
+            result = await db.execute(query.order_by(AgentCommunication.created_at).limit(limit))
+            return list(result.scalars())
+
+    async def list_conversation(self, conversation_id: uuid.UUID) -> List[AgentCommunication]:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(AgentCommunication)
+                .where(AgentCommunication.conversation_id == conversation_id)
+                .order_by(AgentCommunication.created_at)
+            )
+            return list(result.scalars())
+
+    async def update_status(self, message_id: uuid.UUID, status: str,
+                            response_time_ms: Optional[int] = None) -> bool:
+        async with self._transaction() as db:
+            message = await db.get(AgentCommunication, message_id)
+            if message is None:
+                return False
+            now = datetime.now(timezone.utc)
+            message.status = status
+            if status == "delivered":
+                message.delivered_at = now
+            elif status in ("processed", "failed"):
+                message.processed_at = now
+            if status == "failed":
+                message.retry_count = (message.retry_count or 0) + 1
+            if response_time_ms is not None:
+                message.response_time_ms = response_time_ms
+            return True
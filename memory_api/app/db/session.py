@@ -1,5 +1,6 @@
 # Database Session Management
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
@@ -76,6 +77,48 @@ else:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(database_url: str = None) -> str:
+    """Convertit l'URL synchrone vers le driver async (asyncpg / aiosqlite)"""
+    database_url = database_url or DATABASE_URL
+    if database_url.startswith("postgresql+asyncpg://") or database_url.startswith("sqlite+aiosqlite://"):
+        return database_url
+    if database_url.startswith("postgresql"):
+        return "postgresql+asyncpg://" + database_url.split("://", 1)[1]
+    if database_url.startswith("sqlite"):
+        return "sqlite+aiosqlite://" + database_url.split("://", 1)[1]
+    return database_url
+
+def create_async_db_engine(database_url: str = None):
+    """Crée le moteur async avec le même dimensionnement de pool que le moteur sync"""
+    async_url = get_async_database_url(database_url)
+    if async_url.startswith("postgresql+asyncpg"):
+        return create_async_engine(
+            async_url,
+            pool_size=25,
+            max_overflow=50,
+            pool_pre_ping=True,
+            pool_recycle=7200,
+            echo=False,
+            isolation_level="READ COMMITTED",
+            connect_args={
+                "server_settings": {
+                    "application_name": "NextGeneration_MemoryAPI",
+                    "timezone": "UTC",
+                },
+                "timeout": 10,
+                "command_timeout": 30,
+            }
+        )
+    return create_async_engine(async_url, poolclass=NullPool, echo=False)
+
+# Moteur async (asyncpg) : les endpoints FastAPI attendent les requêtes sans bloquer la boucle
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+def database_configured() -> bool:
+    """Indique si une base de données a été explicitement configurée"""
+    return bool(os.getenv("DATABASE_URL") or os.getenv("POSTGRES_HOST"))
+
 Base = declarative_base()
 
 def get_db():
@@ -91,16 +134,21 @@ def get_db():
         db.close()
 
 async def get_async_db():
-    """Version async du générateur de session (pour future implémentation)"""
-    db = SessionLocal()
-    try:
-        yield db
-    except Exception as e:
-        logger.error(f"Async database session error: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
+    """Générateur de session async (asyncpg) pour les dépendances FastAPI"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Async database session error: {e}")
+            await db.rollback()
+            raise
+
+async def init_async_db(engine=None):
+    """Crée les tables manquantes via le moteur async"""
+    from .models import Base as ModelsBase
+    engine = engine or async_engine
+    async with engine.begin() as conn:
+        await conn.run_sync(ModelsBase.metadata.create_all)
 
 def test_connection():
     """Test de connexion à la base de données avec diagnostics avancés"""
@@ -1,19 +1,55 @@
 # Memory API Main Application
-from fastapi import FastAPI, HTTPException, Depends
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import JSONResponse
 from typing import List, Optional
-from .models.schemas import MemoryItem, StateItem, SearchQuery, SearchResult
+from .models.schemas import (
+    MemoryItem, StateItem, SearchQuery, SearchResult,
+    CheckpointRecord, CheckpointBatch, CheckpointBatchResult,
+    MemoryBatch, MemoryBatchResult, SearchBatch, SearchBatchResult,
+    RAGQuery, RAGQueryResult, RAGHit
+)
 from .services.rag_service import RAGService
 from .services.state_service import StateService
+from .services.retrieval_service import HybridRetriever
+from .services.vector_executor import VectorStoreSaturated
+from .db.session import database_configured, init_async_db, async_engine
+from .db.repositories import StateItemRepository, MemoryItemRepository, KnowledgeBaseRepository
+
+# État persisté via asyncpg dès qu'une base est configurée, en mémoire sinon
+USE_DATABASE = database_configured()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if USE_DATABASE:
+        await init_async_db()
+    yield
+    rag_service.executor.shutdown(wait=False)
+    rag_service.embedder.cache.close()
+    if USE_DATABASE:
+        await async_engine.dispose()
 
 app = FastAPI(
     title="Memory API",
     description="API pour la gestion de mémoire et d'état dans l'environnement multi-agent",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Services
-rag_service = RAGService()
-state_service = StateService()
+rag_service = RAGService(memory_repository=MemoryItemRepository() if USE_DATABASE else None)
+state_service = StateService(StateItemRepository() if USE_DATABASE else None)
+retriever = HybridRetriever(rag_service, KnowledgeBaseRepository() if USE_DATABASE else None)
+
+@app.exception_handler(VectorStoreSaturated)
+async def vector_store_saturated_handler(request: Request, exc: VectorStoreSaturated):
+    """Backpressure : le vector store est saturé, le client doit réessayer"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Vector store saturé, réessayez plus tard"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 @app.get("/")
 async def root():
@@ -25,6 +61,21 @@ async def health_check():
     """Vérification de santé de l'API"""
     return {"status": "healthy", "service": "memory_api"}
 
+@app.get("/metrics/vector_store")
+async def vector_store_metrics():
+    """Métriques de l'exécuteur vectoriel (file, attentes, refus)"""
+    return rag_service.executor.get_metrics()
+
+@app.get("/metrics/embeddings")
+async def embedding_metrics():
+    """Métriques du cache d'embeddings (hits mémoire/disque, calculs)"""
+    return rag_service.embedder.get_metrics()
+
+@app.get("/metrics/retrieval")
+async def retrieval_metrics():
+    """Métriques du pipeline /rag_query (latences, dégradations)"""
+    return retriever.get_metrics()
+
 # Endpoints pour la mémoire
 @app.post("/memory/store", response_model=MemoryItem)
 async def store_memory(content: str, metadata: dict = None, session_id: str = None):
@@ -36,6 +87,30 @@ async def search_memory(query: SearchQuery):
     """Recherche dans la mémoire"""
     return await rag_service.search_memory(query)
 
+@app.post("/memory/store_batch", response_model=MemoryBatchResult)
+async def store_memory_batch(batch: MemoryBatch):
+    """Stocke un lot de documents en un seul appel collection.add"""
+    items = await rag_service.store_memory_batch(batch.items, batch.session_id)
+    return MemoryBatchResult(items=items, stored=len(items))
+
+@app.post("/memory/search_batch", response_model=SearchBatchResult)
+async def search_memory_batch(batch: SearchBatch):
+    """Exécute un lot de recherches (un collection.query par session)"""
+    return SearchBatchResult(results=await rag_service.search_memory_batch(batch.queries))
+
+@app.post("/rag_query", response_model=RAGQueryResult)
+async def rag_query(request: RAGQuery):
+    """Récupération hybride top-k (vecteurs + plein texte) reranquée sous budget de latence"""
+    started = time.perf_counter()
+    candidates, degraded = await retriever.query(request.query, request.top_k, request.session_id,
+                                                 request.budget_ms)
+    return RAGQueryResult(
+        results=[RAGHit(content=c.content, score=round(c.score, 6), id=c.id, source=c.source,
+                        metadata=c.metadata) for c in candidates],
+        latency_ms=round((time.perf_counter() - started) * 1000.0, 3),
+        degraded=degraded
+    )
+
 @app.get("/memory/all", response_model=List[MemoryItem])
 async def get_all_memories(session_id: str = None):
     """Récupère toutes les mémoires"""
@@ -84,6 +159,26 @@ async def clear_state(session_id: str = None):
         return {"message": "État effacé avec succès"}
     raise HTTPException(status_code=500, detail="Erreur lors de l'effacement de l'état")
 
+# Endpoints pour les checkpoints LangGraph (namespace 'checkpoint')
+@app.post("/state/checkpoints/batch", response_model=CheckpointBatchResult)
+async def put_checkpoints(batch: CheckpointBatch):
+    """Stocke un lot de checkpoints en un seul aller-retour"""
+    versions = await state_service.put_checkpoints(batch.checkpoints)
+    return CheckpointBatchResult(stored=len(batch.checkpoints), versions=versions)
+
+@app.get("/state/checkpoints/{thread_id}", response_model=CheckpointRecord)
+async def get_checkpoint(thread_id: str, checkpoint_id: str = None):
+    """Récupère un checkpoint précis ou le plus récent d'un thread"""
+    record = await state_service.get_checkpoint(thread_id, checkpoint_id)
+    if record:
+        return record
+    raise HTTPException(status_code=404, detail="Checkpoint non trouvé")
+
+@app.get("/state/checkpoints/{thread_id}/history", response_model=List[CheckpointRecord])
+async def list_checkpoints(thread_id: str, limit: int = None, before: str = None):
+    """Liste les checkpoints d'un thread du plus récent au plus ancien"""
+    return await state_service.list_checkpoints(thread_id, limit, before)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
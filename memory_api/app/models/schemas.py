@@ -1,11 +1,11 @@
 # Data Models and Schemas
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 
 class MemoryItem(BaseModel):
     """Modèle pour un élément de mémoire"""
-    id: Optional[int] = None
+    id: Optional[Union[int, str]] = None
     content: str
     metadata: Optional[Dict[str, Any]] = None
     timestamp: Optional[datetime] = None
@@ -17,6 +17,8 @@ class StateItem(BaseModel):
     key: str
     value: Any
     session_id: Optional[str] = None
+    namespace: Optional[str] = None
+    version: Optional[int] = None
     timestamp: Optional[datetime] = None
 
 class SearchQuery(BaseModel):
@@ -28,4 +30,71 @@ class SearchQuery(BaseModel):
 class SearchResult(BaseModel):
     """Modèle pour les résultats de recherche"""
     items: List[MemoryItem]
-    total_count: int 
\ No newline at end of file
+    total_count: int
+
+# Taille maximale d'un lot (documents ou requêtes) par appel HTTP
+MAX_BATCH_SIZE = 1000
+
+class MemoryBatchItem(BaseModel):
+    """Modèle pour un document d'un lot d'écriture"""
+    content: str
+    metadata: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
+
+class MemoryBatch(BaseModel):
+    """Modèle pour l'écriture groupée de documents"""
+    items: List[MemoryBatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    session_id: Optional[str] = None  # Appliqué aux documents sans session_id
+
+class MemoryBatchResult(BaseModel):
+    """Modèle pour le résultat d'une écriture groupée"""
+    items: List[MemoryItem]
+    stored: int
+
+class SearchBatch(BaseModel):
+    """Modèle pour la recherche groupée"""
+    queries: List[SearchQuery] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class SearchBatchResult(BaseModel):
+    """Modèle pour les résultats d'une recherche groupée (même ordre que les requêtes)"""
+    results: List[SearchResult]
+
+class RAGQuery(BaseModel):
+    """Modèle pour une requête RAG top-k (contrat de rag_code_search_tool)"""
+    query: str = Field(..., min_length=1, max_length=1000)
+    top_k: int = Field(3, ge=1, le=50)
+    session_id: Optional[str] = None
+    budget_ms: Optional[float] = Field(None, gt=0, le=10000)  # Budget de latence, défaut serveur sinon
+
+class RAGHit(BaseModel):
+    """Modèle pour un résultat RAG reranqué"""
+    content: str
+    score: float
+    id: Optional[str] = None
+    source: str  # "memory" (ChromaDB) ou "knowledge_base"
+    metadata: Optional[Dict[str, Any]] = None
+
+class RAGQueryResult(BaseModel):
+    """Modèle pour la réponse de /rag_query"""
+    results: List[RAGHit]
+    latency_ms: float
+    degraded: bool = False  # Source abandonnée ou rerank sauté faute de budget
+
+class CheckpointRecord(BaseModel):
+    """Modèle pour un checkpoint LangGraph sérialisé (namespace 'checkpoint')"""
+    thread_id: str
+    checkpoint_id: str
+    parent_checkpoint_id: Optional[str] = None
+    checkpoint: str
+    metadata: str
+    version: Optional[int] = None
+    timestamp: Optional[datetime] = None
+
+class CheckpointBatch(BaseModel):
+    """Modèle pour l'écriture groupée de checkpoints"""
+    checkpoints: List[CheckpointRecord]
+
+class CheckpointBatchResult(BaseModel):
+    """Modèle pour le résultat d'une écriture groupée de checkpoints"""
+    stored: int
+    versions: Dict[str, int]
\ No newline at end of file
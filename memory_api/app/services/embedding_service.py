@@ -0,0 +1,202 @@
+# Embedding Service
+"""
+Calcul des embeddings avec cache par hash de contenu.
+- Niveau mémoire : LRU borné
+- Niveau disque : SQLite (survit aux redémarrages)
+- Backend pluggable : ONNX MiniLM de ChromaDB (CPU, par défaut),
+  sentence-transformers si installé, ou toute fonction texte -> vecteurs.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Un backend prend un lot de textes et retourne un vecteur par texte
+EmbeddingBackend = Callable[[List[str]], Sequence[Sequence[float]]]
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+
+def content_hash(text: str) -> str:
+    """SHA256 du contenu (même valeur que MemoryItem.content_hash)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SentenceTransformerBackend:
+    """Backend local sentence-transformers, embeddings par lots sur CPU"""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", device: str = "cpu", batch_size: int = 64):
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise ImportError("sentence-transformers n'est pas installé")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, device=device)
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(list(input), batch_size=self.batch_size, normalize_embeddings=True)
+        return [vector.tolist() for vector in vectors]
+
+
+def _chroma_default_backend() -> EmbeddingBackend:
+    # ONNX all-MiniLM-L6-v2 exécuté localement sur CPU (modèle par défaut des collections)
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    return DefaultEmbeddingFunction()
+
+
+EMBEDDING_BACKENDS: Dict[str, Callable[[], EmbeddingBackend]] = {
+    "default": _chroma_default_backend,
+    "sentence_transformers": lambda: SentenceTransformerBackend(
+        os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"),
+        batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    ),
+}
+
+
+def register_embedding_backend(name: str, factory: Callable[[], EmbeddingBackend]):
+    """Enregistre un backend supplémentaire sélectionnable via EMBEDDING_BACKEND"""
+    EMBEDDING_BACKENDS[name] = factory
+
+
+def create_embedding_backend(name: Optional[str] = None) -> EmbeddingBackend:
+    name = name or os.getenv("EMBEDDING_BACKEND", "default")
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {name}")
+    return EMBEDDING_BACKENDS[name]()
+
+
+class EmbeddingCache:
+    """Cache d'embeddings : LRU mémoire devant une table SQLite sur disque"""
+
+    def __init__(self, path: Optional[str] = None, max_memory_entries: Optional[int] = None):
+        self.path = path if path is not None else os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+        self.max_memory_entries = max_memory_entries or int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "10000"))
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+        self.metrics = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stored': 0
+        }
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Ouverture paresseuse ; appelé depuis les threads de l'exécuteur vectoriel
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path or ":memory:", check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._connection.commit()
+        return self._connection
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        missing: List[str] = []
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.metrics['memory_hits'] += 1
+                else:
+                    missing.append(key)
+
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", missing
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f", blob).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.metrics['disk_hits'] += 1
+                self.metrics['misses'] += len(missing) - len(rows)
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        if not vectors:
+            return
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in vectors.items()]
+            )
+            self._db.commit()
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            self.metrics['stored'] += len(vectors)
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.metrics, 'memory_entries': len(self._memory)}
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class CachedEmbedder:
+    """
+    Embeddings dédupliqués par hash : seuls les contenus jamais vus
+    sont envoyés au backend, en un seul lot.
+    """
+
+    def __init__(self, backend: Optional[EmbeddingBackend] = None, cache: Optional[EmbeddingCache] = None,
+                 model_name: Optional[str] = None):
+        self.backend = backend or create_embedding_backend()
+        self.cache = cache or EmbeddingCache()
+        self.model_name = model_name or self._backend_name(self.backend)
+        self.metrics = {'embedded': 0, 'backend_calls': 0}
+
+    @staticmethod
+    def _backend_name(backend: EmbeddingBackend) -> str:
+        name = getattr(backend, "model_name", None)
+        if name is None and callable(getattr(backend, "name", None)):
+            try:
+                name = backend.name()
+            except Exception:
+                name = None
+        return name or type(backend).__name__
+
+    def cache_key(self, text: str) -> str:
+        # Le modèle fait partie de la clé : changer de backend n'utilise pas d'anciens vecteurs
+        return content_hash(f"{self.model_name}\x1f{text}")
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Retourne un vecteur par texte (ordre conservé)"""
+        keys = [self.cache_key(text) for text in texts]
+        vectors = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        pending: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in pending:
+                pending[key] = text
+        if pending:
+            computed = self.backend(list(pending.values()))
+            new_vectors = {key: [float(x) for x in vector] for key, vector in zip(pending, computed)}
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+            self.metrics['backend_calls'] += 1
+            self.metrics['embedded'] += len(pending)
+        return [vectors[key] for key in keys]
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {**self.metrics, **self.cache.get_metrics(), 'model': self.model_name}
@@ -1,17 +1,59 @@
 # RAG (Retrieval-Augmented Generation) Service
+import uuid
 import chromadb
-from typing import List, Optional, Dict, Any
-from ..models.schemas import MemoryItem, SearchQuery, SearchResult
+from typing import List, Optional, Dict, Any, Tuple
+from ..models.schemas import MemoryItem, SearchQuery, SearchResult, MemoryBatchItem
+from .vector_executor import VectorStoreExecutor
+from .embedding_service import CachedEmbedder
+
+COLLECTION_NAME = "memory_collection"
 
 class RAGService:
     """Service pour la récupération et génération augmentée utilisant ChromaDB"""
     
-    def __init__(self):
+    def __init__(self, client=None, embedder: Optional[CachedEmbedder] = None,
+                 executor: Optional[VectorStoreExecutor] = None, memory_repository=None):
         """Initialise le service RAG avec ChromaDB"""
+        # Les appels ChromaDB sont synchrones : exécutés hors de la boucle asyncio
+        self.executor = executor or VectorStoreExecutor()
+        # Embeddings calculés une seule fois par contenu (cache disque + LRU)
+        self.embedder = embedder or CachedEmbedder()
+        # Persistance PostgreSQL optionnelle (content_hash + embeddings_vector)
+        self.memory_repository = memory_repository
         # Configure un client ChromaDB persistant
-        self.client = chromadb.PersistentClient(path="chroma_db")
+        self.client = client or chromadb.PersistentClient(path="chroma_db")
         # Crée ou charge une collection
-        self.collection = self.client.get_or_create_collection(name="memory_collection")
+        self.collection = self._get_collection()
+        # Limite d'un appel add() imposée par ChromaDB
+        get_max_batch_size = getattr(self.client, "get_max_batch_size", None)
+        self.max_batch_size = get_max_batch_size() if get_max_batch_size else 5000
+    
+    def _get_collection(self):
+        return self.client.get_or_create_collection(name=COLLECTION_NAME)
+    
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        return await self.executor.run(self.embedder.embed, texts)
+    
+    @staticmethod
+    def _new_id() -> str:
+        """ID sans collision entre écrivains concurrents (pas de count() par écriture)"""
+        return uuid.uuid4().hex
+    
+    @staticmethod
+    def _where(session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        return {"session_id": session_id} if session_id else None
+    
+    @staticmethod
+    def _format_query_results(results: Dict[str, Any], index: int, limit: int) -> SearchResult:
+        """Convertit la i-ème liste de résultats de collection.query en SearchResult"""
+        items = []
+        if results and results["ids"] and results["ids"][index]:
+            for i, doc_id in enumerate(results["ids"][index][:limit]):
+                content = results['documents'][index][i]
+                metadata = results['metadatas'][index][i]
+                session_id = metadata.get("session_id") if metadata else None
+                items.append(MemoryItem(id=doc_id, content=content, metadata=metadata, session_id=session_id))
+        return SearchResult(items=items, total_count=len(items))
     
     async def store_memory(self, content: str, metadata: Optional[Dict[str, Any]] = None, 
                           session_id: Optional[str] = None) -> MemoryItem:
@@ -24,46 +66,104 @@ class RAGService:
             metadata["session_id"] = session_id
 
         # Génère un ID unique pour le document
-        doc_id = str(self.collection.count() + 1)
+        doc_id = self._new_id()
+        embeddings = await self._embed([content])
 
-        self.collection.add(
+        await self.executor.run(
+            self.collection.add,
             documents=[content],
-            metadatas=[metadata],
+            embeddings=embeddings,
+            metadatas=[metadata or None],
             ids=[doc_id]
         )
+        if self.memory_repository:
+            await self.memory_repository.add(content, session_id=session_id, metadata=metadata,
+                                             embeddings_vector=embeddings[0])
         
         return MemoryItem(id=doc_id, content=content, metadata=metadata, session_id=session_id)
     
     async def search_memory(self, query: SearchQuery) -> SearchResult:
         """Recherche dans la mémoire (ChromaDB) en utilisant une recherche sémantique."""
-        where_clause = {}
-        if query.session_id:
-            where_clause = {"session_id": query.session_id}
-
-        results = self.collection.query(
-            query_texts=[query.query],
+        results = await self.executor.run(
+            self.collection.query,
+            query_embeddings=await self._embed([query.query]),
             n_results=query.limit or 10,
-            where=where_clause
+            where=self._where(query.session_id)
         )
         
         # Formatte les résultats pour correspondre au schéma SearchResult
-        items = []
-        if results and results["ids"][0]:
-            for i, doc_id in enumerate(results["ids"][0]):
-                content = results['documents'][0][i]
-                metadata = results['metadatas'][0][i]
-                session_id = metadata.get("session_id") if metadata else None
-                items.append(MemoryItem(id=doc_id, content=content, metadata=metadata, session_id=session_id))
+        return self._format_query_results(results, 0, query.limit or 10)
+    
+    async def search_candidates(self, query: str, limit: int,
+                                session_id: Optional[str] = None) -> List[Tuple[MemoryItem, float]]:
+        """Candidats vectoriels avec similarité dans ]0, 1] dérivée de la distance ChromaDB"""
+        results = await self.executor.run(
+            self.collection.query,
+            query_embeddings=await self._embed([query]),
+            n_results=limit,
+            where=self._where(session_id)
+        )
+        items = self._format_query_results(results, 0, limit).items
+        distances = (results.get("distances") or [[]])[0] or [0.0] * len(items)
+        return [(item, 1.0 / (1.0 + max(float(distance), 0.0))) for item, distance in zip(items, distances)]
+    
+    async def store_memory_batch(self, items: List[MemoryBatchItem],
+                                 session_id: Optional[str] = None) -> List[MemoryItem]:
+        """Stocke N documents via collection.add (découpé à la taille max de ChromaDB)"""
+        stored: List[MemoryItem] = []
+        documents, metadatas, ids = [], [], []
+        for item in items:
+            metadata = dict(item.metadata or {})
+            item_session = item.session_id or session_id
+            if item_session:
+                metadata["session_id"] = item_session
+            doc_id = self._new_id()
+            documents.append(item.content)
+            metadatas.append(metadata or None)
+            ids.append(doc_id)
+            stored.append(MemoryItem(id=doc_id, content=item.content, metadata=metadata, session_id=item_session))
 
-        return SearchResult(items=items, total_count=len(items))
+        embeddings = await self._embed(documents)
+        for start in range(0, len(ids), self.max_batch_size):
+            end = start + self.max_batch_size
+            await self.executor.run(self.collection.add, documents=documents[start:end],
+                                    embeddings=embeddings[start:end],
+                                    metadatas=metadatas[start:end], ids=ids[start:end])
+        if self.memory_repository:
+            await self.memory_repository.add_many([
+                {"content": item.content, "session_id": item.session_id, "metadata": item.metadata,
+                 "embeddings_vector": vector}
+                for item, vector in zip(stored, embeddings)
+            ])
+        return stored
+    
+    async def search_memory_batch(self, queries: List[SearchQuery]) -> List[SearchResult]:
+        """
+        Exécute N recherches avec un collection.query par session_id distinct
+        (le filtre where est commun à toutes les requêtes d'un appel).
+        """
+        groups: Dict[Optional[str], List[Tuple[int, SearchQuery]]] = {}
+        for index, query in enumerate(queries):
+            groups.setdefault(query.session_id, []).append((index, query))
+
+        # Un seul lot d'embeddings pour toutes les requêtes (doublons servis par le cache)
+        query_embeddings = await self._embed([query.query for query in queries])
+        results: List[Optional[SearchResult]] = [None] * len(queries)
+        for session_id, group in groups.items():
+            n_results = max(query.limit or 10 for _, query in group)
+            response = await self.executor.run(
+                self.collection.query,
+                query_embeddings=[query_embeddings[index] for index, _ in group],
+                n_results=n_results,
+                where=self._where(session_id)
+            )
+            for position, (index, query) in enumerate(group):
+                results[index] = self._format_query_results(response, position, query.limit or 10)
+        return results
     
     async def get_all_memories(self, session_id: Optional[str] = None) -> List[MemoryItem]:
         """Récupère toutes les mémoires depuis ChromaDB"""
-        where_clause = {}
-        if session_id:
-            where_clause = {"session_id": session_id}
-            
-        all_items = self.collection.get(where=where_clause)
+        all_items = await self.executor.run(self.collection.get, where=self._where(session_id))
         
         items = []
         for i, doc_id in enumerate(all_items["ids"]):
@@ -76,9 +176,9 @@ class RAGService:
     async def clear_memory(self, session_id: Optional[str] = None) -> bool:
         """Efface la mémoire dans ChromaDB"""
         if session_id:
-            self.collection.delete(where={"session_id": session_id})
+            await self.executor.run(self.collection.delete, where={"session_id": session_id})
         else:
             # Efface et recrée la collection pour tout supprimer
-            self.client.delete_collection(name="memory_collection")
-            self.collection = self.client.get_or_create_collection(name="memory_collection")
+            await self.executor.run(self.client.delete_collection, name=COLLECTION_NAME)
+            self.collection = await self.executor.run(self._get_collection)
         return True 
\ No newline at end of file
@@ -0,0 +1,186 @@
+# Hybrid Retrieval Service
+"""
+Pipeline de récupération top-k pour /rag_query.
+- Candidats vectoriels (ChromaDB) et lexicaux (tsvector / pg_trgm sur knowledge_base)
+  récupérés en parallèle
+- Fusion par rang réciproque (RRF)
+- Rerank CPU léger : couverture des termes de la requête et proximité des bigrammes
+Le tout sous un budget de latence : une source en retard est abandonnée et le
+rerank est sauté si le budget est épuisé (réponse marquée "degraded").
+"""
+import asyncio
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .rag_service import RAGService
+
+# Constante de lissage usuelle de la fusion par rang réciproque
+RRF_K = 60
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Termes normalisés (minuscules, mots d'au moins 2 caractères)"""
+    return [term for term in _TERM_PATTERN.findall(text.lower()) if len(term) > 1]
+
+
+@dataclass
+class Candidate:
+    """Document candidat et scores par source"""
+    key: str
+    content: str
+    id: Optional[str] = None
+    source: str = "memory"
+    metadata: Optional[Dict[str, Any]] = None
+    vector_score: float = 0.0
+    keyword_score: float = 0.0
+    fused_score: float = 0.0
+    score: float = 0.0
+    ranks: Dict[str, int] = field(default_factory=dict)
+
+
+def lexical_score(query_terms: List[str], content: str) -> float:
+    """Part des termes (et bigrammes) de la requête présents dans le document"""
+    if not query_terms:
+        return 0.0
+    document_terms = tokenize(content)
+    vocabulary = set(document_terms)
+    unique_terms = set(query_terms)
+    coverage = len(unique_terms & vocabulary) / len(unique_terms)
+    query_bigrams = set(zip(query_terms, query_terms[1:]))
+    if not query_bigrams:
+        return coverage
+    document_bigrams = set(zip(document_terms, document_terms[1:]))
+    proximity = len(query_bigrams & document_bigrams) / len(query_bigrams)
+    return 0.7 * coverage + 0.3 * proximity
+
+
+class HybridRetriever:
+    """Récupération hybride vecteurs + plein texte avec rerank sous budget de latence"""
+
+    def __init__(self, rag_service: RAGService, knowledge_repository=None,
+                 budget_ms: Optional[float] = None, candidate_factor: Optional[int] = None,
+                 rerank_weight: float = 0.5):
+        self.rag_service = rag_service
+        self.knowledge_repository = knowledge_repository
+        self.budget_ms = budget_ms or float(os.getenv("RAG_QUERY_BUDGET_MS", "800"))
+        self.candidate_factor = candidate_factor or int(os.getenv("RAG_QUERY_CANDIDATE_FACTOR", "4"))
+        self.rerank_weight = rerank_weight
+
+        self.metrics = {
+            'queries': 0,
+            'degraded': 0,
+            'source_timeouts': 0,
+            'source_errors': 0,
+            'rerank_skipped': 0,
+            'total_latency_ms': 0.0,
+            'max_latency_ms': 0.0
+        }
+
+    async def query(self, query: str, top_k: int = 3, session_id: Optional[str] = None,
+                    budget_ms: Optional[float] = None) -> Tuple[List[Candidate], bool]:
+        """Retourne les top_k candidats reranqués et un indicateur de dégradation"""
+        started = time.perf_counter()
+        deadline = started + (budget_ms or self.budget_ms) / 1000.0
+        pool_size = max(top_k * self.candidate_factor, top_k)
+
+        sources = {"vector": asyncio.ensure_future(self._vector_candidates(query, pool_size, session_id))}
+        if self.knowledge_repository is not None:
+            sources["keyword"] = asyncio.ensure_future(self._keyword_candidates(query, pool_size))
+
+        ranked, degraded = await self._gather(sources, deadline)
+        candidates = self._fuse(ranked)
+
+        if candidates and time.perf_counter() < deadline:
+            self._rerank(query, candidates)
+        else:
+            if candidates:
+                self.metrics['rerank_skipped'] += 1
+                degraded = True
+            for candidate in candidates:
+                candidate.score = candidate.fused_score
+        candidates.sort(key=lambda candidate: candidate.score, reverse=True)
+
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        self.metrics['queries'] += 1
+        self.metrics['degraded'] += int(degraded)
+        self.metrics['total_latency_ms'] += latency_ms
+        self.metrics['max_latency_ms'] = max(self.metrics['max_latency_ms'], latency_ms)
+        return candidates[:top_k], degraded
+
+    async def _gather(self, sources: Dict[str, "asyncio.Future"],
+                      deadline: float) -> Tuple[Dict[str, List[Candidate]], bool]:
+        """Attend les sources jusqu'à l'échéance ; les retardataires sont annulés"""
+        timeout = max(deadline - time.perf_counter(), 0.0)
+        done, pending = await asyncio.wait(sources.values(), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        self.metrics['source_timeouts'] += len(pending)
+
+        ranked: Dict[str, List[Candidate]] = {}
+        degraded = bool(pending)
+        for name, task in sources.items():
+            if task not in done:
+                continue
+            if task.exception() is not None:
+                # Une source en échec ne doit pas faire échouer la requête
+                self.metrics['source_errors'] += 1
+                degraded = True
+                continue
+            ranked[name] = task.result()
+        if not ranked and sources["vector"] in done and sources["vector"].exception() is not None:
+            raise sources["vector"].exception()
+        return ranked, degraded
+
+    async def _vector_candidates(self, query: str, limit: int, session_id: Optional[str]) -> List[Candidate]:
+        results = await self.rag_service.search_candidates(query, limit, session_id)
+        return [
+            Candidate(key=f"memory:{item.id}", id=str(item.id), content=item.content,
+                      metadata=item.metadata, vector_score=score)
+            for item, score in results
+        ]
+
+    async def _keyword_candidates(self, query: str, limit: int) -> List[Candidate]:
+        results = await self.knowledge_repository.search_text(query, limit)
+        return [
+            Candidate(key=f"knowledge:{document.id}", id=str(document.id), content=document.content,
+                      source="knowledge_base", keyword_score=score,
+                      metadata={"title": document.title, "category": document.category})
+            for document, score in results
+        ]
+
+    @staticmethod
+    def _fuse(ranked: Dict[str, List[Candidate]]) -> List[Candidate]:
+        """Fusion RRF ; un même contenu trouvé par les deux sources est fusionné"""
+        merged: Dict[str, Candidate] = {}
+        by_content: Dict[str, str] = {}
+        for name, candidates in ranked.items():
+            for rank, candidate in enumerate(candidates, start=1):
+                key = by_content.setdefault(candidate.content, candidate.key)
+                current = merged.setdefault(key, candidate)
+                if current is not candidate:
+                    current.vector_score = max(current.vector_score, candidate.vector_score)
+                    current.keyword_score = max(current.keyword_score, candidate.keyword_score)
+                current.ranks[name] = rank
+                current.fused_score += 1.0 / (RRF_K + rank)
+        return list(merged.values())
+
+    def _rerank(self, query: str, candidates: List[Candidate]):
+        """Score final = RRF normalisé et score lexical, pondérés par rerank_weight"""
+        query_terms = tokenize(query)
+        best_fused = max(candidate.fused_score for candidate in candidates) or 1.0
+        for candidate in candidates:
+            lexical = lexical_score(query_terms, candidate.content)
+            candidate.score = ((1.0 - self.rerank_weight) * candidate.fused_score / best_fused
+                               + self.rerank_weight * lexical)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        queries = self.metrics['queries']
+        return {
+            **self.metrics,
+            'budget_ms': self.budget_ms,
+            'avg_latency_ms': self.metrics['total_latency_ms'] / queries if queries else 0.0
+        }
@@ -1,16 +1,30 @@
 # State Management Service  
+from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
-from ..models.schemas import StateItem
+from ..models.schemas import StateItem, CheckpointRecord
+from ..db.repositories import StateItemRepository, GLOBAL_SESSION_ID
+
+CHECKPOINT_NAMESPACE = "checkpoint"
 
 class StateService:
     """Service pour la gestion d'état"""
     
-    def __init__(self):
-        """Initialise le service d'état"""
+    def __init__(self, repository: Optional[StateItemRepository] = None):
+        """
+        Initialise le service d'état.
+        Avec un repository, l'état est persisté (PostgreSQL/asyncpg) ;
+        sinon il reste en mémoire (développement, tests).
+        """
+        self.repository = repository
         self.state_store: Dict[str, StateItem] = {}
+        # Checkpoints LangGraph : thread_id -> {checkpoint_id: StateItem}
+        self.checkpoint_store: Dict[str, Dict[str, StateItem]] = {}
     
     async def set_state(self, key: str, value: Any, session_id: Optional[str] = None) -> StateItem:
         """Définit une valeur d'état"""
+        if self.repository:
+            item = await self.repository.upsert(key, value, session_id)
+            return self._from_db(item, session_id)
         state_key = f"{session_id}:{key}" if session_id else key
         state_item = StateItem(
             id=len(self.state_store) + 1,
@@ -23,11 +37,17 @@ class StateService:
     
     async def get_state(self, key: str, session_id: Optional[str] = None) -> Optional[StateItem]:
         """Récupère une valeur d'état"""
+        if self.repository:
+            item = await self.repository.get(key, session_id)
+            return self._from_db(item, session_id) if item else None
         state_key = f"{session_id}:{key}" if session_id else key
         return self.state_store.get(state_key)
     
     async def get_all_state(self, session_id: Optional[str] = None) -> List[StateItem]:
         """Récupère tout l'état"""
+        if self.repository:
+            items = await self.repository.list(session_id, exclude_namespace=CHECKPOINT_NAMESPACE)
+            return [self._from_db(item) for item in items]
         if session_id:
             return [item for key, item in self.state_store.items() 
                    if item.session_id == session_id]
@@ -35,6 +55,8 @@ class StateService:
     
     async def delete_state(self, key: str, session_id: Optional[str] = None) -> bool:
         """Supprime une valeur d'état"""
+        if self.repository:
+            return await self.repository.delete(key, session_id)
         state_key = f"{session_id}:{key}" if session_id else key
         if state_key in self.state_store:
             del self.state_store[state_key]
@@ -43,6 +65,9 @@ class StateService:
     
     async def clear_state(self, session_id: Optional[str] = None) -> bool:
         """Efface l'état"""
+        if self.repository:
+            await self.repository.clear(session_id, exclude_namespace=CHECKPOINT_NAMESPACE)
+            return True
         if session_id:
             keys_to_remove = [key for key, item in self.state_store.items() 
                             if item.session_id == session_id]
@@ -50,4 +75,113 @@ class StateService:
                 del self.state_store[key]
         else:
             self.state_store.clear()
-        return True 
\ No newline at end of file
+        return True
+    
+    async def put_checkpoints(self, records: List[CheckpointRecord]) -> Dict[str, int]:
+        """Stocke un lot de checkpoints versionnés (namespace 'checkpoint')"""
+        if self.repository:
+            return await self._put_checkpoints_db(records)
+        versions: Dict[str, int] = {}
+        for record in records:
+            thread_items = self.checkpoint_store.setdefault(record.thread_id, {})
+            existing = thread_items.get(record.checkpoint_id)
+            if existing is not None:
+                version = existing.version
+            else:
+                version = max((item.version for item in thread_items.values()), default=0) + 1
+            thread_items[record.checkpoint_id] = StateItem(
+                id=version,
+                key=record.checkpoint_id,
+                value={
+                    "checkpoint": record.checkpoint,
+                    "metadata": record.metadata,
+                    "parent_checkpoint_id": record.parent_checkpoint_id,
+                },
+                session_id=record.thread_id,
+                namespace=CHECKPOINT_NAMESPACE,
+                version=version,
+                timestamp=datetime.now(timezone.utc)
+            )
+            versions[record.checkpoint_id] = version
+        return versions
+    
+    async def get_checkpoint(self, thread_id: str, checkpoint_id: Optional[str] = None) -> Optional[CheckpointRecord]:
+        """Récupère un checkpoint précis ou le plus récent d'un thread"""
+        if self.repository:
+            if checkpoint_id:
+                item = await self.repository.get(checkpoint_id, thread_id)
+                if item is not None and item.namespace != CHECKPOINT_NAMESPACE:
+                    item = None
+            else:
+                item = await self.repository.latest(thread_id, CHECKPOINT_NAMESPACE)
+            return self._to_checkpoint_record(self._from_db(item, thread_id)) if item else None
+        thread_items = self.checkpoint_store.get(thread_id)
+        if not thread_items:
+            return None
+        if checkpoint_id:
+            item = thread_items.get(checkpoint_id)
+        else:
+            item = max(thread_items.values(), key=lambda i: i.version)
+        return self._to_checkpoint_record(item) if item else None
+    
+    async def list_checkpoints(self, thread_id: str, limit: Optional[int] = None,
+                               before: Optional[str] = None) -> List[CheckpointRecord]:
+        """Liste les checkpoints d'un thread du plus récent au plus ancien"""
+        if self.repository:
+            items = await self.repository.list(thread_id, namespace=CHECKPOINT_NAMESPACE,
+                                               limit=limit, before_key=before)
+            return [self._to_checkpoint_record(self._from_db(item, thread_id)) for item in items]
+        thread_items = self.checkpoint_store.get(thread_id, {})
+        items = sorted(thread_items.values(), key=lambda i: i.version, reverse=True)
+        if before:
+            items = [item for item in items if item.key < before]
+        if limit is not None:
+            items = items[:limit]
+        return [self._to_checkpoint_record(item) for item in items]
+    
+    async def _put_checkpoints_db(self, records: List[CheckpointRecord]) -> Dict[str, int]:
+        """Écrit les checkpoints en une transaction par thread"""
+        by_thread: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_thread.setdefault(record.thread_id, []).append({
+                "key": record.checkpoint_id,
+                "value": {
+                    "checkpoint": record.checkpoint,
+                    "metadata": record.metadata,
+                    "parent_checkpoint_id": record.parent_checkpoint_id,
+                },
+            })
+        versions: Dict[str, int] = {}
+        for thread_id, items in by_thread.items():
+            versions.update(await self.repository.put_many(thread_id, items, CHECKPOINT_NAMESPACE, "checkpoint"))
+        return versions
+    
+    @staticmethod
+    def _from_db(item, session_id: Optional[str] = None) -> StateItem:
+        """Convertit une ligne state_items en StateItem"""
+        return StateItem(
+            key=item.key,
+            value=item.value,
+            session_id=session_id or StateService._owner(item),
+            namespace=item.namespace,
+            version=item.version,
+            timestamp=item.updated_at or item.created_at
+        )
+    
+    @staticmethod
+    def _owner(item) -> Optional[str]:
+        owner = getattr(item, "owner_session_id", None)
+        return None if owner == GLOBAL_SESSION_ID else owner
+    
+    @staticmethod
+    def _to_checkpoint_record(item: StateItem) -> CheckpointRecord:
+        """Convertit un StateItem du namespace 'checkpoint' en CheckpointRecord"""
+        return CheckpointRecord(
+            thread_id=item.session_id,
+            checkpoint_id=item.key,
+            parent_checkpoint_id=item.value.get("parent_checkpoint_id"),
+            checkpoint=item.value["checkpoint"],
+            metadata=item.value["metadata"],
+            version=item.version,
+            timestamp=item.timestamp
+        )
\ No newline at end of file
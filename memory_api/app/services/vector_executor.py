@@ -0,0 +1,119 @@
+# Vector Store Executor
+"""
+Exécuteur borné pour les appels ChromaDB synchrones.
+Les opérations vectorielles tournent dans un pool de threads dédié afin de ne
+pas bloquer la boucle asyncio ; au-delà de la file autorisée, les appels sont
+refusés (backpressure -> HTTP 503).
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class VectorStoreSaturated(Exception):
+    """Levée quand l'exécuteur vectoriel et sa file sont pleins"""
+
+    def __init__(self, in_flight: int, capacity: int, retry_after: int = 1):
+        super().__init__(f"Vector store saturated ({in_flight}/{capacity})")
+        self.in_flight = in_flight
+        self.capacity = capacity
+        self.retry_after = retry_after
+
+
+class VectorStoreExecutor:
+    """Pool de threads borné avec métriques de file et de temps d'attente"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("VECTOR_STORE_WORKERS", "4"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("VECTOR_STORE_MAX_QUEUE", "32"))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vector-store")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+
+        self.metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'max_queue_depth': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'total_run_seconds': 0.0
+        }
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def queue_depth(self) -> int:
+        """Appels acceptés qui attendent un thread libre"""
+        return self._in_flight - self._running
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Exécute fn dans le pool ; lève VectorStoreSaturated si la file est pleine"""
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.metrics['rejected'] += 1
+                raise VectorStoreSaturated(self._in_flight, self.capacity)
+            self._in_flight += 1
+            self.metrics['submitted'] += 1
+            self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self.queue_depth)
+
+        enqueued_at = time.perf_counter()
+        try:
+            future = self._executor.submit(self._call, fn, enqueued_at, args, kwargs)
+        except BaseException:
+            self._release()
+            raise
+        # Place libérée quand le thread a terminé (ou que l'appel est annulé avant de démarrer),
+        # pas quand l'appelant abandonne : un appel Chroma annulé occupe encore son thread
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future: Optional[Future] = None):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _call(self, fn: Callable[..., Any], enqueued_at: float, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        started_at = time.perf_counter()
+        wait = started_at - enqueued_at
+        with self._lock:
+            self._running += 1
+            self.metrics['total_wait_seconds'] += wait
+            self.metrics['max_wait_seconds'] = max(self.metrics['max_wait_seconds'], wait)
+        try:
+            result = fn(*args, **kwargs)
+            with self._lock:
+                self.metrics['completed'] += 1
+            return result
+        except Exception:
+            with self._lock:
+                self.metrics['failed'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.metrics['total_run_seconds'] += time.perf_counter() - started_at
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métriques courantes (profondeur de file, attentes moyennes)"""
+        with self._lock:
+            started = self.metrics['completed'] + self.metrics['failed']
+            return {
+                **self.metrics,
+                'in_flight': self._in_flight,
+                'running': self._running,
+                'queue_depth': self._in_flight - self._running,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'avg_wait_seconds': self.metrics['total_wait_seconds'] / started if started else 0.0,
+                'avg_run_seconds': self.metrics['total_run_seconds'] / started if started else 0.0
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
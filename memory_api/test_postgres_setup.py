@@ -99,7 +99,7 @@ def test_crud_operations():
             agent_id="test-agent",
             agent_type="test",
             status="running",
-            metadata={"test": True}
+            metadata_={"test": True}
         )
         db.add(test_session)
         db.commit()
@@ -113,7 +113,7 @@ def test_crud_operations():
             content_type="test",
             category="validation",
             importance_score=5,
-            metadata={"test": True}
+            metadata_={"test": True}
         )
         db.add(test_memory)
         db.commit()
@@ -7,13 +7,15 @@ import asyncio
 import json
 import logging
 import pickle
+import sys
+import time
 import zlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union, Tuple, Type
 from dataclasses import dataclass, asdict
 from enum import Enum
 import hashlib
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
 from langgraph.graph import StateGraph
 from langgraph.checkpoint.base import BaseCheckpointSaver
@@ -173,63 +175,88 @@ class StateCompression:
 
 
 class StateCache:
-    """High-performance state caching with TTL and LRU"""
+    """High-performance state caching with TTL and LRU.
+
+    Entries live in an OrderedDict kept in recency order, so lookup, update and
+    eviction are O(1). Expiry uses the monotonic clock, and the cache is bounded
+    both by entry count and by an estimate of the cached bytes.
+    """
     
-    def __init__(self, max_size: int = 10000, default_ttl: int = 3600):
-        self.cache = {}
-        self.access_times = {}
-        self.creation_times = {}
+    def __init__(self, max_size: int = 10000, default_ttl: int = 3600,
+                 max_bytes: int = 256 * 1024 * 1024):
+        # key -> (value, expires_at, size_bytes), least recently used first
+        self.cache: "OrderedDict[str, Tuple[Dict[str, Any], float, int]]" = OrderedDict()
         self.max_size = max_size
         self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
         self.hit_count = 0
         self.miss_count = 0
+        self.eviction_count = 0
+        self.expiration_count = 0
         
     async def get(self, key: str) -> Optional[Dict[str, Any]]:
         """Get state from cache"""
-        current_time = datetime.utcnow()
+        entry = self.cache.get(key)
+        if entry is None:
+            self.miss_count += 1
+            return None
         
-        if key in self.cache:
-            # Check TTL
-            creation_time = self.creation_times.get(key, current_time)
-            if (current_time - creation_time).total_seconds() > self.default_ttl:
-                await self.remove(key)
-                self.miss_count += 1
-                return None
-            
-            # Update access time for LRU
-            self.access_times[key] = current_time
-            self.hit_count += 1
-            return self.cache[key]
+        value, expires_at, _ = entry
+        if time.monotonic() >= expires_at:
+            self._discard(key)
+            self.expiration_count += 1
+            self.miss_count += 1
+            return None
         
-        self.miss_count += 1
-        return None
+        # Mark as most recently used
+        self.cache.move_to_end(key)
+        self.hit_count += 1
+        return value
     
     async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None):
         """Set state in cache"""
-        current_time = datetime.utcnow()
+        size = self._estimate_size(value)
+        self._discard(key)
+        if size > self.max_bytes:
+            # Larger than the whole budget: never cached
+            return
         
-        # Check if we need to evict
-        if len(self.cache) >= self.max_size:
-            await self._evict_lru()
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        self.cache[key] = (value, expires_at, size)
+        self.current_bytes += size
         
-        self.cache[key] = value
-        self.access_times[key] = current_time
-        self.creation_times[key] = current_time
+        while len(self.cache) > self.max_size or self.current_bytes > self.max_bytes:
+            await self._evict_lru()
     
     async def remove(self, key: str):
         """Remove state from cache"""
-        if key in self.cache:
-            del self.cache[key]
-            self.access_times.pop(key, None)
-            self.creation_times.pop(key, None)
+        self._discard(key)
+    
+    def _discard(self, key: str):
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[2]
     
     async def _evict_lru(self):
         """Evict least recently used item"""
-        if not self.access_times:
+        if not self.cache:
             return
         
-        oldest_key = min(self.access_times.keys(), key=lambda k: self.access_times[k])
-        await self.remove(oldest_key)
+        _, (_, _, size) = self.cache.popitem(last=False)
+        self.current_bytes -= size
+        self.eviction_count += 1
+    
+    @classmethod
+    def _estimate_size(cls, value: Any) -> int:
+        """Approximate payload size in bytes (compressed blobs dominate)"""
+        if isinstance(value, (bytes, bytearray, str)):
+            return len(value)
+        if isinstance(value, dict):
+            return sum(len(str(k)) + cls._estimate_size(v) for k, v in value.items())
+        if isinstance(value, (list, tuple, set)):
+            return sum(cls._estimate_size(v) for v in value)
+        return sys.getsizeof(value)
     
     def get_hit_rate(self) -> float:
         """Get cache hit rate"""
@@ -241,8 +268,12 @@ class StateCache:
         return {
             "size": len(self.cache),
             "max_size": self.max_size,
+            "size_bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
             "hit_count": self.hit_count,
             "miss_count": self.miss_count,
+            "eviction_count": self.eviction_count,
+            "expiration_count": self.expiration_count,
             "hit_rate": self.get_hit_rate()
         }
 
@@ -0,0 +1,215 @@
+"""
+Extraction AST des parties d'un code_context utiles à la tâche
+Le code est analysé une seule fois (arbre partagé avec SecureCodeAnalyzer via
+parse_code) pour indexer ses définitions de premier niveau et leurs dépendances ;
+seules les définitions atteignables depuis les noms cités dans la tâche sont
+conservées. Sans nom reconnu ou sur code non Python, la main revient au
+découpage par défaut (contexte complet dans la limite du budget).
+"""
+import ast
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from orchestrator.app.agents.context_budget import ELISION, IDENTIFIER_PATTERN
+from orchestrator.app.security.secure_analyzer import parse_code
+
+# Méthodes gardées avec une méthode ciblée : elles donnent le contexte de l'instance
+CLASS_CONTEXT_METHODS = ("__init__",)
+
+
+@dataclass
+class Symbol:
+    """Définition de premier niveau (ou méthode) et noms qu'elle référence"""
+    name: str
+    node: ast.AST
+    start: int  # Lignes 1-indexées, décorateurs inclus
+    end: int
+    references: Set[str] = field(default_factory=set)
+    parent: Optional[str] = None  # Classe englobante d'une méthode
+
+
+def _node_span(node: ast.AST) -> Tuple[int, int]:
+    start = min([node.lineno] + [decorator.lineno for decorator in getattr(node, "decorator_list", [])])
+    return start, node.end_lineno or node.lineno
+
+
+def _references(node: ast.AST) -> Set[str]:
+    names = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            names.add(child.id)
+        elif isinstance(child, ast.Attribute):
+            names.add(child.attr)
+    return names
+
+
+def _bound_names(node: ast.AST) -> List[str]:
+    """Noms définis par une instruction de premier niveau"""
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return [(alias.asname or alias.name).split(".")[0] for alias in node.names]
+    if isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        return [child.id for target in targets for child in ast.walk(target) if isinstance(child, ast.Name)]
+    return []
+
+
+class SymbolIndex:
+    """Index des définitions d'un module : nom -> symboles, méthode -> classe"""
+
+    def __init__(self, tree: ast.Module):
+        self.symbols: Dict[str, List[Symbol]] = {}
+        self.methods: Dict[str, List[Symbol]] = {}
+        self.classes: Dict[str, Symbol] = {}
+        for node in tree.body:
+            start, end = _node_span(node)
+            for name in _bound_names(node):
+                symbol = Symbol(name, node, start, end, _references(node) - {name})
+                self.symbols.setdefault(name, []).append(symbol)
+                if isinstance(node, ast.ClassDef):
+                    self.classes[name] = symbol
+            if isinstance(node, ast.ClassDef):
+                for member in node.body:
+                    if isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        member_start, member_end = _node_span(member)
+                        self.methods.setdefault(member.name, []).append(
+                            Symbol(member.name, member, member_start, member_end,
+                                   _references(member) - {member.name}, parent=node.name)
+                        )
+
+    def lookup(self, name: str) -> List[Symbol]:
+        return self.symbols.get(name, []) + self.methods.get(name, [])
+
+
+class AstCodeSlicer:
+    """Slicer de ContextBudgeter : définitions atteignables depuis les noms de la tâche"""
+
+    def __init__(self):
+        self.metrics = {
+            'calls': 0,
+            'sliced': 0,
+            'no_match': 0,  # Aucun nom de la tâche ne désigne une définition
+            'not_python': 0,
+            'chars_in': 0,
+            'chars_out': 0
+        }
+
+    def __call__(self, code: str, task_description: str, budget: int,
+                 count_tokens: Callable[[str], int]) -> Optional[str]:
+        self.metrics['calls'] += 1
+        try:
+            tree = parse_code(code)
+        except (SyntaxError, ValueError):
+            self.metrics['not_python'] += 1
+            return None
+
+        index = SymbolIndex(tree)
+        seeds = self._seeds(index, task_description)
+        if not seeds:
+            self.metrics['no_match'] += 1
+            return None
+
+        lines = code.splitlines()
+        spans = self._select(index, seeds, lines, budget, count_tokens)
+        if not spans:
+            return None
+        sliced = self._render(lines, spans)
+        self.metrics['sliced'] += 1
+        self.metrics['chars_in'] += len(code)
+        self.metrics['chars_out'] += len(sliced)
+        return sliced
+
+    def _seeds(self, index: SymbolIndex, task_description: str) -> List[Symbol]:
+        words = IDENTIFIER_PATTERN.findall(task_description)
+        seeds = [symbol for word in words for symbol in index.lookup(word)]
+        if not seeds:
+            # Correspondance insensible à la casse ("parser" -> class Parser)
+            lowered = {word.lower() for word in words}
+            seeds = [symbol for name in list(index.symbols) + list(index.methods)
+                     if name.lower() in lowered for symbol in index.lookup(name)]
+        # Les imports seuls ne font pas une cible
+        return [symbol for symbol in seeds if not isinstance(symbol.node, (ast.Import, ast.ImportFrom))]
+
+    def _select(self, index: SymbolIndex, seeds: List[Symbol], lines: List[str], budget: int,
+                count_tokens: Callable[[str], int]) -> List[Tuple[int, int]]:
+        """Parcours en largeur des dépendances ; s'arrête au premier symbole qui dépasse le budget"""
+        spans: List[Tuple[int, int]] = []
+        used = 0
+        seen: Set[int] = set()
+        queue = deque(seeds)
+        while queue:
+            symbol = queue.popleft()
+            for span in self._spans(index, symbol):
+                if span in spans:
+                    continue
+                size = count_tokens("\n".join(lines[span[0] - 1:span[1]])) + 1
+                if used + size > budget:
+                    # Symboles plus proches déjà retenus ; les suivants sont plus lointains
+                    return spans
+                spans.append(span)
+                used += size
+            if id(symbol) in seen:
+                continue
+            seen.add(id(symbol))
+            for name in sorted(symbol.references):
+                for dependency in index.symbols.get(name, []):
+                    if id(dependency) not in seen:
+                        queue.append(dependency)
+        return spans
+
+    def _spans(self, index: SymbolIndex, symbol: Symbol) -> List[Tuple[int, int]]:
+        if symbol.parent is None:
+            return [(symbol.start, symbol.end)]
+        # Méthode : en-tête de la classe, contexte d'instance puis la méthode
+        owner = index.classes[symbol.parent]
+        body_start = owner.node.body[0].lineno
+        if isinstance(owner.node.body[0], ast.Expr) and isinstance(getattr(owner.node.body[0], "value", None), ast.Constant):
+            body_start = owner.node.body[0].end_lineno + 1  # docstring incluse
+        spans = [(owner.start, max(owner.node.lineno, body_start - 1))]
+        for name in CLASS_CONTEXT_METHODS:
+            for method in index.methods.get(name, []):
+                if method.parent == symbol.parent and method is not symbol:
+                    spans.append((method.start, method.end))
+        spans.append((symbol.start, symbol.end))
+        return spans
+
+    @staticmethod
+    def _render(lines: List[str], spans: List[Tuple[int, int]]) -> str:
+        parts, previous_end = [], 0
+        for start, end in sorted(set(spans)):
+            if start <= previous_end:
+                start = previous_end + 1
+                if start > end:
+                    continue
+            if start > previous_end + 1:
+                indent = lines[start - 1][:len(lines[start - 1]) - len(lines[start - 1].lstrip())]
+                parts.append(indent + ELISION)
+            parts.append("\n".join(lines[start - 1:end]) + "\n")
+            previous_end = end
+        if previous_end < len(lines):
+            parts.append(ELISION)
+        return "".join(parts)
+
+    def get_metrics(self) -> Dict[str, float]:
+        chars_in = self.metrics['chars_in']
+        return {
+            **self.metrics,
+            'parse_cache': parse_code.cache_info()._asdict(),
+            'reduction_ratio': 1 - self.metrics['chars_out'] / chars_in if chars_in else 0.0
+        }
+
+
+# Instance globale
+_code_slicer: Optional[AstCodeSlicer] = None
+
+
+def get_code_slicer() -> AstCodeSlicer:
+    """Retourne le slicer AST global des workers"""
+    global _code_slicer
+
+    if _code_slicer is None:
+        _code_slicer = AstCodeSlicer()
+
+    return _code_slicer
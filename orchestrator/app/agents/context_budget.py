@@ -0,0 +1,291 @@
+"""
+Budget de tokens des prompts workers
+Avant chaque appel LLM, les entrées du worker (tâche, historique de l'état,
+code_context) sont assemblées pour tenir dans le budget du modèle routé :
+tâche intacte, tours récents conservés, anciens tours résumés puis abandonnés,
+code_context réduit aux blocs pertinents pour la tâche.
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from orchestrator.app.config import settings
+from orchestrator.app.observability.monitoring import get_monitoring
+from orchestrator.app.performance.model_router import ModelProfile, estimate_tokens
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+# Début d'une instruction de premier niveau (ligne non indentée)
+TOP_LEVEL_SPLIT = re.compile(r"\n(?=[^\s#])")
+ELISION = "# ...\n"
+
+# (code, tâche, budget en tokens, compteur) -> code réduit, None si non applicable
+CodeSlicer = Callable[[str, str, int, Callable[[str], int]], Optional[str]]
+
+
+class TokenCounter:
+    """Comptage tiktoken (cl100k_base), approximation ~4 caractères/token si indisponible"""
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._unavailable = not TIKTOKEN_AVAILABLE
+
+    def __call__(self, text: str) -> int:
+        if not text:
+            return 0
+        if not self._unavailable and self._encoding is None:
+            try:
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except Exception:
+                # Table BPE non téléchargeable (environnement hors ligne)
+                self._unavailable = True
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return estimate_tokens(text)
+
+
+def state_history(state: Dict[str, Any]) -> List[str]:
+    """Tours accumulés dans l'AgentState, du plus ancien au plus récent"""
+    history = []
+    for message in state.get("messages") or []:
+        if isinstance(message, dict):
+            history.append(f"{message.get('role', 'message')}: {message.get('content', '')}")
+        else:
+            history.append(str(message))
+    history.extend(str(entry) for entry in state.get("working_memory") or [])
+    history.extend(f"error: {error}" for error in state.get("errors") or [])
+    return history
+
+
+def task_terms(task_description: str) -> set:
+    return {term.lower() for term in IDENTIFIER_PATTERN.findall(task_description)}
+
+
+def slice_code_blocks(code: str, task_description: str, budget: int, count_tokens: Callable[[str], int]) -> str:
+    """
+    Découpe le code en blocs de premier niveau, garde les plus pertinents pour la
+    tâche (identifiants partagés) dans l'ordre d'origine, avec marqueurs d'élision.
+    """
+    blocks = TOP_LEVEL_SPLIT.split(code)
+    terms = task_terms(task_description)
+    sizes = [count_tokens(block) + 1 for block in blocks]
+
+    def relevance(index: int) -> Tuple[int, int]:
+        identifiers = {term.lower() for term in IDENTIFIER_PATTERN.findall(blocks[index])}
+        # À pertinence égale, les premiers blocs (imports, constantes) d'abord
+        return len(terms & identifiers), -index
+
+    kept, used = set(), 0
+    for index in sorted(range(len(blocks)), key=relevance, reverse=True):
+        if used + sizes[index] <= budget:
+            kept.add(index)
+            used += sizes[index]
+
+    if not kept:
+        # Aucun bloc ne tient : début du bloc le plus pertinent, tronqué au budget
+        best = max(range(len(blocks)), key=relevance)
+        return truncate_to_budget(blocks[best], budget, count_tokens) + "\n" + ELISION
+
+    parts, previous = [], -1
+    for index in sorted(kept):
+        if index != previous + 1:
+            parts.append(ELISION)
+        parts.append(blocks[index] + "\n")
+        previous = index
+    if previous != len(blocks) - 1:
+        parts.append(ELISION)
+    return "".join(parts)
+
+
+def truncate_to_budget(text: str, budget: int, count_tokens: Callable[[str], int]) -> str:
+    if count_tokens(text) <= budget:
+        return text
+    # Recherche dichotomique sur le nombre de caractères conservés
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+@dataclass
+class BudgetReport:
+    budget: int
+    original_tokens: int
+    prompt_tokens: int
+    history_dropped: int
+    code_sliced: bool
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.original_tokens - self.prompt_tokens)
+
+
+class ContextBudgeter:
+    """Assemble les entrées d'un worker dans le budget de tokens d'un modèle"""
+
+    def __init__(self, max_tokens: Optional[int] = None, output_reserve: Optional[int] = None,
+                 recent_turns: Optional[int] = None, history_share: Optional[float] = None,
+                 count_tokens: Optional[Callable[[str], int]] = None,
+                 code_slicers: Optional[List[CodeSlicer]] = None, slice_min_chars: Optional[int] = None,
+                 slice_agents: Optional[List[str]] = None):
+        self.max_tokens = max_tokens or settings.CONTEXT_BUDGET_MAX_TOKENS
+        self.output_reserve = output_reserve if output_reserve is not None else settings.CONTEXT_BUDGET_OUTPUT_RESERVE
+        self.recent_turns = recent_turns if recent_turns is not None else settings.CONTEXT_BUDGET_RECENT_TURNS
+        self.history_share = history_share if history_share is not None else settings.CONTEXT_BUDGET_HISTORY_SHARE
+        self.count_tokens = count_tokens or TokenCounter()
+        # Essayés dans l'ordre avant le découpage par blocs
+        self.code_slicers: List[CodeSlicer] = list(code_slicers or [])
+        # Au-delà, le code_context est réduit aux parties pertinentes même s'il tient dans le budget
+        self.slice_min_chars = slice_min_chars if slice_min_chars is not None else settings.CODE_SLICE_MIN_CHARS
+        # ... mais seulement pour ces agents ; les autres ne sont réduits qu'au-delà du budget
+        self.slice_agents = set(slice_agents if slice_agents is not None else settings.CODE_SLICE_AGENTS)
+
+        self.metrics = {
+            'calls': 0,
+            'original_tokens': 0,
+            'prompt_tokens': 0,
+            'tokens_saved': 0,
+            'history_dropped': 0,
+            'code_sliced': 0
+        }
+
+    def budget_for(self, profile: ModelProfile, overhead_tokens: int = 0) -> int:
+        """Tokens disponibles pour les entrées : fenêtre du modèle moins la réponse, plafonnés"""
+        window = profile.context_window - self.output_reserve - overhead_tokens
+        return max(256, min(self.max_tokens, window))
+
+    def assemble(self, task_description: str, code_context: Optional[str], history: List[str],
+                 budget: int, agent: str = "worker") -> Tuple[Dict[str, str], BudgetReport]:
+        """Retourne (entrées du prompt, rapport) ; la tâche n'est jamais tronquée"""
+        code_context = code_context or ""
+        count = self.count_tokens
+        task_tokens = count(task_description)
+        code_tokens = count(code_context)
+        history_tokens = [count(entry) + 1 for entry in history]
+        original = task_tokens + code_tokens + sum(history_tokens)
+
+        available = max(0, budget - task_tokens)
+        # L'historique est plafonné à sa part ; la part non utilisée revient au code
+        history_text, history_used, dropped = self._fit_history(
+            history, history_tokens, min(int(available * self.history_share), available)
+        )
+        code_budget = available - history_used
+        relevant = None
+        if (self.code_slicers and len(code_context) >= self.slice_min_chars
+                and (agent in self.slice_agents or code_tokens > code_budget)):
+            relevant = self._relevant_code(code_context, task_description, code_budget)
+        sliced = relevant is not None or code_tokens > code_budget
+        if relevant is not None:
+            code_context = relevant
+        elif sliced:
+            code_context = self._slice_code(code_context, task_description, code_budget)
+
+        payload = {
+            "task_description": task_description,
+            "code_context": code_context,
+            "history": history_text
+        }
+        report = BudgetReport(budget, original, task_tokens + history_used + (count(code_context) if sliced else code_tokens),
+                              dropped, sliced)
+        self._record(report, agent)
+        return payload, report
+
+    def _fit_history(self, history: List[str], sizes: List[int], budget: int) -> Tuple[str, int, int]:
+        """Tours récents intacts, tours plus anciens résumés en une ligne s'il reste de la place"""
+        kept: List[str] = []
+        used = 0
+        index = len(history)
+        while index > 0 and len(kept) < self.recent_turns and used + sizes[index - 1] <= budget:
+            index -= 1
+            kept.insert(0, history[index])
+            used += sizes[index]
+        older = history[:index]
+        dropped = 0
+        if older:
+            summary = self._summarize(older, budget - used)
+            if summary:
+                kept.insert(0, summary)
+                used += self.count_tokens(summary) + 1
+            else:
+                dropped = len(older)
+        return "\n".join(kept), used, dropped
+
+    def _summarize(self, entries: List[str], budget: int) -> Optional[str]:
+        """Résumé extractif : début de chaque ancien tour, les plus récents d'abord"""
+        header = f"[{len(entries)} earlier entries summarized]"
+        parts: List[str] = []
+        used = self.count_tokens(header) + 1
+        if used > budget:
+            return None
+        for entry in reversed(entries):
+            first_line = entry.strip().splitlines()[0] if entry.strip() else ""
+            excerpt = " ".join(first_line.split()[:12])
+            size = self.count_tokens(excerpt) + 1
+            if not excerpt or used + size > budget:
+                break
+            parts.insert(0, excerpt)
+            used += size
+        return " | ".join([header, *parts])
+
+    def _relevant_code(self, code: str, task_description: str, budget: int) -> Optional[str]:
+        if budget <= 0:
+            return None
+        for slicer in self.code_slicers:
+            sliced = slicer(code, task_description, budget, self.count_tokens)
+            if sliced is not None and self.count_tokens(sliced) <= budget:
+                return sliced
+        return None
+
+    def _slice_code(self, code: str, task_description: str, budget: int) -> str:
+        if budget <= 0:
+            return ""
+        relevant = self._relevant_code(code, task_description, budget)
+        if relevant is not None:
+            return relevant
+        return slice_code_blocks(code, task_description, budget, self.count_tokens)
+
+    def _record(self, report: BudgetReport, agent: str):
+        self.metrics['calls'] += 1
+        self.metrics['original_tokens'] += report.original_tokens
+        self.metrics['prompt_tokens'] += report.prompt_tokens
+        self.metrics['tokens_saved'] += report.saved_tokens
+        self.metrics['history_dropped'] += report.history_dropped
+        self.metrics['code_sliced'] += int(report.code_sliced)
+        get_monitoring().observe_histogram("orchestrator_context_tokens_saved", report.saved_tokens, {"agent": agent})
+
+    def get_metrics(self) -> Dict[str, Any]:
+        calls = self.metrics['calls']
+        return {
+            **self.metrics,
+            'avg_tokens_saved': self.metrics['tokens_saved'] / calls if calls else 0.0,
+            'reduction_ratio': (self.metrics['tokens_saved'] / self.metrics['original_tokens']
+                                if self.metrics['original_tokens'] else 0.0)
+        }
+
+
+# Instance globale
+_context_budgeter: Optional[ContextBudgeter] = None
+
+
+def get_context_budgeter() -> ContextBudgeter:
+    """Retourne le budgeteur de contexte global des workers"""
+    global _context_budgeter
+
+    if _context_budgeter is None:
+        slicers = []
+        if settings.CODE_SLICE_ENABLED:
+            from orchestrator.app.agents.code_slicer import get_code_slicer
+            slicers.append(get_code_slicer())
+        _context_budgeter = ContextBudgeter(code_slicers=slicers)
+
+    return _context_budgeter
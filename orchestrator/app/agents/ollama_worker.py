@@ -6,10 +6,13 @@ Utilise vos modèles existants avec sélection intelligente.
 
 import httpx
 import asyncio
+import json
 import time
 from typing import Dict, Any, List, Optional
 import logging
 
+from orchestrator.app.agents.streaming import get_token_stream
+
 class OllamaLocalWorker:
     """Worker pour modèles Ollama locaux sur RTX 3090."""
     
@@ -187,7 +190,7 @@ class OllamaLocalWorker:
         payload = {
             "model": model_name,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,  # Tokens relayés au fil de l'eau (SSE /invoke)
             "options": {
                 "temperature": temperature,
                 "top_p": 0.9,
@@ -206,26 +209,37 @@ class OllamaLocalWorker:
             elif "precise" in requirements:
                 payload["options"]["temperature"] = 0.3
         
+        token_stream = get_token_stream()
+        parts: List[str] = []
+        result: Dict[str, Any] = {}
+        
         async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                f"{self.ollama_url}/api/generate",
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result.get("response", "")
+            async with client.stream("POST", f"{self.ollama_url}/api/generate", json=payload) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
                 
-                # Log des métriques de performance
-                if "eval_count" in result and "eval_duration" in result:
-                    eval_count = result["eval_count"]
-                    eval_duration = result["eval_duration"] / 1e9  # ns to seconds
-                    tokens_per_sec = eval_count / eval_duration if eval_duration > 0 else 0
-                    self.logger.info(f"Performance {model_name}: {tokens_per_sec:.1f} tokens/sec")
-                
-                return response_text
-            else:
-                raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+                # Une ligne JSON par fragment, la dernière ("done") porte les métriques
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    result = json.loads(line)
+                    token = result.get("response", "")
+                    if token:
+                        parts.append(token)
+                        if token_stream is not None:
+                            token_stream.publish(self.agent_type, self.agent_type, token, model=model_name)
+                    if result.get("done"):
+                        break
+        
+        # Log des métriques de performance
+        if "eval_count" in result and "eval_duration" in result:
+            eval_count = result["eval_count"]
+            eval_duration = result["eval_duration"] / 1e9  # ns to seconds
+            tokens_per_sec = eval_count / eval_duration if eval_duration > 0 else 0
+            self.logger.info(f"Performance {model_name}: {tokens_per_sec:.1f} tokens/sec")
+        
+        return "".join(parts)
     
     async def get_available_models(self) -> List[str]:
         """Retourne la liste des modèles disponibles."""
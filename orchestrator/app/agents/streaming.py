@@ -0,0 +1,99 @@
+"""
+Streaming des tokens LLM vers le flux SSE de /invoke
+Les workers publient leurs tokens dans le TokenStream lié au contexte de la requête.
+"""
+import asyncio
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+_DONE = object()
+
+_current_stream: ContextVar[Optional["TokenStream"]] = ContextVar("token_stream", default=None)
+
+
+def get_token_stream() -> Optional["TokenStream"]:
+    """Retourne le TokenStream de la requête courante (None hors streaming)"""
+    return _current_stream.get()
+
+
+class TokenStreamCallbackHandler(AsyncCallbackHandler):
+    """Relaie on_llm_new_token d'un AgentExecutor LangChain vers le TokenStream"""
+
+    def __init__(self, stream: "TokenStream", node: str, agent: str, model: Optional[str] = None):
+        self.stream = stream
+        self.node = node
+        self.agent = agent
+        self.model = model
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.stream.publish(self.node, self.agent, token, model=self.model)
+
+
+class TokenStream:
+    """
+    File unique fusionnant les sorties de nœuds LangGraph et les tokens LLM.
+    Le graphe tourne dans une tâche dédiée où le stream est lié au ContextVar,
+    hérité par les tâches des nœuds.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.metrics = {
+            'tokens': 0,
+            'chunks': 0,
+            'first_token_latency': None
+        }
+        self._started_at: Optional[float] = None
+
+    def publish(self, node: str, agent: str, token: str, model: Optional[str] = None):
+        """Publie un token (non bloquant, appelable depuis n'importe quel nœud)"""
+        if not token:
+            return
+        if self.metrics['first_token_latency'] is None and self._started_at is not None:
+            self.metrics['first_token_latency'] = asyncio.get_running_loop().time() - self._started_at
+        self.metrics['tokens'] += 1
+        event: Dict[str, Any] = {"type": "token", "node": node, "agent": agent, "token": token}
+        if model:
+            event["model"] = model
+        self._queue.put_nowait(("token", event))
+
+    def callback_handler(self, node: str, agent: Optional[str] = None,
+                         model: Optional[str] = None) -> TokenStreamCallbackHandler:
+        return TokenStreamCallbackHandler(self, node, agent or node, model)
+
+    async def _drive(self, chunks: AsyncIterator[Any]):
+        _current_stream.set(self)
+        try:
+            async for chunk in chunks:
+                self.metrics['chunks'] += 1
+                self._queue.put_nowait(("chunk", chunk))
+        except Exception as e:
+            self._queue.put_nowait(("error", e))
+        finally:
+            self._queue.put_nowait(_DONE)
+
+    async def events(self, chunks: AsyncIterator[Any]) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Exécute le flux de chunks du graphe et produit ("token", event) et
+        ("chunk", chunk) dans l'ordre d'arrivée. Les erreurs du graphe sont relevées.
+        """
+        self._started_at = asyncio.get_running_loop().time()
+        producer = asyncio.create_task(self._drive(chunks))
+        try:
+            while True:
+                item = await self._queue.get()
+                if item is _DONE:
+                    break
+                kind, payload = item
+                if kind == "error":
+                    raise payload
+                yield item
+        finally:
+            if not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except asyncio.CancelledError:
+                    pass
@@ -1,6 +1,11 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
+from orchestrator.app.config import settings
 from orchestrator.app.graph.state import AgentState
 
+# Nœuds exécutables en parallèle quand le code à traiter est déjà fourni
+INDEPENDENT_NODES: List[str] = ["code_generation", "documentation"]
+PARALLEL_PLAN = "Review provided code with code_generation agent and document it with documentation agent in parallel"
+
 class Supervisor:
     """Agent superviseur qui coordonne les tâches entre les agents spécialisés."""
     
@@ -13,8 +18,13 @@ class Supervisor:
             plan = "Create comprehensive tests using testing agent"
             state["next"] = "testing"
         elif "code" in task_description.lower() or "python" in task_description.lower() or "generate" in task_description.lower():
-            plan = "Generate code solution using code_generation agent, then document with documentation agent"
-            state["next"] = "code_generation"
+            if self._can_fan_out(state):
+                # La documentation ne dépend pas du code généré : fan-out
+                plan = PARALLEL_PLAN
+                state["next"] = list(INDEPENDENT_NODES)
+            else:
+                plan = "Generate code solution using code_generation agent, then document with documentation agent"
+                state["next"] = "code_generation"
         elif "documentation" in task_description.lower() or "doc" in task_description.lower():
             plan = "Create documentation using documentation agent"
             state["next"] = "documentation"
@@ -37,6 +47,12 @@ class Supervisor:
         # Vérifier si on a des résultats à analyser
         results = state.get("results", {})
         
+        # Mode parallèle : relancer uniquement les nœuds indépendants sans résultat
+        if state.get("plan") == PARALLEL_PLAN:
+            pending = [node for node in INDEPENDENT_NODES if node not in results]
+            state["next"] = pending or "finish"
+            return state
+        
         # Si on a des résultats de génération de code mais pas de documentation
         if "code_generation" in results and "documentation" not in results:
             state["next"] = "documentation"
@@ -51,6 +67,20 @@ class Supervisor:
             state["next"] = "code_generation"
         
         return state
+    
+    def node(self, state: AgentState) -> Dict[str, Any]:
+        """Nœud LangGraph : ne renvoie que les champs pilotés par le superviseur.
+        
+        Les canaux à reducer (results, errors, logs) ne doivent pas être réécrits
+        en entier, sinon leur contenu serait dupliqué.
+        """
+        routed = self.route(dict(state))
+        return {"plan": routed["plan"], "next": routed["next"], "task_status": routed["task_status"]}
+    
+    @staticmethod
+    def _can_fan_out(state: AgentState) -> bool:
+        """Le fan-out n'est possible que si le code à revoir/documenter est fourni."""
+        return settings.PARALLEL_WORKERS_ENABLED and bool((state.get("code_context") or "").strip())
 
 # Instance globale du superviseur
 supervisor = Supervisor() 
\ No newline at end of file
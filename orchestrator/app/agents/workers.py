@@ -1,14 +1,37 @@
+import time
 from functools import lru_cache
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.prompts import PromptTemplate
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
 
+from orchestrator.app.agents.context_budget import get_context_budgeter, state_history
+from orchestrator.app.agents.streaming import get_token_stream
 from orchestrator.app.agents.tools import real_code_tools, real_doc_tools, real_test_tools
 from orchestrator.app.config import settings
 from orchestrator.app.graph.state import AgentState
+from orchestrator.app.performance.hedging import (
+    HedgeAttempt,
+    HedgeTokenHandler,
+    get_hedged_caller,
+    get_llm_circuit_breaker,
+)
+from orchestrator.app.performance.llm_cache import get_llm_cache
+from orchestrator.app.performance.model_router import (
+    AGENT_CANDIDATES,
+    MODEL_CATALOG,
+    ModelProfile,
+    estimate_tokens,
+    get_model_router,
+)
+
+try:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    GEMINI_AVAILABLE = True
+except ImportError:
+    GEMINI_AVAILABLE = False
 
 WORKER_PROMPT = PromptTemplate.from_template("""
 You are a specialized {role} agent in a multi-agent system.
@@ -16,6 +39,7 @@ You are a specialized {role} agent in a multi-agent system.
 Your role: {role}
 Task: {task_description}
 Code Context: {code_context}
+Recent History: {history}
 
 Use the available tools to complete your specific task.
 Be precise and thorough in your analysis.
@@ -25,33 +49,150 @@ Thought: I need to analyze the task and use appropriate tools.
 Action: 
 """)
 
+# Modèle historique de chaque agent (hors routeur)
+AGENT_MODELS = {
+    "code_generation": "gpt-4o",
+    "documentation": "claude-3-5-sonnet-20240620",
+    "testing": "gpt-4o",
+}
+
+# Température et outils de chaque agent
+AGENT_SETTINGS = {
+    "code_generation": (0.1, real_code_tools),
+    "documentation": (0.2, real_doc_tools),
+    "testing": (0.2, real_test_tools),  # CORRECTION IA-1: Ajout agent testing
+}
+
+def create_chat_model(profile: ModelProfile, temperature: float):
+    """Instancie le client LangChain du fournisseur d'un modèle routable."""
+    streaming = settings.STREAM_TOKENS_ENABLED
+    if profile.provider == "openai":
+        return ChatOpenAI(model=profile.model, temperature=temperature, api_key=settings.OPENAI_API_KEY, streaming=streaming)
+    if profile.provider == "anthropic":
+        return ChatAnthropic(model=profile.model, temperature=temperature, api_key=settings.ANTHROPIC_API_KEY, streaming=streaming)
+    if profile.provider == "ollama":
+        # API compatible OpenAI exposée par Ollama
+        return ChatOpenAI(model=profile.model, temperature=temperature, api_key="ollama", base_url=f"{settings.OLLAMA_BASE_URL}/v1", streaming=streaming)
+    if profile.provider == "gemini":
+        if not GEMINI_AVAILABLE:
+            raise ValueError("langchain-google-genai is required for Gemini models")
+        return ChatGoogleGenerativeAI(model=profile.model, temperature=temperature, google_api_key=settings.GOOGLE_API_KEY, streaming=streaming)
+    raise ValueError(f"Unknown provider: {profile.provider}")
+
 # CORRECTIF CRITIQUE: Implémentation fonctionnelle de la factory.
-@lru_cache(maxsize=3)  # CORRECTION IA-1: Augmenté pour 3 agents
-def get_agent_executor(agent_type: str) -> AgentExecutor:
-    """Crée et configure un AgentExecutor à la demande, puis le met en cache."""
-    if agent_type == "code_generation":
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.1, api_key=settings.OPENAI_API_KEY)
-        tools = real_code_tools
-    elif agent_type == "documentation":
-        llm = ChatAnthropic(model="claude-3-5-sonnet-20240620", temperature=0.2, api_key=settings.ANTHROPIC_API_KEY)
-        tools = real_doc_tools
-    elif agent_type == "testing":  # CORRECTION IA-1: Ajout agent testing
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.2, api_key=settings.OPENAI_API_KEY)  # GPT-4 pour tests
-        tools = real_test_tools
-    else:
+@lru_cache(maxsize=16)  # Un exécuteur par couple agent / modèle routé
+def get_agent_executor(agent_type: str, model_key: Optional[str] = None) -> AgentExecutor:
+    """Crée et configure un AgentExecutor à la demande, puis le met en cache.
+    
+    model_key ("fournisseur:modèle") est choisi par le routeur ; par défaut le modèle historique de l'agent.
+    """
+    if agent_type not in AGENT_SETTINGS:
         raise ValueError(f"Unknown agent type: {agent_type}")
+    temperature, tools = AGENT_SETTINGS[agent_type]
+    llm = create_chat_model(MODEL_CATALOG[model_key or AGENT_CANDIDATES[agent_type][0]], temperature)
     
     prompt = WORKER_PROMPT.partial(role=agent_type)
     return AgentExecutor(agent=create_react_agent(llm, tools, prompt), tools=tools, verbose=True, handle_parsing_errors=True)
 
+def budget_inputs(agent_key: str, profile: ModelProfile, input_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Entrées du prompt ajustées au budget de tokens du modèle (historique et code_context réduits)."""
+    history = input_payload.get("history") or []
+    if not settings.CONTEXT_BUDGET_ENABLED:
+        return {**input_payload, "history": "\n".join(history)}
+    budgeter = get_context_budgeter()
+    budget = budgeter.budget_for(profile, overhead_tokens=budgeter.count_tokens(WORKER_PROMPT.template))
+    payload, _ = budgeter.assemble(input_payload["task_description"], input_payload.get("code_context"),
+                                   history, budget, agent=agent_key)
+    return payload
+
+async def run_agent_on_model(agent_key: str, profile: ModelProfile, input_payload: Dict[str, Any],
+                             token_stream=None, hedge_attempt: Optional[HedgeAttempt] = None) -> str:
+    """Un appel de l'agent sur un modèle, protégé par le circuit du fournisseur et mesuré par le routeur."""
+    router = get_model_router()
+    input_payload = budget_inputs(agent_key, profile, input_payload)
+    relay = token_stream.callback_handler(agent_key, model=profile.model) if token_stream else None
+    callbacks = [HedgeTokenHandler(hedge_attempt, relay)] if hedge_attempt is not None else [relay] if relay else []
+    run_config = {"callbacks": callbacks} if callbacks else None
+    breaker = await get_llm_circuit_breaker(profile.provider)
+    started = time.monotonic()
+    try:
+        with router.track(profile):
+            response = await breaker.call(get_agent_executor(agent_key, profile.key).ainvoke, input_payload, config=run_config)
+    except Exception:
+        router.record(profile, time.monotonic() - started, success=False, agent_type=agent_key)
+        raise
+    router.record(profile, time.monotonic() - started, estimate_tokens(response["output"]), agent_type=agent_key)
+    return response["output"]
+
+async def invoke_routed(agent_key: str, input_payload: Dict[str, Any], token_stream=None,
+                        slo_seconds: Optional[float] = None,
+                        candidates: Optional[List[ModelProfile]] = None) -> Tuple[str, ModelProfile]:
+    """Exécute l'agent sur le modèle choisi par le routeur, avec repli sur les suivants en cas d'échec.
+    
+    Avec HEDGING_ENABLED, chaque appel peut être doublé d'un secours vers le modèle suivant.
+    candidates impose l'ordre d'essai (par défaut, le classement du routeur).
+    Retourne (réponse, modèle qui l'a produite).
+    """
+    router = get_model_router()
+    hedger = get_hedged_caller() if settings.HEDGING_ENABLED else None
+    if candidates is None:
+        candidates = router.rank(agent_key, slo_seconds)[:settings.MODEL_ROUTER_MAX_ATTEMPTS]
+    # Modèles déjà appelés, secours du hedge compris : un repli ne les rappelle pas
+    tried: Set[str] = set()
+
+    async def attempt_call(model: ModelProfile, hedge_attempt: Optional[HedgeAttempt] = None) -> str:
+        tried.add(model.key)
+        return await run_agent_on_model(agent_key, model, input_payload, token_stream, hedge_attempt)
+
+    last_error: Optional[Exception] = None
+    for attempt, profile in enumerate(candidates):
+        if profile.key in tried:
+            continue
+        if tried:
+            router.record_fallback()
+        try:
+            if hedger is not None:
+                return await hedger.call([model for model in candidates[attempt:] if model.key not in tried], attempt_call)
+            return await attempt_call(profile), profile
+        except Exception as e:
+            last_error = e
+    raise last_error
+
 async def worker_node_wrapper(state: AgentState, agent_key: str) -> Dict[str, Any]:
-    """Wrapper asynchrone qui exécute la tâche pour un agent donné."""
-    agent_executor = get_agent_executor(agent_key)
-    input_payload = {"task_description": state["task_description"], "code_context": state.get("results", {}).get("code_generation", state.get("code_context", ""))}
+    """Wrapper asynchrone qui exécute la tâche pour un agent donné.
+    
+    Retourne une mise à jour partielle (results/errors fusionnés par reducer)
+    afin que plusieurs workers puissent s'exécuter dans le même super-step.
+    """
+    input_payload = {"task_description": state["task_description"], "code_context": state.get("results", {}).get("code_generation", state.get("code_context", "")),
+                     "history": state_history(state)}
+    cache_args = (input_payload["task_description"], input_payload["code_context"] or "")
+    # L'historique (messages, mémoire de travail, erreurs) entre dans le prompt, donc dans la clé
+    cached_history = "\n".join(input_payload["history"])
+    llm_cache = get_llm_cache() if settings.LLM_CACHE_ENABLED else None
     try:
-        response = await agent_executor.ainvoke(input_payload)
-        state["results"][agent_key] = response["output"]
+        if settings.MODEL_ROUTER_ENABLED:
+            candidates = get_model_router().rank(agent_key, state.get("latency_slo"))[:settings.MODEL_ROUTER_MAX_ATTEMPTS]
+        else:
+            # Sans routeur : modèle historique de l'agent ; avec le hedging, le suivant de AGENT_CANDIDATES en secours
+            candidates = [MODEL_CATALOG[key] for key in AGENT_CANDIDATES[agent_key][:2 if settings.HEDGING_ENABLED else 1]]
+        # Le cache est indexé par le modèle (fournisseur:modèle) qui a produit la réponse :
+        # une réponse d'un modèle de repli n'est jamais servie comme celle du modèle principal
+        if llm_cache is not None:
+            cached = await llm_cache.get(agent_key, candidates[0].key, *cache_args, history=cached_history)
+            if cached is not None:
+                return {"results": {agent_key: cached.response}}
+        token_stream = get_token_stream()
+        if settings.MODEL_ROUTER_ENABLED or settings.HEDGING_ENABLED:
+            output, producer = await invoke_routed(agent_key, input_payload, token_stream, candidates=candidates)
+        else:
+            producer = candidates[0]
+            run_config = {"callbacks": [token_stream.callback_handler(agent_key, model=AGENT_MODELS.get(agent_key, agent_key))]} if token_stream else None
+            payload = budget_inputs(agent_key, producer, input_payload)
+            response = await get_agent_executor(agent_key).ainvoke(payload, config=run_config)
+            output = response["output"]
+        if llm_cache is not None:
+            await llm_cache.set(agent_key, producer.key, *cache_args, output, history=cached_history)
+        return {"results": {agent_key: output}}
     except Exception as e:
-        state["errors"].append(f"Error in {agent_key}: {e}")
-    state["next"] = "supervisor"
-    return state 
\ No newline at end of file
+        return {"errors": [f"Error in {agent_key}: {e}"]} 
\ No newline at end of file
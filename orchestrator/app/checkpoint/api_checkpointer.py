@@ -1,31 +1,345 @@
+"""
+Checkpointer LangGraph persistant adossé à la Memory API.
+
+Les checkpoints sont stockés comme StateItem versionnés (namespace 'checkpoint')
+via les endpoints /state/checkpoints de memory_api :
+- Écritures regroupées par thread_id (un seul POST pour une rafale d'étapes)
+- Lectures servies par un cache LRU borné avant tout aller-retour réseau
+"""
+import asyncio
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Iterator, AsyncIterator
+
 import httpx
-from typing import Dict, Any, Optional
-from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    copy_checkpoint,
+)
 from langgraph.checkpoint import Checkpoint
 
+from orchestrator.app.config import settings
+from orchestrator.app.security.logging import security_logger
+
+
 class ApiCheckpointer(BaseCheckpointSaver):
-    """Checkpointer qui utilise l'API de mémoire pour la persistance."""
-    
-    def __init__(self, client: httpx.AsyncClient):
-        super().__init__()
+    """
+    Checkpointer qui utilise l'API de mémoire pour la persistance.
+
+    - aput met à jour le cache local puis met l'écriture en file ; la file d'un
+      thread est vidée en un seul appel HTTP après flush_interval ou dès
+      max_batch_size checkpoints en attente
+    - aget_tuple lit d'abord le cache LRU (cache_size entrées), puis la Memory API
+
+    Un seul writer par thread_id est supposé : le cache sert le dernier
+    checkpoint connu localement sans revalidation.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        base_url: Optional[str] = None,
+        flush_interval: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+        cache_size: Optional[int] = None,
+        *,
+        serde: Optional[SerializerProtocol] = None
+    ):
+        super().__init__(serde=serde)
         self.client = client
-        
-    def put(self, config: Dict[str, Any], checkpoint: Checkpoint) -> None:
-        """Sauvegarde un checkpoint (version synchrone - à éviter)."""
-        # Implémentation basique - à améliorer avec une version async
-        pass
-        
-    def get(self, config: Dict[str, Any]) -> Optional[Checkpoint]:
-        """Récupère un checkpoint (version synchrone - à éviter)."""
-        # Implémentation basique - à améliorer avec une version async
-        return None
-        
-    async def aput(self, config: Dict[str, Any], checkpoint: Checkpoint) -> None:
-        """Version asynchrone de put."""
-        # Implémentation basique pour éviter les erreurs
-        pass
-        
-    async def aget(self, config: Dict[str, Any]) -> Optional[Checkpoint]:
-        """Version asynchrone de get."""
-        # Implémentation basique pour éviter les erreurs
-        return None 
\ No newline at end of file
+        self.base_url = (base_url or settings.MEMORY_API_URL).rstrip("/")
+        self.flush_interval = settings.CHECKPOINT_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_batch_size = max_batch_size or settings.CHECKPOINT_MAX_BATCH_SIZE
+        self.cache_size = cache_size or settings.CHECKPOINT_CACHE_SIZE
+        # Au-delà, les checkpoints les plus anciens en échec sont abandonnés
+        self.max_pending = self.max_batch_size * 4
+
+        # Cache LRU (thread_id, checkpoint_id) -> CheckpointTuple
+        self._cache: "OrderedDict[Tuple[str, str], CheckpointTuple]" = OrderedDict()
+        self._latest: Dict[str, str] = {}
+
+        # Écritures en attente par thread_id
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        self._flush_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+        # Métriques
+        self.metrics = {
+            'puts': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'flushes': 0,
+            'flushed_checkpoints': 0,
+            'flush_errors': 0,
+            'dropped_checkpoints': 0
+        }
+
+    # --- API synchrone (cache local uniquement) ---
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata) -> RunnableConfig:
+        """Sauvegarde un checkpoint (version synchrone - à éviter, flush au prochain cycle async)."""
+        saved_config = self._enqueue(config, checkpoint, metadata)
+        try:
+            self._schedule_flush(config["configurable"]["thread_id"])
+        except RuntimeError:
+            pass  # Pas de boucle active : vidé au prochain aput/aflush
+        return saved_config
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Récupère un checkpoint (version synchrone - cache local uniquement)."""
+        return self._cache_lookup(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Liste les checkpoints présents dans le cache local (version synchrone)."""
+        thread_id = config["configurable"]["thread_id"] if config else None
+        tuples = [
+            t for (tid, _), t in self._cache.items()
+            if thread_id is None or tid == thread_id
+        ]
+        tuples.sort(key=lambda t: t.config["configurable"]["thread_ts"], reverse=True)
+        yield from self._filter_tuples(tuples, filter, before, limit)
+
+    # --- API asynchrone ---
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata) -> RunnableConfig:
+        """Version asynchrone de put : écriture regroupée par thread_id."""
+        thread_id = config["configurable"]["thread_id"]
+        saved_config = self._enqueue(config, checkpoint, metadata)
+
+        if len(self._pending.get(thread_id, [])) >= self.max_batch_size:
+            await self._flush_thread(thread_id)
+        else:
+            self._schedule_flush(thread_id)
+        return saved_config
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Version asynchrone de get_tuple : cache LRU puis Memory API."""
+        cached = self._cache_lookup(config)
+        if cached is not None:
+            return cached
+
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = config["configurable"].get("thread_ts")
+
+        # Les écritures en attente doivent être visibles côté API
+        if thread_id in self._pending:
+            await self._flush_thread(thread_id)
+
+        params = {"checkpoint_id": checkpoint_id} if checkpoint_id else None
+        try:
+            response = await self.client.get(f"{self.base_url}/state/checkpoints/{thread_id}", params=params)
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+        except Exception as e:
+            security_logger.log_error(f"Checkpoint fetch failed for thread {thread_id}", e)
+            return None
+
+        checkpoint_tuple = self._record_to_tuple(response.json())
+        self._remember(checkpoint_tuple, latest=checkpoint_id is None)
+        return self._copy_tuple(checkpoint_tuple)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Liste l'historique des checkpoints d'un thread depuis la Memory API."""
+        if not config:
+            for checkpoint_tuple in self.list(None, filter=filter, before=before, limit=limit):
+                yield checkpoint_tuple
+            return
+
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id in self._pending:
+            await self._flush_thread(thread_id)
+
+        params: Dict[str, Any] = {}
+        if before:
+            params["before"] = before["configurable"]["thread_ts"]
+        if limit is not None and not filter:
+            params["limit"] = limit
+
+        try:
+            response = await self.client.get(f"{self.base_url}/state/checkpoints/{thread_id}/history", params=params)
+            response.raise_for_status()
+        except Exception as e:
+            security_logger.log_error(f"Checkpoint history fetch failed for thread {thread_id}", e)
+            return
+
+        tuples = [self._record_to_tuple(record) for record in response.json()]
+        for checkpoint_tuple in self._filter_tuples(tuples, filter, None, limit):
+            yield checkpoint_tuple
+
+    async def aflush(self, thread_id: Optional[str] = None) -> None:
+        """Force l'envoi des écritures en attente (un thread ou tous)."""
+        thread_ids = [thread_id] if thread_id else list(set(self._pending) | set(self._flush_tasks))
+        for tid in thread_ids:
+            task = self._flush_tasks.pop(tid, None)
+            if task and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            await self._flush_thread(tid)
+
+    async def aclose(self) -> None:
+        """Vide toutes les files d'écriture avant l'arrêt."""
+        await self.aflush()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Retourne les métriques du checkpointer."""
+        total_reads = self.metrics['cache_hits'] + self.metrics['cache_misses']
+        return {
+            **self.metrics,
+            'cache_hit_rate_percent': round(self.metrics['cache_hits'] / max(total_reads, 1) * 100, 2),
+            'cached_checkpoints': len(self._cache),
+            'pending_checkpoints': sum(len(records) for records in self._pending.values()),
+            'avg_batch_size': round(self.metrics['flushed_checkpoints'] / max(self.metrics['flushes'], 1), 2)
+        }
+
+    # --- Interne ---
+
+    def _enqueue(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata) -> RunnableConfig:
+        """Met à jour le cache et ajoute le checkpoint sérialisé à la file du thread."""
+        thread_id = config["configurable"]["thread_id"]
+        parent_id = config["configurable"].get("thread_ts")
+        saved_config = {"configurable": {"thread_id": thread_id, "thread_ts": checkpoint["id"]}}
+
+        self._remember(CheckpointTuple(
+            config=saved_config,
+            checkpoint=copy_checkpoint(checkpoint),
+            metadata=metadata,
+            parent_config={"configurable": {"thread_id": thread_id, "thread_ts": parent_id}} if parent_id else None
+        ), latest=True)
+
+        pending = self._pending.setdefault(thread_id, [])
+        pending.append({
+            "thread_id": thread_id,
+            "checkpoint_id": checkpoint["id"],
+            "parent_checkpoint_id": parent_id,
+            "checkpoint": self.serde.dumps(checkpoint).decode("utf-8"),
+            "metadata": self.serde.dumps(metadata).decode("utf-8")
+        })
+        self.metrics['puts'] += 1
+        return saved_config
+
+    def _schedule_flush(self, thread_id: str) -> None:
+        """Programme un flush différé du thread s'il n'y en a pas déjà un."""
+        if thread_id not in self._flush_tasks:
+            self._flush_tasks[thread_id] = asyncio.get_running_loop().create_task(self._delayed_flush(thread_id))
+
+    async def _delayed_flush(self, thread_id: str) -> None:
+        """Attend la fenêtre de regroupement puis vide la file du thread."""
+        await asyncio.sleep(self.flush_interval)
+        self._flush_tasks.pop(thread_id, None)
+        await self._flush_thread(thread_id)
+
+    async def _flush_thread(self, thread_id: str) -> None:
+        """Envoie toutes les écritures en attente d'un thread en un seul POST."""
+        lock = self._flush_locks.get(thread_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._flush_locks[thread_id] = lock
+
+        async with lock:
+            records = self._pending.pop(thread_id, None)
+            if not records:
+                return
+            try:
+                response = await self.client.post(
+                    f"{self.base_url}/state/checkpoints/batch",
+                    json={"checkpoints": records}
+                )
+                response.raise_for_status()
+                self.metrics['flushes'] += 1
+                self.metrics['flushed_checkpoints'] += len(records)
+            except Exception as e:
+                self.metrics['flush_errors'] += 1
+                security_logger.log_error(f"Checkpoint flush failed for thread {thread_id}", e)
+                # Remise en file pour la prochaine tentative, bornée
+                requeued = records + self._pending.get(thread_id, [])
+                overflow = len(requeued) - self.max_pending
+                if overflow > 0:
+                    self.metrics['dropped_checkpoints'] += overflow
+                    requeued = requeued[overflow:]
+                self._pending[thread_id] = requeued
+
+    def _cache_lookup(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Cherche un checkpoint dans le cache LRU (précis ou le plus récent)."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = config["configurable"].get("thread_ts") or self._latest.get(thread_id)
+        key = (thread_id, checkpoint_id)
+
+        if checkpoint_id is None or key not in self._cache:
+            self.metrics['cache_misses'] += 1
+            return None
+
+        self._cache.move_to_end(key)
+        self.metrics['cache_hits'] += 1
+        return self._copy_tuple(self._cache[key])
+
+    def _remember(self, checkpoint_tuple: CheckpointTuple, latest: bool) -> None:
+        """Insère un checkpoint dans le cache LRU et évince les plus anciens."""
+        thread_id = checkpoint_tuple.config["configurable"]["thread_id"]
+        checkpoint_id = checkpoint_tuple.config["configurable"]["thread_ts"]
+        key = (thread_id, checkpoint_id)
+
+        self._cache[key] = checkpoint_tuple
+        self._cache.move_to_end(key)
+        if latest:
+            current = self._latest.get(thread_id)
+            if current is None or checkpoint_id >= current:
+                self._latest[thread_id] = checkpoint_id
+
+        while len(self._cache) > self.cache_size:
+            (old_thread_id, old_checkpoint_id), _ = self._cache.popitem(last=False)
+            if self._latest.get(old_thread_id) == old_checkpoint_id:
+                del self._latest[old_thread_id]
+
+    def _record_to_tuple(self, record: Dict[str, Any]) -> CheckpointTuple:
+        """Convertit un CheckpointRecord de la Memory API en CheckpointTuple."""
+        thread_id = record["thread_id"]
+        parent_id = record.get("parent_checkpoint_id")
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "thread_ts": record["checkpoint_id"]}},
+            checkpoint=self.serde.loads(record["checkpoint"].encode("utf-8")),
+            metadata=self.serde.loads(record["metadata"].encode("utf-8")),
+            parent_config={"configurable": {"thread_id": thread_id, "thread_ts": parent_id}} if parent_id else None
+        )
+
+    @staticmethod
+    def _copy_tuple(checkpoint_tuple: CheckpointTuple) -> CheckpointTuple:
+        """Copie défensive : LangGraph peut muter le checkpoint retourné."""
+        return checkpoint_tuple._replace(checkpoint=copy_checkpoint(checkpoint_tuple.checkpoint))
+
+    @staticmethod
+    def _filter_tuples(
+        tuples: List[CheckpointTuple],
+        filter: Optional[Dict[str, Any]],
+        before: Optional[RunnableConfig],
+        limit: Optional[int]
+    ) -> Iterator[CheckpointTuple]:
+        """Applique les filtres before/metadata/limit sur une liste triée."""
+        count = 0
+        for checkpoint_tuple in tuples:
+            if before and checkpoint_tuple.config["configurable"]["thread_ts"] >= before["configurable"]["thread_ts"]:
+                continue
+            if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None and count >= limit:
+                break
+            count += 1
+            yield checkpoint_tuple
@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -22,6 +24,99 @@ class Settings(BaseSettings):
     MAX_LLM_RESPONSE_TIME: float = 120.0
     MAX_CODE_SIZE: int = 50000
     MAX_TASK_DESCRIPTION_LENGTH: int = 5000
+    
+    # Checkpointer LangGraph (persistance via memory_api)
+    CHECKPOINT_FLUSH_INTERVAL: float = 0.05  # Fenêtre de regroupement des écritures (secondes)
+    CHECKPOINT_MAX_BATCH_SIZE: int = 32
+    CHECKPOINT_CACHE_SIZE: int = 512
+    
+    # Exécution parallèle des workers indépendants (code_context fourni)
+    PARALLEL_WORKERS_ENABLED: bool = False
+    
+    # Cache des réponses LLM (exact + similarité sémantique)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: float = 3600.0
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    # 1.0 désactive le niveau sémantique. L'embedding local (sac de n-grammes haché) rapproche des
+    # tâches de sens opposé ("ascending"/"descending" > 0.92) : n'abaisser qu'avec un vrai embedding.
+    LLM_CACHE_SIMILARITY_THRESHOLD: float = 1.0
+    LLM_CACHE_REDIS_ENABLED: bool = True  # Partage entre réplicas via ProductionRedisCache
+    
+    # Streaming token par token des LLM via le flux SSE de /invoke
+    STREAM_TOKENS_ENABLED: bool = True
+    
+    # Contrôle d'admission de /invoke (exécutions LangGraph simultanées)
+    INVOKE_MAX_IN_FLIGHT: int = 8
+    INVOKE_MAX_QUEUE: int = 32  # Au-delà : 429 immédiat avec Retry-After
+    INVOKE_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    
+    # Déduplication single-flight des requêtes /invoke identiques (bail Redis entre réplicas)
+    INVOKE_SINGLE_FLIGHT_ENABLED: bool = True
+    INVOKE_SINGLE_FLIGHT_LEASE_SECONDS: float = 30.0
+    
+    # Mode job : file durable (Redis Streams) et pool de workers
+    JOBS_STREAM: str = "invoke:jobs"
+    JOBS_CONSUMER_GROUP: str = "invoke-workers"
+    JOBS_WORKER_PROCESSES: int = 0  # 0 = un processus par cœur
+    JOBS_WORKER_CONCURRENCY: int = 4  # Exécutions simultanées par processus
+    JOBS_VISIBILITY_TIMEOUT_SECONDS: float = 300.0  # Job repris si son worker ne donne plus signe de vie
+    JOBS_MAX_ATTEMPTS: int = 3
+    JOBS_RESULT_TTL_SECONDS: int = 86400
+    
+    # Routage des workers entre fournisseurs LLM selon la latence observée.
+    # Désactivé par défaut tant que les a priori de coût/latence ne sont pas calibrés : activé, le
+    # classement va du moins cher au plus cher (avec LOCAL_MODELS_ENABLED, documentation passe sur
+    # ollama:llama3:8b et code_generation quitte GPT-4o pour Claude ou Gemini).
+    MODEL_ROUTER_ENABLED: bool = False
+    MODEL_ROUTER_SLO_SECONDS: float = 45.0  # SLO par défaut d'un appel worker
+    MODEL_ROUTER_EXPECTED_TOKENS: int = 800  # Taille de réponse attendue pour l'estimation
+    MODEL_ROUTER_COOLDOWN_SECONDS: float = 60.0  # Quarantaine d'un modèle dégradé
+    MODEL_ROUTER_MAX_ATTEMPTS: int = 3  # Modèles essayés par appel avant d'abandonner
+    MODEL_ROUTER_TRACE_PATH: str = ""  # Trace JSONL des appels, rejouable hors ligne
+    
+    # Requêtes LLM hedgées (secours vers le modèle suivant si le premier token tarde).
+    # Avec le routeur : modèle suivant du classement ; sans : second modèle de AGENT_CANDIDATES.
+    HEDGING_ENABLED: bool = False
+    HEDGING_PERCENTILE: float = 0.95  # Délai de hedge : percentile des premiers tokens récents
+    HEDGING_MIN_DELAY_SECONDS: float = 2.0
+    HEDGING_MAX_DELAY_SECONDS: float = 20.0  # Délai utilisé tant que l'historique est trop court
+    HEDGING_MIN_SAMPLES: int = 20
+    HEDGING_BUDGET_RATIO: float = 0.1  # Au plus ~10 % de requêtes supplémentaires
+    HEDGING_BUDGET_BURST: float = 5.0
+    
+    # Budget de tokens des prompts workers (historique et code_context réduits au besoin)
+    CONTEXT_BUDGET_ENABLED: bool = True
+    CONTEXT_BUDGET_MAX_TOKENS: int = 6000  # Plafond des entrées, quelle que soit la fenêtre du modèle
+    CONTEXT_BUDGET_OUTPUT_RESERVE: int = 2000  # Tokens réservés à la réponse et au raisonnement ReAct
+    CONTEXT_BUDGET_RECENT_TURNS: int = 6  # Tours récents de l'historique conservés intacts
+    CONTEXT_BUDGET_HISTORY_SHARE: float = 0.25  # Part maximale du budget pour l'historique
+    
+    # Extraction AST des définitions utiles à la tâche dans les gros code_context
+    CODE_SLICE_ENABLED: bool = True
+    CODE_SLICE_MIN_CHARS: int = 8000  # En dessous, le code_context est transmis tel quel s'il tient dans le budget
+    # Agents dont le code_context tenant dans le budget peut quand même être réduit : lecture seule.
+    # La sortie de code_generation remplace toute la sélection de l'utilisateur, un extrait la tronquerait.
+    CODE_SLICE_AGENTS: List[str] = ["documentation", "testing"]
+
+    # Pool de workers pylint persistants de SecureCodeAnalyzer
+    LINT_POOL_SIZE: int = 2
+    LINT_POOL_JOB_TIMEOUT_SECONDS: float = 10.0  # Au-delà, le worker est tué et remplacé
+    LINT_POOL_MAX_JOBS_PER_WORKER: int = 200  # Recyclage du worker (mémoire astroid)
+    LINT_POOL_CACHE_SIZE: int = 256  # Résultats mis en cache par empreinte du code
+    LINT_POOL_STARTUP_TIMEOUT_SECONDS: float = 30.0  # Import de pylint/astroid au démarrage d'un worker
+    
+    # Pipeline de logs d'audit/sécurité non bloquant (anneau borné vidé par un thread)
+    LOG_PIPELINE_ENABLED: bool = True
+    LOG_PIPELINE_CAPACITY: int = 10000  # Enregistrements en attente au maximum
+    LOG_PIPELINE_OVERFLOW_POLICY: str = "drop_oldest"  # drop_oldest | sample | block
+    LOG_PIPELINE_BLOCK_TIMEOUT_SECONDS: float = 0.05  # Attente maximale de l'appelant en politique block
+    LOG_PIPELINE_SAMPLE_EVERY: int = 10  # Politique sample : 1 enregistrement sur N conservé à saturation
+    LOG_PIPELINE_BATCH_SIZE: int = 256
+    LOG_PIPELINE_FLUSH_INTERVAL_SECONDS: float = 0.5
+    
+    # Agrégation des événements de sécurité à haute fréquence (cache, état, sessions)
+    SECURITY_EVENT_AGGREGATION_ENABLED: bool = True
+    SECURITY_EVENT_SUMMARY_INTERVAL_SECONDS: float = 60.0  # Période des résumés par type d'événement
 
     model_config = SettingsConfigDict(env_file='.env', env_file_encoding='utf-8', extra='ignore')
     
@@ -1,18 +1,41 @@
-from typing import TypedDict, List, Optional, Dict, Any
+from typing import TypedDict, List, Optional, Dict, Any, Union
 from datetime import datetime
 from pydantic import BaseModel, Field
+from typing_extensions import Annotated
 
 class Feedback(BaseModel):
     """Modèle pour le feedback utilisateur."""
     rating: int = Field(..., ge=1, le=5)
     comment: Optional[str] = None
 
+class ResetDict(dict):
+    """Valeur qui remplace le canal au lieu d'y être fusionnée (début d'une exécution)."""
+
+class ResetList(list):
+    """Valeur qui remplace le canal au lieu d'y être ajoutée (début d'une exécution)."""
+
+def merge_results(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reducer LangGraph : fusionne les résultats des workers exécutés en parallèle.
+    
+    Un ResetDict repart de zéro : une nouvelle tâche sur un thread existant
+    ne doit pas hériter des résultats de la précédente.
+    """
+    if isinstance(right, ResetDict):
+        return dict(right)
+    return {**(left or {}), **(right or {})}
+
+def append_entries(left: Optional[List[str]], right: Optional[List[str]]) -> List[str]:
+    """Reducer LangGraph : concatène errors/logs, sauf ResetList qui repart de zéro."""
+    if isinstance(right, ResetList):
+        return list(right)
+    return (left or []) + (right or [])
+
 class AgentState(TypedDict):
     """État partagé et persistant du workflow."""
     messages: List[Dict[str, Any]]
     plan: Optional[str]
-    next: str
-    results: Dict[str, Any]
+    next: Union[str, List[str]]  # Liste = nœuds indépendants exécutés en parallèle
+    results: Annotated[Dict[str, Any], merge_results]
     session_id: str
     created_at: datetime
     updated_at: datetime
@@ -20,6 +43,7 @@ class AgentState(TypedDict):
     task_status: str
     code_context: Optional[str]
     working_memory: List[str]
-    errors: List[str]
-    logs: List[str]
-    feedback: Optional[Dict[str, Any]] 
\ No newline at end of file
+    errors: Annotated[List[str], append_entries]
+    logs: Annotated[List[str], append_entries]
+    feedback: Optional[Dict[str, Any]]
+    latency_slo: Optional[float]  # SLO de latence d'un appel worker (secondes), routage des modèles 
\ No newline at end of file
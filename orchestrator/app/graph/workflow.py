@@ -0,0 +1,89 @@
+"""
+Construction et exécution du workflow LangGraph
+Partagé par l'API (/invoke) et les workers de jobs, sans dépendre de l'application FastAPI.
+"""
+import json
+from datetime import datetime, timezone
+from functools import partial
+from typing import AsyncIterator, Optional
+
+import httpx
+from langgraph.graph import END, StateGraph
+
+from orchestrator.app.agents.supervisor import supervisor
+from orchestrator.app.agents.streaming import TokenStream
+from orchestrator.app.agents.workers import worker_node_wrapper
+from orchestrator.app.checkpoint.api_checkpointer import ApiCheckpointer
+from orchestrator.app.config import settings
+from orchestrator.app.graph.state import AgentState, ResetDict, ResetList
+
+
+def mark_as_completed(state: AgentState) -> dict:
+    """Nœud final pour marquer la tâche comme terminée."""
+    return {"task_status": "completed"}
+
+
+def create_workflow(client: httpx.AsyncClient):
+    workflow = StateGraph(AgentState)
+    workflow.add_node("supervisor", supervisor.node)
+    # partial (et non lambda) : LangGraph doit détecter la coroutine pour l'attendre
+    workflow.add_node("code_generation", partial(worker_node_wrapper, agent_key="code_generation"))
+    workflow.add_node("documentation", partial(worker_node_wrapper, agent_key="documentation"))
+    workflow.add_node("finish", mark_as_completed)
+    workflow.set_entry_point("supervisor")
+    # "next" peut être une liste : LangGraph exécute alors les nœuds en parallèle
+    workflow.add_conditional_edges("supervisor", lambda x: x["next"], {
+        "code_generation": "code_generation",
+        "documentation": "documentation",
+        "finish": "finish"
+    })
+    workflow.add_edge("code_generation", "supervisor")
+    workflow.add_edge("documentation", "supervisor")
+    workflow.add_edge("finish", END)
+    return workflow.compile(checkpointer=ApiCheckpointer(client=client))
+
+
+def build_initial_state(task_description: str, session_id: str,
+                        code_context: Optional[str] = None,
+                        latency_slo: Optional[float] = None) -> AgentState:
+    """État initial d'une exécution, plan du superviseur inclus
+
+    results/errors/logs sont marqués Reset : sur un thread déjà checkpointé (même
+    session_id, job relancé), l'exécution repart de zéro au lieu de fusionner.
+    """
+    initial_state = AgentState(
+        messages=[],
+        plan=None,
+        next="supervisor",
+        results=ResetDict(),
+        session_id=session_id,
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+        task_description=task_description,
+        task_status="pending",
+        code_context=code_context,
+        working_memory=[],
+        errors=ResetList(),
+        logs=ResetList(),
+        feedback=None,
+        latency_slo=latency_slo
+    )
+
+    # CORRECTIF 5: Appel de supervisor.create_plan juste après construction de l'état initial
+    return supervisor.create_plan(initial_state)
+
+
+async def stream_workflow_events(app_instance, initial_state: AgentState, session_id: str) -> AsyncIterator[str]:
+    """Exécute le graphe et produit les événements SSE (tokens LLM et sorties de nœuds)"""
+    config = {"configurable": {"thread_id": session_id}}
+    chunks = app_instance.astream(initial_state, config)
+    if settings.STREAM_TOKENS_ENABLED:
+        # Tokens LLM relayés dès leur génération, entre les sorties de nœuds
+        async for kind, payload in TokenStream().events(chunks):
+            if kind == "token":
+                yield f"event: token\ndata: {json.dumps(payload)}\n\n"
+            else:
+                yield f"data: {json.dumps(payload, default=str)}\n\n"
+    else:
+        async for chunk in chunks:
+            yield f"data: {json.dumps(chunk, default=str)}\n\n"
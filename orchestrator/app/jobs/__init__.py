@@ -0,0 +1 @@
+# Module jobs - File durable et workers des exécutions asynchrones
\ No newline at end of file
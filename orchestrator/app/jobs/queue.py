@@ -0,0 +1,211 @@
+"""
+File durable des jobs /invoke sur Redis Streams
+- jobs:stream (groupe de consommateurs) : un message par job à exécuter
+- job:{id} (hash) : statut, requête, résultat
+- job:{id}:events (stream) : événements SSE rejouables, terminés par un marqueur de fin ;
+  une reprise le vide et commence par un marqueur de redémarrage
+Un job dont le worker disparaît est repris (XAUTOCLAIM) après le délai de visibilité.
+"""
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from orchestrator.app.config import settings
+from orchestrator.app.performance.redis_cache import get_cache
+
+JOB_PREFIX = "job:"
+
+# Statuts terminaux : plus aucun événement ne sera produit
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def _text(value: Any) -> Any:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def restart_event(attempt: int) -> str:
+    """Événement SSE d'une reprise : le client abandonne la sortie partielle de la tentative précédente"""
+    return f"event: restart\ndata: {json.dumps({'attempt': attempt})}\n\n"
+
+
+class JobQueue:
+    """File de jobs Redis Streams partagée par l'API et les workers"""
+
+    def __init__(self, redis_client, stream: Optional[str] = None, group: Optional[str] = None,
+                 visibility_timeout: Optional[float] = None, result_ttl: Optional[int] = None):
+        self.redis = redis_client
+        self.stream = stream or settings.JOBS_STREAM
+        self.group = group or settings.JOBS_CONSUMER_GROUP
+        self.visibility_timeout = visibility_timeout if visibility_timeout is not None else settings.JOBS_VISIBILITY_TIMEOUT_SECONDS
+        self.result_ttl = result_ttl or settings.JOBS_RESULT_TTL_SECONDS
+        self._group_ready = False
+
+    @staticmethod
+    def job_key(job_id: str) -> str:
+        return f"{JOB_PREFIX}{job_id}"
+
+    @staticmethod
+    def events_key(job_id: str) -> str:
+        return f"{JOB_PREFIX}{job_id}:events"
+
+    async def ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            # BUSYGROUP : groupe déjà créé par un autre processus
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    # --- Côté API ---
+    async def submit(self, task_description: str, session_id: str,
+                     code_context: Optional[str] = None) -> str:
+        """Enregistre le job puis le publie dans la file ; retourne son identifiant"""
+        await self.ensure_group()
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "session_id": session_id,
+            "task_description": task_description,
+            "code_context": code_context or "",
+            "attempts": 0,
+            "created_at": _now()
+        }
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.job_key(job_id), mapping=job)
+            pipe.xadd(self.stream, {"job_id": job_id})
+            await pipe.execute()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        data = await self.redis.hgetall(self.job_key(job_id))
+        if not data:
+            return None
+        job = {_text(k): _text(v) for k, v in data.items()}
+        job["attempts"] = int(job.get("attempts", 0))
+        if job.get("result"):
+            job["result"] = json.loads(job["result"])
+        return job
+
+    async def events(self, job_id: str, block_ms: int = 5000) -> AsyncIterator[str]:
+        """Rejoue les événements SSE du job puis suit l'exécution jusqu'au marqueur de fin"""
+        last_id = "0-0"
+        while True:
+            response = await self.redis.xread({self.events_key(job_id): last_id}, block=block_ms)
+            if not response:
+                job = await self.get(job_id)
+                if job is None or job["status"] in TERMINAL_STATUSES:
+                    return
+                continue
+            for entry_id, fields in response[0][1]:
+                last_id = entry_id
+                fields = {_text(k): _text(v) for k, v in fields.items()}
+                if "end" in fields:
+                    return
+                if "restart" in fields:
+                    yield restart_event(int(fields["restart"]))
+                    continue
+                yield fields["line"]
+
+    # --- Côté worker ---
+    async def claim(self, consumer: str, count: int = 1, block_ms: int = 1000) -> List[Tuple[str, str]]:
+        """
+        Retourne jusqu'à count (message_id, job_id) : d'abord les jobs abandonnés
+        par un worker disparu, puis les nouveaux.
+        """
+        await self.ensure_group()
+        _, stale, *_ = await self.redis.xautoclaim(
+            self.stream, self.group, consumer,
+            min_idle_time=int(self.visibility_timeout * 1000), start_id="0-0", count=count
+        )
+        messages = list(stale)
+        if len(messages) < count:
+            response = await self.redis.xreadgroup(self.group, consumer, {self.stream: ">"},
+                                                   count=count - len(messages), block=block_ms)
+            if response:
+                messages.extend(response[0][1])
+        claimed = []
+        for message_id, fields in messages:
+            if fields:  # entrée supprimée entre-temps
+                fields = {_text(k): _text(v) for k, v in fields.items()}
+                claimed.append((_text(message_id), fields["job_id"]))
+        return claimed
+
+    async def start(self, job_id: str, consumer: str) -> int:
+        """Marque le job en cours ; retourne le numéro de tentative"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(self.job_key(job_id), "attempts", 1)
+            pipe.hset(self.job_key(job_id), mapping={"status": "running", "worker": consumer, "started_at": _now()})
+            # Une reprise repart d'un flux d'événements vide
+            pipe.delete(self.events_key(job_id))
+            attempts, *_ = await pipe.execute()
+        if int(attempts) > 1:
+            # Les clients qui suivaient la tentative précédente gardent leur position : marqueur explicite
+            await self.redis.xadd(self.events_key(job_id), {"restart": int(attempts)})
+        return int(attempts)
+
+    async def touch(self, message_id: str, consumer: str):
+        """Remet à zéro l'inactivité du message : le job n'est pas repris tant que le worker vit"""
+        await self.redis.xclaim(self.stream, self.group, consumer, min_idle_time=0,
+                                message_ids=[message_id], justid=True)
+
+    async def append_event(self, job_id: str, line: str):
+        await self.redis.xadd(self.events_key(job_id), {"line": line})
+
+    async def discard(self, message_id: str):
+        """Acquitte et retire un message sans toucher au job (expiré ou supprimé)"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream, self.group, message_id)
+            pipe.xdel(self.stream, message_id)
+            await pipe.execute()
+
+    async def finish(self, job_id: str, message_id: str, status: str,
+                     result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        """Statut terminal, marqueur de fin, acquittement ; résultats conservés result_ttl secondes"""
+        fields = {"status": status, "finished_at": _now()}
+        if result is not None:
+            fields["result"] = json.dumps(result, default=str)
+        if error:
+            fields["error"] = error
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.job_key(job_id), mapping=fields)
+            pipe.xadd(self.events_key(job_id), {"end": status})
+            pipe.expire(self.job_key(job_id), self.result_ttl)
+            pipe.expire(self.events_key(job_id), self.result_ttl)
+            pipe.xack(self.stream, self.group, message_id)
+            pipe.xdel(self.stream, message_id)
+            await pipe.execute()
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        await self.ensure_group()
+        pending = await self.redis.xpending(self.stream, self.group)
+        return {
+            "stream": self.stream,
+            "queued": await self.redis.xlen(self.stream) - int(pending["pending"]),
+            "in_progress": int(pending["pending"])
+        }
+
+
+# Instance globale
+_job_queue: Optional[JobQueue] = None
+
+
+async def get_job_queue() -> Optional[JobQueue]:
+    """Retourne la file de jobs globale, None si Redis n'est pas disponible"""
+    global _job_queue
+
+    if _job_queue is None:
+        cache = await get_cache()
+        if cache.redis_client is None:
+            return None
+        _job_queue = JobQueue(cache.redis_client)
+
+    return _job_queue
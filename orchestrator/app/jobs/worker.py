@@ -0,0 +1,191 @@
+"""
+Pool de workers des jobs /invoke
+Chaque processus consomme la file Redis Streams et exécute jusqu'à
+JOBS_WORKER_CONCURRENCY graphes LangGraph à la fois ; un processus par cœur
+par défaut. Lancement : python -m orchestrator.app.jobs.worker
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+
+from orchestrator.app.config import settings
+from orchestrator.app.security.logging import security_logger
+from orchestrator.app.jobs.queue import JobQueue
+
+# job -> flux d'événements SSE de son exécution
+JobExecutor = Callable[[Dict[str, Any]], AsyncIterator[str]]
+
+
+def merge_event_results(line: str, results: Dict[str, Any]):
+    """Agrège les 'results' des sorties de nœuds contenues dans un événement SSE"""
+    if not line.startswith("data: "):
+        return  # événements token
+    try:
+        chunk = json.loads(line[len("data: "):])
+    except ValueError:
+        return
+    if not isinstance(chunk, dict):
+        return
+    for output in chunk.values():
+        if isinstance(output, dict) and isinstance(output.get("results"), dict):
+            results.update(output["results"])
+
+
+class JobWorker:
+    """Consommateur de la file : exécution, heartbeat et publication des événements"""
+
+    def __init__(self, queue: JobQueue, execute: JobExecutor, concurrency: Optional[int] = None,
+                 consumer: Optional[str] = None, max_attempts: Optional[int] = None):
+        self.queue = queue
+        self.execute = execute
+        self.concurrency = concurrency or settings.JOBS_WORKER_CONCURRENCY
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.max_attempts = max_attempts or settings.JOBS_MAX_ATTEMPTS
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.metrics = {
+            'claimed': 0,
+            'completed': 0,
+            'failed': 0
+        }
+
+    async def run(self, stop: asyncio.Event, block_ms: int = 1000):
+        """Boucle de consommation jusqu'à stop ; les jobs en cours sont terminés avant de rendre la main"""
+        while not stop.is_set():
+            free = self.concurrency - len(self._tasks)
+            if free <= 0:
+                await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            try:
+                claimed = await self.queue.claim(self.consumer, count=free, block_ms=block_ms)
+            except Exception as e:
+                security_logger.log_error("Job claim failed", e)
+                await asyncio.sleep(1)
+                continue
+            for message_id, job_id in claimed:
+                self.metrics['claimed'] += 1
+                task = asyncio.create_task(self.process(message_id, job_id))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+
+    async def process(self, message_id: str, job_id: str):
+        job = await self.queue.get(job_id)
+        if job is None:
+            # Job expiré ou supprimé : rien à exécuter, ni hash à recréer
+            await self.queue.discard(message_id)
+            return
+
+        attempt = await self.queue.start(job_id, self.consumer)
+        if attempt > self.max_attempts:
+            self.metrics['failed'] += 1
+            await self.queue.finish(job_id, message_id, "failed", error="Max attempts exceeded")
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(message_id))
+        results: Dict[str, Any] = {}
+        try:
+            async for line in self.execute(job):
+                merge_event_results(line, results)
+                await self.queue.append_event(job_id, line)
+            self.metrics['completed'] += 1
+            await self.queue.finish(job_id, message_id, "completed", result=results)
+        except Exception as e:
+            self.metrics['failed'] += 1
+            security_logger.log_error("Job execution failed", e, include_details=settings.DEBUG)
+            await self.queue.append_event(job_id, f"data: {json.dumps({'error': 'Task execution failed'})}\n\n")
+            await self.queue.finish(job_id, message_id, "failed", result=results, error=type(e).__name__)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, message_id: str):
+        # Bien avant le délai de visibilité, pour qu'aucun autre worker ne reprenne le job
+        interval = max(self.queue.visibility_timeout / 3, 0.05)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.queue.touch(message_id, self.consumer)
+            except Exception as e:
+                security_logger.log_error("Job heartbeat failed", e)
+
+
+def workflow_executor(app_instance) -> JobExecutor:
+    """Exécution d'un job par le graphe compilé"""
+    from orchestrator.app.checkpoint.api_checkpointer import ApiCheckpointer
+    from orchestrator.app.graph.workflow import build_initial_state, stream_workflow_events
+
+    async def execute(job: Dict[str, Any]) -> AsyncIterator[str]:
+        initial_state = build_initial_state(job["task_description"], job["session_id"],
+                                            job.get("code_context") or None)
+        async for line in stream_workflow_events(app_instance, initial_state, job["session_id"]):
+            yield line
+        # Checkpoints du thread envoyés avant que le job soit marqué terminé : /status voit l'état final
+        if isinstance(app_instance.checkpointer, ApiCheckpointer):
+            await app_instance.checkpointer.aflush(job["session_id"])
+        yield f"data: {json.dumps({'status': 'completed'})}\n\n"
+
+    return execute
+
+
+async def _serve():
+    """Un processus worker : graphe compilé, client Redis et boucle de consommation"""
+    import httpx
+    import redis.asyncio as redis
+    from orchestrator.app.checkpoint.api_checkpointer import ApiCheckpointer
+    from orchestrator.app.graph.workflow import create_workflow
+
+    redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"),
+                                  db=int(os.getenv("REDIS_DB", "0")))
+    async with httpx.AsyncClient() as http_client:
+        app_instance = create_workflow(http_client)
+        execute = workflow_executor(app_instance)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+
+        worker = JobWorker(JobQueue(redis_client), execute)
+        security_logger.log_security_event("JOB_WORKER_STARTED", {"consumer": worker.consumer})
+        try:
+            await worker.run(stop)
+        finally:
+            # Checkpoints en attente envoyés avant de fermer le client HTTP (comme le lifespan de l'API)
+            if isinstance(app_instance.checkpointer, ApiCheckpointer):
+                await app_instance.checkpointer.aclose()
+            await redis_client.aclose()
+
+
+def run_worker_process():
+    asyncio.run(_serve())
+
+
+def main():
+    """Lance JOBS_WORKER_PROCESSES processus (un par cœur si 0)"""
+    processes = settings.JOBS_WORKER_PROCESSES or os.cpu_count() or 1
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=run_worker_process, name=f"job-worker-{i}") for i in range(processes)]
+    for process in workers:
+        process.start()
+
+    def stop_workers(*_):
+        # SIGTERM relayé : chaque worker termine ses jobs en cours avant de sortir
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop_workers)
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        stop_workers()
+
+
+if __name__ == "__main__":
+    main()
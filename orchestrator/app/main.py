@@ -7,22 +7,21 @@ from typing import Optional, List
 import httpx
 from fastapi import Depends, FastAPI, HTTPException, Security, Request
 from fastapi.responses import StreamingResponse, Response
+from starlette.background import BackgroundTask
 from fastapi.security import APIKeyHeader
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from langgraph.graph import END, StateGraph
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel, Field, validator
 
-from orchestrator.app.agents.supervisor import supervisor
-from orchestrator.app.agents.workers import worker_node_wrapper
 from orchestrator.app.agents.tools import close_http_client
 from orchestrator.app.checkpoint.api_checkpointer import ApiCheckpointer
 from orchestrator.app.config import settings
-from orchestrator.app.graph.state import AgentState, Feedback
+from orchestrator.app.graph.state import Feedback
+from orchestrator.app.graph.workflow import create_workflow, build_initial_state, stream_workflow_events
 from orchestrator.app.security.validators import InputSanitizer
 from orchestrator.app.security.logging import security_logger, AuditLogger, AuditEventType, setup_secure_logging
 from orchestrator.app.security.secrets_manager import get_secrets_manager
@@ -36,6 +35,13 @@ from orchestrator.app.performance.load_tester import get_load_tester
 # Sprint 1.3 - Advanced Observability & Scalability
 from orchestrator.app.observability.distributed_tracing import get_tracer, initialize_tracing
 from orchestrator.app.performance.circuit_breaker import get_circuit_manager, CircuitBreakerConfig
+from orchestrator.app.performance.admission_control import get_admission_controller, AdmissionRejected
+from orchestrator.app.performance.single_flight import get_single_flight, request_key, abort_on_failure
+from orchestrator.app.performance.model_router import get_model_router
+from orchestrator.app.performance.hedging import get_hedged_caller
+from orchestrator.app.agents.context_budget import get_context_budgeter
+from orchestrator.app.observability.log_pipeline import get_log_pipeline, install_log_pipeline, shutdown_log_pipeline
+from orchestrator.app.jobs.queue import get_job_queue
 from orchestrator.app.observability.business_metrics import get_business_metrics, initialize_business_metrics
 
 # Sprint 2.1 - Advanced Architecture & Performance
@@ -58,6 +64,10 @@ http_client = None
 async def lifespan(app: FastAPI):
     # Initialiser le logging sécurisé
     setup_secure_logging()
+    # Écriture des logs d'audit/sécurité hors du chemin des requêtes
+    log_pipeline = install_log_pipeline()
+    if log_pipeline is not None:
+        log_pipeline.add_tick(security_logger.flush_event_summaries)
     
     global workflow_app, http_client
     http_client = httpx.AsyncClient()
@@ -130,6 +140,11 @@ async def lifespan(app: FastAPI):
     Instrumentator().instrument(app).expose(app)
     yield
     
+    # Vider les checkpoints en attente avant de fermer le client HTTP
+    if workflow_app is not None and isinstance(workflow_app.checkpointer, ApiCheckpointer):
+        await workflow_app.checkpointer.aclose()
+        print("[lifespan] Pending checkpoints flushed.")
+    
     # CORRECTIF 4: Fermeture propre du client HTTP
     if http_client:
         await http_client.aclose()
@@ -170,6 +185,8 @@ async def lifespan(app: FastAPI):
         "component": "orchestrator",
         "status": "clean"
     })
+    security_logger.flush_event_summaries(force=True)
+    shutdown_log_pipeline()
 
 # --- App Initialization ---
 app = FastAPI(title="Multi-Agent Orchestrator", version="3.3-final", lifespan=lifespan)
@@ -234,6 +251,10 @@ class TaskRequest(BaseModel):
     task_description: str = Field(..., min_length=1, max_length=settings.MAX_TASK_DESCRIPTION_LENGTH)
     session_id: Optional[str] = Field(None, regex=r'^[a-f0-9-]{36}$')
     code_context: Optional[str] = Field(None, max_length=settings.MAX_CODE_SIZE)
+    # Priorité dans la file d'admission (valeurs d'AgentPriority, la plus haute d'abord)
+    priority: int = Field(AgentPriority.NORMAL.value, ge=AgentPriority.LOW.value, le=AgentPriority.CRITICAL.value)
+    # SLO de latence des appels LLM des workers (routage entre fournisseurs)
+    latency_slo_seconds: Optional[float] = Field(None, gt=0, le=settings.MAX_LLM_RESPONSE_TIME)
     
     @validator('task_description')
     def validate_task_description(cls, v):
@@ -263,29 +284,6 @@ class FeedbackRequest(Feedback):
             return InputSanitizer.sanitize_task_description(v)
         return v
 
-# --- Workflow Creation ---
-def mark_as_completed(state: AgentState) -> dict:
-    """Nœud final pour marquer la tâche comme terminée."""
-    state["task_status"] = "completed"
-    return state
-
-def create_workflow(client: httpx.AsyncClient):
-    workflow = StateGraph(AgentState)
-    workflow.add_node("supervisor", supervisor.route)
-    workflow.add_node("code_generation", lambda s: worker_node_wrapper(s, "code_generation"))
-    workflow.add_node("documentation", lambda s: worker_node_wrapper(s, "documentation"))
-    workflow.add_node("finish", mark_as_completed)
-    workflow.set_entry_point("supervisor")
-    workflow.add_conditional_edges("supervisor", lambda x: x["next"], {
-        "code_generation": "code_generation", 
-        "documentation": "documentation", 
-        "finish": "finish"
-    })
-    workflow.add_edge("code_generation", "supervisor")
-    workflow.add_edge("documentation", "supervisor")
-    workflow.add_edge("finish", END)
-    return workflow.compile(checkpointer=ApiCheckpointer(client=client))
-
 # --- Endpoints ---
 @app.post("/invoke", tags=["Core"])
 async def invoke(req: TaskRequest, request: Request, app_instance=Depends(require_workflow), _=Depends(get_api_key)):
@@ -298,32 +296,42 @@ async def invoke(req: TaskRequest, request: Request, app_instance=Depends(requir
         "has_code_context": req.code_context is not None
     })
     
-    # Création de l'état initial
-    initial_state = AgentState(
-        messages=[],
-        plan=None,
-        next="supervisor",
-        results={},
-        session_id=session_id,
-        created_at=datetime.now(timezone.utc),
-        updated_at=datetime.now(timezone.utc),
-        task_description=req.task_description,
-        task_status="pending",
-        code_context=req.code_context,
-        working_memory=[],
-        errors=[],
-        logs=[],
-        feedback=None
-    )
+    # Single-flight : un doublon concurrent s'abonne au flux de l'exécution en cours
+    flight, run = None, None
+    if settings.INVOKE_SINGLE_FLIGHT_ENABLED:
+        flight = await get_single_flight()
+        is_leader, run = await flight.begin(request_key(req.task_description, req.code_context, req.session_id))
+        if not is_leader:
+            AuditLogger.log_task_event(AuditEventType.TASK_CREATED, session_id, {
+                "client_ip": request.client.host,
+                "coalesced": True
+            })
+            return StreamingResponse(run.subscribe(), media_type="text/event-stream")
     
-    # CORRECTIF 5: Appel de supervisor.create_plan juste après construction de l'état initial
-    initial_state = supervisor.create_plan(initial_state)
+    # Jusqu'au démarrage, tout échec ou déconnexion termine le run auquel les doublons sont abonnés
+    async with abort_on_failure(flight, run):
+        # Création de l'état initial (plan du superviseur inclus)
+        initial_state = build_initial_state(req.task_description, session_id, req.code_context,
+                                            req.latency_slo_seconds)
+        
+        # Contrôle d'admission : attente bornée ou 429 avant d'ouvrir le flux
+        try:
+            ticket = await get_admission_controller().acquire(req.priority)
+        except AdmissionRejected as e:
+            if run is not None:
+                await flight.abort(run, f"data: {json.dumps({'error': 'Orchestrator saturated'})}\n\n")
+            AuditLogger.log_task_event(AuditEventType.TASK_FAILED, session_id, {
+                "client_ip": request.client.host,
+                "error_type": "AdmissionRejected",
+                "reason": e.reason
+            })
+            raise HTTPException(429, "Orchestrator saturated, retry later",
+                                headers={"Retry-After": str(e.retry_after)})
     
     async def event_stream():
         try:
-            config = {"configurable": {"thread_id": session_id}}
-            async for chunk in app_instance.astream(initial_state, config):
-                yield f"data: {json.dumps(chunk, default=str)}\n\n"
+            async for line in stream_workflow_events(app_instance, initial_state, session_id):
+                yield line
             
             # Log de fin de tâche
             AuditLogger.log_task_event(AuditEventType.TASK_COMPLETED, session_id, {
@@ -338,8 +346,53 @@ async def invoke(req: TaskRequest, request: Request, app_instance=Depends(requir
                 "error_type": type(e).__name__
             })
             yield f"data: {json.dumps({'error': 'Task execution failed'})}\n\n"
+        finally:
+            ticket.release()
+    
+    if run is not None:
+        # Exécution détachée du client : les abonnés (dont l'initiateur) rejouent son flux
+        flight.start(run, event_stream())
+        return StreamingResponse(run.subscribe(), media_type="text/event-stream")
     
-    return StreamingResponse(event_stream(), media_type="text/plain")
+    # La tâche de fond libère aussi le créneau si le flux n'a jamais démarré
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             background=BackgroundTask(ticket.release))
+
+# --- Mode job : exécution détachée de la connexion HTTP ---
+async def require_job_queue():
+    queue = await get_job_queue()
+    if queue is None:
+        raise HTTPException(503, "Service Unavailable: job queue requires Redis.")
+    return queue
+
+@app.post("/jobs", tags=["Jobs"], status_code=202)
+async def submit_job(req: TaskRequest, request: Request, queue=Depends(require_job_queue), _=Depends(get_api_key)):
+    """Met la tâche en file et retourne immédiatement l'identifiant du job"""
+    session_id = req.session_id or str(uuid.uuid4())
+    job_id = await queue.submit(req.task_description, session_id, req.code_context)
+    AuditLogger.log_task_event(AuditEventType.TASK_CREATED, session_id, {
+        "client_ip": request.client.host,
+        "job_id": job_id,
+        "task_description_length": len(req.task_description),
+        "has_code_context": req.code_context is not None
+    })
+    return {"job_id": job_id, "session_id": session_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}", tags=["Jobs"])
+async def get_job(job_id: str, queue=Depends(require_job_queue), _=Depends(get_api_key)):
+    """Statut et résultats d'un job (polling)"""
+    job = await queue.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    job.pop("code_context", None)
+    return job
+
+@app.get("/jobs/{job_id}/events", tags=["Jobs"])
+async def job_events(job_id: str, queue=Depends(require_job_queue), _=Depends(get_api_key)):
+    """Flux SSE du job, rejoué depuis le début ; la déconnexion n'interrompt pas l'exécution"""
+    if await queue.get(job_id) is None:
+        raise HTTPException(404, "Job not found")
+    return StreamingResponse(queue.events(job_id), media_type="text/event-stream")
 
 @app.get("/status/{session_id}", tags=["Core"])
 async def status(session_id: str, request: Request, app_instance=Depends(require_workflow), _=Depends(get_api_key)):
@@ -548,21 +601,64 @@ async def cache_stats():
     return await cache.get_metrics()
 
 
+@app.get("/admission/stats", tags=["Performance"])
+async def admission_stats():
+    """Statistiques du contrôle d'admission de /invoke"""
+    return get_admission_controller().get_metrics()
+
+
+@app.get("/single_flight/stats", tags=["Performance"])
+async def single_flight_stats():
+    """Statistiques de déduplication des exécutions /invoke"""
+    return (await get_single_flight()).get_metrics()
+
+
+@app.get("/model_router/stats", tags=["Performance"])
+async def model_router_stats():
+    """Latence, débit et santé observés par modèle, sélections du routeur"""
+    return get_model_router().get_metrics()
+
+
+@app.get("/hedging/stats", tags=["Performance"])
+async def hedging_stats():
+    """Taux de hedge, budget restant et délais de hedge par modèle"""
+    return {"enabled": settings.HEDGING_ENABLED, **get_hedged_caller().get_metrics()}
+
+
+@app.get("/context_budget/stats", tags=["Performance"])
+async def context_budget_stats():
+    """Tokens de prompt économisés par le budget de contexte des workers"""
+    return get_context_budgeter().get_metrics()
+
+
+@app.get("/logging/stats", tags=["Performance"])
+async def logging_stats():
+    """Profondeur de l'anneau de logs, pertes par politique et agrégation des événements"""
+    aggregator = security_logger.aggregator
+    return {
+        "pipeline": {"enabled": settings.LOG_PIPELINE_ENABLED, **get_log_pipeline().get_metrics()},
+        "event_aggregation": aggregator.get_metrics() if aggregator is not None else {"enabled": False}
+    }
+
+
 @app.post("/cache/clear", tags=["Performance"])
 async def clear_cache(
     cache_type: Optional[str] = None,
     api_key: str = Depends(get_api_key)
 ):
-    """Vider le cache (avec authentification)"""
+    """Vider le cache (avec authentification) : nouvelle génération, anciennes entrées récupérées en arrière-plan"""
     cache = await get_cache()
     
     if cache_type:
         try:
             cache_type_enum = CacheType(cache_type)
-            deleted = await cache.clear_by_type(cache_type_enum)
-            return {"status": "success", "deleted_entries": deleted, "cache_type": cache_type}
         except ValueError:
             raise HTTPException(400, f"Invalid cache type: {cache_type}")
+        generation = await cache.clear_by_type(cache_type_enum)
+        # deleted_entries conservé pour les clients existants : rien n'est supprimé de façon synchrone,
+        # les entrées de l'ancienne génération sont récupérées en arrière-plan
+        return {"status": "success" if generation else "failed", "deleted_entries": 0,
+                "generation": generation, "cache_type": cache_type}
     else:
         success = await cache.clear_all()
         return {"status": "success" if success else "failed", "action": "clear_all"}
@@ -0,0 +1,138 @@
+"""
+Agrégation des événements de sécurité à haute fréquence
+Les types d'événements émis à chaque opération (hit et écriture de cache,
+stockage d'état, enregistrement de session) sont comptés dans des résumés par
+intervalle accompagnés de quelques exemples échantillonnés ; les types rares
+ou critiques restent journalisés un par un. La politique est définie par type.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from orchestrator.app.config import settings
+
+
+@dataclass(frozen=True)
+class EventPolicy:
+    """Politique de journalisation d'un type d'événement"""
+    aggregate: bool = False
+    individual_per_interval: int = 0  # Événements encore journalisés un par un dans chaque intervalle
+    exemplars: int = 3  # Exemples conservés par résumé (échantillonnage réservoir)
+
+
+# Types non listés : journalisés individuellement
+INDIVIDUAL = EventPolicy()
+
+HIGH_FREQUENCY_EVENT_POLICIES: Dict[str, EventPolicy] = {
+    "CACHE_HIT": EventPolicy(aggregate=True),
+    "CACHE_SET": EventPolicy(aggregate=True),
+    "CACHE_DELETE": EventPolicy(aggregate=True),
+    "CACHE_COMPRESSION": EventPolicy(aggregate=True),
+    "STATE_STORED": EventPolicy(aggregate=True),
+    "SESSION_REGISTERED": EventPolicy(aggregate=True, individual_per_interval=10),
+    "SESSION_REMOVED": EventPolicy(aggregate=True, individual_per_interval=10),
+    "NETWORK_ACCESS_ALLOWED": EventPolicy(aggregate=True, individual_per_interval=10),
+}
+
+
+@dataclass
+class EventSummary:
+    """Résumé d'un type d'événement sur un intervalle"""
+    event_type: str
+    count: int  # Événements agrégés (hors journalisés individuellement)
+    individually_logged: int
+    interval_seconds: float
+    exemplars: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class _Window:
+    __slots__ = ("individual", "aggregated", "exemplars")
+
+    def __init__(self):
+        self.individual = 0
+        self.aggregated = 0
+        self.exemplars: List[Dict[str, Any]] = []
+
+
+class SecurityEventAggregator:
+    """Décide, par type, si un événement est journalisé ou compté dans le résumé de l'intervalle"""
+
+    def __init__(self, policies: Optional[Dict[str, EventPolicy]] = None, interval: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, rng: Optional[random.Random] = None):
+        self.policies = dict(HIGH_FREQUENCY_EVENT_POLICIES if policies is None else policies)
+        self.interval = interval or settings.SECURITY_EVENT_SUMMARY_INTERVAL_SECONDS
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._windows: Dict[str, _Window] = {}
+        self._interval_start = clock()
+
+        self.metrics = {
+            'events': 0,
+            'logged_individually': 0,
+            'aggregated': 0,
+            'summaries': 0
+        }
+
+    def set_policy(self, event_type: str, policy: EventPolicy) -> None:
+        self.policies[event_type] = policy
+
+    def admit(self, event_type: str, details: Dict[str, Any]) -> bool:
+        """True si l'événement doit être journalisé individuellement"""
+        self.metrics['events'] += 1
+        policy = self.policies.get(event_type, INDIVIDUAL)
+        if not policy.aggregate:
+            self.metrics['logged_individually'] += 1
+            return True
+
+        with self._lock:
+            window = self._windows.get(event_type)
+            if window is None:
+                window = self._windows[event_type] = _Window()
+            if window.individual < policy.individual_per_interval:
+                window.individual += 1
+                self.metrics['logged_individually'] += 1
+                return True
+
+            window.aggregated += 1
+            if len(window.exemplars) < policy.exemplars:
+                window.exemplars.append(dict(details))
+            else:
+                # Échantillonnage réservoir : chaque événement a la même chance d'être un exemple
+                slot = self._rng.randrange(window.aggregated)
+                if slot < policy.exemplars:
+                    window.exemplars[slot] = dict(details)
+        self.metrics['aggregated'] += 1
+        return False
+
+    def due(self) -> bool:
+        return self._clock() - self._interval_start >= self.interval
+
+    def drain(self, force: bool = False) -> List[EventSummary]:
+        """Résumés de l'intervalle écoulé (ou en cours si force), puis nouvel intervalle"""
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self._interval_start
+            if not force and elapsed < self.interval:
+                return []
+            summaries = [
+                EventSummary(event_type, window.aggregated, window.individual, elapsed, window.exemplars)
+                for event_type, window in self._windows.items()
+                if window.aggregated
+            ]
+            self._windows = {}
+            self._interval_start = now
+        self.metrics['summaries'] += len(summaries)
+        return summaries
+
+    def get_metrics(self) -> Dict[str, Any]:
+        events = self.metrics['events']
+        return {
+            **self.metrics,
+            'interval_seconds': self.interval,
+            'aggregated_types': sorted(t for t, p in self.policies.items() if p.aggregate),
+            'aggregation_ratio': self.metrics['aggregated'] / events if events else 0.0
+        }
@@ -0,0 +1,326 @@
+"""
+Pipeline de logs non bloquant pour les événements d'audit et de sécurité
+Les handlers des loggers concernés sont remplacés par un QueuedLogHandler qui
+se contente de déposer l'enregistrement dans un anneau borné en mémoire ; un
+thread d'arrière-plan vide l'anneau par lots, formate et écrit vers les
+handlers d'origine. Disque lent ou collecteur de logs saturé n'ajoutent ainsi
+aucune latence aux requêtes : à saturation, la politique de débordement
+(drop_oldest, sample ou block) s'applique et les pertes sont comptées.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from orchestrator.app.config import settings
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_SAMPLE = "sample"
+OVERFLOW_BLOCK = "block"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_SAMPLE, OVERFLOW_BLOCK)
+
+# Loggers d'audit et de sécurité (security/logging.py et structured_logging.py)
+PIPELINE_LOGGERS = ("security", "audit", "security_audit", "compliance")
+
+
+class LogRing:
+    """Anneau borné d'enregistrements, thread-safe, avec politique de débordement"""
+
+    def __init__(self, capacity: int, overflow_policy: str = OVERFLOW_DROP_OLDEST,
+                 block_timeout: float = 0.05, sample_every: int = 10):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.sample_every = max(1, sample_every)
+
+        self._items: Deque[logging.LogRecord] = deque()
+        lock = threading.Lock()
+        self._not_empty = threading.Condition(lock)
+        self._not_full = threading.Condition(lock)
+        self._overflow_seen = 0
+        self.dropped: Counter = Counter()
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, record: logging.LogRecord, can_block: bool = True) -> bool:
+        """Dépose un enregistrement ; False s'il a été abandonné"""
+        with self._not_full:
+            if len(self._items) >= self.capacity and not self._make_room(record, can_block):
+                return False
+            self._items.append(record)
+            self.high_water = max(self.high_water, len(self._items))
+            self._not_empty.notify()
+            return True
+
+    def _make_room(self, record: logging.LogRecord, can_block: bool) -> bool:
+        if self.overflow_policy == OVERFLOW_BLOCK and can_block:
+            deadline = time.monotonic() + self.block_timeout
+            while len(self._items) >= self.capacity:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._not_full.wait(remaining):
+                    if len(self._items) < self.capacity:
+                        return True
+                    self.dropped['block_timeout'] += 1
+                    return False
+            return True
+
+        if self.overflow_policy == OVERFLOW_SAMPLE and record.levelno < logging.ERROR:
+            # Pendant la saturation, un enregistrement sur N remplace le plus ancien
+            self._overflow_seen += 1
+            if self._overflow_seen % self.sample_every:
+                self.dropped['sampled'] += 1
+                return False
+
+        # drop_oldest, block depuis le thread de vidage, erreurs en politique sample
+        self._items.popleft()
+        self.dropped['drop_oldest'] += 1
+        return True
+
+    def get_batch(self, max_items: int, timeout: float) -> List[logging.LogRecord]:
+        """Jusqu'à max_items enregistrements, en attendant au plus timeout s'il n'y en a aucun"""
+        with self._not_empty:
+            if not self._items:
+                self._not_empty.wait(timeout)
+            batch = [self._items.popleft() for _ in range(min(max_items, len(self._items)))]
+            if batch:
+                self._not_full.notify_all()
+            return batch
+
+    def wake(self):
+        with self._not_empty:
+            self._not_empty.notify_all()
+
+
+class QueuedLogHandler(logging.Handler):
+    """Handler du chemin de requête : dépôt dans l'anneau, sans formatage ni I/O"""
+
+    def __init__(self, pipeline: "LogPipeline", logger_name: str):
+        super().__init__()
+        self.pipeline = pipeline
+        self.logger_name = logger_name
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Le message (msg % args) est formaté sur le thread de vidage
+        record.pipeline_target = self.logger_name
+        self.pipeline.enqueue(record)
+
+
+class LogPipeline:
+    """Anneau borné et thread de vidage par lots vers les handlers d'origine"""
+
+    def __init__(self, capacity: Optional[int] = None, overflow_policy: Optional[str] = None,
+                 batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 block_timeout: Optional[float] = None, sample_every: Optional[int] = None):
+        self.ring = LogRing(
+            capacity or settings.LOG_PIPELINE_CAPACITY,
+            overflow_policy or settings.LOG_PIPELINE_OVERFLOW_POLICY,
+            block_timeout if block_timeout is not None else settings.LOG_PIPELINE_BLOCK_TIMEOUT_SECONDS,
+            sample_every or settings.LOG_PIPELINE_SAMPLE_EVERY
+        )
+        self.batch_size = batch_size or settings.LOG_PIPELINE_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.LOG_PIPELINE_FLUSH_INTERVAL_SECONDS
+
+        self._targets: Dict[str, List[logging.Handler]] = {}
+        self._restore: Dict[str, Tuple[List[logging.Handler], bool]] = {}
+        self._ticks: List[Callable[[], Any]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._exported_drops: Counter = Counter()
+
+        self.metrics = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'write_errors': 0,
+            'max_batch_seconds': 0.0
+        }
+
+    def attach(self, logger: logging.Logger) -> None:
+        """Reprend les handlers qu'atteignent les enregistrements du logger"""
+        if any(isinstance(handler, QueuedLogHandler) for handler in logger.handlers):
+            return
+        own = list(logger.handlers)
+        self._restore[logger.name] = (own, logger.propagate)
+        for handler in own:
+            logger.removeHandler(handler)
+        self._targets[logger.name] = own or self._inherited_handlers(logger)
+        logger.addHandler(QueuedLogHandler(self, logger.name))
+        logger.propagate = False
+
+    @staticmethod
+    def _inherited_handlers(logger: logging.Logger) -> List[logging.Handler]:
+        current: Optional[logging.Logger] = logger
+        while current is not None:
+            if current.handlers:
+                return list(current.handlers)
+            if not current.propagate:
+                break
+            current = current.parent
+        return [logging.lastResort] if logging.lastResort else []
+
+    def detach_all(self) -> None:
+        """Rend aux loggers leurs handlers d'origine"""
+        for name, (handlers, propagate) in self._restore.items():
+            logger = logging.getLogger(name)
+            for handler in list(logger.handlers):
+                if isinstance(handler, QueuedLogHandler):
+                    logger.removeHandler(handler)
+            for handler in handlers:
+                logger.addHandler(handler)
+            logger.propagate = propagate
+        self._targets = {}
+        self._restore = {}
+
+    def add_tick(self, callback: Callable[[], Any]) -> None:
+        """Tâche appelée par le thread de vidage à chaque cycle (résumés périodiques)"""
+        self._ticks.append(callback)
+
+    def enqueue(self, record: logging.LogRecord) -> bool:
+        # Le thread de vidage ne doit jamais s'attendre lui-même
+        accepted = self.ring.put(record, can_block=threading.current_thread() is not self._thread)
+        if accepted:
+            self.metrics['enqueued'] += 1
+        return accepted
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="log-pipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Vide l'anneau puis arrête le thread"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self.ring.wake()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            batch = self.ring.get_batch(self.batch_size, self.flush_interval)
+            if batch:
+                self.write_batch(batch)
+            for tick in self._ticks:
+                try:
+                    tick()
+                except Exception:
+                    self.metrics['write_errors'] += 1
+            self._export_drops()
+            if self._stopping.is_set() and not len(self.ring):
+                return
+
+    def write_batch(self, batch: Sequence[logging.LogRecord]) -> None:
+        """Formate et écrit un lot : une écriture par flux cible"""
+        started = time.perf_counter()
+        by_target: Dict[str, List[logging.LogRecord]] = {}
+        for record in batch:
+            by_target.setdefault(getattr(record, 'pipeline_target', ''), []).append(record)
+
+        for name, records in by_target.items():
+            for handler in self._targets.get(name, []):
+                self._write(handler, [record for record in records if record.levelno >= handler.level])
+
+        self.metrics['written'] += len(batch)
+        self.metrics['batches'] += 1
+        self.metrics['max_batch_seconds'] = max(self.metrics['max_batch_seconds'], time.perf_counter() - started)
+
+    def _write(self, handler: logging.Handler, records: List[logging.LogRecord]) -> None:
+        if not records:
+            return
+        stream = getattr(handler, 'stream', None)
+        if not isinstance(handler, logging.StreamHandler) or stream is None:
+            for record in records:
+                handler.handle(record)
+            return
+
+        lines = []
+        for record in records:
+            try:
+                if handler.filter(record):
+                    lines.append(handler.format(record) + handler.terminator)
+            except Exception:
+                self.metrics['write_errors'] += 1
+                handler.handleError(record)
+        if not lines:
+            return
+        handler.acquire()
+        try:
+            stream.write("".join(lines))
+            handler.flush()
+        except Exception:
+            self.metrics['write_errors'] += 1
+            handler.handleError(records[-1])
+        finally:
+            handler.release()
+
+    def _export_drops(self) -> None:
+        """Pertes reportées en métriques Prometheus depuis le thread de vidage"""
+        dropped = self.ring.dropped
+        if dropped == self._exported_drops:
+            return
+        from orchestrator.app.observability.monitoring import get_monitoring
+
+        monitoring = get_monitoring()
+        for reason, total in list(dropped.items()):
+            delta = total - self._exported_drops[reason]
+            if delta > 0:
+                monitoring.increment_counter("orchestrator_log_records_dropped_total", {"reason": reason}, delta)
+                self._exported_drops[reason] = total
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'overflow_policy': self.ring.overflow_policy,
+            'capacity': self.ring.capacity,
+            'depth': len(self.ring),
+            'high_water': self.ring.high_water,
+            'dropped': dict(self.ring.dropped),
+            'dropped_total': sum(self.ring.dropped.values()),
+            'loggers': sorted(self._targets)
+        }
+
+
+# Instance globale
+_log_pipeline: Optional[LogPipeline] = None
+
+
+def get_log_pipeline() -> LogPipeline:
+    """Retourne le pipeline de logs global"""
+    global _log_pipeline
+
+    if _log_pipeline is None:
+        _log_pipeline = LogPipeline()
+
+    return _log_pipeline
+
+
+def install_log_pipeline(logger_names: Sequence[str] = PIPELINE_LOGGERS) -> Optional[LogPipeline]:
+    """Place les loggers d'audit et de sécurité derrière le pipeline (après leur configuration)"""
+    if not settings.LOG_PIPELINE_ENABLED:
+        return None
+    pipeline = get_log_pipeline()
+    for name in logger_names:
+        pipeline.attach(logging.getLogger(name))
+    if pipeline._thread is None:
+        # Enregistrements en attente écrits même sans arrêt propre de l'application
+        atexit.register(pipeline.stop)
+    pipeline.start()
+    return pipeline
+
+
+def shutdown_log_pipeline() -> None:
+    """Écrit les enregistrements en attente et rend les handlers d'origine"""
+    if _log_pipeline is not None:
+        _log_pipeline.stop()
+        _log_pipeline.detach_all()
@@ -162,6 +162,41 @@ class ProductionMonitoring:
                 help="Total security events",
                 metric_type=MetricType.COUNTER,
                 labels=["event_type", "severity", "source"]
+            ),
+            CustomMetric(
+                name="orchestrator_admission_in_flight",
+                help="Workflow executions currently admitted",
+                metric_type=MetricType.GAUGE
+            ),
+            CustomMetric(
+                name="orchestrator_admission_queue_depth",
+                help="Workflow executions waiting for admission",
+                metric_type=MetricType.GAUGE
+            ),
+            CustomMetric(
+                name="orchestrator_admission_wait_seconds",
+                help="Time spent waiting for admission",
+                metric_type=MetricType.HISTOGRAM,
+                buckets=[0.01, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0]
+            ),
+            CustomMetric(
+                name="orchestrator_admission_rejections_total",
+                help="Workflow executions rejected by admission control",
+                metric_type=MetricType.COUNTER,
+                labels=["reason"]
+            ),
+            CustomMetric(
+                name="orchestrator_context_tokens_saved",
+                help="Prompt tokens removed by the worker context budget per LLM call",
+                metric_type=MetricType.HISTOGRAM,
+                labels=["agent"],
+                buckets=[0, 100, 500, 1000, 2500, 5000, 10000, 25000]
+            ),
+            CustomMetric(
+                name="orchestrator_log_records_dropped_total",
+                help="Audit/security log records dropped by the log pipeline overflow policy",
+                metric_type=MetricType.COUNTER,
+                labels=["reason"]
             )
         ]
         
@@ -0,0 +1,192 @@
+"""
+Contrôle d'admission des exécutions LangGraph de /invoke
+Nombre d'exécutions simultanées plafonné, file d'attente bornée par priorité,
+rejet anticipé (429 + Retry-After estimé sur le temps de service observé)
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from orchestrator.app.config import settings
+from orchestrator.app.observability.monitoring import get_monitoring
+
+
+class AdmissionRejected(Exception):
+    """Levée quand une exécution ne peut pas être admise (file pleine ou attente trop longue)"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Admission rejected ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """Créneau d'exécution admis ; release() est idempotent"""
+
+    def __init__(self, controller: "AdmissionController", priority: int, wait_seconds: float):
+        self.controller = controller
+        self.priority = priority
+        self.wait_seconds = wait_seconds
+        self.admitted_at = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        self.controller._release(time.monotonic() - self.admitted_at)
+
+
+class AdmissionController:
+    """
+    Sémaphore à file de priorité bornée.
+    Les priorités suivent AgentPriority (valeur la plus haute servie d'abord),
+    FIFO à priorité égale.
+    """
+
+    def __init__(self, max_in_flight: Optional[int] = None, max_queue: Optional[int] = None,
+                 queue_timeout: Optional[float] = None, service_time_alpha: float = 0.2):
+        self.max_in_flight = max_in_flight or settings.INVOKE_MAX_IN_FLIGHT
+        self.max_queue = max_queue if max_queue is not None else settings.INVOKE_MAX_QUEUE
+        self.queue_timeout = queue_timeout or settings.INVOKE_QUEUE_TIMEOUT_SECONDS
+        self.service_time_alpha = service_time_alpha
+
+        self.in_flight = 0
+        # (-priorité, ordre d'arrivée, future) : heapq est un tas minimum
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # Moyenne mobile exponentielle de la durée d'une exécution (secondes)
+        self.avg_service_time: Optional[float] = None
+
+        self.metrics = {
+            'admitted': 0,
+            'queued': 0,
+            'rejected_queue_full': 0,
+            'rejected_timeout': 0,
+            'completed': 0,
+            'max_queue_depth': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    def retry_after(self) -> int:
+        """Secondes estimées avant qu'un créneau se libère pour un nouvel arrivant"""
+        service_time = self.avg_service_time or 1.0
+        batches = (self.queue_depth + 1) / self.max_in_flight
+        return max(1, math.ceil(service_time * batches))
+
+    async def acquire(self, priority: int = 2) -> AdmissionTicket:
+        """Attend un créneau ; lève AdmissionRejected si la file est pleine ou l'attente expire"""
+        started = time.monotonic()
+        if self.in_flight < self.max_in_flight and not self.queue_depth:
+            self.in_flight += 1
+            return self._admitted(priority, 0.0)
+
+        if self.queue_depth >= self.max_queue:
+            self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (-priority, next(self._sequence), waiter))
+        self.metrics['queued'] += 1
+        self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self.queue_depth)
+        self._export()
+
+        try:
+            # Le créneau est transféré par _release : in_flight déjà compté
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                return self._admitted(priority, time.monotonic() - started)
+            self._reject("timeout")
+        except asyncio.CancelledError:
+            # Client parti pendant l'attente : rendre le créneau s'il avait été transféré
+            if not self._abandon(waiter):
+                self._release(0.0, record=False)
+            raise
+        return self._admitted(priority, time.monotonic() - started)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 2) -> AsyncIterator[AdmissionTicket]:
+        ticket = await self.acquire(priority)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _abandon(self, waiter: asyncio.Future) -> bool:
+        """Retire un appelant de la file ; False si le créneau lui a déjà été transféré"""
+        if waiter.done():
+            return False
+        waiter.cancel()
+        return True
+
+    def _admitted(self, priority: int, wait_seconds: float) -> AdmissionTicket:
+        self.metrics['admitted'] += 1
+        self.metrics['total_wait_seconds'] += wait_seconds
+        self.metrics['max_wait_seconds'] = max(self.metrics['max_wait_seconds'], wait_seconds)
+        get_monitoring().observe_histogram("orchestrator_admission_wait_seconds", wait_seconds)
+        self._export()
+        return AdmissionTicket(self, priority, wait_seconds)
+
+    def _reject(self, reason: str):
+        self.metrics[f'rejected_{reason}'] += 1
+        get_monitoring().increment_counter("orchestrator_admission_rejections_total", {"reason": reason})
+        raise AdmissionRejected(reason, self.retry_after())
+
+    def _release(self, service_time: float, record: bool = True):
+        if record:
+            self.metrics['completed'] += 1
+            if self.avg_service_time is None:
+                self.avg_service_time = service_time
+            else:
+                self.avg_service_time += self.service_time_alpha * (service_time - self.avg_service_time)
+
+        # Transfert direct au prochain appelant encore en attente
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                self._export()
+                return
+        self.in_flight -= 1
+        self._export()
+
+    def _export(self):
+        monitoring = get_monitoring()
+        monitoring.set_gauge("orchestrator_admission_in_flight", self.in_flight)
+        monitoring.set_gauge("orchestrator_admission_queue_depth", self.queue_depth)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        admitted = self.metrics['admitted']
+        return {
+            **self.metrics,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'max_in_flight': self.max_in_flight,
+            'max_queue': self.max_queue,
+            'avg_service_seconds': self.avg_service_time or 0.0,
+            'avg_wait_seconds': self.metrics['total_wait_seconds'] / admitted if admitted else 0.0,
+            'retry_after_seconds': self.retry_after()
+        }
+
+
+# Instance globale
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Retourne le contrôleur d'admission global de /invoke"""
+    global _admission_controller
+
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+
+    return _admission_controller
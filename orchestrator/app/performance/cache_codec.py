@@ -0,0 +1,291 @@
+"""
+Enveloppe binaire des entrées du cache Redis
+En-tête fixe compact (struct) suivi du corps sérialisé : msgpack si disponible,
+sinon JSON compact. Au-delà du seuil de compression, ou dès qu'un type dispose
+d'un dictionnaire entraîné, le corps est compressé (zstd si disponible, sinon
+deflate brut avec dictionnaire prédéfini). Le décodage lit l'en-tête en place
+via memoryview, sans copier le corps. Les entrées JSON historiques restent
+lisibles par le cache.
+"""
+import json
+import re
+import struct
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# 0xC1 n'est jamais émis par msgpack et ne peut commencer un document JSON
+ENVELOPE_MAGIC = 0xC1
+ENVELOPE_VERSION = 2
+
+CODEC_RAW = 0
+CODEC_DEFLATE = 1
+CODEC_ZSTD = 2
+
+FORMAT_JSON = 0
+FORMAT_MSGPACK = 1
+
+# magic, version, codec, format, dict_id, created_at, expires_at, compute_seconds (durée du calcul, XFetch)
+HEADER = struct.Struct(">BBBBIddf")
+# Version 1 : access_count et last_accessed à la place de compute_seconds (accès désormais suivis dans Redis)
+HEADER_V1 = struct.Struct(">BBBBIddId")
+
+DEFLATE_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# En dessous, même avec dictionnaire, la compression ne rapporte rien
+DICTIONARY_MIN_PAYLOAD = 32
+SAMPLE_MAX_BYTES = 4096
+
+# Fragments candidats au dictionnaire : clés JSON, chaînes courtes, mots
+_DICTIONARY_TOKEN = re.compile(rb'"[^"\\]{1,48}"\s*:?\s*|[^\s"]{3,48}\s?')
+
+
+class CacheCodecError(ValueError):
+    """Enveloppe illisible (format inconnu, dictionnaire ou codec indisponible)"""
+
+
+class DecodedEntry(NamedTuple):
+    value: Any
+    created_at: float
+    expires_at: float
+    compute_seconds: float
+
+
+@dataclass
+class CompressionDictionary:
+    """Dictionnaire de compression partagé entre réplicas, identifié par son CRC32"""
+    dict_id: int
+    data: bytes
+    _zstd: Any = field(default=None, repr=False)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CompressionDictionary':
+        # 0 est réservé à « sans dictionnaire »
+        return cls(zlib.crc32(data) or 1, data)
+
+    def zstd_dict(self):
+        if self._zstd is None:
+            self._zstd = zstandard.ZstdCompressionDict(self.data)
+        return self._zstd
+
+
+def train_dictionary(samples: List[bytes], size: int) -> bytes:
+    """Entraîne un dictionnaire sur des payloads similaires"""
+    if ZSTD_AVAILABLE:
+        try:
+            return zstandard.train_dictionary(size, samples).as_bytes()
+        except Exception:
+            pass  # Échantillons insuffisants pour zstd : entraînement par fréquence
+
+    document_frequency: Counter = Counter()
+    for sample in samples:
+        document_frequency.update(set(_DICTIONARY_TOKEN.findall(sample)))
+    threshold = max(2, len(samples) // 10)
+    common = [token for token, count in document_frequency.items() if count >= threshold]
+    # Fragments les plus rentables en fin de dictionnaire : distances les plus courtes
+    common.sort(key=lambda token: document_frequency[token] * len(token))
+    return b"".join(common)[-size:]
+
+
+class CacheCodec:
+    """Encode et décode les entrées du cache, avec dictionnaires par type"""
+
+    def __init__(
+        self,
+        compression_threshold: int = 1024,
+        dictionary_types: Iterable[str] = (),
+        dictionary_size: int = 8192,
+        dictionary_samples: int = 200
+    ):
+        self.compression_threshold = compression_threshold
+        self.dictionary_types = set(dictionary_types)
+        self.dictionary_size = dictionary_size
+        self.dictionary_samples = dictionary_samples
+
+        # Dictionnaire utilisé à l'encodage, par type ; tous les dictionnaires connus pour le décodage
+        self.active: Dict[str, CompressionDictionary] = {}
+        self.dictionaries: Dict[int, CompressionDictionary] = {}
+        self._samples: Dict[str, List[bytes]] = {}
+
+        self.stats: Dict[str, Counter] = {}
+
+    # Encodage
+
+    def encode(
+        self,
+        cache_type: str,
+        value: Any,
+        created_at: float,
+        expires_at: float,
+        compute_seconds: float = 0.0
+    ) -> Tuple[bytes, int]:
+        """Retourne l'enveloppe et la taille du corps avant compression"""
+        payload, body_format = self._serialize(value)
+        payload_size = len(payload)
+        body, codec, dict_id = payload, CODEC_RAW, 0
+
+        dictionary = self.active.get(cache_type)
+        if payload_size > self.compression_threshold or (dictionary and payload_size >= DICTIONARY_MIN_PAYLOAD):
+            compressed, used_codec = self._compress(payload, dictionary)
+            if len(compressed) < payload_size:
+                body, codec, dict_id = compressed, used_codec, dictionary.dict_id if dictionary else 0
+        if dictionary is None and cache_type in self.dictionary_types:
+            samples = self._samples.setdefault(cache_type, [])
+            if len(samples) < self.dictionary_samples:
+                samples.append(payload[:SAMPLE_MAX_BYTES])
+
+        envelope = HEADER.pack(
+            ENVELOPE_MAGIC, ENVELOPE_VERSION, codec, body_format, dict_id,
+            created_at, expires_at, compute_seconds
+        ) + body
+
+        stats = self.stats.setdefault(cache_type, Counter())
+        stats['entries'] += 1
+        stats['payload_bytes'] += payload_size
+        stats['stored_bytes'] += len(envelope)
+        if codec != CODEC_RAW:
+            stats['compressed'] += 1
+        if dict_id:
+            stats['with_dictionary'] += 1
+        return envelope, payload_size
+
+    @staticmethod
+    def _serialize(value: Any) -> Tuple[bytes, int]:
+        if MSGPACK_AVAILABLE:
+            return msgpack.packb(value, use_bin_type=True), FORMAT_MSGPACK
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8'), FORMAT_JSON
+
+    @staticmethod
+    def _compress(body: bytes, dictionary: Optional[CompressionDictionary]) -> Tuple[bytes, int]:
+        if ZSTD_AVAILABLE:
+            compressor = zstandard.ZstdCompressor(
+                level=ZSTD_LEVEL,
+                dict_data=dictionary.zstd_dict() if dictionary else None,
+                write_dict_id=False
+            )
+            return compressor.compress(body), CODEC_ZSTD
+        # Deflate brut (wbits négatif) : ni en-tête ni somme de contrôle zlib
+        if dictionary:
+            compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15, zdict=dictionary.data)
+        else:
+            compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+        return compressor.compress(body) + compressor.flush(), CODEC_DEFLATE
+
+    # Décodage
+
+    @staticmethod
+    def is_envelope(data: Any) -> bool:
+        return isinstance(data, (bytes, bytearray, memoryview)) and len(data) >= HEADER.size and data[0] == ENVELOPE_MAGIC
+
+    @staticmethod
+    def is_compressed(data: bytes) -> bool:
+        return data[2] != CODEC_RAW
+
+    def missing_dictionary(self, data: bytes) -> int:
+        """Identifiant du dictionnaire requis par l'enveloppe s'il n'est pas encore chargé, sinon 0"""
+        dict_id = struct.unpack_from(">I", data, 4)[0]
+        return dict_id if dict_id and dict_id not in self.dictionaries else 0
+
+    def decode(self, data: bytes) -> DecodedEntry:
+        view = memoryview(data)
+        magic, version = view[0], view[1]
+        if magic == ENVELOPE_MAGIC and version == ENVELOPE_VERSION:
+            header_size = HEADER.size
+            (_, _, codec, body_format, dict_id,
+             created_at, expires_at, compute_seconds) = HEADER.unpack_from(view)
+        elif magic == ENVELOPE_MAGIC and version == 1:
+            header_size = HEADER_V1.size
+            (_, _, codec, body_format, dict_id, created_at, expires_at, _, _) = HEADER_V1.unpack_from(view)
+            compute_seconds = 0.0
+        else:
+            raise CacheCodecError(f"Unsupported cache envelope version {version}")
+
+        # Tranche de la mémoire d'origine : aucune copie avant décompression
+        body = view[header_size:]
+        dictionary = None
+        if dict_id:
+            dictionary = self.dictionaries.get(dict_id)
+            if dictionary is None:
+                raise CacheCodecError(f"Unknown compression dictionary {dict_id}")
+
+        if codec == CODEC_DEFLATE:
+            if dictionary:
+                body = zlib.decompressobj(-15, zdict=dictionary.data).decompress(body)
+            else:
+                body = zlib.decompress(body, -15)
+        elif codec == CODEC_ZSTD:
+            if not ZSTD_AVAILABLE:
+                raise CacheCodecError("zstandard not available to decode cache entry")
+            decompressor = zstandard.ZstdDecompressor(dict_data=dictionary.zstd_dict() if dictionary else None)
+            body = decompressor.decompress(body)
+        elif codec != CODEC_RAW:
+            raise CacheCodecError(f"Unknown cache codec {codec}")
+
+        if body_format == FORMAT_MSGPACK:
+            if not MSGPACK_AVAILABLE:
+                raise CacheCodecError("msgpack not available to decode cache entry")
+            value = msgpack.unpackb(body, raw=False)
+        else:
+            value = json.loads(str(body, 'utf-8'))
+        return DecodedEntry(value, created_at, expires_at, compute_seconds)
+
+    # Dictionnaires
+
+    def ready_to_train(self, cache_type: str) -> bool:
+        return (cache_type not in self.active
+                and len(self._samples.get(cache_type, ())) >= self.dictionary_samples)
+
+    def train(self, cache_type: str) -> CompressionDictionary:
+        """Entraîne un dictionnaire sur les échantillons collectés (non activé)"""
+        samples = self._samples.pop(cache_type, [])
+        return CompressionDictionary.from_bytes(train_dictionary(samples, self.dictionary_size))
+
+    def register(self, dictionary: CompressionDictionary) -> None:
+        self.dictionaries[dictionary.dict_id] = dictionary
+
+    def activate(self, cache_type: str, dictionary: CompressionDictionary) -> None:
+        self.register(dictionary)
+        self.active[cache_type] = dictionary
+        self._samples.pop(cache_type, None)
+
+    def reset(self) -> None:
+        """Oublie les dictionnaires actifs (ils seront ré-entraînés) ; les connus restent décodables"""
+        self.active = {}
+        self._samples = {}
+        self.stats = {}
+
+    def get_metrics(self) -> Dict[str, Any]:
+        per_type = {}
+        for cache_type, stats in self.stats.items():
+            entries = stats['entries'] or 1
+            per_type[cache_type] = {
+                **stats,
+                'payload_bytes_per_entry': round(stats['payload_bytes'] / entries, 1),
+                'stored_bytes_per_entry': round(stats['stored_bytes'] / entries, 1),
+                'compression_ratio': round(stats['stored_bytes'] / max(stats['payload_bytes'], 1), 3)
+            }
+        return {
+            'zstd_available': ZSTD_AVAILABLE,
+            'msgpack_available': MSGPACK_AVAILABLE,
+            'compression_threshold': self.compression_threshold,
+            'dictionaries': {
+                cache_type: {'dict_id': dictionary.dict_id, 'size': len(dictionary.data)}
+                for cache_type, dictionary in self.active.items()
+            },
+            'pending_samples': {cache_type: len(samples) for cache_type, samples in self._samples.items()},
+            'per_type': per_type
+        }
@@ -85,6 +85,20 @@ class CallResult:
         if self.timestamp is None:
             self.timestamp = datetime.now()
 
+@dataclass
+class CircuitBreakerMetrics:
+    """Snapshot of circuit breaker statistics"""
+    name: str
+    state: CircuitState
+    failure_count: int
+    success_count: int
+    total_calls: int
+    failure_rate: float
+    slow_call_rate: float
+    last_failure_time: Optional[datetime]
+    state_transition_time: datetime
+    call_history: List[CallResult]
+
 class FallbackStrategy:
     """Advanced fallback strategy for circuit breaker"""
     
@@ -225,6 +239,7 @@ class AdvancedCircuitBreaker:
         # Execute the call
         start_time = time.time()
         call_successful = False
+        cancelled = False
         error_message = None
         
         try:
@@ -244,6 +259,11 @@ class AdvancedCircuitBreaker:
                 f"Call to '{self.name}' timed out after {self.config.call_timeout_seconds}s"
             )
             
+        except asyncio.CancelledError:
+            # Cancelled by the caller (e.g. losing hedged request): neither success nor failure
+            cancelled = True
+            raise
+            
         except Exception as e:
             error_message = str(e)
             async with self._lock:
@@ -252,15 +272,16 @@ class AdvancedCircuitBreaker:
             
         finally:
             # Record call result
-            duration_ms = (time.time() - start_time) * 1000
-            call_result = CallResult(
-                success=call_successful,
-                duration_ms=duration_ms,
-                error=error_message
-            )
-            
-            async with self._lock:
-                self.call_history.append(call_result)
+            if not cancelled:
+                duration_ms = (time.time() - start_time) * 1000
+                call_result = CallResult(
+                    success=call_successful,
+                    duration_ms=duration_ms,
+                    error=error_message
+                )
+                
+                async with self._lock:
+                    self.call_history.append(call_result)
     
     async def _execute_with_timeout(
         self,
@@ -372,6 +393,15 @@ class AdvancedCircuitBreaker:
             self.state = CircuitState.OPEN
             self.state_transition_time = datetime.utcnow()
     
+    def is_open(self) -> bool:
+        """True while calls are rejected (OPEN and recovery timeout not yet elapsed)"""
+        if self.state == CircuitState.FORCED_OPEN:
+            return True
+        if self.state != CircuitState.OPEN:
+            return False
+        return not (self.last_failure_time and
+                    datetime.utcnow() - self.last_failure_time >= timedelta(seconds=self.config.timeout_seconds))
+    
     def get_metrics(self) -> CircuitBreakerMetrics:
         """Get current circuit breaker metrics"""
         recent_calls = list(self.call_history)[-50:]  # Last 50 calls
@@ -0,0 +1,245 @@
+"""
+Requêtes LLM hedgées pour réduire la latence de queue des workers
+Si l'appel primaire n'a pas produit son premier token au bout du percentile
+configuré des latences récentes, un appel de secours part vers le modèle suivant
+du routage ; la première réponse complète l'emporte, l'autre est annulée.
+Le taux de hedge est plafonné par un budget (seau à jetons) et aucun fournisseur
+dont le circuit est ouvert ne sert de secours.
+"""
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from orchestrator.app.config import settings
+from orchestrator.app.performance.circuit_breaker import (
+    AdvancedCircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitBreakerManager,
+    get_circuit_manager,
+)
+from orchestrator.app.performance.model_router import ModelProfile
+
+# Un circuit par fournisseur LLM dans le gestionnaire global
+LLM_CIRCUIT_PREFIX = "llm:"
+
+
+def llm_circuit_config() -> CircuitBreakerConfig:
+    """Délai d'appel et seuil d'appel lent adaptés aux durées de génération LLM"""
+    max_seconds = int(settings.MAX_LLM_RESPONSE_TIME)
+    return CircuitBreakerConfig(call_timeout_seconds=max_seconds, slow_call_threshold_ms=max_seconds * 1000)
+
+
+async def get_llm_circuit_breaker(provider: str,
+                                  manager: Optional[CircuitBreakerManager] = None) -> AdvancedCircuitBreaker:
+    manager = manager or get_circuit_manager()
+    return await manager.get_circuit_breaker(f"{LLM_CIRCUIT_PREFIX}{provider}", llm_circuit_config())
+
+
+class HedgeBudget:
+    """Seau à jetons : chaque requête crédite ratio, chaque hedge consomme un jeton"""
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+
+    def deposit(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class HedgeAttempt:
+    """Un appel de la course : premier token et propriété du flux de tokens"""
+
+    def __init__(self, race: "HedgeRace", profile: ModelProfile, is_backup: bool):
+        self.race = race
+        self.profile = profile
+        self.is_backup = is_backup
+        self.started_at = time.monotonic()
+        self.first_token = asyncio.Event()
+
+    def mark_first_token(self):
+        if not self.first_token.is_set():
+            self.first_token.set()
+            self.race.on_first_response(self)
+
+    def owns_stream(self) -> bool:
+        """Seul l'appel qui a produit le premier token relaie ses tokens au client"""
+        if self.race.stream_owner is None:
+            self.race.stream_owner = self
+        return self.race.stream_owner is self
+
+
+class HedgeRace:
+    """État partagé entre l'appel primaire et son éventuel secours"""
+
+    def __init__(self, caller: "HedgedCaller"):
+        self.caller = caller
+        self.stream_owner: Optional[HedgeAttempt] = None
+
+    def attempt(self, profile: ModelProfile, is_backup: bool = False) -> HedgeAttempt:
+        return HedgeAttempt(self, profile, is_backup)
+
+    def on_first_response(self, attempt: HedgeAttempt):
+        self.caller.observe(attempt.profile.key, time.monotonic() - attempt.started_at)
+
+
+class HedgeTokenHandler(AsyncCallbackHandler):
+    """Signale le premier token d'un appel et ne relaie que les tokens du propriétaire du flux"""
+
+    def __init__(self, attempt: HedgeAttempt, relay: Optional[AsyncCallbackHandler] = None):
+        self.attempt = attempt
+        self.relay = relay
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.attempt.mark_first_token()
+        if self.relay is not None and self.attempt.owns_stream():
+            await self.relay.on_llm_new_token(token, **kwargs)
+
+
+# (modèle, tentative) -> réponse de l'appel
+AttemptCall = Callable[[ModelProfile, HedgeAttempt], Awaitable[Any]]
+
+
+class HedgedCaller:
+    """Politique de hedge : délai au percentile des premiers tokens, budget et circuits"""
+
+    def __init__(self, percentile: Optional[float] = None, budget_ratio: Optional[float] = None,
+                 budget_burst: Optional[float] = None, min_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, min_samples: Optional[int] = None,
+                 window: int = 200, circuit_manager: Optional[CircuitBreakerManager] = None):
+        self.percentile = percentile or settings.HEDGING_PERCENTILE
+        self.min_delay = min_delay if min_delay is not None else settings.HEDGING_MIN_DELAY_SECONDS
+        self.max_delay = max_delay if max_delay is not None else settings.HEDGING_MAX_DELAY_SECONDS
+        self.min_samples = min_samples if min_samples is not None else settings.HEDGING_MIN_SAMPLES
+        self.budget = HedgeBudget(budget_ratio if budget_ratio is not None else settings.HEDGING_BUDGET_RATIO,
+                                  budget_burst if budget_burst is not None else settings.HEDGING_BUDGET_BURST)
+        self.circuit_manager = circuit_manager or get_circuit_manager()
+        # Latences au premier token (ou à la réponse sans streaming) par modèle
+        self.first_response: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+        self.metrics = {
+            'requests': 0,
+            'hedged': 0,
+            'hedge_wins': 0,  # Réponses fournies par le secours
+            'budget_exhausted': 0,
+            'no_target': 0,  # Aucun secours disponible (circuits ouverts)
+            'cancelled': 0
+        }
+
+    def observe(self, key: str, seconds: float):
+        self.first_response[key].append(seconds)
+
+    def hedge_delay(self, key: str) -> float:
+        """Percentile des premières réponses récentes, borné ; max_delay tant que l'historique est court"""
+        samples = self.first_response[key]
+        if len(samples) < self.min_samples:
+            return self.max_delay
+        ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+        return min(max(value, self.min_delay), self.max_delay)
+
+    def is_circuit_open(self, provider: str) -> bool:
+        breaker = self.circuit_manager.circuit_breakers.get(f"{LLM_CIRCUIT_PREFIX}{provider}")
+        return breaker is not None and breaker.is_open()
+
+    def hedge_target(self, candidates: List[ModelProfile]) -> Optional[ModelProfile]:
+        primary = candidates[0]
+        for profile in candidates[1:]:
+            if profile.key != primary.key and not self.is_circuit_open(profile.provider):
+                return profile
+        return None
+
+    async def call(self, candidates: List[ModelProfile], attempt_call: AttemptCall) -> Tuple[Any, ModelProfile]:
+        """
+        Exécute candidates[0], hedgé au besoin vers le premier candidat suivant dont
+        le circuit est fermé ; retourne (réponse, modèle gagnant).
+        """
+        self.metrics['requests'] += 1
+        self.budget.deposit()
+        race = HedgeRace(self)
+        primary = race.attempt(candidates[0])
+        tasks: Dict[asyncio.Task, HedgeAttempt] = {asyncio.create_task(self._run(attempt_call, primary)): primary}
+
+        first_token = asyncio.create_task(primary.first_token.wait())
+        try:
+            done, _ = await asyncio.wait([first_token, *tasks], timeout=self.hedge_delay(primary.profile.key),
+                                         return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            first_token.cancel()
+
+        if not done:
+            # Aucun token du primaire dans le délai : secours si budget et cible disponibles
+            target = self.hedge_target(candidates)
+            if target is None:
+                self.metrics['no_target'] += 1
+            elif not self.budget.try_spend():
+                self.metrics['budget_exhausted'] += 1
+            else:
+                self.metrics['hedged'] += 1
+                backup = race.attempt(target, is_backup=True)
+                tasks[asyncio.create_task(self._run(attempt_call, backup))] = backup
+
+        try:
+            return await self._first_success(tasks)
+        finally:
+            await self._cancel(tasks)
+
+    async def _run(self, attempt_call: AttemptCall, attempt: HedgeAttempt) -> Any:
+        result = await attempt_call(attempt.profile, attempt)
+        # Sans streaming, la réponse complète tient lieu de premier token
+        attempt.mark_first_token()
+        return result
+
+    async def _first_success(self, tasks: Dict[asyncio.Task, HedgeAttempt]) -> Tuple[Any, ModelProfile]:
+        pending = set(tasks)
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    attempt = tasks[task]
+                    if attempt.is_backup:
+                        self.metrics['hedge_wins'] += 1
+                    return task.result(), attempt.profile
+                last_error = task.exception()
+        raise last_error
+
+    async def _cancel(self, tasks: Dict[asyncio.Task, HedgeAttempt]):
+        losers = [task for task in tasks if not task.done()]
+        for task in losers:
+            task.cancel()
+        if losers:
+            self.metrics['cancelled'] += len(losers)
+            await asyncio.gather(*losers, return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        requests = self.metrics['requests']
+        return {
+            **self.metrics,
+            'hedge_rate': self.metrics['hedged'] / requests if requests else 0.0,
+            'budget_tokens': round(self.budget.tokens, 2),
+            'hedge_delay_seconds': {key: round(self.hedge_delay(key), 3) for key in self.first_response}
+        }
+
+
+# Instance globale
+_hedged_caller: Optional[HedgedCaller] = None
+
+
+def get_hedged_caller() -> HedgedCaller:
+    """Retourne la politique de hedge globale des workers"""
+    global _hedged_caller
+
+    if _hedged_caller is None:
+        _hedged_caller = HedgedCaller()
+
+    return _hedged_caller
@@ -0,0 +1,289 @@
+"""
+Cache sémantique des réponses LLM devant les workers
+Deux niveaux : correspondance exacte en processus, puis similarité d'embedding
+"""
+import re
+import math
+import time
+import zlib
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Callable, Set, Tuple
+
+from orchestrator.app.config import settings
+from orchestrator.app.security.logging import security_logger
+from orchestrator.app.performance.redis_cache import cache_llm_response, get_cached_llm_response
+
+# Vecteur creux : index de hachage -> poids (normalisé L2)
+SparseVector = Dict[int, float]
+EmbeddingFunction = Callable[[str], SparseVector]
+
+_WORD_RE = re.compile(r"\w+")
+_HASH_DIMENSIONS = 1 << 18
+
+
+def normalize_task(text: str) -> str:
+    """Normalise une description de tâche (casse, espaces)"""
+    return " ".join(text.lower().split())
+
+
+def hashed_embedding(text: str) -> SparseVector:
+    """
+    Embedding local par hachage d'unigrammes et bigrammes.
+    Déterministe entre processus (crc32) et sans dépendance à un modèle.
+    """
+    tokens = _WORD_RE.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    vector: SparseVector = {}
+    for feature in features:
+        index = zlib.crc32(feature.encode("utf-8")) % _HASH_DIMENSIONS
+        vector[index] = vector.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    if norm:
+        for index in vector:
+            vector[index] /= norm
+    return vector
+
+
+def cosine_similarity(a: SparseVector, b: SparseVector) -> float:
+    """Similarité cosinus entre deux vecteurs creux normalisés"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(i, 0.0) for i, w in a.items())
+
+
+@dataclass
+class LLMCacheEntry:
+    """Entrée du cache LLM en processus"""
+    response: str
+    bucket: Tuple[str, str, str]
+    vector: SparseVector
+    expires_at: float
+    hits: int = 0
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.monotonic()) >= self.expires_at
+
+
+@dataclass
+class LLMCacheResult:
+    """Résultat d'une recherche dans le cache"""
+    response: str
+    tier: str  # exact | redis | semantic
+    similarity: float = 1.0
+    key: str = field(default="")
+
+
+class SemanticLLMCache:
+    """
+    Cache des réponses LLM indexé par (agent_type, model, tâche normalisée, hash du code_context):
+    - Niveau 1 : correspondance exacte en processus (LRU + TTL monotone)
+    - Niveau 1b : Redis partagé via cache_llm_response (optionnel)
+    - Niveau 2 : similarité cosinus dans le même (agent, modèle, code_context)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        similarity_threshold: Optional[float] = None,
+        embedding_fn: Optional[EmbeddingFunction] = None,
+        use_redis: Optional[bool] = None
+    ):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LLM_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.LLM_CACHE_MAX_ENTRIES
+        self.similarity_threshold = (
+            similarity_threshold if similarity_threshold is not None
+            else settings.LLM_CACHE_SIMILARITY_THRESHOLD
+        )
+        self.embedding_fn = embedding_fn or hashed_embedding
+        self.use_redis = use_redis if use_redis is not None else settings.LLM_CACHE_REDIS_ENABLED
+
+        self._entries: "OrderedDict[str, LLMCacheEntry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, str, str], Set[str]] = {}
+
+        # Métriques
+        self.metrics = {
+            'hits_exact': 0,
+            'hits_redis': 0,
+            'hits_semantic': 0,
+            'misses': 0,
+            'sets': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'errors': 0
+        }
+
+    @staticmethod
+    def code_hash(code_context: str) -> str:
+        return hashlib.sha256((code_context or "").encode("utf-8")).hexdigest()
+
+    @classmethod
+    def context_hash(cls, code_context: str, history: str = "") -> str:
+        """Empreinte du contexte du prompt : code, plus l'historique s'il y en a un"""
+        if not history:
+            return cls.code_hash(code_context)
+        return hashlib.sha256("\x1f".join([cls.code_hash(code_context), cls.code_hash(history)]).encode("utf-8")).hexdigest()
+
+    def make_key(self, agent_type: str, model: str, task_description: str, code_context: str, history: str = "") -> str:
+        """Clé exacte déterministe (aussi utilisée côté Redis)"""
+        raw = "\x1f".join([agent_type, model, normalize_task(task_description), self.context_hash(code_context, history)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(
+        self,
+        agent_type: str,
+        model: str,
+        task_description: str,
+        code_context: str = "",
+        history: str = ""
+    ) -> Optional[LLMCacheResult]:
+        """Recherche une réponse : exact local, puis Redis, puis sémantique
+
+        history : historique envoyé dans le prompt ; deux historiques différents ne partagent aucune réponse.
+        """
+        key = self.make_key(agent_type, model, task_description, code_context, history)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.is_expired(now):
+                self._remove(key)
+                self.metrics['expirations'] += 1
+            else:
+                self._entries.move_to_end(key)
+                entry.hits += 1
+                self.metrics['hits_exact'] += 1
+                return LLMCacheResult(entry.response, "exact", 1.0, key)
+
+        bucket = (agent_type, model, self.context_hash(code_context, history))
+
+        if self.use_redis:
+            try:
+                cached = await get_cached_llm_response(key)
+            except Exception as e:
+                self.metrics['errors'] += 1
+                security_logger.log_error("LLM cache redis lookup failed", e)
+                cached = None
+            if cached is not None:
+                self._store(key, bucket, normalize_task(task_description), cached)
+                self.metrics['hits_redis'] += 1
+                return LLMCacheResult(cached, "redis", 1.0, key)
+
+        if self.similarity_threshold < 1.0 and self._buckets.get(bucket):
+            match = self._semantic_lookup(bucket, normalize_task(task_description), now)
+            if match is not None:
+                self.metrics['hits_semantic'] += 1
+                return match
+
+        self.metrics['misses'] += 1
+        return None
+
+    async def set(
+        self,
+        agent_type: str,
+        model: str,
+        task_description: str,
+        code_context: str,
+        response: str,
+        history: str = ""
+    ) -> str:
+        """Stocke une réponse réussie dans les niveaux actifs"""
+        key = self.make_key(agent_type, model, task_description, code_context, history)
+        bucket = (agent_type, model, self.context_hash(code_context, history))
+        self._store(key, bucket, normalize_task(task_description), response)
+        self.metrics['sets'] += 1
+
+        if self.use_redis:
+            try:
+                await cache_llm_response(key, response)
+            except Exception as e:
+                self.metrics['errors'] += 1
+                security_logger.log_error("LLM cache redis store failed", e)
+        return key
+
+    def _semantic_lookup(self, bucket: Tuple[str, str, str], task: str, now: float) -> Optional[LLMCacheResult]:
+        """Meilleur voisin au-dessus du seuil, limité au même bucket"""
+        try:
+            query = self.embedding_fn(task)
+        except Exception as e:
+            self.metrics['errors'] += 1
+            security_logger.log_error("LLM cache embedding failed", e)
+            return None
+
+        best_key, best_score = None, self.similarity_threshold
+        for key in list(self._buckets.get(bucket, ())):
+            entry = self._entries[key]
+            if entry.is_expired(now):
+                self._remove(key)
+                self.metrics['expirations'] += 1
+                continue
+            score = cosine_similarity(query, entry.vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        if best_key is None:
+            return None
+        entry = self._entries[best_key]
+        self._entries.move_to_end(best_key)
+        entry.hits += 1
+        return LLMCacheResult(entry.response, "semantic", best_score, best_key)
+
+    def _store(self, key: str, bucket: Tuple[str, str, str], task: str, response: str):
+        vector = self.embedding_fn(task) if self.similarity_threshold < 1.0 else {}
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = LLMCacheEntry(
+            response=response,
+            bucket=bucket,
+            vector=vector,
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        self._buckets.setdefault(bucket, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.metrics['evictions'] += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._buckets.get(entry.bucket)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._buckets[entry.bucket]
+
+    def clear(self):
+        self._entries.clear()
+        self._buckets.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métriques du cache avec ratio de hit"""
+        hits = self.metrics['hits_exact'] + self.metrics['hits_redis'] + self.metrics['hits_semantic']
+        total = hits + self.metrics['misses']
+        return {
+            **self.metrics,
+            'hits': hits,
+            'hit_ratio': hits / total if total else 0.0,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'similarity_threshold': self.similarity_threshold
+        }
+
+
+# Instance globale
+_llm_cache_instance: Optional[SemanticLLMCache] = None
+
+
+def get_llm_cache() -> SemanticLLMCache:
+    """Retourne l'instance globale du cache LLM"""
+    global _llm_cache_instance
+
+    if _llm_cache_instance is None:
+        _llm_cache_instance = SemanticLLMCache()
+
+    return _llm_cache_instance
@@ -0,0 +1,354 @@
+"""
+Routage des agents workers entre fournisseurs LLM selon la latence observée
+Par modèle : EWMA de la latence au premier token, du débit (tokens/s) et du taux
+d'erreur, plus les appels en cours. Le routeur retient le modèle le moins cher dont
+la latence estimée tient dans le SLO de la requête ; un fournisseur dégradé est mis
+en quarantaine et les suivants prennent le relais.
+Rejouable hors ligne sur une trace de latences enregistrée :
+    python -m orchestrator.app.performance.model_router trace.jsonl
+"""
+import argparse
+import json
+import statistics
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from orchestrator.app.config import settings
+from orchestrator.app.observability.monitoring import get_monitoring
+from orchestrator.app.security.logging import security_logger
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Modèle routable et ses valeurs a priori (avant toute mesure)"""
+    provider: str  # openai, anthropic, gemini, ollama
+    model: str
+    cost_per_1k_tokens: float  # Coût moyen entrée + sortie (USD), 0 pour les modèles locaux
+    first_token_seconds: float
+    tokens_per_second: float
+    max_concurrency: int = 8  # Au-delà, les appels se mettent en file chez le fournisseur
+    context_window: int = 128000  # Tokens (prompt + réponse)
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+
+# Catalogue des modèles ; les valeurs a priori sont corrigées dès les premiers appels
+MODEL_CATALOG: Dict[str, ModelProfile] = {profile.key: profile for profile in (
+    ModelProfile("openai", "gpt-4o", 0.010, 0.8, 60.0),
+    ModelProfile("openai", "gpt-4o-mini", 0.0006, 0.5, 90.0),
+    ModelProfile("anthropic", "claude-3-5-sonnet-20240620", 0.009, 1.0, 55.0, context_window=200000),
+    ModelProfile("anthropic", "claude-3-haiku-20240307", 0.0008, 0.5, 110.0, context_window=200000),
+    ModelProfile("gemini", "gemini-1.5-pro", 0.007, 1.2, 50.0, context_window=1000000),
+    ModelProfile("gemini", "gemini-1.5-flash", 0.0004, 0.6, 120.0, context_window=1000000),
+    ModelProfile("ollama", "qwen-coder-32b:latest", 0.0, 1.5, 18.0, max_concurrency=1, context_window=32768),
+    ModelProfile("ollama", "llama3:8b-instruct-q6_k", 0.0, 0.4, 55.0, max_concurrency=1, context_window=8192),
+)}
+
+# Modèles de qualité acceptable par agent ; le premier est le modèle historique de l'agent
+AGENT_CANDIDATES: Dict[str, List[str]] = {
+    "code_generation": ["openai:gpt-4o", "anthropic:claude-3-5-sonnet-20240620",
+                        "gemini:gemini-1.5-pro", "ollama:qwen-coder-32b:latest"],
+    "documentation": ["anthropic:claude-3-5-sonnet-20240620", "openai:gpt-4o",
+                      "gemini:gemini-1.5-flash", "anthropic:claude-3-haiku-20240307",
+                      "ollama:llama3:8b-instruct-q6_k"],
+    "testing": ["openai:gpt-4o", "anthropic:claude-3-5-sonnet-20240620",
+                "gemini:gemini-1.5-pro", "ollama:qwen-coder-32b:latest"],
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximation du nombre de tokens (~4 caractères par token)"""
+    return max(1, len(text) // 4)
+
+
+class ModelStats:
+    """Statistiques glissantes d'un modèle"""
+
+    def __init__(self, profile: ModelProfile):
+        self.first_token_seconds = profile.first_token_seconds
+        self.tokens_per_second = profile.tokens_per_second
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.degraded_until = 0.0
+        self.samples = 0
+
+
+class LatencyAwareRouter:
+    """Sélection du modèle le moins cher respectant le SLO, repli automatique sur dégradation"""
+
+    def __init__(self, catalog: Optional[Dict[str, ModelProfile]] = None,
+                 candidates: Optional[Dict[str, List[str]]] = None,
+                 providers: Optional[Iterable[str]] = None, alpha: float = 0.2,
+                 error_threshold: float = 0.5, max_consecutive_failures: int = 3,
+                 cooldown_seconds: Optional[float] = None, trace_path: Optional[str] = None,
+                 clock=time.monotonic):
+        self.catalog = catalog if catalog is not None else MODEL_CATALOG
+        self.candidates = candidates if candidates is not None else AGENT_CANDIDATES
+        self.providers: Optional[Set[str]] = set(providers) if providers is not None else None
+        self.alpha = alpha
+        self.error_threshold = error_threshold
+        self.max_consecutive_failures = max_consecutive_failures
+        self.cooldown_seconds = cooldown_seconds if cooldown_seconds is not None else settings.MODEL_ROUTER_COOLDOWN_SECONDS
+        self.trace_path = trace_path
+        self.clock = clock
+        self.stats: Dict[str, ModelStats] = {key: ModelStats(profile) for key, profile in self.catalog.items()}
+
+        self.metrics = {
+            'selections': defaultdict(int),
+            'slo_misses': 0,  # Aucun modèle sain ne tenait le SLO estimé
+            'fallbacks': 0,
+            'degradations': 0
+        }
+
+    def estimate_latency(self, key: str, expected_tokens: int) -> float:
+        """Latence attendue : premier token + génération, majorée par la file chez le fournisseur"""
+        profile, stats = self.catalog[key], self.stats[key]
+        service = stats.first_token_seconds + expected_tokens / max(stats.tokens_per_second, 0.1)
+        return service * (1 + stats.in_flight / profile.max_concurrency)
+
+    def is_degraded(self, key: str) -> bool:
+        return self.stats[key].degraded_until > self.clock()
+
+    def rank(self, agent_type: str, slo_seconds: Optional[float] = None,
+             expected_tokens: Optional[int] = None) -> List[ModelProfile]:
+        """
+        Ordre d'essai des modèles pour un appel : modèles sains tenant le SLO du moins
+        cher au plus cher, puis modèles sains du plus rapide au plus lent, puis modèles
+        dégradés en dernier recours.
+        """
+        slo_seconds = slo_seconds or settings.MODEL_ROUTER_SLO_SECONDS
+        expected_tokens = expected_tokens or settings.MODEL_ROUTER_EXPECTED_TOKENS
+        keys = [key for key in self.candidates.get(agent_type, []) if key in self.catalog
+                and (self.providers is None or self.catalog[key].provider in self.providers)]
+        if not keys:
+            raise ValueError(f"No model available for agent type: {agent_type}")
+
+        estimates = {key: self.estimate_latency(key, expected_tokens) for key in keys}
+        healthy = [key for key in keys if not self.is_degraded(key)]
+        within_slo = sorted((key for key in healthy if estimates[key] <= slo_seconds),
+                            key=lambda key: (self.catalog[key].cost_per_1k_tokens, estimates[key]))
+        too_slow = sorted((key for key in healthy if estimates[key] > slo_seconds), key=estimates.get)
+        degraded = sorted((key for key in keys if self.is_degraded(key)), key=estimates.get)
+
+        if not within_slo:
+            self.metrics['slo_misses'] += 1
+        ranked = within_slo + too_slow + degraded
+        self.metrics['selections'][ranked[0]] += 1
+        return [self.catalog[key] for key in ranked]
+
+    def select(self, agent_type: str, slo_seconds: Optional[float] = None,
+               expected_tokens: Optional[int] = None) -> ModelProfile:
+        return self.rank(agent_type, slo_seconds, expected_tokens)[0]
+
+    @contextmanager
+    def track(self, profile: ModelProfile) -> Iterator[None]:
+        """Compte l'appel en cours pour la majoration de file"""
+        stats = self.stats[profile.key]
+        stats.in_flight += 1
+        try:
+            yield
+        finally:
+            stats.in_flight -= 1
+
+    def record(self, profile: ModelProfile, latency: float, tokens: int = 0, success: bool = True,
+               first_token_seconds: Optional[float] = None, agent_type: Optional[str] = None):
+        """Intègre le résultat d'un appel dans les EWMA et met à jour l'état de santé"""
+        stats, alpha = self.stats[profile.key], self.alpha
+        stats.samples += 1
+        stats.error_rate += alpha * ((0.0 if success else 1.0) - stats.error_rate)
+        if success:
+            stats.consecutive_failures = 0
+            if first_token_seconds is not None:
+                stats.first_token_seconds += alpha * (first_token_seconds - stats.first_token_seconds)
+            generation = latency - (first_token_seconds if first_token_seconds is not None else stats.first_token_seconds)
+            if tokens > 0:
+                # Sans mesure du premier token, le débit inclut l'attente : estimation prudente
+                observed_tps = tokens / max(generation, latency * 0.1, 1e-3)
+                stats.tokens_per_second += alpha * (observed_tps - stats.tokens_per_second)
+            elif latency > stats.first_token_seconds:
+                stats.first_token_seconds += alpha * (latency - stats.first_token_seconds)
+        else:
+            stats.consecutive_failures += 1
+            if (stats.consecutive_failures >= self.max_consecutive_failures
+                    or (stats.samples >= self.max_consecutive_failures and stats.error_rate > self.error_threshold)):
+                if not self.is_degraded(profile.key):
+                    self.metrics['degradations'] += 1
+                    security_logger.log_security_event("MODEL_PROVIDER_DEGRADED", {
+                        "model": profile.key,
+                        "error_rate": round(stats.error_rate, 3),
+                        "cooldown_seconds": self.cooldown_seconds
+                    })
+                stats.degraded_until = self.clock() + self.cooldown_seconds
+
+        get_monitoring().track_llm_request(profile.provider, profile.model, latency, success)
+        if self.trace_path:
+            self._append_trace(profile, latency, tokens, success, first_token_seconds, agent_type)
+
+    def record_fallback(self):
+        self.metrics['fallbacks'] += 1
+
+    def _append_trace(self, profile: ModelProfile, latency: float, tokens: int, success: bool,
+                      first_token_seconds: Optional[float], agent_type: Optional[str]):
+        record = {"ts": time.time(), "agent_type": agent_type, "provider": profile.provider,
+                  "model": profile.model, "latency": round(latency, 4), "tokens": tokens, "success": success}
+        if first_token_seconds is not None:
+            record["first_token"] = round(first_token_seconds, 4)
+        try:
+            with open(self.trace_path, "a", encoding="utf-8") as trace:
+                trace.write(json.dumps(record) + "\n")
+        except OSError as e:
+            security_logger.log_error("Model router trace write failed", e)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'selections': dict(self.metrics['selections']),
+            'models': {
+                key: {
+                    'first_token_seconds': round(stats.first_token_seconds, 3),
+                    'tokens_per_second': round(stats.tokens_per_second, 1),
+                    'error_rate': round(stats.error_rate, 3),
+                    'in_flight': stats.in_flight,
+                    'degraded': self.is_degraded(key),
+                    'samples': stats.samples
+                }
+                for key, stats in self.stats.items()
+                if self.providers is None or self.catalog[key].provider in self.providers
+            }
+        }
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as trace:
+        return [json.loads(line) for line in trace if line.strip()]
+
+
+def replay_trace(router: Optional[LatencyAwareRouter], trace: List[Dict[str, Any]],
+                 slo_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Benchmark hors ligne : chaque enregistrement de la trace est rejoué comme une
+    requête de son agent ; le modèle choisi « répond » avec sa prochaine mesure
+    enregistrée (parcours circulaire). router=None rejoue le routage statique
+    historique (premier candidat de l'agent). Les appels sont séquentiels : la file
+    chez le fournisseur n'est pas simulée, l'horloge du routeur avance du temps rejoué.
+    """
+    slo_seconds = slo_seconds or settings.MODEL_ROUTER_SLO_SECONDS
+    simulated_now = [0.0]
+    if router is not None:
+        router.clock = lambda: simulated_now[0]
+    candidates = router.candidates if router is not None else AGENT_CANDIDATES
+    samples: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in trace:
+        samples[f"{record['provider']}:{record['model']}"].append(record)
+    cursors: Dict[str, int] = defaultdict(int)
+
+    def next_sample(key: str) -> Optional[Dict[str, Any]]:
+        if not samples[key]:
+            return None
+        sample = samples[key][cursors[key] % len(samples[key])]
+        cursors[key] += 1
+        return sample
+
+    latencies: List[float] = []
+    selections: Dict[str, int] = defaultdict(int)
+    cost = 0.0
+    failures = 0
+    for record in trace:
+        agent_type = record.get("agent_type") or "code_generation"
+        expected_tokens = record.get("tokens") or None
+        if router is not None:
+            ranked = router.rank(agent_type, slo_seconds, expected_tokens)
+        else:
+            ranked = [MODEL_CATALOG[candidates[agent_type][0]]]
+
+        # Essais successifs jusqu'au premier succès ; les échecs s'ajoutent à la latence
+        elapsed, answered = 0.0, False
+        for attempt, profile in enumerate(ranked):
+            sample = next_sample(profile.key)
+            if sample is None:
+                continue  # Modèle absent de la trace : inconnu, non rejouable
+            if attempt and router is not None:
+                router.record_fallback()
+            elapsed += sample["latency"]
+            tokens = sample.get("tokens", 0)
+            if router is not None:
+                router.record(profile, sample["latency"], tokens, sample.get("success", True),
+                              sample.get("first_token"))
+            if sample.get("success", True):
+                cost += tokens / 1000 * profile.cost_per_1k_tokens
+                selections[profile.key] += 1
+                answered = True
+                break
+        if not answered:
+            failures += 1
+        latencies.append(elapsed)
+        simulated_now[0] += elapsed
+
+    if not latencies:
+        return {"requests": 0}
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "failures": failures,
+        "slo_attainment": sum(1 for latency in latencies if latency <= slo_seconds) / len(latencies),
+        "p50_seconds": round(statistics.median(ordered), 3),
+        "p95_seconds": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "mean_seconds": round(statistics.fmean(ordered), 3),
+        "cost_usd": round(cost, 4),
+        "selections": dict(selections)
+    }
+
+
+def enabled_providers() -> Set[str]:
+    """Fournisseurs configurés (clé d'API renseignée, modèles locaux activés)"""
+    providers = set()
+    if settings.OPENAI_API_KEY:
+        providers.add("openai")
+    if settings.ANTHROPIC_API_KEY:
+        providers.add("anthropic")
+    if settings.GOOGLE_API_KEY:
+        providers.add("gemini")
+    if settings.LOCAL_MODELS_ENABLED:
+        providers.add("ollama")
+    return providers
+
+
+# Instance globale
+_model_router: Optional[LatencyAwareRouter] = None
+
+
+def get_model_router() -> LatencyAwareRouter:
+    """Retourne le routeur de modèles global des agents workers"""
+    global _model_router
+
+    if _model_router is None:
+        _model_router = LatencyAwareRouter(providers=enabled_providers(),
+                                           trace_path=settings.MODEL_ROUTER_TRACE_PATH or None)
+
+    return _model_router
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejoue une trace de latences LLM (JSONL) contre le routeur")
+    parser.add_argument("trace", help="Trace JSONL (MODEL_ROUTER_TRACE_PATH)")
+    parser.add_argument("--slo", type=float, default=None, help="SLO de latence en secondes")
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace)
+    # Seuls les fournisseurs présents dans la trace sont rejouables
+    providers = {record["provider"] for record in trace}
+    report = {
+        "static": replay_trace(None, trace, args.slo),
+        "routed": replay_trace(LatencyAwareRouter(providers=providers), trace, args.slo)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Cache L1 en processus devant ProductionRedisCache
+Les petites clés très lues (sessions, état des agents) sont servies depuis la
+mémoire locale, bornée en octets et en durée de vie. Chaque écriture ou
+suppression est diffusée aux autres réplicas par pub/sub Redis ; une lecture
+Redis concurrente d'une invalidation n'est jamais réinsérée dans le L1.
+"""
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from orchestrator.app.security.logging import security_logger
+
+INVALIDATION_CHANNEL = "cache:invalidations"
+
+# Invalidations par clé mémorisées pour rejeter les lectures concurrentes
+INVALIDATION_MEMORY = 10000
+
+RESUBSCRIBE_DELAY_SECONDS = 1.0
+
+
+class NearCache:
+    """LRU borné en octets, TTL court, métriques de hit-rate propres"""
+
+    def __init__(
+        self,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 10.0,
+        max_entry_bytes: int = 64 * 1024,
+        cache_types: Iterable[str] = ("session_data", "agent_state", "user_context"),
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_entry_bytes = max_entry_bytes
+        self.cache_types = set(cache_types)
+        self._clock = clock
+
+        # Clé Redis -> (octets de l'enveloppe, échéance L1) ; ordre LRU
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+
+        # Numéro de séquence des invalidations : une lecture commencée avant est rejetée
+        self._seq = 0
+        self._floor = 0
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+
+        self.metrics = {
+            'hits': 0,
+            'misses': 0,
+            'fills': 0,
+            'rejected_fills': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0
+        }
+
+    def handles(self, cache_type: str) -> bool:
+        return cache_type in self.cache_types
+
+    def fill_token(self) -> int:
+        """À prendre avant la lecture Redis dont le résultat sera inséré"""
+        return self._seq
+
+    def get(self, key: str) -> Optional[bytes]:
+        item = self._entries.get(key)
+        if item is None:
+            self.metrics['misses'] += 1
+            return None
+        data, deadline = item
+        if self._clock() >= deadline:
+            self._remove(key)
+            self.metrics['expirations'] += 1
+            self.metrics['misses'] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.metrics['hits'] += 1
+        return data
+
+    def put(self, key: str, data: bytes, token: int) -> bool:
+        """Insère l'enveloppe lue ou écrite, sauf si une invalidation l'a suivie"""
+        if token < self._floor or self._invalidated.get(key, -1) > token:
+            self.metrics['rejected_fills'] += 1
+            return False
+        size = len(data)
+        if size > self.max_entry_bytes:
+            return False
+
+        self._remove(key)
+        self._entries[key] = (data, self._clock() + self.ttl_seconds)
+        self._bytes += size
+        self.metrics['fills'] += 1
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.metrics['evictions'] += 1
+        return True
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        self._seq += 1
+        for key in keys:
+            self._remove(key)
+            self._invalidated[key] = self._seq
+            self._invalidated.move_to_end(key)
+            self.metrics['invalidations'] += 1
+        while len(self._invalidated) > INVALIDATION_MEMORY:
+            # Mémoire des invalidations saturée : plancher relevé, conservateur
+            _, seq = self._invalidated.popitem(last=False)
+            self._floor = max(self._floor, seq)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        """Invalide toutes les clés d'un type (et les lectures en cours)"""
+        self._seq += 1
+        self._floor = self._seq
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self._remove(key)
+            self.metrics['invalidations'] += 1
+
+    def clear(self) -> None:
+        self._seq += 1
+        self._floor = self._seq
+        self.metrics['invalidations'] += len(self._entries)
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self._bytes -= len(item[0])
+
+    def get_metrics(self) -> Dict[str, Any]:
+        lookups = self.metrics['hits'] + self.metrics['misses']
+        return {
+            **self.metrics,
+            'hit_rate_percent': round(self.metrics['hits'] / max(lookups, 1) * 100, 2),
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'cache_types': sorted(self.cache_types)
+        }
+
+
+class InvalidationBus:
+    """Diffusion des invalidations du L1 entre réplicas par pub/sub Redis"""
+
+    def __init__(
+        self,
+        near_cache: NearCache,
+        channel: str = INVALIDATION_CHANNEL,
+        on_namespace_cleared: Optional[Callable[[str], None]] = None
+    ):
+        self.near_cache = near_cache
+        self.channel = channel
+        # Appelé pour un type entier ou "*" (nouvelle génération à relire par le cache)
+        self.on_namespace_cleared = on_namespace_cleared
+        self.origin = uuid.uuid4().hex
+        self._redis = None
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.metrics = {
+            'published': 0,
+            'received': 0,
+            'resubscriptions': 0
+        }
+
+    async def start(self, redis_client) -> None:
+        """S'abonne au canal ; l'abonnement est actif au retour"""
+        if self._task is not None:
+            return
+        self._redis = redis_client
+        await self._subscribe()
+        self._task = asyncio.create_task(self._listen())
+
+    async def _subscribe(self) -> None:
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+
+    def publish(self, pipe, cache_type: str, keys: Optional[List[str]] = None):
+        """
+        Invalidation de clés Redis, d'un type (keys=None) ou de tout ("*")
+        Ajoutée au pipeline, ou coroutine à attendre si pipe est le client Redis
+        """
+        message = {'origin': self.origin, 'type': cache_type}
+        if keys is not None:
+            message['keys'] = keys
+        self.metrics['published'] += 1
+        return pipe.publish(self.channel, json.dumps(message))
+
+    def apply(self, message: Dict[str, Any]) -> None:
+        """Applique une invalidation reçue d'un autre réplica"""
+        if message.get('origin') == self.origin:
+            return  # Écriture locale : le L1 est déjà à jour
+        self.metrics['received'] += 1
+        cache_type = message.get('type')
+        if 'keys' in message:
+            self.near_cache.invalidate(message['keys'])
+            return
+        if cache_type == "*":
+            self.near_cache.clear()
+        else:
+            self.near_cache.invalidate_prefix(f"{cache_type}:")
+        if self.on_namespace_cleared:
+            self.on_namespace_cleared(cache_type)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get('type') == 'message':
+                        self.apply(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Invalidations potentiellement perdues : le L1 entier est vidé
+                security_logger.log_error("Near cache invalidation listener error", e)
+                self.near_cache.clear()
+                if self.on_namespace_cleared:
+                    self.on_namespace_cleared("*")
+                await asyncio.sleep(RESUBSCRIBE_DELAY_SECONDS)
+                try:
+                    await self._pubsub.aclose()
+                    await self._subscribe()
+                    self.metrics['resubscriptions'] += 1
+                except Exception:
+                    pass
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self.metrics, 'channel': self.channel, 'listening': self._task is not None and not self._task.done()}
@@ -4,9 +4,15 @@ Gestion multi-layer du cache avec TTL intelligent
 """
 import os
 import json
+import math
+import time
+import uuid
+import random
 import asyncio
-from typing import Optional, Dict, Any, Union
-from datetime import datetime, timedelta
+import itertools
+from collections import Counter
+from typing import Optional, Dict, Any, Union, Iterable, List, Tuple, Callable, Awaitable
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass, asdict
 from enum import Enum
 
@@ -17,6 +23,27 @@ except ImportError:
     REDIS_AVAILABLE = False
 
 from orchestrator.app.security.logging import security_logger
+from orchestrator.app.performance.cache_codec import CacheCodec, CacheCodecError, CompressionDictionary, DecodedEntry
+from orchestrator.app.performance.near_cache import InvalidationBus, NearCache
+
+# Dictionnaires de compression partagés : cache_dict:{type}:{id} et cache_dict:{type}:current
+DICTIONARY_KEY_PREFIX = "cache_dict"
+
+# Statistiques d'accès côté Redis, par type : compteurs (hash) et dernier accès (sorted set)
+ACCESS_COUNT_PREFIX = "cache_access"
+LAST_ACCESS_PREFIX = "cache_last_access"
+ACCESS_PRUNE_EVERY = 1000  # Accès enregistrés entre deux purges des statistiques orphelines
+ACCESS_PRUNE_BATCH = 500
+ACCESS_FLUSH_EVERY = 100  # Hits L1 regroupés avant report dans les compteurs Redis
+
+MGET_CHUNK_SIZE = 500
+
+# Verrou de calcul inter-réplicas de get_or_compute
+COMPUTE_LOCK_PREFIX = "cache_lock"
+
+# Générations par type (hash) : les clés portent la génération, vider un type l'incrémente
+GENERATION_KEY = "cache_generation"
+RECLAIM_SCAN_COUNT = 500  # Clés examinées par SCAN lors de la récupération des générations périmées
 
 
 class CacheType(Enum):
@@ -39,6 +66,7 @@ class CacheEntry:
     expires_at: datetime
     access_count: int = 0
     last_accessed: Optional[datetime] = None
+    compute_seconds: float = 0.0  # Durée du calcul de la valeur (rafraîchissement XFetch)
     
     def is_expired(self) -> bool:
         """Vérifie si l'entrée a expiré"""
@@ -68,14 +96,45 @@ class CacheEntry:
             access_count=data.get('access_count', 0),
             last_accessed=datetime.fromisoformat(data['last_accessed']) if data.get('last_accessed') else None
         )
+    
+    def to_envelope(self, codec: CacheCodec) -> Tuple[bytes, int]:
+        """Enveloppe binaire pour stockage Redis (la clé et le type sont portés par la clé Redis)"""
+        return codec.encode(
+            self.cache_type.value,
+            self.value,
+            _to_epoch(self.created_at),
+            _to_epoch(self.expires_at),
+            self.compute_seconds
+        )
+    
+    @classmethod
+    def from_envelope(cls, key: str, cache_type: CacheType, decoded: DecodedEntry) -> 'CacheEntry':
+        """Crée une entrée depuis une enveloppe décodée"""
+        return cls(
+            key=key,
+            value=decoded.value,
+            cache_type=cache_type,
+            created_at=_from_epoch(decoded.created_at),
+            expires_at=_from_epoch(decoded.expires_at),
+            compute_seconds=decoded.compute_seconds
+        )
+
+
+def _to_epoch(moment: datetime) -> float:
+    """Datetime UTC naïf (convention du cache) vers timestamp"""
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _from_epoch(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
 
 
 class ProductionRedisCache:
     """
     Cache Redis production-ready avec:
-    - Multi-layer caching strategy
+    - Multi-layer caching strategy (L1 en processus optionnel, invalidé par pub/sub)
     - TTL intelligent par type
-    - Compression automatique
+    - Enveloppe binaire compressée, dictionnaires entraînés par type
     - Monitoring et métriques
     - Fallback gracieux
     """
@@ -87,7 +146,16 @@ class ProductionRedisCache:
         max_connections: int = 100,
         retry_on_timeout: bool = True,
         health_check_interval: int = 30,
-        compression_threshold: int = 1024  # Compression si > 1KB
+        compression_threshold: int = 1024,  # Compression si > 1KB
+        dictionary_types: Iterable[CacheType] = (CacheType.LLM_RESPONSE, CacheType.AGENT_STATE),
+        dictionary_size: int = 8192,
+        dictionary_samples: int = 200,
+        near_cache: Optional[NearCache] = None,
+        lock_lease_seconds: float = 5.0,
+        lock_wait_timeout: float = 10.0,
+        xfetch_beta: float = 1.0,
+        generation_refresh_seconds: float = 1.0,
+        reclaim_keys_per_second: int = 5000
     ):
         self.redis_url = redis_url
         self.db = db
@@ -96,6 +164,56 @@ class ProductionRedisCache:
         self.health_check_interval = health_check_interval
         self.compression_threshold = compression_threshold
         
+        # Encodage binaire ; petits payloads similaires compressés avec un dictionnaire par type
+        self.codec = CacheCodec(
+            compression_threshold=compression_threshold,
+            dictionary_types=[cache_type.value for cache_type in dictionary_types],
+            dictionary_size=dictionary_size,
+            dictionary_samples=dictionary_samples
+        )
+        self._dictionary_checked: set = set()
+        
+        # Enregistrements d'accès en arrière-plan
+        self._background_tasks: set = set()
+        self._accesses_since_prune: Dict[CacheType, int] = {}
+        self._pending_access: Dict[CacheType, Counter] = {}
+        
+        # Tier L1 en processus, cohérent entre réplicas par pub/sub
+        self.near_cache = near_cache
+        self.invalidation_bus = InvalidationBus(
+            near_cache, on_namespace_cleared=self._forget_generations
+        ) if near_cache else None
+        
+        # get_or_compute : single-flight local, verrou Redis à bail court, rafraîchissement XFetch
+        self.lock_lease_seconds = lock_lease_seconds
+        self.lock_wait_timeout = lock_wait_timeout
+        self.xfetch_beta = xfetch_beta
+        self._random = random.random
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.compute_metrics = {
+            'computes': 0,
+            'coalesced': 0,
+            'lock_waits': 0,
+            'lock_timeouts': 0,
+            'early_refreshes': 0,
+            'refresh_errors': 0
+        }
+        
+        # Espaces de noms versionnés : vider un type est en O(1), les anciennes générations
+        # expirent par TTL ou sont récupérées par un SCAN en arrière-plan à débit plafonné
+        self.generation_refresh_seconds = generation_refresh_seconds
+        self.reclaim_keys_per_second = reclaim_keys_per_second
+        self._generations: Dict[CacheType, int] = {}  # 0 : clés sans génération (format historique)
+        self._generations_read_at = float('-inf')
+        self._generation_changes = 0
+        self._reclaim_tasks: Dict[CacheType, asyncio.Task] = {}
+        self.generation_metrics = {
+            'bumps': 0,
+            'scanned_keys': 0,
+            'reclaimed_keys': 0,
+            'reclaim_errors': 0
+        }
+        
         # Pool de connexions
         self.redis_pool = None
         self.redis_client = None
@@ -147,6 +265,9 @@ class ProductionRedisCache:
             # Test de connexion
             await self.redis_client.ping()
             
+            if self.invalidation_bus:
+                await self.invalidation_bus.start(self.redis_client)
+            
             self.initialized = True
             security_logger.log_security_event("CACHE_INITIALIZED", {
                 "redis_url": self.redis_url,
@@ -174,47 +295,159 @@ class ProductionRedisCache:
             return None
             
         try:
-            # Clé Redis avec préfixe
-            redis_key = f"{cache_type.value}:{key}"
+            entry = await self._get_entry(key, cache_type)
+            return entry.value if entry else None
             
-            # Récupération depuis Redis
+        except Exception as e:
+            self.metrics['errors'] += 1
+            security_logger.log_error(f"Cache get error for key {key}", e)
+            return None
+    
+    async def _get_entry(self, key: str, cache_type: CacheType) -> Optional[CacheEntry]:
+        await self._ensure_generations()
+        redis_key = self._redis_key(key, cache_type)
+        near = self._near_cache_for(cache_type)
+        
+        # L1 d'abord, puis Redis
+        cached_data = near.get(redis_key) if near else None
+        from_near = cached_data is not None
+        if not from_near:
+            token = near.fill_token() if near else 0
             cached_data = await self.redis_client.get(redis_key)
+        
+        entry = await self._live_entry(key, cache_type, cached_data)
+        if entry is None:
+            return None
+        
+        if near and not from_near:
+            near.put(redis_key, cached_data, token)
+        
+        # Compteurs d'accès côté Redis, sans réécrire la valeur
+        self._track_access(cache_type, [key], near=from_near)
+        
+        return entry
+    
+    async def get_or_compute(
+        self,
+        key: str,
+        cache_type: CacheType,
+        loader: Callable[[], Awaitable[Any]],
+        custom_ttl: Optional[timedelta] = None
+    ) -> Any:
+        """
+        Récupère une valeur ou la calcule une seule fois, sans ruée à l'expiration
+        
+        - un seul calcul par clé dans le processus (les appels concurrents l'attendent)
+        - un seul calcul par clé entre réplicas (verrou Redis à bail court, les autres attendent la valeur)
+        - rafraîchissement anticipé probabiliste (XFetch) avant le TTL, en arrière-plan
+        
+        Args:
+            key: Clé du cache
+            cache_type: Type de cache
+            loader: Coroutine sans argument qui calcule la valeur (None n'est pas caché)
+            custom_ttl: TTL personnalisé (optionnel)
             
-            if cached_data is None:
-                self.metrics['misses'] += 1
-                return None
-            
-            # Désérialisation
-            entry_dict = json.loads(cached_data)
-            entry = CacheEntry.from_dict(entry_dict)
-            
-            # Vérification expiration
-            if entry.is_expired():
-                await self._delete_key(redis_key)
-                self.metrics['misses'] += 1
-                return None
-            
-            # Mise à jour statistiques d'accès
-            entry.access_count += 1
-            entry.last_accessed = datetime.utcnow()
-            
-            # Mise à jour en arrière-plan (fire and forget)
-            asyncio.create_task(self._update_access_stats(redis_key, entry))
-            
-            self.metrics['hits'] += 1
-            
-            security_logger.log_security_event("CACHE_HIT", {
-                "key": key,
-                "cache_type": cache_type.value,
-                "access_count": entry.access_count
-            })
-            
+        Returns:
+            Valeur cachée ou calculée
+        """
+        if not self.initialized or not self.redis_client:
+            return await loader()
+        
+        try:
+            entry = await self._get_entry(key, cache_type)
+        except Exception as e:
+            self.metrics['errors'] += 1
+            security_logger.log_error(f"Cache get error for key {key}", e)
+            entry = None
+        
+        redis_key = self._redis_key(key, cache_type)
+        if entry is not None:
+            if redis_key not in self._flights and self._should_refresh_early(entry):
+                self.compute_metrics['early_refreshes'] += 1
+                self._start_flight(redis_key, self._refresh(key, cache_type, loader, custom_ttl))
             return entry.value
+        
+        flight = self._flights.get(redis_key)
+        if flight is not None:
+            self.compute_metrics['coalesced'] += 1
+            value = await asyncio.shield(flight)
+            if value is not None:
+                return value
+            # Rafraîchissement anticipé non abouti : calcul complet
+            flight = self._flights.get(redis_key)
+        if flight is None:
+            flight = self._start_flight(redis_key, self._compute(key, cache_type, loader, custom_ttl))
+        return await asyncio.shield(flight)
+    
+    async def get_many(self, keys: Iterable[str], cache_type: CacheType) -> Dict[str, Any]:
+        """
+        Récupère plusieurs valeurs en un seul aller-retour (MGET pipeliné)
+        
+        Args:
+            keys: Clés du cache
+            cache_type: Type de cache
             
+        Returns:
+            Valeurs trouvées par clé (clés absentes ou expirées omises)
+        """
+        keys = list(dict.fromkeys(keys))
+        if not self.initialized or not self.redis_client:
+            self.metrics['misses'] += len(keys)
+            return {}
+        if not keys:
+            return {}
+        try:
+            await self._ensure_generations()
         except Exception as e:
             self.metrics['errors'] += 1
-            security_logger.log_error(f"Cache get error for key {key}", e)
-            return None
+            security_logger.log_error(f"Cache get_many error for type {cache_type.value}", e)
+            return {}
+            
+        near = self._near_cache_for(cache_type)
+        local = {}
+        if near:
+            for key in keys:
+                cached_data = near.get(self._redis_key(key, cache_type))
+                if cached_data is not None:
+                    local[key] = cached_data
+        remote_keys = [key for key in keys if key not in local]
+        
+        fetched = []
+        token = near.fill_token() if near else 0
+        if remote_keys:
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for start in range(0, len(remote_keys), MGET_CHUNK_SIZE):
+                        chunk = remote_keys[start:start + MGET_CHUNK_SIZE]
+                        pipe.mget([self._redis_key(key, cache_type) for key in chunk])
+                    fetched = list(itertools.chain.from_iterable(await pipe.execute()))
+            except Exception as e:
+                self.metrics['errors'] += 1
+                security_logger.log_error(f"Cache get_many error for type {cache_type.value}", e)
+                remote_keys = []
+        
+        found = {}
+        for key, cached_data in itertools.chain(local.items(), zip(remote_keys, fetched)):
+            try:
+                entry = await self._live_entry(key, cache_type, cached_data)
+            except Exception as e:
+                self.metrics['errors'] += 1
+                security_logger.log_error(f"Cache get error for key {key}", e)
+                continue
+            if entry is None:
+                continue
+            found[key] = entry.value
+            if near and key not in local:
+                near.put(self._redis_key(key, cache_type), cached_data, token)
+        
+        local_hits = [key for key in found if key in local]
+        remote_hits = [key for key in found if key not in local]
+        if local_hits:
+            self._track_access(cache_type, local_hits, near=True)
+        if remote_hits:
+            self._track_access(cache_type, remote_hits)
+        # Ordre des clés demandées
+        return {key: found[key] for key in keys if key in found}
     
     async def set(
         self, 
@@ -235,57 +468,98 @@ class ProductionRedisCache:
         Returns:
             True si succès, False sinon
         """
+        return await self.set_many({key: value}, cache_type, custom_ttl)
+    
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        cache_type: CacheType,
+        custom_ttl: Optional[timedelta] = None,
+        compute_seconds: float = 0.0
+    ) -> bool:
+        """
+        Stocke plusieurs valeurs en un seul aller-retour (pipeline)
+        
+        Args:
+            items: Valeurs par clé
+            cache_type: Type de cache
+            custom_ttl: TTL personnalisé (optionnel)
+            compute_seconds: Durée du calcul des valeurs (rafraîchissement XFetch)
+            
+        Returns:
+            True si toutes les valeurs sont stockées, False sinon
+        """
         if not self.initialized or not self.redis_client:
             return False
+        if not items:
+            return True
             
         try:
             # TTL selon le type ou custom
             ttl = custom_ttl or self.ttl_config.get(cache_type, timedelta(minutes=5))
-            
-            # Création de l'entrée
+            ttl_seconds = int(ttl.total_seconds())
             now = datetime.utcnow()
-            entry = CacheEntry(
-                key=key,
-                value=value,
-                cache_type=cache_type,
-                created_at=now,
-                expires_at=now + ttl
-            )
             
-            # Sérialisation
-            entry_data = json.dumps(entry.to_dict())
+            # Sérialisation et compression (au-delà du seuil ou avec le dictionnaire du type)
+            await self._ensure_generations()
+            await self._ensure_dictionary(cache_type)
+            encoded = []
+            for key, value in items.items():
+                entry = CacheEntry(
+                    key=key,
+                    value=value,
+                    cache_type=cache_type,
+                    created_at=now,
+                    expires_at=now + ttl,
+                    compute_seconds=compute_seconds
+                )
+                entry_data, payload_size = entry.to_envelope(self.codec)
+                encoded.append((key, entry_data))
+                
+                if self.codec.is_compressed(entry_data):
+                    self.metrics['compression_saves'] += 1
+                    security_logger.log_security_event("CACHE_COMPRESSION", {
+                        "key": key,
+                        "original_size": payload_size,
+                        "stored_size": len(entry_data),
+                        "cache_type": cache_type.value
+                    })
             
-            # Compression si nécessaire
-            if len(entry_data) > self.compression_threshold:
-                # Ici on pourrait ajouter la compression (gzip)
-                # Pour simplifier, on log juste
-                self.metrics['compression_saves'] += 1
-                security_logger.log_security_event("CACHE_COMPRESSION", {
-                    "key": key,
-                    "original_size": len(entry_data),
-                    "cache_type": cache_type.value
-                })
+            # Stockage Redis avec TTL ; une nouvelle valeur repart de zéro accès
+            near = self._near_cache_for(cache_type)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, entry_data in encoded:
+                    pipe.setex(self._redis_key(key, cache_type), ttl_seconds, entry_data)
+                self._reset_access(pipe, cache_type, list(items))
+                if near:
+                    self.invalidation_bus.publish(pipe, cache_type.value, [self._redis_key(key, cache_type) for key in items])
+                await pipe.execute()
             
-            # Stockage Redis avec TTL
-            redis_key = f"{cache_type.value}:{key}"
-            ttl_seconds = int(ttl.total_seconds())
+            if near:
+                # Lectures en cours de l'ancienne valeur rejetées, puis écriture dans le L1
+                near.invalidate(self._redis_key(key, cache_type) for key, _ in encoded)
+                token = near.fill_token()
+                for key, entry_data in encoded:
+                    near.put(self._redis_key(key, cache_type), entry_data, token)
             
-            await self.redis_client.setex(redis_key, ttl_seconds, entry_data)
+            self.metrics['sets'] += len(encoded)
             
-            self.metrics['sets'] += 1
+            for key, entry_data in encoded:
+                security_logger.log_security_event("CACHE_SET", {
+                    "key": key,
+                    "cache_type": cache_type.value,
+                    "ttl_seconds": ttl_seconds,
+                    "data_size": len(entry_data)
+                })
             
-            security_logger.log_security_event("CACHE_SET", {
-                "key": key,
-                "cache_type": cache_type.value,
-                "ttl_seconds": ttl_seconds,
-                "data_size": len(entry_data)
-            })
+            if self.codec.ready_to_train(cache_type.value):
+                await self._publish_dictionary(cache_type)
             
             return True
             
         except Exception as e:
             self.metrics['errors'] += 1
-            security_logger.log_error(f"Cache set error for key {key}", e)
+            security_logger.log_error(f"Cache set error for keys {', '.join(list(items)[:5])}", e)
             return False
     
     async def delete(self, key: str, cache_type: CacheType) -> bool:
@@ -294,8 +568,16 @@ class ProductionRedisCache:
             return False
             
         try:
-            redis_key = f"{cache_type.value}:{key}"
-            result = await self.redis_client.delete(redis_key)
+            await self._ensure_generations()
+            near = self._near_cache_for(cache_type)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.delete(self._redis_key(key, cache_type))
+                self._reset_access(pipe, cache_type, [key])
+                if near:
+                    self.invalidation_bus.publish(pipe, cache_type.value, [self._redis_key(key, cache_type)])
+                result, *_ = await pipe.execute()
+            if near:
+                near.invalidate([self._redis_key(key, cache_type)])
             
             self.metrics['deletes'] += 1
             
@@ -313,26 +595,29 @@ class ProductionRedisCache:
             return False
     
     async def clear_by_type(self, cache_type: CacheType) -> int:
-        """Supprime toutes les entrées d'un type de cache"""
+        """
+        Invalide toutes les entrées d'un type en temps constant
+        
+        La génération du type est incrémentée : les entrées existantes deviennent
+        invisibles pour tous les réplicas, puis sont récupérées en arrière-plan.
+        
+        Returns:
+            Nouvelle génération du type, 0 en cas d'échec
+        """
         if not self.initialized or not self.redis_client:
             return 0
             
         try:
-            pattern = f"{cache_type.value}:*"
-            keys = await self.redis_client.keys(pattern)
+            generation = await self._bump_generations([cache_type])
+            if self._near_cache_for(cache_type):
+                self.near_cache.invalidate_prefix(f"{cache_type.value}:")
             
-            if keys:
-                deleted = await self.redis_client.delete(*keys)
-                self.metrics['deletes'] += deleted
-                
-                security_logger.log_security_event("CACHE_CLEAR_TYPE", {
-                    "cache_type": cache_type.value,
-                    "deleted_count": deleted
-                })
-                
-                return deleted
+            security_logger.log_security_event("CACHE_CLEAR_TYPE", {
+                "cache_type": cache_type.value,
+                "generation": generation
+            })
             
-            return 0
+            return generation
             
         except Exception as e:
             self.metrics['errors'] += 1
@@ -340,12 +625,16 @@ class ProductionRedisCache:
             return 0
     
     async def clear_all(self) -> bool:
-        """Vide tout le cache (ATTENTION: opération destructive)"""
+        """Invalide tout le cache en temps constant (ATTENTION: opération destructive)"""
         if not self.initialized or not self.redis_client:
             return False
             
         try:
-            await self.redis_client.flushdb()
+            # Pas de FLUSHDB : ni blocage de Redis, ni perte des dictionnaires et des données partagées
+            await self._bump_generations(list(CacheType), publish_type="*")
+            
+            if self.near_cache:
+                self.near_cache.clear()
             
             # Reset metrics
             for key in self.metrics:
@@ -388,6 +677,16 @@ class ProductionRedisCache:
                 'hit_rate_percent': round(hit_rate, 2),
                 'total_operations': total_operations
             },
+            'encoding': self.codec.get_metrics(),
+            'compute': {**self.compute_metrics, 'in_flight': len(self._flights)},
+            'generations': {
+                **self.generation_metrics,
+                'current': {ct.value: generation for ct, generation in self._generations.items()}
+            },
+            'near_cache': {
+                **self.near_cache.get_metrics(),
+                'invalidation_bus': self.invalidation_bus.get_metrics()
+            } if self.near_cache else None,
             'redis_info': redis_info,
             'ttl_config': {ct.value: int(ttl.total_seconds()) for ct, ttl in self.ttl_config.items()},
             'status': 'connected' if self.initialized else 'disconnected'
@@ -428,17 +727,414 @@ class ProductionRedisCache:
         
         return health
     
-    async def _update_access_stats(self, redis_key: str, entry: CacheEntry):
-        """Met à jour les statistiques d'accès en arrière-plan"""
+    async def _decode_entry(self, key: str, cache_type: CacheType, data: bytes) -> CacheEntry:
+        """Décode une enveloppe binaire ou une entrée JSON antérieure"""
+        if not self.codec.is_envelope(data):
+            return CacheEntry.from_dict(json.loads(data))
+        
+        dict_id = self.codec.missing_dictionary(data)
+        if dict_id:
+            # Dictionnaire entraîné par un autre réplica
+            await self._load_dictionary(cache_type, dict_id)
+        return CacheEntry.from_envelope(key, cache_type, self.codec.decode(data))
+    
+    def _dictionary_key(self, cache_type: CacheType, suffix: Union[int, str]) -> str:
+        return f"{DICTIONARY_KEY_PREFIX}:{cache_type.value}:{suffix}"
+    
+    async def _load_dictionary(self, cache_type: CacheType, dict_id: int) -> CompressionDictionary:
+        data = await self.redis_client.get(self._dictionary_key(cache_type, dict_id))
+        if data is None:
+            raise CacheCodecError(f"Compression dictionary {dict_id} missing for {cache_type.value}")
+        dictionary = CompressionDictionary(dict_id, data)
+        self.codec.register(dictionary)
+        return dictionary
+    
+    async def _ensure_dictionary(self, cache_type: CacheType):
+        """Adopte le dictionnaire courant du type s'il a déjà été publié par un réplica"""
+        if (cache_type.value not in self.codec.dictionary_types
+                or cache_type.value in self.codec.active
+                or cache_type in self._dictionary_checked):
+            return
+        self._dictionary_checked.add(cache_type)
         try:
-            entry_data = json.dumps(entry.to_dict())
-            # Maintenir le TTL existant
-            await self.redis_client.set(redis_key, entry_data, keepttl=True)
+            current = await self.redis_client.get(self._dictionary_key(cache_type, "current"))
+            if current is not None:
+                self.codec.activate(cache_type.value, await self._load_dictionary(cache_type, int(current)))
+        except Exception as e:
+            security_logger.log_error(f"Cache dictionary load error for type {cache_type.value}", e)
+    
+    async def _publish_dictionary(self, cache_type: CacheType):
+        """Entraîne le dictionnaire du type et le publie ; le premier réplica publié l'emporte"""
+        try:
+            dictionary = self.codec.train(cache_type.value)
+            current_key = self._dictionary_key(cache_type, "current")
+            await self.redis_client.set(self._dictionary_key(cache_type, dictionary.dict_id), dictionary.data)
+            if not await self.redis_client.set(current_key, dictionary.dict_id, nx=True):
+                current = int(await self.redis_client.get(current_key))
+                if current != dictionary.dict_id:
+                    # Jamais utilisé pour encoder : on adopte celui déjà publié
+                    await self.redis_client.delete(self._dictionary_key(cache_type, dictionary.dict_id))
+                    dictionary = await self._load_dictionary(cache_type, current)
+            self.codec.activate(cache_type.value, dictionary)
+            
+            security_logger.log_security_event("CACHE_DICTIONARY_TRAINED", {
+                "cache_type": cache_type.value,
+                "dict_id": dictionary.dict_id,
+                "size": len(dictionary.data)
+            })
+        except Exception as e:
+            self.metrics['errors'] += 1
+            security_logger.log_error(f"Cache dictionary training error for type {cache_type.value}", e)
+    
+    def _near_cache_for(self, cache_type: CacheType) -> Optional[NearCache]:
+        """Tier L1 si activé pour ce type de cache"""
+        if self.near_cache and self.near_cache.handles(cache_type.value):
+            return self.near_cache
+        return None
+    
+    def _redis_key(self, key: str, cache_type: CacheType) -> str:
+        """Clé Redis avec préfixe du type et de sa génération (absente en génération 0)"""
+        generation = self._generations.get(cache_type, 0)
+        if generation:
+            return f"{cache_type.value}:g{generation}:{key}"
+        return f"{cache_type.value}:{key}"
+    
+    async def _ensure_generations(self):
+        """Relit les générations de tous les types, au plus une fois par intervalle"""
+        if time.monotonic() - self._generations_read_at < self.generation_refresh_seconds:
+            return
+        changes = self._generation_changes
+        values = await self.redis_client.hmget(GENERATION_KEY, [cache_type.value for cache_type in CacheType])
+        if changes != self._generation_changes:
+            return  # Incrément local ou invalidation reçue pendant la lecture : elle prime
+        self._generations = {cache_type: int(value or 0) for cache_type, value in zip(CacheType, values)}
+        self._generations_read_at = time.monotonic()
+    
+    def _forget_generations(self, cache_type: str):
+        """Un autre réplica a vidé un type : générations relues à la prochaine opération"""
+        self._generation_changes += 1
+        self._generations_read_at = float('-inf')
+    
+    async def _bump_generations(self, cache_types: List[CacheType], publish_type: Optional[str] = None) -> int:
+        """HINCRBY des générations et UNLINK des statistiques d'accès en un aller-retour"""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for cache_type in cache_types:
+                pipe.hincrby(GENERATION_KEY, cache_type.value, 1)
+            # UNLINK : libération mémoire hors du thread principal de Redis
+            pipe.unlink(*itertools.chain.from_iterable(self._access_keys(cache_type) for cache_type in cache_types))
+            if self.invalidation_bus:
+                # Publié après l'incrément : les autres réplicas relisent la nouvelle génération
+                self.invalidation_bus.publish(pipe, publish_type or cache_types[0].value)
+            results = await pipe.execute()
+        
+        for cache_type, generation in zip(cache_types, results):
+            self._generations[cache_type] = generation
+            self._schedule_reclaim(cache_type)
+        self._generation_changes += 1
+        self.generation_metrics['bumps'] += len(cache_types)
+        return results[0]
+    
+    def _schedule_reclaim(self, cache_type: CacheType):
+        """Une récupération en arrière-plan par type ; celle en cours relit la génération à chaque lot"""
+        running = self._reclaim_tasks.get(cache_type)
+        if running is not None and not running.done():
+            return
+        task = asyncio.create_task(self.reclaim_stale_generations(cache_type))
+        self._reclaim_tasks[cache_type] = task
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def reclaim_stale_generations(self, cache_type: CacheType) -> int:
+        """
+        Supprime les entrées des générations antérieures d'un type
+        
+        SCAN incrémental (jamais KEYS) et UNLINK par lots, au plus reclaim_keys_per_second
+        clés examinées par seconde. Les entrées manquées expirent de toute façon par leur TTL.
+        
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        if not self.initialized or not self.redis_client:
+            return 0
+        
+        prefix = f"{cache_type.value}:".encode()
+        reclaimed = 0
+        cursor = 0
+        try:
+            while True:
+                started = time.monotonic()
+                await self._ensure_generations()
+                current = self._generations.get(cache_type, 0)
+                cursor, keys = await self.redis_client.scan(cursor, match=f"{cache_type.value}:*", count=RECLAIM_SCAN_COUNT)
+                stale = [key for key in keys if self._key_generation(key, prefix) < current]
+                if stale:
+                    reclaimed += await self.redis_client.unlink(*stale)
+                self.generation_metrics['scanned_keys'] += len(keys)
+                if cursor == 0:
+                    break
+                # Débit plafonné : le trafic applicatif reste prioritaire
+                await asyncio.sleep(max(0.0, RECLAIM_SCAN_COUNT / self.reclaim_keys_per_second - (time.monotonic() - started)))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.generation_metrics['reclaim_errors'] += 1
+            security_logger.log_error(f"Cache generation reclaim error for type {cache_type.value}", e)
+        
+        self.generation_metrics['reclaimed_keys'] += reclaimed
+        security_logger.log_security_event("CACHE_GENERATION_RECLAIMED", {
+            "cache_type": cache_type.value,
+            "generation": self._generations.get(cache_type, 0),
+            "reclaimed_count": reclaimed
+        })
+        return reclaimed
+    
+    @staticmethod
+    def _key_generation(redis_key: bytes, prefix: bytes) -> int:
+        """Génération portée par une clé Redis du type, 0 pour le format historique"""
+        tag = redis_key[len(prefix):].split(b":", 1)[0]
+        return int(tag[1:]) if tag[:1] == b"g" and tag[1:].isdigit() else 0
+    
+    async def _live_entry(self, key: str, cache_type: CacheType, cached_data: Optional[bytes]) -> Optional[CacheEntry]:
+        """Entrée décodée, ou None si absente ou expirée ; compte le hit ou le miss"""
+        if cached_data is None:
+            self.metrics['misses'] += 1
+            return None
+        
+        # Désérialisation
+        entry = await self._decode_entry(key, cache_type, cached_data)
+        
+        # Vérification expiration
+        if entry.is_expired():
+            await self._delete_key(self._redis_key(key, cache_type))
+            self.metrics['misses'] += 1
+            return None
+        
+        self.metrics['hits'] += 1
+        
+        security_logger.log_security_event("CACHE_HIT", {
+            "key": key,
+            "cache_type": cache_type.value
+        })
+        
+        return entry
+    
+    @staticmethod
+    def _access_keys(cache_type: CacheType) -> Tuple[str, str]:
+        return f"{ACCESS_COUNT_PREFIX}:{cache_type.value}", f"{LAST_ACCESS_PREFIX}:{cache_type.value}"
+    
+    def _reset_access(self, pipe, cache_type: CacheType, keys: List[str]):
+        """Ajoute au pipeline la remise à zéro des statistiques d'accès des clés"""
+        counts_key, last_access_key = self._access_keys(cache_type)
+        pipe.hdel(counts_key, *keys)
+        pipe.zrem(last_access_key, *keys)
+    
+    def _track_access(self, cache_type: CacheType, keys: List[str], near: bool = False):
+        """Enregistre les accès en arrière-plan (fire and forget)"""
+        pending = self._pending_access.setdefault(cache_type, Counter())
+        pending.update(keys)
+        # Hits L1 regroupés : pas d'aller-retour Redis à chaque lecture locale
+        if near and pending.total() < ACCESS_FLUSH_EVERY:
+            return
+        self._pending_access[cache_type] = Counter()
+        task = asyncio.create_task(self._record_access(cache_type, pending))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def _record_access(self, cache_type: CacheType, accesses: Counter):
+        """HINCRBY des compteurs et ZADD du dernier accès, en un aller-retour"""
+        try:
+            now = time.time()
+            counts_key, last_access_key = self._access_keys(cache_type)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, count in accesses.items():
+                    pipe.hincrby(counts_key, key, count)
+                pipe.zadd(last_access_key, {key: now for key in accesses})
+                await pipe.execute()
+            
+            recorded = self._accesses_since_prune.get(cache_type, 0) + accesses.total()
+            if recorded >= ACCESS_PRUNE_EVERY:
+                recorded = 0
+                await self._prune_access_stats(cache_type, now)
+            self._accesses_since_prune[cache_type] = recorded
         except:
             pass  # Non-critique, on ignore les erreurs
     
+    async def _prune_access_stats(self, cache_type: CacheType, now: float):
+        """Retire les statistiques des clés non lues depuis le TTL du type (entrées expirées)"""
+        counts_key, last_access_key = self._access_keys(cache_type)
+        cutoff = now - self.ttl_config.get(cache_type, timedelta(minutes=5)).total_seconds()
+        stale = await self.redis_client.zrangebyscore(last_access_key, "-inf", cutoff, start=0, num=ACCESS_PRUNE_BATCH)
+        if stale:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hdel(counts_key, *stale)
+                pipe.zrem(last_access_key, *stale)
+                await pipe.execute()
+    
+    def _should_refresh_early(self, entry: CacheEntry) -> bool:
+        """XFetch : now - delta * beta * ln(rand) >= expiry, plus probable à l'approche du TTL"""
+        if entry.compute_seconds <= 0:
+            return False
+        # 1 - random() dans ]0, 1] : ln défini
+        gap = -entry.compute_seconds * self.xfetch_beta * math.log(1.0 - self._random())
+        return time.time() + gap >= _to_epoch(entry.expires_at)
+    
+    def _start_flight(self, redis_key: str, coroutine) -> asyncio.Task:
+        """Calcul partagé par tous les appelants locaux de la clé"""
+        task = asyncio.create_task(coroutine)
+        self._flights[redis_key] = task
+        
+        def done(finished: asyncio.Task):
+            if self._flights.get(redis_key) is finished:
+                del self._flights[redis_key]
+            if not finished.cancelled():
+                finished.exception()  # Récupérée même si tous les appelants sont partis
+        
+        task.add_done_callback(done)
+        return task
+    
+    async def _compute(
+        self,
+        key: str,
+        cache_type: CacheType,
+        loader: Callable[[], Awaitable[Any]],
+        custom_ttl: Optional[timedelta]
+    ) -> Any:
+        """Calcule sous verrou Redis, ou attend la valeur calculée par un autre réplica"""
+        lock_key = f"{COMPUTE_LOCK_PREFIX}:{self._redis_key(key, cache_type)}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_wait_timeout
+        while not await self._acquire_lock(lock_key, token):
+            self.compute_metrics['lock_waits'] += 1
+            entry = await self._wait_for_remote(key, cache_type, lock_key, deadline)
+            if entry is not None:
+                return entry.value
+            if time.monotonic() >= deadline:
+                # Détenteur trop lent : calcul local plutôt qu'une erreur
+                self.compute_metrics['lock_timeouts'] += 1
+                token = None
+                break
+        
+        try:
+            if token:
+                # Valeur publiée entre le miss et la prise du verrou
+                entry = await self._peek_entry(key, cache_type)
+                if entry is not None:
+                    return entry.value
+            return await self._load_and_store(key, cache_type, loader, custom_ttl)
+        finally:
+            if token:
+                await self._release_lock(lock_key, token)
+    
+    async def _refresh(
+        self,
+        key: str,
+        cache_type: CacheType,
+        loader: Callable[[], Awaitable[Any]],
+        custom_ttl: Optional[timedelta]
+    ) -> Any:
+        """Rafraîchissement anticipé : abandonné si un autre réplica le fait déjà"""
+        lock_key = f"{COMPUTE_LOCK_PREFIX}:{self._redis_key(key, cache_type)}"
+        token = uuid.uuid4().hex
+        try:
+            if not await self._acquire_lock(lock_key, token):
+                return None
+            try:
+                return await self._load_and_store(key, cache_type, loader, custom_ttl)
+            finally:
+                await self._release_lock(lock_key, token)
+        except Exception as e:
+            # La valeur courante reste servie jusqu'à son TTL
+            self.compute_metrics['refresh_errors'] += 1
+            security_logger.log_error(f"Cache early refresh error for key {key}", e)
+            return None
+    
+    async def _load_and_store(
+        self,
+        key: str,
+        cache_type: CacheType,
+        loader: Callable[[], Awaitable[Any]],
+        custom_ttl: Optional[timedelta]
+    ) -> Any:
+        started = time.perf_counter()
+        value = await loader()
+        compute_seconds = time.perf_counter() - started
+        self.compute_metrics['computes'] += 1
+        if value is not None:
+            await self.set_many({key: value}, cache_type, custom_ttl, compute_seconds=compute_seconds)
+        return value
+    
+    async def _acquire_lock(self, lock_key: str, token: str) -> bool:
+        try:
+            return bool(await self.redis_client.set(lock_key, token, nx=True, px=int(self.lock_lease_seconds * 1000)))
+        except Exception as e:
+            # Redis indisponible : single-flight local uniquement
+            security_logger.log_error("Cache compute lock acquisition failed", e)
+            return True
+    
+    async def _release_lock(self, lock_key: str, token: str):
+        """Supprime le verrou seulement s'il appartient encore à ce calcul (WATCH/MULTI)"""
+        try:
+            async with self.redis_client.pipeline() as pipe:
+                await pipe.watch(lock_key)
+                owner = await pipe.get(lock_key)
+                if owner is None or owner.decode() != token:
+                    await pipe.unwatch()
+                    return
+                pipe.multi()
+                pipe.delete(lock_key)
+                await pipe.execute()
+        except Exception:
+            pass  # Non-critique : le bail expire de lui-même
+    
+    async def _wait_for_remote(
+        self,
+        key: str,
+        cache_type: CacheType,
+        lock_key: str,
+        deadline: float
+    ) -> Optional[CacheEntry]:
+        """Attend la valeur calculée par le détenteur du verrou ; None s'il l'a relâché sans valeur"""
+        delay = 0.02
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.25)
+            entry = await self._peek_entry(key, cache_type)
+            if entry is not None:
+                return entry
+            if not await self.redis_client.exists(lock_key):
+                return None
+        return None
+    
+    async def _peek_entry(self, key: str, cache_type: CacheType) -> Optional[CacheEntry]:
+        """Lecture Redis directe, hors L1 et métriques"""
+        cached_data = await self.redis_client.get(self._redis_key(key, cache_type))
+        if cached_data is None:
+            return None
+        entry = await self._decode_entry(key, cache_type, cached_data)
+        return None if entry.is_expired() else entry
+    
+    async def get_access_stats(self, key: str, cache_type: CacheType) -> Dict[str, Any]:
+        """Nombre d'accès et dernier accès d'une entrée"""
+        stats = {'access_count': 0, 'last_accessed': None}
+        if not self.initialized or not self.redis_client:
+            return stats
+        
+        try:
+            counts_key, last_access_key = self._access_keys(cache_type)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hget(counts_key, key)
+                pipe.zscore(last_access_key, key)
+                count, last_accessed = await pipe.execute()
+            stats['access_count'] = int(count or 0)
+            stats['last_accessed'] = _from_epoch(last_accessed) if last_accessed else None
+        except Exception as e:
+            security_logger.log_error(f"Cache access stats error for key {key}", e)
+        return stats
+    
     async def _delete_key(self, redis_key: str):
         """Supprime une clé expirée"""
+        if self.near_cache:
+            self.near_cache.invalidate([redis_key])
         try:
             await self.redis_client.delete(redis_key)
         except:
@@ -446,6 +1142,11 @@ class ProductionRedisCache:
     
     async def close(self):
         """Ferme les connexions Redis"""
+        for task in self._reclaim_tasks.values():
+            task.cancel()
+        self._reclaim_tasks.clear()
+        if self.invalidation_bus:
+            await self.invalidation_bus.stop()
         if self.redis_client:
             await self.redis_client.close()
         if self.redis_pool:
@@ -470,9 +1171,18 @@ async def get_cache() -> ProductionRedisCache:
         redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
         redis_db = int(os.getenv('REDIS_DB', '0'))
         
+        # Tier L1 en processus pour les petites clés très lues
+        near_cache = None
+        if os.getenv('REDIS_NEAR_CACHE_ENABLED', 'true').lower() == 'true':
+            near_cache = NearCache(
+                max_bytes=int(os.getenv('REDIS_NEAR_CACHE_MAX_BYTES', str(16 * 1024 * 1024))),
+                ttl_seconds=float(os.getenv('REDIS_NEAR_CACHE_TTL_SECONDS', '10'))
+            )
+        
         _cache_instance = ProductionRedisCache(
             redis_url=redis_url,
-            db=redis_db
+            db=redis_db,
+            near_cache=near_cache
         )
         await _cache_instance.initialize()
     
@@ -502,3 +1212,15 @@ async def get_cached_session_data(session_id: str) -> Optional[Dict[str, Any]]:
     """Récupère des données de session cachées"""
     cache = await get_cache()
     return await cache.get(session_id, CacheType.SESSION_DATA)
+
+
+async def cache_session_data_many(sessions: Dict[str, Dict[str, Any]]) -> bool:
+    """Cache les données de plusieurs sessions en un aller-retour"""
+    cache = await get_cache()
+    return await cache.set_many(sessions, CacheType.SESSION_DATA)
+
+
+async def preload_session_data(session_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Précharge les données de plusieurs sessions en un aller-retour"""
+    cache = await get_cache()
+    return await cache.get_many(session_ids, CacheType.SESSION_DATA)
@@ -14,6 +14,7 @@ import redis.sentinel
 import asyncio
 import json
 import hashlib
+import itertools
 import time
 import logging
 from typing import Any, Optional, Dict, List, Union
@@ -25,6 +26,11 @@ from enum import Enum
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Générations par stratégie (hash) : vider une stratégie incrémente sa génération, en O(1)
+GENERATION_KEY = "orchestrator:generation"
+GENERATION_REFRESH_SECONDS = 1.0
+SCAN_BATCH_SIZE = 500
+
 class CacheStrategy(Enum):
     """Stratégies de cache par type de données"""
     LLM_RESPONSES = "llm_responses"      # TTL 1h
@@ -93,6 +99,12 @@ class RedisProductionCache:
         self.error_count = 0
         self.total_operations = 0
         
+        # Génération par stratégie (0 : clés sans génération), relue au plus une fois par seconde
+        self.generations: Dict[CacheStrategy, int] = {}
+        self._generations_read_at = float('-inf')
+        self._generation_changes = 0
+        self._reclaim_tasks: set = set()
+        
     async def initialize(self) -> bool:
         """Initialise connexion Redis avec failover"""
         try:
@@ -203,8 +215,8 @@ class RedisProductionCache:
     
     def _generate_cache_key(self, strategy: CacheStrategy, key: str, 
                            user_id: str = None) -> str:
-        """Génère clé cache standardisée"""
-        base_key = f"orchestrator:{strategy.value}:{key}"
+        """Génère clé cache standardisée (préfixée de la génération de la stratégie)"""
+        base_key = f"orchestrator:{self._namespace(strategy, self.generations.get(strategy, 0))}:{key}"
         
         if user_id:
             base_key = f"{base_key}:user:{user_id}"
@@ -217,6 +229,26 @@ class RedisProductionCache:
             return hashlib.sha256(key.encode()).hexdigest()
         return key
     
+    @staticmethod
+    def _namespace(strategy: CacheStrategy, generation: int) -> str:
+        return f"{strategy.value}:g{generation}" if generation else strategy.value
+    
+    async def _refresh_generations(self):
+        """Relit les générations des stratégies, au plus une fois par intervalle"""
+        if time.monotonic() - self._generations_read_at < GENERATION_REFRESH_SECONDS:
+            return
+        changes = self._generation_changes
+        values = await asyncio.get_event_loop().run_in_executor(
+            None,
+            self.redis_client.hmget,
+            GENERATION_KEY,
+            [strategy.value for strategy in CacheStrategy]
+        )
+        if changes != self._generation_changes:
+            return  # Génération incrémentée localement pendant la lecture
+        self.generations = {strategy: int(value or 0) for strategy, value in zip(CacheStrategy, values)}
+        self._generations_read_at = time.monotonic()
+    
     async def set(self, strategy: CacheStrategy, key: str, value: Any,
                   user_id: str = None, custom_ttl: int = None) -> bool:
         """Store valeur dans cache avec TTL"""
@@ -224,6 +256,7 @@ class RedisProductionCache:
             self.total_operations += 1
             
             # Génération clé standardisée
+            await self._refresh_generations()
             cache_key = self._generate_cache_key(strategy, key, user_id)
             cache_key = self._hash_large_key(cache_key)
             
@@ -261,6 +294,7 @@ class RedisProductionCache:
             self.total_operations += 1
             
             # Génération clé
+            await self._refresh_generations()
             cache_key = self._generate_cache_key(strategy, key, user_id)
             cache_key = self._hash_large_key(cache_key)
             
@@ -294,6 +328,7 @@ class RedisProductionCache:
                      user_id: str = None) -> bool:
         """Supprime valeur du cache"""
         try:
+            await self._refresh_generations()
             cache_key = self._generate_cache_key(strategy, key, user_id)
             cache_key = self._hash_large_key(cache_key)
             
@@ -311,28 +346,62 @@ class RedisProductionCache:
             self.error_count += 1
             return False
     
-    async def clear_pattern(self, pattern: str) -> int:
-        """Supprime toutes les clés correspondant au pattern"""
+    async def clear_strategy(self, strategy: CacheStrategy) -> int:
+        """Invalide toutes les clés d'une stratégie en O(1) : nouvelle génération"""
         try:
-            if self.is_cluster_mode:
-                # Pour cluster, itérer sur tous les nodes
-                deleted = 0
-                for key in self.redis_client.scan_iter(match=pattern):
-                    if self.redis_client.delete(key):
-                        deleted += 1
-                return deleted
-            else:
-                # Single node
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    return self.redis_client.delete(*keys)
-                return 0
-                
+            generation = await asyncio.get_event_loop().run_in_executor(
+                None, self.redis_client.hincrby, GENERATION_KEY, strategy.value, 1
+            )
+            self.generations[strategy] = generation
+            self._generation_changes += 1
+            
+            # Ancienne génération récupérée en arrière-plan ; les clés sans génération
+            # (même préfixe que toutes les autres) et les clés hachées expirent par TTL
+            if generation > 1:
+                task = asyncio.create_task(
+                    self.clear_pattern(f"orchestrator:{self._namespace(strategy, generation - 1)}:*")
+                )
+                self._reclaim_tasks.add(task)
+                task.add_done_callback(self._reclaim_tasks.discard)
+            
+            logger.info(f"🧹 Cache CLEAR {strategy.value}: génération {generation}")
+            return generation
+            
         except Exception as e:
             logger.error(f"❌ Cache CLEAR error: {e}")
             self.error_count += 1
             return 0
     
+    async def clear_pattern(self, pattern: str, max_keys_per_second: int = 5000) -> int:
+        """Supprime les clés du pattern : SCAN incrémental (jamais KEYS), UNLINK par lots, débit plafonné"""
+        loop = asyncio.get_event_loop()
+        deleted = 0
+        try:
+            keys = self.redis_client.scan_iter(match=pattern, count=SCAN_BATCH_SIZE)
+            while True:
+                started = time.monotonic()
+                batch = await loop.run_in_executor(None, lambda: list(itertools.islice(keys, SCAN_BATCH_SIZE)))
+                if not batch:
+                    return deleted
+                deleted += await loop.run_in_executor(None, self._unlink, batch)
+                # Redis reste disponible pour le trafic applicatif entre deux lots
+                await asyncio.sleep(max(0.0, len(batch) / max_keys_per_second - (time.monotonic() - started)))
+                
+        except Exception as e:
+            logger.error(f"❌ Cache CLEAR error: {e}")
+            self.error_count += 1
+            return deleted
+    
+    def _unlink(self, keys: List[str]) -> int:
+        """UNLINK d'un lot (libération mémoire asynchrone côté Redis)"""
+        if self.is_cluster_mode:
+            # Clés réparties sur plusieurs slots : une commande par clé, en pipeline
+            pipe = self.redis_client.pipeline()
+            for key in keys:
+                pipe.unlink(key)
+            return sum(pipe.execute())
+        return self.redis_client.unlink(*keys)
+    
     async def get_stats(self) -> Dict[str, Any]:
         """Statistiques cache performance"""
         try:
@@ -358,6 +427,7 @@ class RedisProductionCache:
                 "redis_connected_clients": info.get("connected_clients", 0),
                 "redis_ops_per_sec": info.get("instantaneous_ops_per_sec", 0),
                 "cluster_mode": self.is_cluster_mode,
+                "generations": {strategy.value: generation for strategy, generation in self.generations.items()},
                 "uptime_seconds": info.get("uptime_in_seconds", 0)
             }
             
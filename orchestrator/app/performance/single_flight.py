@@ -0,0 +1,292 @@
+"""
+Déduplication single-flight des exécutions /invoke identiques
+Une seule exécution LangGraph par requête normalisée : les doublons concurrents
+s'abonnent au flux SSE de l'exécution en cours. Entre réplicas, un bail Redis
+désigne l'exécutant et les événements sont relayés par un Redis Stream.
+"""
+import asyncio
+import hashlib
+import json
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from orchestrator.app.config import settings
+from orchestrator.app.security.logging import security_logger
+from orchestrator.app.performance.llm_cache import normalize_task
+from orchestrator.app.performance.redis_cache import get_cache
+
+LEASE_PREFIX = "invoke:lease:"
+EVENTS_PREFIX = "invoke:events:"
+
+# Émis aux abonnés si l'exécutant distant disparaît sans terminer
+LOST_LEADER_EVENT = f"data: {json.dumps({'error': 'Task execution failed'})}\n\n"
+
+
+def request_key(task_description: str, code_context: Optional[str] = None,
+                session_id: Optional[str] = None) -> str:
+    """Hash de la requête normalisée (casse/espaces de la tâche, code tel quel)"""
+    payload = "\x1f".join([
+        normalize_task(task_description),
+        (code_context or "").strip(),
+        session_id or ""
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FlightRun:
+    """Exécution partagée : tampon des événements SSE rejoué à chaque abonné"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.owner = uuid.uuid4().hex  # Propriétaire du bail (l'exécutant, local ou distant)
+        self.leader = False
+        self.lines: List[str] = []
+        self.done = False
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._signal = asyncio.Event()
+
+    def publish(self, line: str):
+        self.lines.append(line)
+        self._wake()
+
+    def finish(self):
+        self.done = True
+        self._wake()
+
+    def _wake(self):
+        signal, self._signal = self._signal, asyncio.Event()
+        signal.set()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Rejoue les événements déjà émis puis suit l'exécution jusqu'à sa fin"""
+        self.subscribers += 1
+        index = 0
+        while True:
+            signal = self._signal
+            while index < len(self.lines):
+                yield self.lines[index]
+                index += 1
+            if self.done:
+                return
+            await signal.wait()
+
+
+class InvokeSingleFlight:
+    """Coalescence des exécutions identiques, locale et inter-réplicas (bail Redis)"""
+
+    def __init__(self, redis_client=None, lease_seconds: Optional[float] = None,
+                 replay_seconds: float = 60.0, poll_seconds: float = 1.0):
+        self.redis = redis_client
+        self.lease_seconds = lease_seconds or settings.INVOKE_SINGLE_FLIGHT_LEASE_SECONDS
+        self.replay_seconds = replay_seconds
+        self.poll_seconds = poll_seconds
+        self._runs: Dict[str, FlightRun] = {}
+
+        self.metrics = {
+            'leaders': 0,
+            'coalesced_local': 0,
+            'coalesced_remote': 0,
+            'lost_leaders': 0,
+            'redis_errors': 0
+        }
+
+    async def begin(self, key: str) -> Tuple[bool, FlightRun]:
+        """
+        Retourne (True, run) si l'appelant doit exécuter la requête,
+        (False, run) s'il doit seulement s'abonner à une exécution existante.
+        """
+        run = self._runs.get(key)
+        if run is not None:
+            self.metrics['coalesced_local'] += 1
+            return False, run
+
+        # Enregistré avant tout await : les doublons locaux arrivant pendant la prise de bail suivent ce run
+        run = FlightRun(key)
+        self._runs[key] = run
+        if self.redis is not None:
+            try:
+                remote_owner = await self._acquire_lease(run)
+            except BaseException:
+                # Annulé pendant la prise de bail : les doublons locaux déjà abonnés sont libérés
+                run.publish(LOST_LEADER_EVENT)
+                run.finish()
+                self._runs.pop(key, None)
+                await self._compare_and(run, lambda pipe, lease: pipe.delete(lease))
+                raise
+            if remote_owner is not None:
+                run.owner = remote_owner
+                self.metrics['coalesced_remote'] += 1
+                run.task = asyncio.create_task(self._relay(run))
+                return False, run
+
+        run.leader = True
+        self.metrics['leaders'] += 1
+        return True, run
+
+    def start(self, run: FlightRun, source: AsyncIterator[str],
+              on_done: Optional[Callable[[], Any]] = None) -> asyncio.Task:
+        """
+        Exécute la source en tâche de fond : la déconnexion d'un client
+        (y compris l'initiateur) n'interrompt pas l'exécution partagée.
+        """
+        run.task = asyncio.create_task(self._drive(run, source, on_done))
+        return run.task
+
+    async def abort(self, run: FlightRun, line: str):
+        """Termine un run non démarré (ex. refus d'admission) en notifiant les abonnés"""
+        await self._drive(run, self._single(line), None)
+
+    @staticmethod
+    async def _single(line: str) -> AsyncIterator[str]:
+        yield line
+
+    async def _drive(self, run: FlightRun, source: AsyncIterator[str],
+                     on_done: Optional[Callable[[], Any]]):
+        heartbeat = asyncio.create_task(self._heartbeat(run)) if self.redis is not None else None
+        try:
+            async for line in source:
+                run.publish(line)
+                await self._redis_publish(run, {"line": line})
+        except Exception as e:
+            security_logger.log_error("Single-flight run failed", e)
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            run.finish()
+            self._runs.pop(run.key, None)
+            await self._redis_publish(run, {"end": "1"}, ttl=self.replay_seconds)
+            await self._release_lease(run)
+            if on_done is not None:
+                on_done()
+
+    # --- Coordination Redis ---
+    @staticmethod
+    def _stream(run: FlightRun) -> str:
+        # Un flux par exécution : un run ultérieur ne rejoue pas les événements du précédent
+        return f"{EVENTS_PREFIX}{run.key}:{run.owner}"
+
+    async def _acquire_lease(self, run: FlightRun) -> Optional[str]:
+        """Prend le bail ; retourne le propriétaire distant s'il est déjà détenu, None sinon"""
+        lease = LEASE_PREFIX + run.key
+        try:
+            for _ in range(3):
+                if await self.redis.set(lease, run.owner, nx=True, px=int(self.lease_seconds * 1000)):
+                    return None
+                owner = await self.redis.get(lease)
+                if owner is not None:
+                    return self._text(owner)
+                # Bail libéré entre SET NX et GET : nouvelle tentative
+        except Exception as e:
+            # Redis indisponible : déduplication locale uniquement
+            self.metrics['redis_errors'] += 1
+            security_logger.log_error("Single-flight lease acquisition failed", e)
+        return None
+
+    async def _release_lease(self, run: FlightRun):
+        if self.redis is None or not run.leader:
+            return
+        await self._compare_and(run, lambda pipe, key: pipe.delete(key))
+
+    async def _heartbeat(self, run: FlightRun):
+        # Renouvelle le bail tant que l'exécution progresse, même sans événement
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            lease_ms = int(self.lease_seconds * 1000)
+            await self._compare_and(run, lambda pipe, key: pipe.pexpire(key, lease_ms))
+
+    async def _compare_and(self, run: FlightRun, action: Callable[[Any, str], Any]):
+        """Applique action au bail seulement s'il appartient encore à ce run (WATCH/MULTI)"""
+        key = LEASE_PREFIX + run.key
+        try:
+            async with self.redis.pipeline() as pipe:
+                await pipe.watch(key)
+                owner = await pipe.get(key)
+                if owner is None or self._text(owner) != run.owner:
+                    await pipe.unwatch()
+                    return
+                pipe.multi()
+                action(pipe, key)
+                await pipe.execute()
+        except Exception as e:
+            self.metrics['redis_errors'] += 1
+            security_logger.log_error("Single-flight lease update failed", e)
+
+    async def _redis_publish(self, run: FlightRun, fields: Dict[str, str], ttl: Optional[float] = None):
+        if self.redis is None or not run.leader:
+            return
+        stream = self._stream(run)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.xadd(stream, fields)
+                pipe.pexpire(stream, int((ttl or self.lease_seconds * 2) * 1000))
+                await pipe.execute()
+        except Exception as e:
+            self.metrics['redis_errors'] += 1
+            security_logger.log_error("Single-flight event relay failed", e)
+
+    async def _relay(self, run: FlightRun):
+        """Suit le Redis Stream de l'exécutant distant et le republie localement"""
+        stream = self._stream(run)
+        last_id = "0-0"
+        try:
+            while True:
+                response = await self.redis.xread({stream: last_id}, block=int(self.poll_seconds * 1000))
+                if not response:
+                    # Ni événement ni bail : l'exécutant a disparu sans terminer
+                    owner = await self.redis.get(LEASE_PREFIX + run.key)
+                    if owner is None or self._text(owner) != run.owner:
+                        self.metrics['lost_leaders'] += 1
+                        run.publish(LOST_LEADER_EVENT)
+                        return
+                    continue
+                for entry_id, fields in response[0][1]:
+                    last_id = entry_id
+                    fields = {self._text(k): self._text(v) for k, v in fields.items()}
+                    if "end" in fields:
+                        return
+                    run.publish(fields["line"])
+        except Exception as e:
+            self.metrics['redis_errors'] += 1
+            security_logger.log_error("Single-flight relay failed", e)
+            run.publish(LOST_LEADER_EVENT)
+        finally:
+            run.finish()
+            self._runs.pop(run.key, None)
+
+    @staticmethod
+    def _text(value: Any) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self.metrics, 'in_flight': len(self._runs)}
+
+
+@asynccontextmanager
+async def abort_on_failure(flight: Optional[InvokeSingleFlight], run: Optional[FlightRun]):
+    """
+    Préparation d'un run avant start() : sur exception ou annulation (client déconnecté),
+    le run est terminé et retiré pour que les doublons abonnés ne l'attendent pas indéfiniment.
+    """
+    try:
+        yield
+    except BaseException:
+        if run is not None and not run.done:
+            await flight.abort(run, LOST_LEADER_EVENT)
+        raise
+
+
+# Instance globale
+_single_flight_instance: Optional[InvokeSingleFlight] = None
+
+
+async def get_single_flight() -> InvokeSingleFlight:
+    """Retourne l'instance globale (Redis partagé via ProductionRedisCache si disponible)"""
+    global _single_flight_instance
+
+    if _single_flight_instance is None:
+        cache = await get_cache()
+        _single_flight_instance = InvokeSingleFlight(redis_client=cache.redis_client)
+
+    return _single_flight_instance
@@ -0,0 +1,270 @@
+"""
+Pool de workers de lint persistants pour SecureCodeAnalyzer
+Chaque worker est un processus Python isolé (python -I, répertoire et
+environnement sandbox) qui garde pylint/astroid chargés et reçoit le code par
+pipe : plus de démarrage d'interpréteur par analyse, et aucun appel bloquant
+dans la boucle asyncio. Timeout par job (le worker fautif est tué puis
+remplacé), recyclage après un nombre de jobs, résultats mis en cache par
+empreinte du code.
+"""
+
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from orchestrator.app.config import settings
+
+WORKER_SCRIPT = Path(__file__).with_name("lint_worker.py")
+# Limite d'une ligne du protocole (sortie pylint d'un job)
+STREAM_LIMIT = 4 * 1024 * 1024
+
+
+class LintError(Exception):
+    """Échec d'une analyse par le pool de lint."""
+    pass
+
+
+class LintTimeout(LintError):
+    """Job de lint dépassant son délai (worker tué et remplacé)."""
+    pass
+
+
+class LintUnavailable(LintError):
+    """Outil de lint absent de l'environnement des workers."""
+    pass
+
+
+class LintWorker:
+    """Processus worker et nombre de jobs traités"""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.jobs = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    def kill(self):
+        try:
+            self.process.kill()
+        except (ProcessLookupError, RuntimeError):
+            pass  # Déjà terminé ou boucle d'origine fermée
+
+
+class LintWorkerPool:
+    """Workers de lint réutilisés entre les analyses, démarrés à la demande"""
+
+    def __init__(self, sandbox_dir: Path, size: Optional[int] = None, job_timeout: Optional[float] = None,
+                 max_jobs_per_worker: Optional[int] = None, cache_size: Optional[int] = None,
+                 startup_timeout: Optional[float] = None, command: Optional[List[str]] = None):
+        self.sandbox_dir = Path(sandbox_dir)
+        self.size = size or settings.LINT_POOL_SIZE
+        self.job_timeout = job_timeout or settings.LINT_POOL_JOB_TIMEOUT_SECONDS
+        self.max_jobs_per_worker = max_jobs_per_worker or settings.LINT_POOL_MAX_JOBS_PER_WORKER
+        self.cache_size = cache_size if cache_size is not None else settings.LINT_POOL_CACHE_SIZE
+        self.startup_timeout = startup_timeout or settings.LINT_POOL_STARTUP_TIMEOUT_SECONDS
+        self.command = command or [sys.executable, "-I", str(WORKER_SCRIPT), str(self.sandbox_dir)]
+
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._workers: List[LintWorker] = []
+        self._spawning = 0
+        self._unavailable: Optional[str] = None
+
+        self.metrics = {
+            'jobs': 0,
+            'cache_hits': 0,
+            'deduplicated': 0,
+            'timeouts': 0,
+            'errors': 0,
+            'workers_spawned': 0,
+            'workers_recycled': 0,
+            'job_seconds_total': 0.0
+        }
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        return {
+            'PATH': '/usr/bin:/bin',  # Environnement minimal
+            'HOME': '/tmp',  # Pas d'accès home
+            'TMPDIR': str(self.sandbox_dir)  # Tmp dirigé vers sandbox
+        }
+
+    async def lint(self, code: str) -> str:
+        """Sortie brute de pylint pour ce code (cache, puis job partagé entre appels identiques)"""
+        self._bind_loop()
+        key = hashlib.sha256(code.encode()).hexdigest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.metrics['cache_hits'] += 1
+            return cached
+
+        job = self._inflight.get(key)
+        if job is None:
+            job = asyncio.ensure_future(self._run_and_cache(key, code))
+            self._inflight[key] = job
+            job.add_done_callback(lambda done: self._job_done(key, done))
+        else:
+            self.metrics['deduplicated'] += 1
+        # L'annulation d'un appelant n'interrompt pas le job des autres
+        return await asyncio.shield(job)
+
+    def _job_done(self, key: str, job: asyncio.Future):
+        if self._inflight.get(key) is job:
+            del self._inflight[key]
+        if not job.cancelled():
+            job.exception()  # Exception récupérée même si tous les appelants ont été annulés
+
+    async def _run_and_cache(self, key: str, code: str) -> str:
+        output = await self._run(code)
+        if self.cache_size > 0:
+            self._cache[key] = output
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return output
+
+    async def _run(self, code: str) -> str:
+        worker = await self._acquire()
+        healthy = False
+        started = time.perf_counter()
+        self.metrics['jobs'] += 1
+        try:
+            worker.jobs += 1
+            request = {"id": worker.jobs, "code": code}
+            worker.process.stdin.write((json.dumps(request) + "\n").encode())
+            await worker.process.stdin.drain()
+            line = await asyncio.wait_for(worker.process.stdout.readline(), self.job_timeout)
+            if not line:
+                raise LintError("Lint worker exited unexpectedly")
+            response = json.loads(line)
+            if response.get("id") != request["id"]:
+                raise LintError("Lint worker protocol desynchronized")
+            healthy = True
+            if "error" in response:
+                raise LintError(response["error"])
+            return response.get("output", "")
+        except asyncio.TimeoutError:
+            self.metrics['timeouts'] += 1
+            raise LintTimeout(f"Lint job exceeded {self.job_timeout}s")
+        except (BrokenPipeError, ConnectionResetError):
+            raise LintError("Lint worker exited unexpectedly")
+        except LintError:
+            self.metrics['errors'] += 1
+            raise
+        finally:
+            self.metrics['job_seconds_total'] += time.perf_counter() - started
+            # Worker en état inconnu (timeout, annulation, crash) : tué, un autre le remplacera
+            self._release(worker, healthy)
+
+    async def _acquire(self) -> LintWorker:
+        while True:
+            if self._unavailable:
+                raise LintUnavailable(self._unavailable)
+            try:
+                worker = self._idle.get_nowait()
+            except asyncio.QueueEmpty:
+                if len(self._workers) + self._spawning < self.size:
+                    return await self._spawn()
+                worker = await self._idle.get()
+            # None : place libérée par un worker retiré
+            if worker is not None and worker.alive:
+                return worker
+            if worker is not None:
+                self._retire(worker)
+
+    async def _spawn(self) -> LintWorker:
+        self._spawning += 1
+        started = False
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=str(self.sandbox_dir),
+                env=self.environment,
+                limit=STREAM_LIMIT
+            )
+            worker = LintWorker(process)
+            try:
+                line = await asyncio.wait_for(process.stdout.readline(), self.startup_timeout)
+                ready = json.loads(line) if line else {"ready": False, "error": "worker exited at startup"}
+            except BaseException:
+                worker.kill()
+                raise
+            if not ready.get("ready"):
+                worker.kill()
+                self._unavailable = ready.get("error") or "lint worker unavailable"
+                raise LintUnavailable(self._unavailable)
+            started = True
+        except FileNotFoundError as e:
+            self._unavailable = str(e)
+            raise LintUnavailable(self._unavailable)
+        except asyncio.TimeoutError:
+            raise LintError(f"Lint worker did not start within {self.startup_timeout}s")
+        finally:
+            self._spawning -= 1
+            if not started:
+                # Démarrage échoué : un appelant en attente réessaie ou constate l'indisponibilité
+                self._idle.put_nowait(None)
+        self._workers.append(worker)
+        self.metrics['workers_spawned'] += 1
+        return worker
+
+    def _release(self, worker: LintWorker, healthy: bool):
+        if healthy and worker.alive and worker.jobs < self.max_jobs_per_worker:
+            self._idle.put_nowait(worker)
+        else:
+            self._retire(worker)
+
+    def _retire(self, worker: LintWorker):
+        worker.kill()
+        if worker in self._workers:
+            self._workers.remove(worker)
+            self.metrics['workers_recycled'] += 1
+            self._idle.put_nowait(None)  # Réveille un appelant en attente de worker
+
+    def _bind_loop(self):
+        """Processus et files sont liés à une boucle : repartir de zéro si elle change"""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        for worker in self._workers:
+            worker.kill()
+        self._workers = []
+        self._inflight = {}
+        self._spawning = 0
+        self._idle = asyncio.Queue()
+        self._loop = loop
+
+    async def close(self):
+        """Arrête tous les workers"""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.kill()
+        for worker in workers:
+            try:
+                await worker.process.wait()
+            except RuntimeError:
+                pass
+        self._loop = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        jobs = self.metrics['jobs']
+        return {
+            **self.metrics,
+            'workers': len(self._workers),
+            'size': self.size,
+            'cache_entries': len(self._cache),
+            'avg_job_seconds': self.metrics['job_seconds_total'] / jobs if jobs else 0.0,
+            'unavailable': self._unavailable
+        }
@@ -0,0 +1,83 @@
+"""
+Worker de lint persistant du pool de SecureCodeAnalyzer.
+Lancé par LintWorkerPool (python -I, répertoire et environnement sandbox), il
+importe pylint une seule fois puis traite les requêtes reçues sur stdin :
+une requête JSON {"id", "code"} par ligne, une réponse JSON {"id", "output"}
+ou {"id", "error"} par ligne sur stdout.
+
+Ce module n'importe que la bibliothèque standard au chargement : il est
+exécuté par chemin, hors du package orchestrator.
+"""
+
+import io
+import json
+import os
+import sys
+from typing import Callable, Dict, TextIO
+
+# Mêmes options que l'ancien appel pylint en sous-processus
+PYLINT_ARGS = ['--score=no', '--reports=no', '--disable=all', '--enable=E,W']
+
+
+def write_message(stream: TextIO, message: Dict) -> None:
+    stream.write(json.dumps(message) + "\n")
+    stream.flush()
+
+
+def pylint_linter() -> Callable[[str], str]:
+    """Charge pylint/astroid et retourne la fonction de lint d'un fichier"""
+    import astroid
+    from pylint.lint import Run
+    from pylint.reporters.text import TextReporter
+
+    def lint(path: str) -> str:
+        output = io.StringIO()
+        try:
+            Run([*PYLINT_ARGS, path], reporter=TextReporter(output), exit=False)
+        finally:
+            # Module analysé retiré du cache astroid : mémoire stable d'un job à l'autre
+            astroid.MANAGER.astroid_cache.pop(os.path.splitext(os.path.basename(path))[0], None)
+        return output.getvalue()
+
+    return lint
+
+
+def serve(lint: Callable[[str], str], sandbox_dir: str) -> None:
+    """Boucle requête/réponse jusqu'à la fermeture de stdin"""
+    protocol = sys.stdout
+    # Ce qu'écrivent pylint ou ses plugins ne doit pas corrompre le protocole
+    sys.stdout = sys.stderr
+    write_message(protocol, {"ready": True, "pid": os.getpid()})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        path = os.path.join(sandbox_dir, f"analysis_{os.getpid()}_{request['id']}.py")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(request['code'])
+            os.chmod(path, 0o644)
+            response = {"id": request['id'], "output": lint(path)}
+        except Exception as e:
+            response = {"id": request['id'], "error": f"{type(e).__name__}: {e}"}
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        write_message(protocol, response)
+
+
+def main() -> None:
+    sandbox_dir = sys.argv[1] if len(sys.argv) > 1 else os.getcwd()
+    try:
+        lint = pylint_linter()
+    except ImportError as e:
+        write_message(sys.stdout, {"ready": False, "error": f"pylint missing: {e}"})
+        return
+    serve(lint, sandbox_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,14 @@ Ce module contient les utilitaires pour :
 
 import logging
 import json
+import re
+import timeit
 from datetime import datetime, timezone
 from enum import Enum
+from functools import partial
 from typing import Dict, Any, Optional
 from orchestrator.app.config import settings
+from orchestrator.app.observability.event_aggregation import SecurityEventAggregator
 
 
 class AuditEventType(Enum):
@@ -30,11 +34,81 @@ class AuditEventType(Enum):
     TOOL_EXECUTION = "tool_execution"
 
 
+# Motifs sensibles combinés en une seule alternance, compilée une fois :
+# un seul parcours de la chaîne quel que soit le nombre de motifs
+SENSITIVE_PATTERN = re.compile(
+    # Clés API
+    r'(?P<api_key>api[_-]?key["\s]*[:=]["\s]*)[a-zA-Z0-9-_]{20,}'
+    # Tokens
+    r'|(?P<token>token["\s]*[:=]["\s]*)[a-zA-Z0-9-_.]{20,}'
+    # Mots de passe
+    r'|(?P<password>password["\s]*[:=]["\s]*)[^\s"]{8,}'
+    # IPs privées dans les messages d'erreur
+    r'|(?P<private_ip>\b(?:10\.\d{1,3}\.\d{1,3}\.\d{1,3}|172\.1[6-9]\.\d{1,3}\.\d{1,3}'
+    r'|172\.2[0-9]\.\d{1,3}\.\d{1,3}|172\.3[0-1]\.\d{1,3}\.\d{1,3}|192\.168\.\d{1,3}\.\d{1,3})\b)',
+    re.IGNORECASE
+)
+
+# Sous-chaînes (en minuscules) présentes dans toute correspondance de SENSITIVE_PATTERN
+SENSITIVE_TRIGGERS = ("key", "token", "password", "10.", "172.", "192.168.")
+
+
+def _mask_match(match: "re.Match[str]") -> str:
+    if match.lastgroup == 'private_ip':
+        return '***PRIVATE_IP***'
+    return match.group(match.lastgroup) + '***MASKED***'
+
+
+def mask_sensitive_data(message: str) -> str:
+    """
+    Masque clés API, tokens, mots de passe et IPs privées en une passe.
+    
+    Les chaînes sans déclencheur (cas de la grande majorité des champs
+    d'événements) sont retournées telles quelles sans passer par le regex.
+    """
+    # Tout motif contient '=' ou ':' (secrets) ou '.' (IPs)
+    if '=' not in message and ':' not in message and '.' not in message:
+        return message
+    lowered = message.lower()
+    # Test déroulé : plus rapide qu'any() sur un générateur
+    if not ('key' in lowered or 'token' in lowered or 'password' in lowered
+            or '10.' in lowered or '172.' in lowered or '192.168.' in lowered):
+        return message
+    return SENSITIVE_PATTERN.sub(_mask_match, message)
+
+
+MASKING_BENCHMARK_SAMPLES = {
+    'clean_plain': "cache entry stored for session",
+    'clean_punctuated': "orchestrator.app.performance.redis_cache: session_state",
+    'sensitive': "Connection to 192.168.1.10 failed with password=hunter2hunter2"
+}
+
+
+def benchmark_masking(iterations: int = 200000, samples: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+    """
+    Microbenchmark du masquage : nanosecondes par appel selon le type de chaîne.
+    
+    Args:
+        iterations: Nombre d'appels mesurés par échantillon
+        samples: Échantillons nommés (par défaut MASKING_BENCHMARK_SAMPLES)
+        
+    Returns:
+        Dict: Temps moyen (ns) par échantillon
+    """
+    samples = samples or MASKING_BENCHMARK_SAMPLES
+    return {
+        name: timeit.timeit(partial(mask_sensitive_data, sample), number=iterations) / iterations * 1e9
+        for name, sample in samples.items()
+    }
+
+
 class SecurityLogger:
     """Logger sécurisé qui masque les informations sensibles."""
     
-    def __init__(self):
+    def __init__(self, aggregator: Optional[SecurityEventAggregator] = None):
         self.logger = logging.getLogger("security")
+        # Agrégation des événements à haute fréquence (None : tout est journalisé)
+        self.aggregator = aggregator
     
     @staticmethod
     def _mask_sensitive_data(message: str) -> str:
@@ -47,21 +121,7 @@ class SecurityLogger:
         Returns:
             str: Message avec données sensibles masquées
         """
-        import re
-        
-        # Masquer les clés API
-        message = re.sub(r'(api[_-]?key["\s]*[:=]["\s]*)([a-zA-Z0-9-_]{20,})', r'\1***MASKED***', message, flags=re.IGNORECASE)
-        
-        # Masquer les tokens
-        message = re.sub(r'(token["\s]*[:=]["\s]*)([a-zA-Z0-9-_.]{20,})', r'\1***MASKED***', message, flags=re.IGNORECASE)
-        
-        # Masquer les mots de passe
-        message = re.sub(r'(password["\s]*[:=]["\s]*)([^\s"]{8,})', r'\1***MASKED***', message, flags=re.IGNORECASE)
-        
-        # Masquer les IPs privées dans les messages d'erreur
-        message = re.sub(r'\b(?:10\.\d{1,3}\.\d{1,3}\.\d{1,3}|172\.1[6-9]\.\d{1,3}\.\d{1,3}|172\.2[0-9]\.\d{1,3}\.\d{1,3}|172\.3[0-1]\.\d{1,3}\.\d{1,3}|192\.168\.\d{1,3}\.\d{1,3})\b', '***PRIVATE_IP***', message)
-        
-        return message
+        return mask_sensitive_data(message)
     
     def log_error(self, message: str, error: Exception, include_details: bool = False) -> None:
         """
@@ -89,15 +149,49 @@ class SecurityLogger:
             event_type: Type d'événement
             details: Détails de l'événement
         """
-        # Nettoyer les détails
+        # Rien à masquer si l'événement ne sera pas émis
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
+        
+        # Événements à haute fréquence : comptés dans le résumé de l'intervalle
+        if self.aggregator is not None:
+            if self.aggregator.due():
+                self.flush_event_summaries()
+            if not self.aggregator.admit(event_type, details):
+                return
+        
+        self.logger.warning(f"SECURITY_EVENT: {event_type}", extra=self._mask_details(details))
+    
+    def flush_event_summaries(self, force: bool = False) -> None:
+        """
+        Journalise les résumés des événements agrégés dont l'intervalle est écoulé.
+        
+        Args:
+            force: Résumer aussi l'intervalle en cours (arrêt de l'application)
+        """
+        if self.aggregator is None:
+            return
+        for summary in self.aggregator.drain(force):
+            self.logger.warning(
+                f"SECURITY_EVENT_SUMMARY: {summary.event_type} x{summary.count}",
+                extra={
+                    "event_type": summary.event_type,
+                    "count": summary.count,
+                    "individually_logged": summary.individually_logged,
+                    "interval_seconds": round(summary.interval_seconds, 3),
+                    "exemplars": [self._mask_details(exemplar) for exemplar in summary.exemplars]
+                }
+            )
+    
+    def _mask_details(self, details: Dict[str, Any]) -> Dict[str, Any]:
+        """Détails d'événement avec les valeurs textuelles masquées"""
         safe_details = {}
         for key, value in details.items():
             if isinstance(value, str):
                 safe_details[key] = self._mask_sensitive_data(value)
             else:
                 safe_details[key] = value
-        
-        self.logger.warning(f"SECURITY_EVENT: {event_type}", extra=safe_details)
+        return safe_details
     
     def log_access(self, endpoint: str, user_info: Dict[str, Any], success: bool) -> None:
         """
@@ -176,7 +270,9 @@ class AuditLogger:
 
 
 # Instance globale pour utilisation facile
-security_logger = SecurityLogger()
+security_logger = SecurityLogger(
+    aggregator=SecurityEventAggregator() if settings.SECURITY_EVENT_AGGREGATION_ENABLED else None
+)
 audit_logger = AuditLogger()
 
 
@@ -209,4 +305,4 @@ def setup_secure_logging():
     
     # Empêcher la propagation vers le logger root
     security_log.propagate = False
-    audit_log.propagate = False 
\ No newline at end of file
+    audit_log.propagate = False
\ No newline at end of file
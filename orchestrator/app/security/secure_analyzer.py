@@ -4,19 +4,18 @@ Implémentation du correctif critique pour la vulnérabilité RCE.
 """
 
 import ast
-import hashlib
 import tempfile
 import shlex
 import ipaddress
-import time
 from pathlib import Path
-from subprocess import run, PIPE, TimeoutExpired
 from typing import Dict, List, Set, Optional, Tuple
-from contextlib import contextmanager
+from functools import lru_cache
 import uuid
 import json
 import logging
 
+from orchestrator.app.security.lint_pool import LintTimeout, LintUnavailable, LintWorkerPool
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,6 +29,16 @@ class ValidationError(Exception):
     pass
 
 
+@lru_cache(maxsize=64)
+def parse_code(code: str) -> ast.Module:
+    """
+    Analyse syntaxique mémorisée : le même code_context n'est parsé qu'une fois
+    pour la validation de sécurité et l'extraction des parties pertinentes.
+    L'arbre retourné est partagé et ne doit pas être modifié.
+    """
+    return ast.parse(code)
+
+
 class SecureCodeAnalyzer:
     """Analyseur de code sécurisé avec validation AST et sandboxing."""
     
@@ -83,16 +92,19 @@ class SecureCodeAnalyzer:
         'pickle', 'copyreg', 'shelve', 'marshal', 'dbm'
     }
     
-    def __init__(self, sandbox_dir: Optional[Path] = None):
+    def __init__(self, sandbox_dir: Optional[Path] = None, lint_pool: Optional[LintWorkerPool] = None):
         """
         Initialise l'analyseur sécurisé.
         
         Args:
             sandbox_dir: Répertoire de sandbox (optionnel)
+            lint_pool: Pool de workers de lint (optionnel, créé dans le sandbox)
         """
         self.sandbox_dir = sandbox_dir or Path("/tmp/secure_sandbox")
         self.sandbox_dir.mkdir(exist_ok=True, mode=0o755)
         self._setup_sandbox_environment()
+        # Workers démarrés à la première analyse
+        self.lint_pool = lint_pool or LintWorkerPool(self.sandbox_dir)
         
     def _setup_sandbox_environment(self) -> None:
         """Configure l'environnement de sandbox."""
@@ -136,7 +148,7 @@ class SecureCodeAnalyzer:
         
         # 2. Validation AST stricte
         try:
-            tree = ast.parse(code)
+            tree = parse_code(code)
             self._validate_ast_nodes(tree)
         except SyntaxError as e:
             raise ValidationError(f"Invalid Python syntax: {e}")
@@ -182,42 +194,13 @@ class SecureCodeAnalyzer:
                         if child.func.attr in dangerous_methods:
                             raise SecurityError(f"Dangerous method call: {child.func.attr}")
     
-    @contextmanager
-    def _secure_temp_file(self, code: str):
-        """
-        Crée un fichier temporaire sécurisé dans le sandbox.
-        
-        Args:
-            code: Code à écrire dans le fichier
-            
-        Yields:
-            str: Chemin du fichier temporaire
-        """
-        # Générer un nom de fichier unique et sécurisé
-        code_hash = hashlib.sha256(code.encode()).hexdigest()[:16]
-        timestamp = int(time.time())
-        filename = f"analysis_{timestamp}_{code_hash}.py"
-        file_path = self.sandbox_dir / filename
-        
-        try:
-            # Écriture sécurisée avec permissions restrictives
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(code)
-            file_path.chmod(0o644)  # Lecture seule pour le groupe/autres
-            
-            yield str(file_path)
-            
-        finally:
-            # Nettoyage automatique
-            try:
-                file_path.unlink(missing_ok=True)
-            except Exception as e:
-                logger.warning(f"Failed to clean up temp file {file_path}: {e}")
-    
     async def analyze_code_secure(self, code: str) -> str:
         """
         Analyse le code de manière sécurisée.
         
+        L'analyse est confiée au pool de workers pylint persistants (processus
+        sandboxés, pylint déjà chargé) : aucun appel bloquant dans la boucle.
+        
         Args:
             code: Code Python à analyser
             
@@ -230,40 +213,19 @@ class SecureCodeAnalyzer:
         # 1. Validation préalable obligatoire
         self.validate_code_safety(code)
         
-        # 2. Création fichier temporaire sécurisé
-        with self._secure_temp_file(code) as temp_file_path:
-            # 3. Exécution sandboxée avec restrictions maximales
-            try:
-                result = run(
-                    ['pylint', 
-                     '--score=no', 
-                     '--reports=no',
-                     '--disable=all',
-                     '--enable=E,W',  # Erreurs et warnings uniquement
-                     temp_file_path],
-                    stdout=PIPE,
-                    stderr=PIPE,
-                    text=True,
-                    timeout=10,  # Timeout strict (réduit de 30 à 10s)
-                    cwd=str(self.sandbox_dir),  # Répertoire de travail sandbox
-                    env={
-                        'PATH': '/usr/bin:/bin',  # Environnement minimal
-                        'HOME': '/tmp',  # Pas d'accès home
-                        'TMPDIR': str(self.sandbox_dir)  # Tmp dirigé vers sandbox
-                    }
-                )
-                
-                # Nettoyage et formatage de la sortie
-                output = result.stdout or result.stderr or "No issues detected"
-                return self._sanitize_output(output)
-                
-            except TimeoutExpired:
-                raise SecurityError("Code analysis timed out - potentially infinite loop")
-            except FileNotFoundError:
-                raise SecurityError("Analysis tool not available (pylint missing)")
-            except Exception as e:
-                logger.error(f"Secure analysis failed: {e}")
-                raise SecurityError(f"Analysis failed: {str(e)}")
+        # 2. Analyse par un worker sandboxé (timeout strict par job)
+        try:
+            output = await self.lint_pool.lint(code)
+        except LintTimeout:
+            raise SecurityError("Code analysis timed out - potentially infinite loop")
+        except LintUnavailable:
+            raise SecurityError("Analysis tool not available (pylint missing)")
+        except Exception as e:
+            logger.error(f"Secure analysis failed: {e}")
+            raise SecurityError(f"Analysis failed: {str(e)}")
+        
+        # 3. Nettoyage et formatage de la sortie
+        return self._sanitize_output(output or "No issues detected")
     
     def _sanitize_output(self, output: str) -> str:
         """
@@ -304,7 +266,8 @@ class SecureCodeAnalyzer:
             'dangerous_patterns_count': len(self.DANGEROUS_PATTERNS),
             'sandbox_dir': str(self.sandbox_dir),
             'max_code_size': 10000,
-            'analysis_timeout': 10
+            'analysis_timeout': self.lint_pool.job_timeout,
+            'lint_pool': self.lint_pool.get_metrics()
         }
 
 
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark du masquage des données sensibles du SecurityLogger
+Compare le moteur compilé en une passe (security/logging.py) à l'ancienne
+implémentation en quatre re.sub successifs.
+
+Usage : python scripts/benchmark_log_masking.py [--iterations N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("ORCHESTRATOR_API_KEY", "benchmark")
+
+from orchestrator.app.security.logging import MASKING_BENCHMARK_SAMPLES, benchmark_masking  # noqa: E402
+
+
+def legacy_mask(message: str) -> str:
+    """Ancienne implémentation : quatre passes non précompilées"""
+    message = re.sub(r'(api[_-]?key["\s]*[:=]["\s]*)([a-zA-Z0-9-_]{20,})', r'\1***MASKED***', message, flags=re.IGNORECASE)
+    message = re.sub(r'(token["\s]*[:=]["\s]*)([a-zA-Z0-9-_.]{20,})', r'\1***MASKED***', message, flags=re.IGNORECASE)
+    message = re.sub(r'(password["\s]*[:=]["\s]*)([^\s"]{8,})', r'\1***MASKED***', message, flags=re.IGNORECASE)
+    message = re.sub(r'\b(?:10\.\d{1,3}\.\d{1,3}\.\d{1,3}|172\.1[6-9]\.\d{1,3}\.\d{1,3}|172\.2[0-9]\.\d{1,3}\.\d{1,3}|172\.3[0-1]\.\d{1,3}\.\d{1,3}|192\.168\.\d{1,3}\.\d{1,3})\b', '***PRIVATE_IP***', message)
+    return message
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    current = benchmark_masking(args.iterations)
+    print(f"{'sample':>18}  {'legacy':>10}  {'current':>10}")
+    for name, sample in MASKING_BENCHMARK_SAMPLES.items():
+        legacy = timeit.timeit(partial(legacy_mask, sample), number=args.iterations) / args.iterations * 1e9
+        print(f"{name:>18}  {legacy:8.1f}ns  {current[name]:8.1f}ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ Tests critiques pour vérifier que la vulnérabilité RCE a été corrigée.
 import pytest
 import asyncio
 import ast
+import sys
 import tempfile
 from pathlib import Path
 from unittest.mock import patch, mock_open, MagicMock
@@ -19,6 +20,7 @@ try:
         ValidationError,
         secure_python_linter_tool
     )
+    from orchestrator.app.security.lint_pool import LintWorkerPool, WORKER_SCRIPT
     SECURE_ANALYZER_AVAILABLE = True
 except ImportError:
     SECURE_ANALYZER_AVAILABLE = False
@@ -27,6 +29,20 @@ except ImportError:
     ValidationError = Exception
 
 
+def fake_lint_pool(sandbox_dir: Path, lint_body: str, **kwargs) -> "LintWorkerPool":
+    """Pool dont les workers exécutent lint_body (fonction lint(path)) à la place de pylint."""
+    script = Path(sandbox_dir).parent / "fake_lint_worker.py"
+    script.write_text(
+        "import os, sys, time\n"
+        f"sys.path.insert(0, {str(WORKER_SCRIPT.parent)!r})\n"
+        "from lint_worker import serve\n"
+        "def lint(path):\n"
+        f"    {lint_body}\n"
+        "serve(lint, sys.argv[1])\n"
+    )
+    return LintWorkerPool(sandbox_dir, command=[sys.executable, "-I", str(script), str(sandbox_dir)], **kwargs)
+
+
 @pytest.mark.security
 @pytest.mark.skipif(not SECURE_ANALYZER_AVAILABLE, reason="Secure analyzer not available")
 class TestRCEPrevention:
@@ -146,68 +162,74 @@ subprocess.run(['rm', '-rf', '/'])
         """Test que l'exécution longue est interrompue."""
         infinite_loop_code = sample_python_codes['infinite_loop']
         
-        # Mock subprocess.run dans le module secure_analyzer pour simuler un timeout
-        with patch('orchestrator.app.security.secure_analyzer.run') as mock_run:
-            from subprocess import TimeoutExpired
-            mock_run.side_effect = TimeoutExpired(cmd=['pylint'], timeout=10)
-            
+        # Worker qui ne répond jamais : le job est abandonné et le worker tué
+        analyzer.lint_pool = fake_lint_pool(analyzer.sandbox_dir, "time.sleep(30)", job_timeout=0.5)
+        try:
             with pytest.raises(SecurityError, match="timed out|timeout"):
                 await analyzer.analyze_code_secure(infinite_loop_code)
+            assert analyzer.lint_pool.get_metrics()['workers'] == 0
+        finally:
+            await analyzer.lint_pool.close()
     
     @pytest.mark.asyncio 
-    @patch('orchestrator.app.security.secure_analyzer.run')
-    async def test_sandboxed_execution(self, mock_run, analyzer, sample_python_codes):
+    async def test_sandboxed_execution(self, analyzer, sample_python_codes):
         """Test que l'exécution se fait en sandbox."""
-        mock_run.return_value.stdout = "No issues"
-        mock_run.return_value.stderr = ""
-        mock_run.return_value.returncode = 0
+        # Timeout strict par défaut
+        assert analyzer.lint_pool.job_timeout == 10
         
-        safe_code = sample_python_codes['safe_code']
-        await analyzer.analyze_code_secure(safe_code)
-        
-        # Vérifier que l'exécution est sandboxée
-        assert mock_run.called
-        call_args = mock_run.call_args
-        
-        # Vérifier les paramètres de sécurité
-        assert call_args.kwargs['timeout'] == 10  # Timeout strict
-        assert str(analyzer.sandbox_dir) in call_args.kwargs['cwd']
-        assert 'PATH' in call_args.kwargs['env']
-        assert call_args.kwargs['env']['PATH'] == '/usr/bin:/bin'
+        analyzer.lint_pool = fake_lint_pool(
+            analyzer.sandbox_dir,
+            "return '|'.join([os.getcwd(), os.environ.get('PATH', ''), os.environ.get('HOME', ''), str(sys.flags.isolated)])"
+        )
+        try:
+            result = await analyzer.analyze_code_secure(sample_python_codes['safe_code'])
+        finally:
+            await analyzer.lint_pool.close()
+        
+        # Vérifier les paramètres de sécurité du worker
+        cwd, path, home, isolated = result.split('|')
+        assert str(analyzer.sandbox_dir) in cwd
+        assert path == '/usr/bin:/bin'
+        assert home == '/tmp'
+        assert isolated == '1'
     
     @pytest.mark.asyncio
     async def test_secure_file_creation(self, analyzer, sample_python_codes):
         """Test que les fichiers temporaires sont créés de manière sécurisée."""
         safe_code = sample_python_codes['safe_code']
         
-        with patch('orchestrator.app.security.secure_analyzer.run') as mock_run:
-            mock_run.return_value.stdout = "pylint output"
-            mock_run.return_value.stderr = ""
-            mock_run.return_value.returncode = 0
-            
+        analyzer.lint_pool = fake_lint_pool(
+            analyzer.sandbox_dir,
+            "return '|'.join([os.path.dirname(path), oct(os.stat(path).st_mode & 0o777)])"
+        )
+        try:
             result = await analyzer.analyze_code_secure(safe_code)
-            
-            # Vérifier que le fichier temporaire a été créé dans le sandbox
-            assert mock_run.called
-            temp_file_path = mock_run.call_args[0][0][-1]  # Dernier argument de pylint
-            assert str(analyzer.sandbox_dir) in temp_file_path
+        finally:
+            await analyzer.lint_pool.close()
+        
+        # Vérifier que le fichier temporaire a été créé dans le sandbox puis supprimé
+        directory, mode = result.split('|')
+        assert str(analyzer.sandbox_dir) in directory
+        assert mode == '0o644'
+        assert not list(analyzer.sandbox_dir.glob("analysis_*.py"))
     
     @pytest.mark.asyncio
     async def test_output_sanitization(self, analyzer, sample_python_codes):
         """Test que la sortie est correctement nettoyée."""
         safe_code = sample_python_codes['safe_code']
         
-        with patch('orchestrator.app.security.secure_analyzer.run') as mock_run:
-            # Simulation d'une sortie contenant des chemins sensibles
-            mock_run.return_value.stdout = f"{analyzer.sandbox_dir}/analysis_123_abc.py:1:0: C0111: Missing docstring"
-            mock_run.return_value.stderr = ""
-            mock_run.return_value.returncode = 0
-            
+        # Simulation d'une sortie contenant des chemins sensibles
+        analyzer.lint_pool = fake_lint_pool(
+            analyzer.sandbox_dir, "return path + ':1:0: C0111: Missing docstring'"
+        )
+        try:
             result = await analyzer.analyze_code_secure(safe_code)
-            
-            # Vérifier que les chemins sensibles sont masqués
-            assert str(analyzer.sandbox_dir) not in result
-            assert "[FILE]" in result
+        finally:
+            await analyzer.lint_pool.close()
+        
+        # Vérifier que les chemins sensibles sont masqués
+        assert str(analyzer.sandbox_dir) not in result
+        assert "[FILE]" in result
     
     def test_security_metrics_available(self, analyzer):
         """Test que les métriques de sécurité sont disponibles."""
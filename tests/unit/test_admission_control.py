@@ -0,0 +1,111 @@
+"""
+Tests unitaires pour admission_control.py
+Plafond d'exécutions simultanées, file de priorité bornée, 429 avec Retry-After.
+"""
+
+import pytest
+import asyncio
+from unittest.mock import patch
+
+from orchestrator.app.observability.monitoring import ProductionMonitoring
+from orchestrator.app.performance.admission_control import AdmissionController, AdmissionRejected
+
+
+@pytest.fixture
+def monitoring():
+    instance = ProductionMonitoring()
+    with patch("orchestrator.app.performance.admission_control.get_monitoring", return_value=instance):
+        yield instance
+
+
+def sample(monitoring, name, labels=None):
+    return monitoring.registry.get_sample_value(name, labels or {})
+
+
+@pytest.mark.unit
+class TestAdmissionController:
+    """Tests pour AdmissionController."""
+
+    @pytest.mark.asyncio
+    async def test_admits_up_to_max_in_flight(self, monitoring):
+        controller = AdmissionController(max_in_flight=2, max_queue=0, queue_timeout=1)
+        first = await controller.acquire()
+        await controller.acquire()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.reason == "queue_full"
+        assert sample(monitoring, "orchestrator_admission_in_flight") == 2
+        assert sample(monitoring, "orchestrator_admission_rejections_total", {"reason": "queue_full"}) == 1
+
+        first.release()
+        first.release()  # idempotent
+        assert controller.in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_is_served_first(self, monitoring):
+        controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=5)
+        running = await controller.acquire()
+        order = []
+
+        async def worker(name, priority):
+            async with controller.slot(priority):
+                order.append(name)
+
+        tasks = [asyncio.create_task(worker("low", 1)), asyncio.create_task(worker("normal", 2))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(worker("critical", 4)))
+        await asyncio.sleep(0.01)
+        assert controller.queue_depth == 3
+        assert sample(monitoring, "orchestrator_admission_queue_depth") == 3
+
+        running.release()
+        await asyncio.gather(*tasks)
+        assert order == ["critical", "normal", "low"]
+        assert controller.in_flight == 0
+        assert controller.get_metrics()["max_queue_depth"] == 3
+
+    @pytest.mark.asyncio
+    async def test_retry_after_follows_observed_service_time(self, monitoring):
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5)
+        ticket = await controller.acquire()
+        ticket.admitted_at -= 11.9  # exécution de ~12s
+        ticket.release()
+        assert controller.avg_service_time == pytest.approx(11.9, abs=0.05)
+
+        await controller.acquire()
+        queued = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+
+        # Deux exécutions de ~12s devant le nouvel arrivant sur un seul créneau
+        assert rejected.value.retry_after == 24
+        queued.cancel()
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout_rejects(self, monitoring):
+        controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=0.05)
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+
+        assert rejected.value.reason == "timeout"
+        assert controller.queue_depth == 0
+        assert controller.get_metrics()["rejected_timeout"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self, monitoring):
+        controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=5)
+        running = await controller.acquire()
+        waiting = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.01)
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        running.release()
+
+        assert controller.in_flight == 0
+        assert controller.queue_depth == 0
+        assert (await controller.acquire()).wait_seconds == 0.0
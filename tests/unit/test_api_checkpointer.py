@@ -1,394 +1,285 @@
 """
 Tests complets pour api_checkpointer.py
-Coverage objectif : 75% (Sprint 2.1 IA-1)
+Checkpointer persistant : écritures regroupées par thread_id, cache LRU,
+reprise après redémarrage via la Memory API (StateService en mémoire).
 """
 
 import pytest
 import asyncio
+import json
 import httpx
-from unittest.mock import Mock, AsyncMock, patch
-from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+from functools import partial
+from typing import Dict, Any, List
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, empty_checkpoint
+from langgraph.graph import END, StateGraph
+from typing_extensions import TypedDict
 
 from orchestrator.app.checkpoint.api_checkpointer import ApiCheckpointer
-from langgraph.checkpoint import Checkpoint
+from orchestrator.app.graph import workflow
+from memory_api.app.models.schemas import CheckpointRecord
+from memory_api.app.services.state_service import StateService
+
+
+class FakeMemoryApi:
+    """Memory API simulée via httpx.MockTransport, adossée au vrai StateService."""
+
+    def __init__(self):
+        self.state_service = StateService()
+        self.requests: List[httpx.Request] = []
+        self.fail_posts = False
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path
+        if request.method == "POST" and path == "/state/checkpoints/batch":
+            if self.fail_posts:
+                return httpx.Response(503, json={"detail": "unavailable"})
+            payload = json.loads(request.content)
+            records = [CheckpointRecord(**r) for r in payload["checkpoints"]]
+            versions = await self.state_service.put_checkpoints(records)
+            return httpx.Response(200, json={"stored": len(records), "versions": versions})
+        if request.method == "GET" and path.endswith("/history"):
+            thread_id = path.split("/")[3]
+            limit = request.url.params.get("limit")
+            records = await self.state_service.list_checkpoints(
+                thread_id, int(limit) if limit else None, request.url.params.get("before")
+            )
+            return httpx.Response(200, json=[json.loads(r.model_dump_json()) for r in records])
+        if request.method == "GET" and path.startswith("/state/checkpoints/"):
+            thread_id = path.split("/")[3]
+            record = await self.state_service.get_checkpoint(thread_id, request.url.params.get("checkpoint_id"))
+            if record is None:
+                return httpx.Response(404, json={"detail": "Checkpoint non trouvé"})
+            return httpx.Response(200, json=json.loads(record.model_dump_json()))
+        return httpx.Response(404)
+
+    def posts(self) -> List[httpx.Request]:
+        return [r for r in self.requests if r.method == "POST"]
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler), base_url="http://memory-api")
+
+
+def make_checkpoint(step: int, value: str) -> Dict[str, Any]:
+    """Crée un checkpoint LangGraph réaliste."""
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"value": value, "step": step}
+    checkpoint["channel_versions"] = {"value": step + 1}
+    return checkpoint
+
+
+def thread_config(thread_id: str, thread_ts: str = None) -> Dict[str, Any]:
+    configurable = {"thread_id": thread_id}
+    if thread_ts:
+        configurable["thread_ts"] = thread_ts
+    return {"configurable": configurable}
+
+
+@pytest.fixture
+def memory_api():
+    return FakeMemoryApi()
 
 
 @pytest.mark.unit
 class TestApiCheckpointer:
     """Tests pour ApiCheckpointer."""
-    
-    def setup_method(self):
-        """Setup pour chaque test."""
-        self.mock_client = Mock(spec=httpx.AsyncClient)
-        self.checkpointer = ApiCheckpointer(self.mock_client)
-    
-    def test_api_checkpointer_init(self):
+
+    def test_api_checkpointer_init(self, memory_api):
         """Test initialisation ApiCheckpointer."""
-        client = Mock(spec=httpx.AsyncClient)
-        checkpointer = ApiCheckpointer(client)
-        
-        assert checkpointer.client == client
-        assert hasattr(checkpointer, 'client')
-    
-    def test_put_method_exists(self):
-        """Test méthode put existe (synchrone)."""
-        config = {"session_id": "test-123"}
-        checkpoint = Mock(spec=Checkpoint)
-        
-        # La méthode put existe mais est un stub
-        result = self.checkpointer.put(config, checkpoint)
-        
-        # Doit retourner None (implémentation basique)
-        assert result is None
-    
-    def test_get_method_exists(self):
-        """Test méthode get existe (synchrone)."""
-        config = {"session_id": "test-123"}
-        
-        # La méthode get existe mais est un stub
-        result = self.checkpointer.get(config)
-        
-        # Doit retourner None (implémentation basique)
-        assert result is None
-    
+        client = memory_api.client()
+        checkpointer = ApiCheckpointer(client, base_url="http://memory-api/", cache_size=8)
+
+        assert checkpointer.client is client
+        assert checkpointer.base_url == "http://memory-api"
+        assert checkpointer.cache_size == 8
+        assert isinstance(checkpointer, BaseCheckpointSaver)
+
     @pytest.mark.asyncio
-    async def test_aput_method_exists(self):
-        """Test méthode aput asynchrone existe."""
-        config = {"session_id": "test-123"}
-        checkpoint = Mock(spec=Checkpoint)
-        
-        # La méthode aput existe mais est un stub
-        result = await self.checkpointer.aput(config, checkpoint)
-        
-        # Doit retourner None (implémentation basique)
-        assert result is None
-    
+    async def test_aput_returns_config_and_serves_from_cache(self, memory_api):
+        """aput retourne la config du checkpoint et aget ne touche pas le réseau."""
+        checkpointer = ApiCheckpointer(memory_api.client(), base_url="http://memory-api", flush_interval=10)
+        checkpoint = make_checkpoint(0, "a")
+
+        saved_config = await checkpointer.aput(thread_config("t1"), checkpoint, {"step": 0})
+
+        assert saved_config == thread_config("t1", checkpoint["id"])
+        fetched = await checkpointer.aget(thread_config("t1"))
+        assert fetched["channel_values"] == {"value": "a", "step": 0}
+        assert memory_api.requests == []
+        assert checkpointer.metrics["cache_hits"] == 1
+        await checkpointer.aflush()
+
     @pytest.mark.asyncio
-    async def test_aget_method_exists(self):
-        """Test méthode aget asynchrone existe."""
-        config = {"session_id": "test-123"}
-        
-        # La méthode aget existe mais est un stub
-        result = await self.checkpointer.aget(config)
-        
-        # Doit retourner None (implémentation basique)
-        assert result is None
-    
-    def test_checkpointer_config_handling(self):
-        """Test gestion des configurations."""
-        config1 = {"session_id": "session-1"}
-        config2 = {"session_id": "session-2", "extra": "data"}
-        
-        checkpoint = Mock(spec=Checkpoint)
-        
-        # Les méthodes doivent accepter différents types de config
-        result1 = self.checkpointer.put(config1, checkpoint)
-        result2 = self.checkpointer.put(config2, checkpoint)
-        
-        assert result1 is None
-        assert result2 is None
-    
-    def test_checkpointer_empty_config(self):
-        """Test avec configuration vide."""
-        config = {}
-        checkpoint = Mock(spec=Checkpoint)
-        
-        # Doit gérer une config vide sans erreur
-        result = self.checkpointer.put(config, checkpoint)
-        assert result is None
-        
-        result = self.checkpointer.get(config)
-        assert result is None
-    
+    async def test_burst_is_coalesced_into_single_post(self, memory_api):
+        """Une rafale d'aput sur un thread produit un seul aller-retour HTTP."""
+        checkpointer = ApiCheckpointer(memory_api.client(), base_url="http://memory-api", flush_interval=0.01)
+        config = thread_config("burst")
+        for step in range(5):
+            config = await checkpointer.aput(config, make_checkpoint(step, f"v{step}"), {"step": step})
+
+        await asyncio.sleep(0.05)
+
+        assert len(memory_api.posts()) == 1
+        assert len(json.loads(memory_api.posts()[0].content)["checkpoints"]) == 5
+        stored = await memory_api.state_service.list_checkpoints("burst")
+        assert [r.version for r in stored] == [5, 4, 3, 2, 1]
+        assert checkpointer.get_metrics()["avg_batch_size"] == 5
+
     @pytest.mark.asyncio
-    async def test_async_methods_with_none_checkpoint(self):
-        """Test méthodes async avec checkpoint None."""
-        config = {"session_id": "test"}
-        
-        # Test aput avec checkpoint None
-        result = await self.checkpointer.aput(config, None)
-        assert result is None
-        
-        # Test aget doit toujours retourner None
-        result = await self.checkpointer.aget(config)
-        assert result is None
-    
-    def test_checkpointer_inheritance(self):
-        """Test héritage de BaseCheckpointSaver."""
-        from langgraph.checkpoint.base import BaseCheckpointSaver
-        
-        assert isinstance(self.checkpointer, BaseCheckpointSaver)
-        assert hasattr(self.checkpointer, 'put')
-        assert hasattr(self.checkpointer, 'get')
-    
+    async def test_max_batch_size_forces_flush(self, memory_api):
+        """La file est vidée immédiatement à max_batch_size."""
+        checkpointer = ApiCheckpointer(memory_api.client(), base_url="http://memory-api",
+                                       flush_interval=10, max_batch_size=2)
+        config = thread_config("full")
+        for step in range(4):
+            config = await checkpointer.aput(config, make_checkpoint(step, "x"), {"step": step})
+
+        assert len(memory_api.posts()) == 2
+        assert checkpointer.get_metrics()["pending_checkpoints"] == 0
+        await checkpointer.aclose()
+
     @pytest.mark.asyncio
-    async def test_multiple_async_calls(self):
-        """Test multiples appels asynchrones."""
-        config = {"session_id": "multi-test"}
-        checkpoint = Mock(spec=Checkpoint)
-        
-        # Exécuter plusieurs appels simultanés
-        tasks = [
-            self.checkpointer.aput(config, checkpoint),
-            self.checkpointer.aget(config),
-            self.checkpointer.aput(config, checkpoint),
-            self.checkpointer.aget(config)
-        ]
-        
-        results = await asyncio.gather(*tasks)
-        
-        # Tous doivent retourner None
-        assert all(result is None for result in results)
-    
-    def test_checkpointer_with_mock_client_methods(self):
-        """Test checkpointer avec méthodes client mockées."""
-        # Vérifier que le client est stocké correctement
-        assert self.checkpointer.client == self.mock_client
-        
-        # Le client peut avoir des méthodes mockées
-        self.mock_client.post = Mock()
-        self.mock_client.get = Mock()
-        
-        # Les méthodes du checkpointer fonctionnent toujours
-        config = {"session_id": "mock-test"}
-        checkpoint = Mock(spec=Checkpoint)
-        
-        result = self.checkpointer.put(config, checkpoint)
-        assert result is None
-    
+    async def test_restart_resumes_from_memory_api(self, memory_api):
+        """Un nouveau checkpointer (redémarrage) relit le dernier checkpoint."""
+        writer = ApiCheckpointer(memory_api.client(), base_url="http://memory-api", flush_interval=10)
+        config = thread_config("resume")
+        first = make_checkpoint(0, "first")
+        config = await writer.aput(config, first, {"step": 0})
+        last = make_checkpoint(1, "last")
+        await writer.aput(config, last, {"step": 1})
+        await writer.aclose()
+
+        reader = ApiCheckpointer(memory_api.client(), base_url="http://memory-api")
+        latest = await reader.aget_tuple(thread_config("resume"))
+
+        assert latest.checkpoint["channel_values"]["value"] == "last"
+        assert latest.metadata == {"step": 1}
+        assert latest.parent_config == thread_config("resume", first["id"])
+
+        older = await reader.aget_tuple(thread_config("resume", first["id"]))
+        assert older.checkpoint["channel_values"]["value"] == "first"
+
+        # Second accès : servi par le cache
+        requests_before = len(memory_api.requests)
+        await reader.aget_tuple(thread_config("resume"))
+        assert len(memory_api.requests) == requests_before
+
     @pytest.mark.asyncio
-    async def test_async_performance(self):
-        """Test performance méthodes asynchrones."""
-        import time
-        
-        config = {"session_id": "perf-test"}
-        checkpoint = Mock(spec=Checkpoint)
-        
-        start_time = time.time()
-        
-        # Les méthodes doivent être très rapides (stubs)
-        await self.checkpointer.aput(config, checkpoint)
-        await self.checkpointer.aget(config)
-        
-        duration = time.time() - start_time
-        
-        # Doit être très rapide (< 10ms)
-        assert duration < 0.01
-    
-    def test_checkpointer_config_types(self):
-        """Test différents types de configurations."""
-        checkpoint = Mock(spec=Checkpoint)
-        
-        # Config dict standard
-        config_dict = {"session_id": "test", "user_id": "user123"}
-        result = self.checkpointer.put(config_dict, checkpoint)
-        assert result is None
-        
-        # Config avec valeurs None
-        config_none = {"session_id": None}
-        result = self.checkpointer.put(config_none, checkpoint)
-        assert result is None
-        
-        # Config avec types mixtes
-        config_mixed = {"session_id": "test", "timestamp": 1234567890, "active": True}
-        result = self.checkpointer.put(config_mixed, checkpoint)
-        assert result is None
-    
+    async def test_aget_unknown_thread_returns_none(self, memory_api):
+        """Un thread inconnu retourne None (404 côté Memory API)."""
+        checkpointer = ApiCheckpointer(memory_api.client(), base_url="http://memory-api")
+        assert await checkpointer.aget(thread_config("unknown")) is None
+
     @pytest.mark.asyncio
-    async def test_concurrent_access(self):
-        """Test accès concurrent aux méthodes."""
-        config = {"session_id": "concurrent-test"}
-        checkpoint = Mock(spec=Checkpoint)
-        
-        # Créer plusieurs checkpointers avec le même client
-        checkpointers = [ApiCheckpointer(self.mock_client) for _ in range(3)]
-        
-        # Exécuter des opérations concurrentes
-        tasks = []
-        for cp in checkpointers:
-            tasks.append(cp.aput(config, checkpoint))
-            tasks.append(cp.aget(config))
-        
-        results = await asyncio.gather(*tasks)
-        
-        # Tous doivent réussir et retourner None
-        assert len(results) == 6
-        assert all(result is None for result in results)
-    
-    def test_checkpointer_memory_usage(self):
-        """Test utilisation mémoire du checkpointer."""
-        import sys
-        
-        # Mesurer la taille du checkpointer
-        size = sys.getsizeof(self.checkpointer)
-        
-        # Doit être raisonnable (moins de 1KB)
-        assert size < 1024
-        
-        # Vérifier que le client n'est pas dupliqué
-        assert self.checkpointer.client is self.mock_client
+    async def test_alist_flushes_pending_and_orders_history(self, memory_api):
+        """alist vide la file du thread puis liste du plus récent au plus ancien."""
+        checkpointer = ApiCheckpointer(memory_api.client(), base_url="http://memory-api", flush_interval=10)
+        config = thread_config("history")
+        ids = []
+        for step in range(3):
+            checkpoint = make_checkpoint(step, str(step))
+            ids.append(checkpoint["id"])
+            config = await checkpointer.aput(config, checkpoint, {"step": step, "source": "loop"})
 
+        history = [t async for t in checkpointer.alist(thread_config("history"))]
+        limited = [t async for t in checkpointer.alist(thread_config("history"), limit=1)]
+        filtered = [t async for t in checkpointer.alist(thread_config("history"), filter={"step": 1})]
+
+        assert [t.config["configurable"]["thread_ts"] for t in history] == list(reversed(ids))
+        assert len(limited) == 1
+        assert [t.metadata["step"] for t in filtered] == [1]
+        await checkpointer.aclose()
 
-@pytest.mark.unit
-class TestApiCheckpointerIntegration:
-    """Tests d'intégration pour ApiCheckpointer."""
-    
     @pytest.mark.asyncio
-    async def test_with_real_httpx_client(self):
-        """Test avec un vrai client HTTPX."""
-        async with httpx.AsyncClient() as client:
-            checkpointer = ApiCheckpointer(client)
-            
-            config = {"session_id": "integration-test"}
-            checkpoint = Mock(spec=Checkpoint)
-            
-            # Les méthodes doivent fonctionner avec un vrai client
-            result_put = await checkpointer.aput(config, checkpoint)
-            result_get = await checkpointer.aget(config)
-            
-            assert result_put is None
-            assert result_get is None
-    
-    @pytest.mark.asyncio 
-    async def test_client_lifecycle(self):
-        """Test cycle de vie du client."""
-        # Créer client avec timeout
-        timeout = httpx.Timeout(10.0)
-        client = httpx.AsyncClient(timeout=timeout)
-        
-        checkpointer = ApiCheckpointer(client)
-        
-        # Utiliser le checkpointer
-        config = {"session_id": "lifecycle-test"}
-        await checkpointer.aput(config, Mock(spec=Checkpoint))
-        
-        # Fermer le client
-        await client.aclose()
-        
-        # Le checkpointer garde la référence mais le client est fermé
-        assert checkpointer.client is client
-    
-    def test_checkpointer_serialization_compatibility(self):
-        """Test compatibilité sérialisation."""
-        import pickle
-        
-        client = Mock(spec=httpx.AsyncClient)
-        checkpointer = ApiCheckpointer(client)
-        
-        # Le checkpointer doit être sérialisable (sans le client HTTPX)
-        checkpointer_data = {
-            'class': 'ApiCheckpointer',
-            'client_type': type(client).__name__
-        }
-        
-        # Sérialisation des métadonnées (pas du client HTTPX lui-même)
-        serialized = pickle.dumps(checkpointer_data)
-        deserialized = pickle.loads(serialized)
-        
-        assert deserialized['class'] == 'ApiCheckpointer'
+    async def test_lru_is_bounded(self, memory_api):
+        """Le cache LRU ne dépasse jamais cache_size entrées."""
+        checkpointer = ApiCheckpointer(memory_api.client(), base_url="http://memory-api",
+                                       flush_interval=10, cache_size=3)
+        for i in range(10):
+            await checkpointer.aput(thread_config(f"t{i}"), make_checkpoint(0, str(i)), {"step": 0})
 
+        assert len(checkpointer._cache) == 3
+        assert checkpointer.get_tuple(thread_config("t0")) is None
+        assert checkpointer.get_tuple(thread_config("t9")) is not None
+        await checkpointer.aclose()
 
-@pytest.mark.unit
-class TestApiCheckpointerEdgeCases:
-    """Tests des cas limites pour ApiCheckpointer."""
-    
-    def test_checkpointer_with_none_client(self):
-        """Test comportement avec client None."""
-        # Normalement ne devrait pas arriver, mais test défensif
-        try:
-            # TypeHint attend httpx.AsyncClient, mais Python permet None
-            checkpointer = ApiCheckpointer(None)
-            # Si pas d'erreur, vérifier que client est None
-            assert checkpointer.client is None
-        except TypeError:
-            # Si TypeError est levée, c'est acceptable
-            pass
-    
     @pytest.mark.asyncio
-    async def test_large_config_handling(self):
-        """Test gestion de grandes configurations."""
-        client = Mock(spec=httpx.AsyncClient)
-        checkpointer = ApiCheckpointer(client)
-        
-        # Configuration avec beaucoup de données
-        large_config = {
-            f"key_{i}": f"value_{i}" * 100 
-            for i in range(100)
-        }
-        
-        checkpoint = Mock(spec=Checkpoint)
-        
-        # Doit gérer sans problème (implémentation stub)
-        result = await checkpointer.aput(large_config, checkpoint)
-        assert result is None
-    
-    def test_checkpointer_str_representation(self):
-        """Test représentation string du checkpointer."""
-        client = Mock(spec=httpx.AsyncClient)
-        checkpointer = ApiCheckpointer(client)
-        
-        # Doit avoir une représentation valide
-        str_repr = str(checkpointer)
-        assert 'ApiCheckpointer' in str_repr or 'object' in str_repr
-    
+    async def test_flush_failure_requeues(self, memory_api):
+        """Un échec d'écriture remet les checkpoints en file sans les perdre."""
+        checkpointer = ApiCheckpointer(memory_api.client(), base_url="http://memory-api", flush_interval=10)
+        memory_api.fail_posts = True
+        await checkpointer.aput(thread_config("retry"), make_checkpoint(0, "x"), {"step": 0})
+        await checkpointer.aflush()
+
+        assert checkpointer.metrics["flush_errors"] == 1
+        assert checkpointer.get_metrics()["pending_checkpoints"] == 1
+
+        memory_api.fail_posts = False
+        await checkpointer.aflush()
+        assert checkpointer.get_metrics()["pending_checkpoints"] == 0
+        assert await memory_api.state_service.get_checkpoint("retry") is not None
+
+
+class CounterState(TypedDict):
+    count: int
+    updated_at: datetime
+
+
+@pytest.mark.unit
+class TestApiCheckpointerWithGraph:
+    """Intégration avec un StateGraph LangGraph compilé."""
+
     @pytest.mark.asyncio
-    async def test_exception_handling(self):
-        """Test gestion d'exceptions dans les méthodes."""
-        client = Mock(spec=httpx.AsyncClient)
-        checkpointer = ApiCheckpointer(client)
-        
-        # Même avec des données étranges, ne doit pas lever d'exception
-        weird_config = {"session_id": object()}  # Object non sérialisable
-        
-        try:
-            result = await checkpointer.aput(weird_config, Mock(spec=Checkpoint))
-            assert result is None
-        except Exception:
-            # Si exception, c'est acceptable car implémentation basique
-            pass 
-
-    def test_sync_methods_coverage(self):
-        """Test pour couvrir spécifiquement les méthodes synchrones."""
-        client = Mock(spec=httpx.AsyncClient)
-        checkpointer = ApiCheckpointer(client)
-        
-        config = {"session_id": "sync-test"}
-        checkpoint = Mock(spec=Checkpoint)
-        
-        # Test put synchrone - couvre ligne 16 (pass)
-        result_put = checkpointer.put(config, checkpoint)
-        assert result_put is None
-        
-        # Test get synchrone - couvre ligne 21 (return None)  
-        result_get = checkpointer.get(config)
-        assert result_get is None
-    
+    async def test_graph_state_survives_restart(self, memory_api):
+        """L'état d'une session est récupérable après redémarrage de l'orchestrateur."""
+        def increment(state: CounterState) -> CounterState:
+            return {"count": state["count"] + 1, "updated_at": datetime.now(timezone.utc)}
+
+        def build(checkpointer):
+            workflow = StateGraph(CounterState)
+            workflow.add_node("increment", increment)
+            workflow.set_entry_point("increment")
+            workflow.add_edge("increment", END)
+            return workflow.compile(checkpointer=checkpointer)
+
+        config = thread_config("session-1")
+        first = ApiCheckpointer(memory_api.client(), base_url="http://memory-api", flush_interval=0.01)
+        await build(first).ainvoke({"count": 1, "updated_at": datetime.now(timezone.utc)}, config)
+        await first.aclose()
+
+        restarted = build(ApiCheckpointer(memory_api.client(), base_url="http://memory-api"))
+        snapshot = await restarted.aget_state(config)
+
+        assert snapshot.values["count"] == 2
+        assert isinstance(snapshot.values["updated_at"], datetime)
+        assert len(memory_api.posts()) <= 2
+
     @pytest.mark.asyncio
-    async def test_async_methods_coverage(self):
-        """Test pour couvrir spécifiquement les méthodes asynchrones."""
-        client = Mock(spec=httpx.AsyncClient)
-        checkpointer = ApiCheckpointer(client)
-        
-        config = {"session_id": "async-test"}
-        checkpoint = Mock(spec=Checkpoint)
-        
-        # Test aput asynchrone - couvre ligne 26 (pass)
-        result_aput = await checkpointer.aput(config, checkpoint)
-        assert result_aput is None
-        
-        # Test aget asynchrone - couvre ligne 31 (return None)
-        result_aget = await checkpointer.aget(config)
-        assert result_aget is None
-    
-    def test_init_coverage(self):
-        """Test pour couvrir l'initialisation complète."""
-        client = Mock(spec=httpx.AsyncClient)
-        
-        # Test __init__ avec super() call - couvre lignes 10-11
-        checkpointer = ApiCheckpointer(client)
-        
-        # Vérifier que l'initialisation s'est bien passée
-        assert checkpointer.client is client
-        # Vérifier que super().__init__() a été appelé (BaseCheckpointSaver)
-        from langgraph.checkpoint.base import BaseCheckpointSaver
-        assert isinstance(checkpointer, BaseCheckpointSaver) 
\ No newline at end of file
+    async def test_second_invoke_on_session_runs_new_task(self, memory_api, monkeypatch):
+        """Une nouvelle tâche sur un session_id existant ne reprend pas les résultats de la précédente."""
+        calls = []
+
+        async def fake_worker(state, agent_key):
+            calls.append((agent_key, state["task_description"]))
+            update = {"results": {agent_key: f"{agent_key} for {state['task_description']}"}, "logs": [agent_key]}
+            if state["task_description"] == "generate code A":
+                update["errors"] = [f"{agent_key} warning"]
+            return update
+
+        monkeypatch.setattr(workflow, "worker_node_wrapper", fake_worker)
+        monkeypatch.setattr(workflow, "ApiCheckpointer", partial(ApiCheckpointer, base_url="http://memory-api"))
+        app = workflow.create_workflow(memory_api.client())
+        config = thread_config("s1")
+
+        await app.ainvoke(workflow.build_initial_state("generate code A", "s1"), config)
+        second = await app.ainvoke(workflow.build_initial_state("generate code B", "s1"), config)
+        await app.checkpointer.aclose()
+
+        assert calls == [("code_generation", "generate code A"), ("documentation", "generate code A"),
+                         ("code_generation", "generate code B"), ("documentation", "generate code B")]
+        assert second["results"] == {"code_generation": "code_generation for generate code B",
+                                     "documentation": "documentation for generate code B"}
+        assert second["errors"] == []
+        assert second["logs"] == ["code_generation", "documentation"]
@@ -0,0 +1,109 @@
+"""
+Tests unitaires pour code_slicer.py
+Index des symboles, fermeture des dépendances, méthodes ciblées, repli et partage du parse AST.
+"""
+
+import pytest
+
+from orchestrator.app.agents.code_slicer import AstCodeSlicer
+from orchestrator.app.agents.context_budget import ContextBudgeter
+from orchestrator.app.performance.model_router import estimate_tokens
+from orchestrator.app.security.secure_analyzer import SecureCodeAnalyzer, parse_code
+
+
+def large_source(filler=120):
+    parts = [
+        "import json",
+        "import math",
+        "",
+        "RATE = 0.2",
+        "",
+        "def tax(amount):",
+        "    return round(amount * RATE, 2)",
+        "",
+        "def invoice_total(lines):",
+        "    subtotal = sum(line['price'] for line in lines)",
+        "    return subtotal + tax(subtotal)",
+        "",
+        "class Exporter:",
+        "    \"\"\"Export des factures.\"\"\"",
+        "",
+        "    def __init__(self, fmt):",
+        "        self.fmt = fmt",
+        "",
+        "    def to_json(self, lines):",
+        "        return json.dumps({'total': invoice_total(lines)})",
+        "",
+        "    def to_csv(self, lines):",
+        "        return ','.join(str(line['price']) for line in lines)",
+    ]
+    for i in range(filler):
+        parts += ["", f"def unrelated_{i}(value):", f"    return math.sqrt(value) * {i} + len(str(value))"]
+    return "\n".join(parts) + "\n"
+
+
+@pytest.mark.unit
+class TestAstCodeSlicer:
+    """Tests pour AstCodeSlicer."""
+
+    def test_extracts_dependency_closure_of_named_function(self):
+        code = large_source()
+        sliced = AstCodeSlicer()(code, "Add a discount parameter to invoice_total", 2000, estimate_tokens)
+
+        assert "def invoice_total(lines):" in sliced
+        assert "def tax(amount):" in sliced and "RATE = 0.2" in sliced
+        assert "unrelated_" not in sliced and "import math" not in sliced
+        assert estimate_tokens(sliced) * 10 < estimate_tokens(code)
+
+    def test_method_target_keeps_class_header_and_init(self):
+        sliced = AstCodeSlicer()(large_source(), "to_json should indent the output", 2000, estimate_tokens)
+
+        assert "class Exporter:" in sliced and "Export des factures." in sliced
+        assert "def __init__(self, fmt):" in sliced and "def to_json(self, lines):" in sliced
+        assert "def to_csv" not in sliced
+        # Dépendances de la méthode : invoice_total, puis tax, RATE et l'import json
+        assert "def invoice_total(lines):" in sliced and "import json" in sliced
+        assert "    # ...\n" in sliced
+
+    def test_no_match_or_invalid_code_falls_back(self):
+        slicer = AstCodeSlicer()
+        assert slicer(large_source(), "Improve performance everywhere", 2000, estimate_tokens) is None
+        assert slicer("def broken(:\n", "broken", 2000, estimate_tokens) is None
+        assert slicer.metrics["no_match"] == 1 and slicer.metrics["not_python"] == 1
+
+    def test_budget_keeps_nearest_definitions_first(self):
+        sliced = AstCodeSlicer()(large_source(), "invoice_total", 30, estimate_tokens)
+        assert "def invoice_total(lines):" in sliced
+        assert "def tax(amount):" not in sliced
+
+    def test_parse_shared_with_security_validation(self, tmp_path):
+        code = large_source(filler=5) + "\ndef marker_shared_parse():\n    return 1\n"
+        SecureCodeAnalyzer(sandbox_dir=tmp_path).validate_code_safety(code)
+        hits = parse_code.cache_info().hits
+
+        AstCodeSlicer()(code, "marker_shared_parse", 2000, estimate_tokens)
+        assert parse_code.cache_info().hits == hits + 1
+
+    def test_budgeter_slices_large_context_even_within_budget(self):
+        code = large_source()
+        budgeter = ContextBudgeter(max_tokens=100000, output_reserve=0, count_tokens=estimate_tokens,
+                                   code_slicers=[AstCodeSlicer()], slice_min_chars=2000)
+        payload, report = budgeter.assemble("Fix rounding in tax", code, [], budget=100000, agent="documentation")
+
+        assert report.code_sliced
+        assert "def tax(amount):" in payload["code_context"]
+        assert report.prompt_tokens * 10 < report.original_tokens
+
+    def test_code_generation_gets_whole_selection_within_budget(self):
+        """Sa sortie remplace toute la sélection : un extrait ferait perdre le reste du code."""
+        code = large_source()
+        budgeter = ContextBudgeter(max_tokens=100000, output_reserve=0, count_tokens=estimate_tokens,
+                                   code_slicers=[AstCodeSlicer()], slice_min_chars=2000)
+
+        payload, report = budgeter.assemble("Fix rounding in tax", code, [], budget=100000, agent="code_generation")
+        assert payload["code_context"] == code
+        assert not report.code_sliced
+
+        payload, report = budgeter.assemble("Fix rounding in tax", code, [], budget=2000, agent="code_generation")
+        assert report.code_sliced
+        assert "def tax(amount):" in payload["code_context"]
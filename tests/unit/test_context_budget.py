@@ -0,0 +1,85 @@
+"""
+Tests unitaires pour context_budget.py
+Respect du budget, conservation des tours récents, découpage du code_context et métriques.
+"""
+
+import pytest
+
+from orchestrator.app.agents.context_budget import ContextBudgeter, slice_code_blocks, state_history
+from orchestrator.app.performance.model_router import MODEL_CATALOG, estimate_tokens
+
+
+def big_module(functions=60):
+    blocks = ["import json\n"]
+    for i in range(functions):
+        blocks.append(f"def helper_{i}(value):\n    total = value * {i}\n    return json.dumps({{'total': total}})\n")
+    blocks.append("def parse_config(path):\n    with open(path) as f:\n        return json.load(f)\n")
+    return "\n".join(blocks)
+
+
+def make_budgeter(**kwargs):
+    options = dict(max_tokens=6000, output_reserve=2000, recent_turns=3, history_share=0.25,
+                   count_tokens=estimate_tokens)
+    options.update(kwargs)
+    return ContextBudgeter(**options)
+
+
+@pytest.mark.unit
+class TestContextBudgeter:
+    """Tests pour ContextBudgeter."""
+
+    def test_small_inputs_are_untouched(self):
+        budgeter = make_budgeter()
+        payload, report = budgeter.assemble("fix parse_config", "def parse_config(): pass", ["user: hi"], budget=1000)
+        assert payload == {"task_description": "fix parse_config", "code_context": "def parse_config(): pass",
+                           "history": "user: hi"}
+        assert report.saved_tokens == 0 and not report.code_sliced
+
+    def test_large_code_context_is_sliced_to_relevant_blocks(self):
+        budgeter = make_budgeter()
+        code = big_module()
+        payload, report = budgeter.assemble("Add error handling to parse_config", code, [], budget=300)
+
+        assert report.code_sliced
+        assert "def parse_config(path)" in payload["code_context"]
+        assert "import json" in payload["code_context"]
+        assert "# ..." in payload["code_context"]
+        assert estimate_tokens(payload["code_context"]) <= 300
+        assert report.saved_tokens > estimate_tokens(code) // 2
+
+    def test_recent_turns_kept_and_old_ones_summarized(self):
+        budgeter = make_budgeter()
+        history = [f"assistant: step {i} " + "detail " * 30 for i in range(10)]
+        payload, report = budgeter.assemble("task", "", history, budget=1000)
+
+        lines = payload["history"].splitlines()
+        assert lines[-3:] == history[-3:]
+        assert lines[0].startswith("[7 earlier entries summarized]")
+        assert estimate_tokens(payload["history"]) <= 250
+
+    def test_history_dropped_when_no_room(self):
+        budgeter = make_budgeter(history_share=0.01)
+        history = ["assistant: " + "x" * 400 for _ in range(5)]
+        payload, report = budgeter.assemble("task", "", history, budget=400)
+        assert payload["history"] == ""
+        assert report.history_dropped == 5
+
+    def test_budget_follows_model_window_and_metrics(self):
+        budgeter = make_budgeter()
+        assert budgeter.budget_for(MODEL_CATALOG["openai:gpt-4o"]) == 6000
+        assert budgeter.budget_for(MODEL_CATALOG["ollama:llama3:8b-instruct-q6_k"], overhead_tokens=200) == 5992
+
+        small = make_budgeter(max_tokens=20000)
+        assert small.budget_for(MODEL_CATALOG["ollama:llama3:8b-instruct-q6_k"]) == 8192 - 2000
+
+        budgeter.assemble("parse_config", big_module(), [], budget=300)
+        metrics = budgeter.get_metrics()
+        assert metrics["calls"] == 1 and metrics["code_sliced"] == 1
+        assert metrics["tokens_saved"] == metrics["original_tokens"] - metrics["prompt_tokens"] > 0
+
+    def test_state_history_and_oversized_single_block(self):
+        state = {"messages": [{"role": "user", "content": "hello"}], "working_memory": ["note"], "errors": ["boom"]}
+        assert state_history(state) == ["user: hello", "note", "error: boom"]
+
+        sliced = slice_code_blocks("x = '" + "a" * 4000 + "'", "task", 50, estimate_tokens)
+        assert estimate_tokens(sliced) <= 55 and sliced.endswith("# ...\n")
@@ -0,0 +1,138 @@
+"""
+Tests unitaires pour embedding_service.py
+Cache d'embeddings par hash de contenu (LRU mémoire + SQLite disque) et backend pluggable.
+"""
+
+import pytest
+from typing import List
+
+import chromadb
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from memory_api.app.db.repositories import MemoryItemRepository
+from memory_api.app.db.session import init_async_db
+from memory_api.app.models.schemas import MemoryBatchItem, SearchQuery
+from memory_api.app.services.embedding_service import (
+    CachedEmbedder,
+    EmbeddingCache,
+    content_hash,
+    create_embedding_backend,
+    register_embedding_backend,
+)
+from memory_api.app.services.rag_service import COLLECTION_NAME, RAGService
+
+
+class CountingBackend:
+    """Backend factice qui compte les textes réellement embeddés."""
+
+    model_name = "counting-v1"
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        self.calls.append(list(input))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in input]
+
+
+@pytest.mark.unit
+class TestEmbeddingCache:
+    """Tests pour EmbeddingCache et CachedEmbedder."""
+
+    def test_duplicates_are_embedded_once(self):
+        backend = CountingBackend()
+        embedder = CachedEmbedder(backend, EmbeddingCache(path=""))
+
+        first = embedder.embed(["a", "bb", "a"])
+        second = embedder.embed(["bb", "ccc"])
+
+        assert backend.calls == [["a", "bb"], ["ccc"]]
+        assert first[0] == first[2]
+        assert second[0] == first[1]
+        assert embedder.get_metrics()["embedded"] == 3
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "embeddings.sqlite3")
+        backend = CountingBackend()
+        CachedEmbedder(backend, EmbeddingCache(path=path)).embed(["persisted text"])
+
+        restarted_backend = CountingBackend()
+        cache = EmbeddingCache(path=path)
+        vectors = CachedEmbedder(restarted_backend, cache).embed(["persisted text"])
+
+        assert restarted_backend.calls == []
+        assert vectors[0] == pytest.approx([14.0, float(sum(map(ord, "persisted text")) % 97), 1.0])
+        assert cache.get_metrics()["disk_hits"] == 1
+        cache.close()
+
+    def test_memory_tier_is_lru_bounded(self):
+        cache = EmbeddingCache(path="", max_memory_entries=2)
+        cache.put_many({"k1": [1.0], "k2": [2.0]})
+        cache.get_many(["k1"])
+        cache.put_many({"k3": [3.0]})
+
+        assert list(cache._memory) == ["k1", "k3"]
+        assert cache.get_many(["k2"]) == {"k2": [2.0]}
+        assert cache.get_metrics()["disk_hits"] == 1
+
+    def test_model_name_is_part_of_the_key(self):
+        cache = EmbeddingCache(path="")
+        assert CachedEmbedder(CountingBackend(), cache).cache_key("x") != \
+            CachedEmbedder(CountingBackend(), cache, model_name="other").cache_key("x")
+
+    def test_backend_registry(self):
+        register_embedding_backend("counting", CountingBackend)
+        assert isinstance(create_embedding_backend("counting"), CountingBackend)
+        with pytest.raises(ValueError):
+            create_embedding_backend("missing")
+
+
+@pytest.mark.unit
+class TestRAGServiceEmbeddings:
+    """RAGService s'appuie sur le cache et remplit content_hash / embeddings_vector."""
+
+    @pytest.fixture
+    def chroma_client(self):
+        client = chromadb.EphemeralClient()
+        try:
+            client.delete_collection(COLLECTION_NAME)
+        except Exception:
+            pass
+        return client
+
+    @pytest.mark.asyncio
+    async def test_repeated_queries_are_not_reembedded(self, chroma_client):
+        backend = CountingBackend()
+        service = RAGService(client=chroma_client, embedder=CachedEmbedder(backend, EmbeddingCache(path="")))
+        await service.store_memory("def cached(): pass")
+
+        for _ in range(3):
+            await service.search_memory(SearchQuery(query="cached function", limit=1))
+        await service.search_memory_batch([SearchQuery(query="cached function"), SearchQuery(query="other")])
+
+        assert backend.calls == [["def cached(): pass"], ["cached function"], ["other"]]
+
+    @pytest.mark.asyncio
+    async def test_database_rows_reuse_cached_vectors(self, chroma_client):
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool,
+                                     connect_args={"check_same_thread": False})
+        await init_async_db(engine)
+        try:
+            repository = MemoryItemRepository(async_sessionmaker(engine, expire_on_commit=False))
+            backend = CountingBackend()
+            service = RAGService(client=chroma_client, embedder=CachedEmbedder(backend, EmbeddingCache(path="")),
+                                 memory_repository=repository)
+
+            await service.store_memory_batch([MemoryBatchItem(content="chunk a"), MemoryBatchItem(content="chunk b")],
+                                             session_id="ingest")
+            await service.store_memory("chunk a", session_id="ingest")
+
+            rows = await repository.list_by_session("ingest")
+            assert len(rows) == 2
+            row = next(r for r in rows if r.content == "chunk a")
+            assert row.content_hash == content_hash("chunk a")
+            assert backend.calls == [["chunk a", "chunk b"]]
+            assert row.embeddings_vector == CountingBackend()(["chunk a"])[0]
+        finally:
+            await engine.dispose()
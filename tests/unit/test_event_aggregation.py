@@ -0,0 +1,98 @@
+"""
+Tests unitaires pour event_aggregation.py
+Politiques par type, résumés par intervalle, exemples échantillonnés et intégration au SecurityLogger.
+"""
+
+import pytest
+import random
+from unittest.mock import patch
+
+from orchestrator.app.observability.event_aggregation import EventPolicy, SecurityEventAggregator
+from orchestrator.app.security.logging import SecurityLogger
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_aggregator(clock, **policies):
+    policies = policies or {"CACHE_HIT": EventPolicy(aggregate=True, exemplars=2)}
+    return SecurityEventAggregator(policies=policies, interval=60, clock=clock, rng=random.Random(7))
+
+
+@pytest.mark.unit
+class TestSecurityEventAggregator:
+    """Tests pour SecurityEventAggregator."""
+
+    def test_rare_types_logged_and_frequent_types_summarized(self):
+        clock = FakeClock()
+        aggregator = make_aggregator(clock)
+
+        assert aggregator.admit("UNAUTHORIZED_ACCESS_ATTEMPT", {"ip": "1.2.3.4"})
+        assert not any(aggregator.admit("CACHE_HIT", {"key": f"k{i}"}) for i in range(100))
+        assert aggregator.drain() == []  # Intervalle non écoulé
+
+        clock.now = 61
+        [summary] = aggregator.drain()
+        assert summary.event_type == "CACHE_HIT" and summary.count == 100
+        assert len(summary.exemplars) == 2
+        assert all(exemplar["key"].startswith("k") for exemplar in summary.exemplars)
+        assert aggregator.get_metrics()["aggregated"] == 100
+
+    def test_individual_quota_resets_each_interval(self):
+        clock = FakeClock()
+        aggregator = make_aggregator(clock, SESSION_REGISTERED=EventPolicy(aggregate=True, individual_per_interval=2))
+
+        decisions = [aggregator.admit("SESSION_REGISTERED", {}) for _ in range(5)]
+        assert decisions == [True, True, False, False, False]
+
+        clock.now = 60
+        [summary] = aggregator.drain()
+        assert summary.count == 3 and summary.individually_logged == 2
+        assert aggregator.admit("SESSION_REGISTERED", {})
+
+    def test_exemplars_are_sampled_across_the_interval(self):
+        clock = FakeClock()
+        aggregator = make_aggregator(clock)
+        for i in range(1000):
+            aggregator.admit("CACHE_HIT", {"index": i})
+
+        [summary] = aggregator.drain(force=True)
+        # Réservoir : pas seulement les premiers événements
+        assert any(exemplar["index"] >= 2 for exemplar in summary.exemplars)
+
+    def test_security_logger_emits_masked_summary(self):
+        clock = FakeClock()
+        logger = SecurityLogger(aggregator=make_aggregator(clock))
+
+        with patch.object(logger.logger, 'warning') as mock_warning:
+            for _ in range(10):
+                logger.log_security_event("CACHE_HIT", {"key": "session", "detail": "password=supersecret"})
+            assert mock_warning.call_count == 0
+
+            clock.now = 61
+            logger.log_security_event("CACHE_HIT", {"key": "session"})
+
+        mock_warning.assert_called_once()
+        message, extra = mock_warning.call_args[0][0], mock_warning.call_args[1]["extra"]
+        assert message == "SECURITY_EVENT_SUMMARY: CACHE_HIT x10"
+        assert extra["count"] == 10
+        assert all("supersecret" not in str(exemplar) for exemplar in extra["exemplars"])
+
+    def test_forced_flush_and_logger_without_aggregator(self):
+        clock = FakeClock()
+        logger = SecurityLogger(aggregator=make_aggregator(clock))
+        plain = SecurityLogger()
+
+        with patch.object(logger.logger, 'warning') as mock_warning:
+            logger.log_security_event("CACHE_HIT", {"key": "a"})
+            logger.flush_event_summaries(force=True)
+            plain.log_security_event("CACHE_HIT", {"key": "a"})
+            plain.flush_event_summaries(force=True)
+
+        messages = [call[0][0] for call in mock_warning.call_args_list]
+        assert messages == ["SECURITY_EVENT_SUMMARY: CACHE_HIT x1", "SECURITY_EVENT: CACHE_HIT"]
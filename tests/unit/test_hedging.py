@@ -0,0 +1,168 @@
+"""
+Tests unitaires pour hedging.py
+Déclenchement du secours, annulation du perdant, budget, circuits ouverts et délai au percentile.
+"""
+
+import pytest
+import asyncio
+from unittest.mock import Mock, patch
+
+from orchestrator.app.agents import workers
+from orchestrator.app.config import settings
+from orchestrator.app.performance.circuit_breaker import CircuitBreakerManager
+from orchestrator.app.performance.hedging import HedgedCaller, HedgeTokenHandler, get_llm_circuit_breaker
+from orchestrator.app.performance.model_router import MODEL_CATALOG
+
+PRIMARY = MODEL_CATALOG["openai:gpt-4o"]
+BACKUP = MODEL_CATALOG["anthropic:claude-3-5-sonnet-20240620"]
+THIRD = MODEL_CATALOG["gemini:gemini-1.5-pro"]
+
+
+class FakeProvider:
+    """Appels LLM simulés : délai avant le premier token puis durée de génération."""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour  # clé modèle -> (premier token, fin)
+        self.cancelled = []
+        self.calls = []
+
+    async def __call__(self, profile, attempt):
+        self.calls.append(profile.key)
+        first_token, total = self.behaviour[profile.key]
+        try:
+            await asyncio.sleep(first_token)
+            await HedgeTokenHandler(attempt).on_llm_new_token("x")
+            await asyncio.sleep(total - first_token)
+        except asyncio.CancelledError:
+            self.cancelled.append(profile.key)
+            raise
+        return f"answer from {profile.key}"
+
+
+def make_caller(**kwargs):
+    options = dict(min_delay=0.01, max_delay=0.05, min_samples=5, budget_ratio=0.1, budget_burst=2,
+                   circuit_manager=CircuitBreakerManager())
+    options.update(kwargs)
+    return HedgedCaller(**options)
+
+
+@pytest.mark.unit
+class TestHedgedCaller:
+    """Tests pour HedgedCaller."""
+
+    @pytest.mark.asyncio
+    async def test_stalled_primary_is_hedged_and_cancelled(self):
+        caller = make_caller()
+        provider = FakeProvider({PRIMARY.key: (5.0, 6.0), BACKUP.key: (0.01, 0.03)})
+
+        result, winner = await caller.call([PRIMARY, BACKUP], provider)
+
+        assert result == f"answer from {BACKUP.key}" and winner == BACKUP
+        assert provider.cancelled == [PRIMARY.key]
+        assert caller.metrics["hedged"] == caller.metrics["hedge_wins"] == 1
+
+    @pytest.mark.asyncio
+    async def test_primary_streaming_in_time_is_not_hedged(self):
+        caller = make_caller()
+        provider = FakeProvider({PRIMARY.key: (0.01, 0.1), BACKUP.key: (0.01, 0.02)})
+
+        result, winner = await caller.call([PRIMARY, BACKUP], provider)
+
+        assert winner == PRIMARY
+        assert provider.calls == [PRIMARY.key]
+        assert caller.metrics["hedged"] == 0
+
+    @pytest.mark.asyncio
+    async def test_budget_caps_hedge_rate(self):
+        caller = make_caller(budget_burst=1, budget_ratio=0.1)
+        provider = FakeProvider({PRIMARY.key: (0.08, 0.1), BACKUP.key: (0.01, 0.02)})
+
+        for _ in range(5):
+            await caller.call([PRIMARY, BACKUP], provider)
+
+        assert caller.metrics["hedged"] == 1
+        assert caller.metrics["budget_exhausted"] == 4
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_is_never_a_hedge_target(self):
+        manager = CircuitBreakerManager()
+        (await get_llm_circuit_breaker(BACKUP.provider, manager)).force_open()
+        caller = make_caller(circuit_manager=manager)
+        provider = FakeProvider({PRIMARY.key: (0.08, 0.1), BACKUP.key: (0.01, 0.02)})
+
+        _, winner = await caller.call([PRIMARY, BACKUP], provider)
+
+        assert winner == PRIMARY
+        assert BACKUP.key not in provider.calls
+        assert caller.metrics["no_target"] == 1
+
+    def test_hedge_delay_follows_percentile(self):
+        caller = make_caller(min_delay=0.5, max_delay=30.0, percentile=0.9)
+        assert caller.hedge_delay(PRIMARY.key) == 30.0  # historique insuffisant
+        for seconds in range(1, 11):
+            caller.observe(PRIMARY.key, float(seconds))
+        assert caller.hedge_delay(PRIMARY.key) == 10.0
+        caller.observe(PRIMARY.key, 0.01)
+        assert 0.5 <= caller.hedge_delay(PRIMARY.key) <= 10.0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_loser_is_not_a_circuit_failure(self):
+        manager = CircuitBreakerManager()
+        breaker = await get_llm_circuit_breaker(PRIMARY.provider, manager)
+        call = asyncio.create_task(breaker.call(asyncio.sleep, 5))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        assert breaker.failure_count == 0
+        assert breaker.get_metrics().total_calls == 0
+
+
+@pytest.mark.unit
+class TestRoutedHedging:
+    """Hedge et repli du routeur dans invoke_routed."""
+
+    @pytest.mark.asyncio
+    async def test_failed_race_falls_back_past_the_hedge_backup(self):
+        calls = []
+
+        async def run_agent_on_model(agent_key, profile, input_payload, token_stream=None, hedge_attempt=None):
+            calls.append(profile.key)
+            if profile == PRIMARY:
+                await asyncio.sleep(0.1)  # Aucun token dans le délai : le secours est lancé
+            if profile != THIRD:
+                raise RuntimeError(f"{profile.key} failed")
+            return "answer"
+
+        with patch.object(settings, "HEDGING_ENABLED", True), \
+             patch.object(workers, "get_hedged_caller", return_value=make_caller()), \
+             patch.object(workers, "get_model_router", return_value=Mock()), \
+             patch.object(workers, "run_agent_on_model", run_agent_on_model):
+            output, producer = await workers.invoke_routed("code_generation", {}, candidates=[PRIMARY, BACKUP, THIRD])
+
+        assert (output, producer) == ("answer", THIRD)
+        assert calls == [PRIMARY.key, BACKUP.key, THIRD.key]
+
+    @pytest.mark.asyncio
+    async def test_hedging_without_router_backs_up_to_next_agent_candidate(self):
+        calls = []
+
+        async def run_agent_on_model(agent_key, profile, input_payload, token_stream=None, hedge_attempt=None):
+            calls.append(profile.key)
+            if profile == PRIMARY:
+                await asyncio.sleep(1)
+            return f"answer from {profile.key}"
+
+        state = {"task_description": "write a parser", "code_context": ""}
+        with patch.object(settings, "HEDGING_ENABLED", True), \
+             patch.object(settings, "MODEL_ROUTER_ENABLED", False), \
+             patch.object(settings, "LLM_CACHE_ENABLED", False), \
+             patch.object(workers, "get_token_stream", return_value=None), \
+             patch.object(workers, "get_hedged_caller", return_value=make_caller()), \
+             patch.object(workers, "get_model_router", return_value=Mock()), \
+             patch.object(workers, "run_agent_on_model", run_agent_on_model):
+            update = await workers.worker_node_wrapper(state, "code_generation")
+
+        assert workers.AGENT_CANDIDATES["code_generation"][:2] == [PRIMARY.key, BACKUP.key]
+        assert update == {"results": {"code_generation": f"answer from {BACKUP.key}"}}
+        assert calls == [PRIMARY.key, BACKUP.key]
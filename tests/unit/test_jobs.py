@@ -0,0 +1,221 @@
+"""
+Tests unitaires pour le mode job (jobs/queue.py, jobs/worker.py)
+File durable Redis Streams (fakeredis), reprise après crash d'un worker, polling et SSE.
+"""
+
+import pytest
+import asyncio
+import json
+from types import SimpleNamespace
+
+import fakeredis
+import httpx
+
+from orchestrator.app.checkpoint.api_checkpointer import ApiCheckpointer
+from orchestrator.app.jobs.queue import JobQueue, restart_event
+from orchestrator.app.jobs.worker import JobWorker, merge_event_results, workflow_executor
+
+
+def sse(payload):
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def fake_execute(job):
+    yield "event: token\ndata: {\"token\": \"def\"}\n\n"
+    await asyncio.sleep(0.01)
+    yield sse({"code_generation": {"results": {"code_generation": f"code for {job['task_description']}"}}})
+    yield sse({"documentation": {"results": {"documentation": "docs"}}})
+    yield sse({"status": "completed"})
+
+
+async def failing_execute(job):
+    yield sse({"supervisor": {"next": "code_generation"}})
+    raise RuntimeError("provider down")
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+def make_queue(server, **kwargs):
+    return JobQueue(fakeredis.FakeAsyncRedis(server=server), stream="test:jobs", group="test-workers", **kwargs)
+
+
+async def run_until_done(worker, queue, job_id, timeout=3):
+    stop = asyncio.Event()
+    runner = asyncio.create_task(worker.run(stop, block_ms=20))
+    try:
+        for _ in range(int(timeout / 0.02)):
+            job = await queue.get(job_id)
+            if job["status"] in ("completed", "failed"):
+                return job
+            await asyncio.sleep(0.02)
+        raise AssertionError("job not finished")
+    finally:
+        stop.set()
+        await runner
+
+
+@pytest.mark.unit
+class TestJobQueue:
+    """Tests pour JobQueue et JobWorker."""
+
+    def test_merge_event_results_ignores_tokens(self):
+        results = {}
+        merge_event_results("event: token\ndata: {\"token\": \"x\"}\n\n", results)
+        merge_event_results(sse({"code_generation": {"results": {"code_generation": "print()"}}}), results)
+        merge_event_results(sse({"status": "completed"}), results)
+        assert results == {"code_generation": "print()"}
+
+    @pytest.mark.asyncio
+    async def test_submit_execute_poll_and_replay(self, redis_server):
+        api_queue = make_queue(redis_server)
+        job_id = await api_queue.submit("parse json", "session-1", code_context="x = 1")
+        assert (await api_queue.get(job_id))["status"] == "queued"
+
+        # Worker dans un autre "processus" : client Redis distinct sur le même serveur
+        worker_queue = make_queue(redis_server)
+        job = await run_until_done(JobWorker(worker_queue, fake_execute, consumer="w1"), api_queue, job_id)
+
+        assert job["status"] == "completed"
+        assert job["attempts"] == 1
+        assert job["result"] == {"code_generation": "code for parse json", "documentation": "docs"}
+        events = [line async for line in api_queue.events(job_id)]
+        assert len(events) == 4 and events[-1] == sse({"status": "completed"})
+        assert await api_queue.get_metrics() == {"stream": "test:jobs", "queued": 0, "in_progress": 0}
+
+    @pytest.mark.asyncio
+    async def test_sse_subscriber_follows_running_job(self, redis_server):
+        queue = make_queue(redis_server)
+        job_id = await queue.submit("stream me", "session-2")
+        subscriber = asyncio.create_task(self._collect(queue, job_id))
+        await asyncio.sleep(0.05)
+
+        await run_until_done(JobWorker(make_queue(redis_server), fake_execute, consumer="w1"), queue, job_id)
+        lines = await asyncio.wait_for(subscriber, timeout=2)
+        assert lines[0].startswith("event: token")
+        assert len(lines) == 4
+
+    @staticmethod
+    async def _collect(queue, job_id):
+        return [line async for line in queue.events(job_id, block_ms=20)]
+
+    @pytest.mark.asyncio
+    async def test_job_of_crashed_worker_is_reclaimed(self, redis_server):
+        queue = make_queue(redis_server, visibility_timeout=0.1)
+        job_id = await queue.submit("survive crash", "session-3")
+
+        # Le premier worker réclame le job puis disparaît sans acquitter
+        crashed = make_queue(redis_server, visibility_timeout=0.1)
+        claimed = await crashed.claim("crashed-worker")
+        assert [claimed_job for _, claimed_job in claimed] == [job_id]
+        await crashed.start(job_id, "crashed-worker")
+        await asyncio.sleep(0.15)
+
+        job = await run_until_done(JobWorker(make_queue(redis_server, visibility_timeout=0.1), fake_execute,
+                                             consumer="w2"), queue, job_id)
+        assert job["status"] == "completed"
+        assert job["worker"] == "w2"
+        assert job["attempts"] == 2
+
+    @pytest.mark.asyncio
+    async def test_follower_of_crashed_attempt_sees_restart_marker(self, redis_server):
+        queue = make_queue(redis_server, visibility_timeout=0.1)
+        job_id = await queue.submit("survive crash", "session-3")
+        subscriber = asyncio.create_task(self._collect(queue, job_id))
+
+        # Première tentative : un événement partiel puis le worker disparaît
+        crashed = make_queue(redis_server, visibility_timeout=0.1)
+        await crashed.claim("crashed-worker")
+        await crashed.start(job_id, "crashed-worker")
+        await crashed.append_event(job_id, sse({"supervisor": {"next": "code_generation"}}))
+        await asyncio.sleep(0.15)
+
+        await run_until_done(JobWorker(make_queue(redis_server, visibility_timeout=0.1), fake_execute,
+                                       consumer="w2"), queue, job_id)
+        lines = await asyncio.wait_for(subscriber, timeout=2)
+        assert lines[0] == sse({"supervisor": {"next": "code_generation"}})
+        assert lines[1] == restart_event(2) == f"event: restart\ndata: {json.dumps({'attempt': 2})}\n\n"
+        assert lines[2:] == [line async for line in fake_execute({"task_description": "survive crash"})]
+
+        replay = [line async for line in queue.events(job_id)]
+        assert replay == lines[1:]
+
+    @pytest.mark.asyncio
+    async def test_expired_job_message_is_dropped_without_recreating_job(self, redis_server):
+        queue = make_queue(redis_server)
+        job_id = await queue.submit("expired", "session-6")
+        await queue.redis.delete(queue.job_key(job_id))
+
+        worker = JobWorker(make_queue(redis_server), fake_execute, consumer="w1")
+        stop = asyncio.Event()
+        runner = asyncio.create_task(worker.run(stop, block_ms=20))
+        await asyncio.sleep(0.1)
+        stop.set()
+        await runner
+
+        assert worker.metrics["claimed"] == 1
+        assert await queue.get(job_id) is None
+        assert not await queue.redis.exists(queue.events_key(job_id))
+        assert await queue.get_metrics() == {"stream": "test:jobs", "queued": 0, "in_progress": 0}
+
+    @pytest.mark.asyncio
+    async def test_running_job_is_not_stolen_while_heartbeating(self, redis_server):
+        queue = make_queue(redis_server, visibility_timeout=0.2)
+        job_id = await queue.submit("long job", "session-4")
+
+        async def slow_execute(job):
+            await asyncio.sleep(0.5)
+            yield sse({"status": "completed"})
+
+        first = JobWorker(make_queue(redis_server, visibility_timeout=0.2), slow_execute, consumer="w1")
+        second = JobWorker(make_queue(redis_server, visibility_timeout=0.2), fake_execute, consumer="w2")
+        stop = asyncio.Event()
+        runners = [asyncio.create_task(first.run(stop, block_ms=20))]
+        await asyncio.sleep(0.05)
+        runners.append(asyncio.create_task(second.run(stop, block_ms=20)))
+        await asyncio.sleep(0.7)
+        stop.set()
+        await asyncio.gather(*runners)
+
+        job = await queue.get(job_id)
+        assert job["status"] == "completed"
+        assert job["attempts"] == 1
+        assert second.metrics["claimed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failure_is_recorded(self, redis_server):
+        queue = make_queue(redis_server)
+        job_id = await queue.submit("fails", "session-5")
+
+        job = await run_until_done(JobWorker(make_queue(redis_server), failing_execute, consumer="w1"), queue, job_id)
+        assert job["status"] == "failed"
+        assert job["error"] == "RuntimeError"
+        events = [line async for line in queue.events(job_id)]
+        assert events[-1] == sse({"error": "Task execution failed"})
+
+    @pytest.mark.asyncio
+    async def test_checkpoints_flushed_before_job_reports_completed(self, redis_server, monkeypatch):
+        from orchestrator.app.graph import workflow
+
+        async def fake_stream(app_instance, initial_state, session_id):
+            yield sse({"documentation": {"results": {"documentation": "docs"}}})
+
+        monkeypatch.setattr(workflow, "build_initial_state", lambda *args: {})
+        monkeypatch.setattr(workflow, "stream_workflow_events", fake_stream)
+        queue = make_queue(redis_server)
+        checkpointer = ApiCheckpointer(client=httpx.AsyncClient(transport=httpx.MockTransport(lambda r: None)))
+        status_at_flush = []
+
+        async def aflush(thread_id=None):
+            job = await queue.get(job_id)
+            status_at_flush.append((thread_id, job["status"]))
+
+        monkeypatch.setattr(checkpointer, "aflush", aflush)
+        job_id = await queue.submit("document it", "session-6")
+        execute = workflow_executor(SimpleNamespace(checkpointer=checkpointer))
+
+        job = await run_until_done(JobWorker(make_queue(redis_server), execute, consumer="w1"), queue, job_id)
+        assert job["status"] == "completed"
+        assert status_at_flush == [("session-6", "running")]
@@ -0,0 +1,154 @@
+"""
+Tests unitaires pour lint_pool.py
+Réutilisation des workers, cache par empreinte, timeout et recyclage, outil absent et boucle non bloquée.
+"""
+
+import pytest
+import asyncio
+import sys
+
+from orchestrator.app.security.lint_pool import (
+    WORKER_SCRIPT,
+    LintError,
+    LintTimeout,
+    LintUnavailable,
+    LintWorkerPool,
+)
+
+
+def fake_pool(tmp_path, lint_body, **kwargs):
+    """Pool dont les workers exécutent lint_body (fonction lint(path)) à la place de pylint."""
+    sandbox = tmp_path / "sandbox"
+    sandbox.mkdir(exist_ok=True)
+    script = tmp_path / "fake_lint_worker.py"
+    script.write_text(
+        "import os, sys, time\n"
+        f"sys.path.insert(0, {str(WORKER_SCRIPT.parent)!r})\n"
+        "from lint_worker import serve\n"
+        "def lint(path):\n"
+        f"    {lint_body}\n"
+        "serve(lint, sys.argv[1])\n"
+    )
+    return LintWorkerPool(sandbox, command=[sys.executable, "-I", str(script), str(sandbox)], **kwargs)
+
+
+ECHO_PID = "return f'{os.getpid()}:' + open(path).read()"
+
+
+@pytest.mark.unit
+class TestLintWorkerPool:
+    """Tests pour LintWorkerPool."""
+
+    @pytest.mark.asyncio
+    async def test_worker_reused_and_results_cached_by_hash(self, tmp_path):
+        pool = fake_pool(tmp_path, ECHO_PID, size=1)
+        try:
+            first = await pool.lint("a = 1\n")
+            second = await pool.lint("b = 2\n")
+            again = await pool.lint("a = 1\n")
+        finally:
+            await pool.close()
+
+        assert first.split(":")[0] == second.split(":")[0]  # Même processus, pylint resté chargé
+        assert first.endswith("a = 1\n") and again == first
+        metrics = pool.get_metrics()
+        assert metrics["jobs"] == 2 and metrics["cache_hits"] == 1
+        assert metrics["workers_spawned"] == 1
+
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_requests_share_one_job(self, tmp_path):
+        pool = fake_pool(tmp_path, "time.sleep(0.2); return 'ok'")
+        try:
+            results = await asyncio.gather(*(pool.lint("x = 1\n") for _ in range(5)))
+        finally:
+            await pool.close()
+
+        assert results == ["ok"] * 5
+        assert pool.metrics["jobs"] == 1 and pool.metrics["deduplicated"] == 4
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_worker_and_pool_recovers(self, tmp_path):
+        pool = fake_pool(tmp_path, "time.sleep(30) if 'slow' in open(path).read() else None; return 'ok'",
+                         size=1, job_timeout=0.5)
+        try:
+            with pytest.raises(LintTimeout):
+                await pool.lint("slow = True\n")
+            assert await pool.lint("fast = True\n") == "ok"
+        finally:
+            await pool.close()
+
+        metrics = pool.get_metrics()
+        assert metrics["timeouts"] == 1 and metrics["workers_recycled"] == 1
+        assert metrics["workers_spawned"] == 2 and metrics["cache_entries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_worker_recycled_after_max_jobs(self, tmp_path):
+        pool = fake_pool(tmp_path, ECHO_PID, size=1, max_jobs_per_worker=2, cache_size=0)
+        try:
+            pids = [(await pool.lint(f"v = {i}\n")).split(":")[0] for i in range(3)]
+        finally:
+            await pool.close()
+
+        assert pids[0] == pids[1] != pids[2]
+        assert pool.metrics["workers_recycled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_tool_and_job_errors(self, tmp_path):
+        missing = LintWorkerPool(tmp_path, command=[sys.executable, "-I", "-c",
+                                                    "print('{\"ready\": false, \"error\": \"pylint missing\"}')"])
+        with pytest.raises(LintUnavailable, match="pylint missing"):
+            await missing.lint("a = 1\n")
+        with pytest.raises(LintUnavailable):
+            await missing.lint("b = 2\n")
+        assert missing.metrics["workers_spawned"] == 0
+
+        pool = fake_pool(tmp_path, "raise ValueError('bad input')", size=1)
+        try:
+            with pytest.raises(LintError, match="bad input"):
+                await pool.lint("a = 1\n")
+            with pytest.raises(LintError):
+                await pool.lint("b = 2\n")
+        finally:
+            await pool.close()
+        # Erreur d'analyse : le worker reste sain et réutilisé
+        assert pool.metrics["workers_spawned"] == 1 and pool.metrics["errors"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_spawn_wakes_waiting_callers(self, tmp_path):
+        not_ready = LintWorkerPool(tmp_path, size=1, command=[sys.executable, "-I", "-c",
+                                                              "print('{\"ready\": false}')"])
+        results = await asyncio.wait_for(
+            asyncio.gather(not_ready.lint("a = 1\n"), not_ready.lint("b = 2\n"), return_exceptions=True),
+            timeout=10
+        )
+        assert [type(result) for result in results] == [LintUnavailable, LintUnavailable]
+
+        slow_start = LintWorkerPool(tmp_path, size=1, startup_timeout=0.2,
+                                    command=[sys.executable, "-I", "-c", "import time; time.sleep(5)"])
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(slow_start.lint("a = 1\n"), slow_start.lint("b = 2\n"), return_exceptions=True),
+                timeout=10
+            )
+        finally:
+            await slow_start.close()
+        assert [type(result) for result in results] == [LintError, LintError]
+
+    @pytest.mark.asyncio
+    async def test_event_loop_not_blocked_during_analysis(self, tmp_path):
+        pool = fake_pool(tmp_path, "time.sleep(0.5); return 'done'")
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.02)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        try:
+            assert await pool.lint("a = 1\n") == "done"
+        finally:
+            task.cancel()
+            await pool.close()
+        assert ticks >= 10
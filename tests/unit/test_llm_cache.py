@@ -0,0 +1,214 @@
+"""
+Tests unitaires pour llm_cache.py
+Cache LLM à deux niveaux : exact en processus puis similarité sémantique.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from orchestrator.app.agents import workers
+from orchestrator.app.config import settings
+from orchestrator.app.performance import llm_cache as llm_cache_module
+from orchestrator.app.performance.llm_cache import (
+    SemanticLLMCache,
+    cosine_similarity,
+    hashed_embedding,
+    normalize_task,
+)
+
+
+def make_cache(**kwargs) -> SemanticLLMCache:
+    params = {"ttl_seconds": 60, "max_entries": 16, "similarity_threshold": 0.8, "use_redis": False}
+    params.update(kwargs)
+    return SemanticLLMCache(**params)
+
+
+@pytest.mark.unit
+class TestEmbedding:
+    """Tests pour l'embedding local par hachage."""
+
+    def test_normalize_task(self):
+        assert normalize_task("  Write   a\tFunction \n") == "write a function"
+
+    def test_similarity_orders_near_duplicates(self):
+        base = hashed_embedding("write a python function that sorts a list of integers")
+        near = hashed_embedding("write a python function that sorts a list of numbers")
+        far = hashed_embedding("document the REST API authentication flow")
+
+        assert cosine_similarity(base, base) == pytest.approx(1.0)
+        assert cosine_similarity(base, near) > 0.7
+        assert cosine_similarity(base, far) < 0.2
+
+
+@pytest.mark.unit
+class TestSemanticLLMCache:
+    """Tests pour SemanticLLMCache."""
+
+    @pytest.mark.asyncio
+    async def test_exact_hit_ignores_case_and_whitespace(self):
+        cache = make_cache()
+        await cache.set("code_generation", "gpt-4o", "Write a sort function", "ctx", "def sort(): ...")
+
+        result = await cache.get("code_generation", "gpt-4o", "  write a SORT   function ", "ctx")
+
+        assert result.response == "def sort(): ..."
+        assert result.tier == "exact"
+        assert cache.metrics["hits_exact"] == 1
+
+    @pytest.mark.asyncio
+    async def test_key_includes_agent_model_and_code_context(self):
+        cache = make_cache(similarity_threshold=1.0)
+        await cache.set("code_generation", "gpt-4o", "task", "ctx", "answer")
+
+        assert await cache.get("documentation", "gpt-4o", "task", "ctx") is None
+        assert await cache.get("code_generation", "claude", "task", "ctx") is None
+        assert await cache.get("code_generation", "gpt-4o", "task", "other ctx") is None
+        assert cache.metrics["misses"] == 3
+
+    @pytest.mark.asyncio
+    async def test_history_is_part_of_key_and_semantic_bucket(self):
+        cache = make_cache(similarity_threshold=0.5)
+        await cache.set("code_generation", "gpt-4o", "sort a list of integers", "ctx", "first", history="user: sort")
+
+        assert await cache.get("code_generation", "gpt-4o", "sort a list of integers", "ctx") is None
+        assert await cache.get("code_generation", "gpt-4o", "sort a list of numbers", "ctx",
+                               history="user: sort\nerror: timeout") is None
+        hit = await cache.get("code_generation", "gpt-4o", "sort a list of integers", "ctx", history="user: sort")
+        assert hit.response == "first"
+        assert cache.make_key("testing", "m", "t", "ctx") == cache.make_key("testing", "m", "t", "ctx", "")
+
+    @pytest.mark.asyncio
+    async def test_semantic_hit_above_threshold_only(self):
+        cache = make_cache(similarity_threshold=0.7)
+        await cache.set("code_generation", "gpt-4o",
+                        "write a python function that sorts a list of integers", "", "sorted_code")
+
+        near = await cache.get("code_generation", "gpt-4o",
+                               "write a python function that sorts a list of numbers", "")
+        far = await cache.get("code_generation", "gpt-4o", "document the authentication flow", "")
+
+        assert near.tier == "semantic"
+        assert near.response == "sorted_code"
+        assert 0.7 <= near.similarity < 1.0
+        assert far is None
+        metrics = cache.get_metrics()
+        assert metrics["hits_semantic"] == 1
+        assert metrics["hit_ratio"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_default_threshold_does_not_share_answers_between_opposite_tasks(self):
+        """Un seul mot change le sens de la tâche : le sac de n-grammes ne le voit pas."""
+        cache = SemanticLLMCache(ttl_seconds=60, max_entries=16, use_redis=False)
+        pairs = [
+            ("Write a python function that sorts the list of registered users in ascending order "
+             "by signup date and returns the first page of twenty users", "ascending", "descending"),
+            ("Write a FastAPI middleware that validates the JWT bearer token on every request and "
+             "rejects expired tokens with a 401 response", "rejects", "accepts"),
+        ]
+
+        for task, word, opposite in pairs:
+            other = task.replace(word, opposite)
+            assert cosine_similarity(hashed_embedding(normalize_task(task)), hashed_embedding(normalize_task(other))) > 0.92
+            await cache.set("code_generation", "gpt-4o", task, "", f"code for {word}")
+            assert await cache.get("code_generation", "gpt-4o", other, "") is None
+
+        assert cache.similarity_threshold == 1.0
+        assert cache.metrics["hits_semantic"] == 0
+
+    @pytest.mark.asyncio
+    async def test_threshold_one_disables_semantic_tier(self):
+        cache = make_cache(similarity_threshold=1.0)
+        await cache.set("code_generation", "gpt-4o", "sort a list of integers", "", "x")
+
+        assert await cache.get("code_generation", "gpt-4o", "sort a list of numbers", "") is None
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiration(self):
+        cache = make_cache(ttl_seconds=10)
+        with patch.object(llm_cache_module.time, "monotonic", return_value=100.0):
+            await cache.set("testing", "gpt-4o", "write tests", "", "tests")
+        with patch.object(llm_cache_module.time, "monotonic", return_value=111.0):
+            assert await cache.get("testing", "gpt-4o", "write tests", "") is None
+
+        assert cache.metrics["expirations"] == 1
+        assert cache.get_metrics()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_keeps_recently_used(self):
+        cache = make_cache(max_entries=2, similarity_threshold=1.0)
+        await cache.set("testing", "m", "a", "", "A")
+        await cache.set("testing", "m", "b", "", "B")
+        await cache.get("testing", "m", "a", "")
+        await cache.set("testing", "m", "c", "", "C")
+
+        assert await cache.get("testing", "m", "b", "") is None
+        assert (await cache.get("testing", "m", "a", "")).response == "A"
+        assert cache.metrics["evictions"] == 1
+        assert cache._buckets and sum(len(k) for k in cache._buckets.values()) == 2
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_is_consulted_and_populates_local(self):
+        cache = make_cache(use_redis=True)
+        with patch.object(llm_cache_module, "get_cached_llm_response",
+                          AsyncMock(return_value="from redis")) as redis_get:
+            first = await cache.get("documentation", "claude", "explain module", "")
+            second = await cache.get("documentation", "claude", "explain module", "")
+
+        assert first.tier == "redis"
+        assert second.tier == "exact"
+        redis_get.assert_awaited_once_with(cache.make_key("documentation", "claude", "explain module", ""))
+
+    @pytest.mark.asyncio
+    async def test_redis_store_failure_is_not_fatal(self):
+        cache = make_cache(use_redis=True)
+        with patch.object(llm_cache_module, "cache_llm_response", AsyncMock(side_effect=ConnectionError())):
+            await cache.set("testing", "m", "task", "", "ok")
+
+        assert cache.metrics["errors"] == 1
+        assert (await cache.get("testing", "m", "task", "")).response == "ok"
+
+
+@pytest.mark.unit
+class TestWorkerLLMCache:
+    """Tests du cache LLM vu depuis worker_node_wrapper."""
+
+    @pytest.mark.asyncio
+    async def test_supervisor_loop_with_new_history_is_not_served_cached_answer(self):
+        cache = make_cache(similarity_threshold=1.0)
+        executor = Mock(ainvoke=AsyncMock(side_effect=[{"output": "first"}, {"output": "second"}]))
+        state = {"task_description": "write docs", "code_context": "", "messages": [], "errors": []}
+
+        with patch.object(settings, "LLM_CACHE_ENABLED", True), \
+             patch.object(settings, "MODEL_ROUTER_ENABLED", False), \
+             patch.object(workers, "get_llm_cache", return_value=cache), \
+             patch.object(workers, "get_token_stream", return_value=None), \
+             patch.object(workers, "get_agent_executor", return_value=executor):
+            first = await workers.worker_node_wrapper(state, "documentation")
+            replay = await workers.worker_node_wrapper(state, "documentation")
+            looped = await workers.worker_node_wrapper({**state, "errors": ["testing failed"]}, "documentation")
+
+        assert first == replay == {"results": {"documentation": "first"}}
+        assert looped == {"results": {"documentation": "second"}}
+        assert executor.ainvoke.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_routed_answer_is_cached_under_the_model_that_produced_it(self):
+        cache = make_cache(similarity_threshold=1.0)
+        primary, fallback = (workers.MODEL_CATALOG[key] for key in workers.AGENT_CANDIDATES["code_generation"][:2])
+        router = Mock(rank=Mock(return_value=[primary, fallback]))
+        invoke = AsyncMock(return_value=("fallback answer", fallback))
+        state = {"task_description": "write a parser", "code_context": ""}
+
+        with patch.object(settings, "LLM_CACHE_ENABLED", True), \
+             patch.object(settings, "MODEL_ROUTER_ENABLED", True), \
+             patch.object(workers, "get_llm_cache", return_value=cache), \
+             patch.object(workers, "get_token_stream", return_value=None), \
+             patch.object(workers, "get_model_router", return_value=router), \
+             patch.object(workers, "invoke_routed", invoke):
+            assert await workers.worker_node_wrapper(state, "code_generation") == {"results": {"code_generation": "fallback answer"}}
+            invoke.return_value = ("primary answer", primary)
+            assert await workers.worker_node_wrapper(state, "code_generation") == {"results": {"code_generation": "primary answer"}}
+
+        assert (await cache.get("code_generation", fallback.key, "write a parser", "")).response == "fallback answer"
+        assert (await cache.get("code_generation", primary.key, "write a parser", "")).response == "primary answer"
+        assert invoke.await_count == 2
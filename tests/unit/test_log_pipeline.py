@@ -0,0 +1,131 @@
+"""
+Tests unitaires pour log_pipeline.py
+Appel non bloquant, écriture par lots, politiques de débordement et restitution des handlers.
+"""
+
+import pytest
+import logging
+import threading
+import time
+
+from orchestrator.app.observability.log_pipeline import LogPipeline, LogRing
+
+
+class SlowStream:
+    """Flux d'écriture lent qui compte ses écritures."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.writes = []
+
+    def write(self, text):
+        time.sleep(self.delay)
+        self.writes.append(text)
+
+    def flush(self):
+        pass
+
+
+def make_record(message, level=logging.INFO):
+    return logging.LogRecord("security", level, __file__, 1, message, None, None)
+
+
+def make_logger(name, stream, level=logging.DEBUG):
+    logger = logging.getLogger(name)
+    logger.handlers = []
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    handler.setLevel(level)
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger, handler
+
+
+@pytest.mark.unit
+class TestLogPipeline:
+    """Tests pour LogPipeline et LogRing."""
+
+    def test_slow_handler_does_not_delay_caller(self):
+        stream = SlowStream(delay=0.2)
+        logger, handler = make_logger("test_pipeline_slow", stream)
+        pipeline = LogPipeline(capacity=100, flush_interval=0.01)
+        pipeline.attach(logger)
+        pipeline.start()
+        try:
+            started = time.perf_counter()
+            for i in range(5):
+                logger.warning("event %d", i)
+            assert time.perf_counter() - started < 0.05
+        finally:
+            pipeline.stop()
+            pipeline.detach_all()
+
+        assert "".join(stream.writes).count("WARNING event") == 5
+        assert logger.handlers == [handler]
+
+    def test_batch_is_formatted_and_written_once_per_stream(self):
+        stream = SlowStream()
+        logger, _ = make_logger("test_pipeline_batch", stream, level=logging.WARNING)
+        pipeline = LogPipeline(capacity=100)
+        pipeline.attach(logger)
+
+        logger.info("ignored by handler level")
+        for i in range(3):
+            logger.warning("payload=%s", i)
+        pipeline.write_batch(pipeline.ring.get_batch(100, 0))
+        pipeline.detach_all()
+
+        assert stream.writes == ["WARNING payload=0\nWARNING payload=1\nWARNING payload=2\n"]
+        assert pipeline.metrics["batches"] == 1 and pipeline.metrics["written"] == 4
+
+    def test_drop_oldest_keeps_newest_records(self):
+        ring = LogRing(capacity=3, overflow_policy="drop_oldest")
+        for i in range(5):
+            assert ring.put(make_record(f"m{i}"))
+
+        assert [record.msg for record in ring.get_batch(10, 0)] == ["m2", "m3", "m4"]
+        assert ring.dropped == {"drop_oldest": 2}
+
+    def test_sample_policy_keeps_one_in_n_and_all_errors(self):
+        ring = LogRing(capacity=2, overflow_policy="sample", sample_every=3)
+        ring.put(make_record("a"))
+        ring.put(make_record("b"))
+        admitted = [ring.put(make_record(f"burst{i}")) for i in range(6)]
+        assert admitted == [False, False, True, False, False, True]
+        assert ring.put(make_record("failure", logging.ERROR))
+
+        assert [record.msg for record in ring.get_batch(10, 0)] == ["burst5", "failure"]
+        assert ring.dropped["sampled"] == 4
+
+    def test_block_policy_waits_for_room_then_gives_up(self):
+        ring = LogRing(capacity=1, overflow_policy="block", block_timeout=0.05)
+        ring.put(make_record("first"))
+
+        started = time.perf_counter()
+        assert not ring.put(make_record("late"))
+        assert 0.04 <= time.perf_counter() - started < 0.5
+        assert ring.dropped == {"block_timeout": 1}
+
+        consumer = threading.Timer(0.01, lambda: ring.get_batch(1, 0))
+        consumer.start()
+        ring.block_timeout = 1.0
+        assert ring.put(make_record("after drain"))
+        consumer.join()
+
+    def test_inherited_handlers_and_propagation_are_restored(self):
+        parent_stream = SlowStream()
+        parent, _ = make_logger("test_pipeline_parent", parent_stream)
+        child = logging.getLogger("test_pipeline_parent.child")
+        child.handlers = []
+        child.propagate = True
+
+        pipeline = LogPipeline(capacity=10)
+        pipeline.attach(child)
+        assert child.propagate is False
+        child.warning("through parent handler")
+        pipeline.write_batch(pipeline.ring.get_batch(10, 0))
+        pipeline.detach_all()
+
+        assert parent_stream.writes == ["WARNING through parent handler\n"]
+        assert child.handlers == [] and child.propagate is True
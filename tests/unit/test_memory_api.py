@@ -701,6 +701,68 @@ class TestIntegrationScenarios(TestMemoryAPIEndpoints):
         assert response.status_code == 200
 
 
+class TestCheckpointEndpoints(TestMemoryAPIEndpoints):
+    """Tests pour les endpoints de checkpoints LangGraph (namespace 'checkpoint')."""
+    
+    @pytest.fixture
+    def real_state_service(self):
+        """Fixture StateService réel et isolé."""
+        from memory_api.app.services.state_service import StateService
+        with patch('memory_api.app.main.state_service', StateService()) as service:
+            yield service
+    
+    def _record(self, checkpoint_id, parent=None):
+        return {
+            "thread_id": "thread-1",
+            "checkpoint_id": checkpoint_id,
+            "parent_checkpoint_id": parent,
+            "checkpoint": '{"id": "%s"}' % checkpoint_id,
+            "metadata": '{"step": 0}'
+        }
+    
+    def test_batch_store_assigns_versions(self, client, real_state_service):
+        """Test écriture groupée : versions croissantes par thread."""
+        response = client.post("/state/checkpoints/batch", json={
+            "checkpoints": [self._record("cp-1"), self._record("cp-2", parent="cp-1")]
+        })
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["stored"] == 2
+        assert data["versions"] == {"cp-1": 1, "cp-2": 2}
+    
+    def test_get_latest_and_specific_checkpoint(self, client, real_state_service):
+        """Test lecture du dernier checkpoint et d'un checkpoint précis."""
+        client.post("/state/checkpoints/batch", json={
+            "checkpoints": [self._record("cp-1"), self._record("cp-2", parent="cp-1")]
+        })
+        
+        latest = client.get("/state/checkpoints/thread-1").json()
+        specific = client.get("/state/checkpoints/thread-1", params={"checkpoint_id": "cp-1"}).json()
+        
+        assert latest["checkpoint_id"] == "cp-2"
+        assert latest["parent_checkpoint_id"] == "cp-1"
+        assert latest["version"] == 2
+        assert specific["checkpoint_id"] == "cp-1"
+    
+    def test_get_checkpoint_not_found(self, client, real_state_service):
+        """Test 404 pour un thread sans checkpoint."""
+        response = client.get("/state/checkpoints/unknown-thread")
+        assert response.status_code == 404
+    
+    def test_checkpoint_history(self, client, real_state_service):
+        """Test historique trié du plus récent au plus ancien."""
+        client.post("/state/checkpoints/batch", json={
+            "checkpoints": [self._record(f"cp-{i}") for i in range(1, 4)]
+        })
+        
+        history = client.get("/state/checkpoints/thread-1/history").json()
+        before = client.get("/state/checkpoints/thread-1/history", params={"before": "cp-3", "limit": 1}).json()
+        
+        assert [r["checkpoint_id"] for r in history] == ["cp-3", "cp-2", "cp-1"]
+        assert [r["checkpoint_id"] for r in before] == ["cp-2"]
+
+
 class TestApplicationConfiguration:
     """Tests pour la configuration de l'application."""
     
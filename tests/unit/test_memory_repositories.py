@@ -0,0 +1,175 @@
+"""
+Tests unitaires pour les repositories async de la Memory API.
+Exécutés sur SQLite (aiosqlite) : mêmes requêtes que sur PostgreSQL/asyncpg.
+"""
+
+import pytest
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from memory_api.app.db.session import get_async_database_url, init_async_db
+from memory_api.app.db.repositories import (
+    AgentCommunicationRepository,
+    AgentSessionRepository,
+    KnowledgeBaseRepository,
+    MemoryItemRepository,
+    StateItemRepository,
+)
+from memory_api.app.models.schemas import CheckpointRecord
+from memory_api.app.services.state_service import StateService
+
+
+@asynccontextmanager
+async def sqlite_database():
+    """Base SQLite en mémoire partagée par toutes les sessions du test."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool,
+                                 connect_args={"check_same_thread": False})
+    await init_async_db(engine)
+    try:
+        yield async_sessionmaker(engine, expire_on_commit=False)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.unit
+class TestAsyncDatabaseUrl:
+    """Tests pour la conversion d'URL vers les drivers async."""
+
+    def test_postgresql_uses_asyncpg(self):
+        assert get_async_database_url("postgresql://u:p@db:5432/mem") == "postgresql+asyncpg://u:p@db:5432/mem"
+
+    def test_sqlite_uses_aiosqlite(self):
+        assert get_async_database_url("sqlite:///./memory.db") == "sqlite+aiosqlite:///./memory.db"
+        assert get_async_database_url("postgresql+asyncpg://x/y") == "postgresql+asyncpg://x/y"
+
+
+@pytest.mark.unit
+class TestRepositories:
+    """Tests pour les repositories AgentSession/MemoryItem/StateItem/AgentCommunication."""
+
+    @pytest.mark.asyncio
+    async def test_session_get_or_create_is_idempotent(self):
+        async with sqlite_database() as session_factory:
+            repo = AgentSessionRepository(session_factory)
+            first = await repo.get_or_create("s1", agent_type="supervisor")
+            second = await repo.get_or_create("s1")
+
+            assert first.id == second.id
+            assert await repo.update_status("s1", "completed", tokens_used=10)
+            stored = await repo.get("s1")
+            assert stored.status == "completed"
+            assert stored.total_tokens_used == 10
+            assert await repo.list_active() == []
+
+    @pytest.mark.asyncio
+    async def test_memory_items_are_deduplicated_per_session(self):
+        async with sqlite_database() as session_factory:
+            repo = MemoryItemRepository(session_factory)
+            first = await repo.add("hello world", session_id="s1", metadata={"source": "test"})
+            again = await repo.add("hello world", session_id="s1")
+            other = await repo.add("hello world", session_id="s2")
+
+            assert first.id == again.id
+            assert other.id != first.id
+            assert first.content_hash == MemoryItemRepository.hash_content("hello world")
+            assert first.metadata_ == {"source": "test"}
+            assert first.created_at is not None
+            assert len(await repo.list_by_session("s1")) == 1
+            assert (await repo.get_by_hash(first.content_hash, "s2")).id == other.id
+            assert await repo.delete_by_session("s1") == 1
+            assert await repo.list_by_session("s1") == []
+
+    @pytest.mark.asyncio
+    async def test_state_upsert_bumps_version(self):
+        async with sqlite_database() as session_factory:
+            repo = StateItemRepository(session_factory)
+            await repo.upsert("mode", "fast", session_id="s1")
+            updated = await repo.upsert("mode", {"level": 2}, session_id="s1")
+
+            assert updated.version == 2
+            assert (await repo.get("mode", "s1")).value == {"level": 2}
+            assert await repo.get("mode") is None
+            assert await repo.delete("mode", "s1")
+            assert not await repo.delete("mode", "s1")
+
+    @pytest.mark.asyncio
+    async def test_concurrent_upserts(self):
+        async with sqlite_database() as session_factory:
+            repo = StateItemRepository(session_factory)
+            await AgentSessionRepository(session_factory).get_or_create("s1")
+            await asyncio.gather(*(repo.upsert(f"k{i}", i, session_id="s1") for i in range(10)))
+
+            items = await repo.list("s1")
+            assert sorted(item.value for item in items) == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_communications_lifecycle(self):
+        async with sqlite_database() as session_factory:
+            repo = AgentCommunicationRepository(session_factory)
+            conversation = uuid.uuid4()
+            message = await repo.send("supervisor", "code_generation", "task", {"task": "write"},
+                                      session_id="s1", conversation_id=conversation, priority="high")
+
+            pending = await repo.list_for_agent("code_generation")
+            assert [m.id for m in pending] == [message.id]
+
+            assert await repo.update_status(message.id, "processed", response_time_ms=120)
+            stored = await repo.get(message.id)
+            assert stored.status == "processed"
+            assert stored.processed_at is not None
+            assert await repo.list_for_agent("code_generation") == []
+            assert len(await repo.list_conversation(conversation)) == 1
+
+    def test_postgres_search_matches_gin_index_expression(self):
+        statement = KnowledgeBaseRepository._postgres_search_statement("parser", 5)
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        # Chaque to_tsvector est l'expression de idx_knowledge_content_search (init_postgres.py), sans paramètre lié
+        index_expression = "to_tsvector('french', (knowledge_base.title || ' ') || coalesce(knowledge_base.summary, ''))"
+        assert sql.count("to_tsvector(") == sql.count(index_expression) > 0
+
+
+@pytest.mark.unit
+class TestStateServiceWithDatabase:
+    """StateService adossé au StateItemRepository."""
+
+    @pytest.mark.asyncio
+    async def test_state_roundtrip(self):
+        async with sqlite_database() as session_factory:
+            service = StateService(StateItemRepository(session_factory))
+            await service.set_state("k", "v", "s1")
+            await service.set_state("g", "global")
+
+            assert (await service.get_state("k", "s1")).value == "v"
+            assert (await service.get_state("g")).session_id is None
+            assert {item.key for item in await service.get_all_state()} == {"k", "g"}
+            assert await service.delete_state("k", "s1")
+            await service.clear_state()
+            assert await service.get_all_state() == []
+
+    @pytest.mark.asyncio
+    async def test_checkpoints_are_versioned_and_persisted(self):
+        async with sqlite_database() as session_factory:
+            service = StateService(StateItemRepository(session_factory))
+            records = [CheckpointRecord(thread_id="t1", checkpoint_id=f"c{i}", checkpoint="{}",
+                                        metadata=f'{{"step": {i}}}', parent_checkpoint_id=f"c{i-1}" if i else None)
+                       for i in range(3)]
+            versions = await service.put_checkpoints(records)
+            await service.set_state("plain", "x", "t1")
+
+            assert versions == {"c0": 1, "c1": 2, "c2": 3}
+            restarted = StateService(StateItemRepository(session_factory))
+            latest = await restarted.get_checkpoint("t1")
+            assert latest.checkpoint_id == "c2"
+            assert latest.parent_checkpoint_id == "c1"
+            assert (await restarted.get_checkpoint("t1", "c0")).version == 1
+            assert await restarted.get_checkpoint("t1", "plain") is None
+            history = await restarted.list_checkpoints("t1", limit=2)
+            assert [r.checkpoint_id for r in history] == ["c2", "c1"]
+            assert [r.checkpoint_id for r in await restarted.list_checkpoints("t1", before="c2")] == ["c1", "c0"]
+            assert [i.key for i in await restarted.get_all_state("t1")] == ["plain"]
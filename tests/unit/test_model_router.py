@@ -0,0 +1,97 @@
+"""
+Tests unitaires pour model_router.py
+Sélection selon SLO et coût, mise à jour des EWMA, quarantaine et rejeu hors ligne d'une trace.
+"""
+
+import pytest
+import json
+
+from orchestrator.app.performance.model_router import (
+    MODEL_CATALOG,
+    LatencyAwareRouter,
+    load_trace,
+    replay_trace,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_router(**kwargs):
+    return LatencyAwareRouter(providers={"openai", "anthropic", "ollama"}, cooldown_seconds=60, **kwargs)
+
+
+def trace_record(model, latency, tokens=400, success=True, agent_type="code_generation"):
+    return {"agent_type": agent_type, "provider": MODEL_CATALOG[model].provider,
+            "model": MODEL_CATALOG[model].model, "latency": latency, "tokens": tokens, "success": success}
+
+
+@pytest.mark.unit
+class TestLatencyAwareRouter:
+    """Tests pour LatencyAwareRouter."""
+
+    def test_cheapest_model_within_slo_wins(self):
+        router = make_router()
+        # Petit volume : le modèle local (gratuit) tient le SLO
+        assert router.select("code_generation", slo_seconds=30, expected_tokens=200).key == "ollama:qwen-coder-32b:latest"
+        # Réponse longue : le local dépasse le SLO, le moins cher des rapides est retenu
+        assert router.select("code_generation", slo_seconds=30, expected_tokens=1500).key == "anthropic:claude-3-5-sonnet-20240620"
+        # Fournisseur non configuré (gemini) jamais proposé
+        assert all(p.provider != "gemini" for p in router.rank("code_generation"))
+
+    def test_observed_latency_shifts_selection(self):
+        router = make_router()
+        sonnet = MODEL_CATALOG["anthropic:claude-3-5-sonnet-20240620"]
+        for _ in range(10):
+            router.record(sonnet, latency=40.0, tokens=800)
+        assert router.stats[sonnet.key].tokens_per_second < 30
+        assert router.estimate_latency(sonnet.key, 1500) > 30
+        assert router.select("code_generation", slo_seconds=30, expected_tokens=1500).key == "openai:gpt-4o"
+
+    def test_queue_depth_penalizes_local_model(self):
+        router = make_router()
+        local = MODEL_CATALOG["ollama:qwen-coder-32b:latest"]
+        assert router.select("code_generation", slo_seconds=20, expected_tokens=200).provider == "ollama"
+        with router.track(local):
+            # GPU local occupé : l'appel suivant attendrait la fin du premier
+            assert router.select("code_generation", slo_seconds=20, expected_tokens=200).provider != "ollama"
+        assert router.stats[local.key].in_flight == 0
+
+    def test_degraded_provider_is_quarantined_then_restored(self):
+        clock = FakeClock()
+        router = make_router(clock=clock)
+        gpt = MODEL_CATALOG["openai:gpt-4o"]
+        for _ in range(3):
+            router.record(gpt, latency=5.0, success=False)
+
+        assert router.is_degraded(gpt.key)
+        ranked = router.rank("testing", slo_seconds=20, expected_tokens=1500)
+        assert ranked[-1].key == gpt.key
+        assert router.get_metrics()["degradations"] == 1
+
+        clock.now += 61
+        assert not router.is_degraded(gpt.key)
+
+    def test_replay_trace_beats_static_routing_on_stalls(self, tmp_path):
+        trace = []
+        for i in range(40):
+            # gpt-4o : blocages réguliers de 60 s ; sonnet stable
+            trace.append(trace_record("openai:gpt-4o", 60.0 if i % 2 else 8.0,
+                                      success=bool(i % 4 != 3)))
+            trace.append(trace_record("anthropic:claude-3-5-sonnet-20240620", 9.0))
+        path = tmp_path / "trace.jsonl"
+        path.write_text("".join(json.dumps(record) + "\n" for record in trace))
+
+        loaded = load_trace(str(path))
+        static = replay_trace(None, loaded, slo_seconds=20)
+        routed = replay_trace(LatencyAwareRouter(providers={"openai", "anthropic"}), loaded, slo_seconds=20)
+
+        assert static["requests"] == routed["requests"] == 80
+        assert routed["slo_attainment"] > static["slo_attainment"]
+        assert routed["p95_seconds"] < static["p95_seconds"]
+        assert routed["failures"] == 0
@@ -0,0 +1,156 @@
+"""
+Tests unitaires pour near_cache.py
+Tier L1 borné (octets, TTL), rejet des lectures concurrentes d'une invalidation
+et cohérence entre réplicas par pub/sub (fakeredis).
+"""
+
+import pytest
+import asyncio
+from unittest.mock import patch
+
+import fakeredis
+
+from orchestrator.app.performance import redis_cache
+from orchestrator.app.performance.near_cache import NearCache
+from orchestrator.app.performance.redis_cache import CacheType, ProductionRedisCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def replica(server, **kwargs):
+    cache = ProductionRedisCache(near_cache=NearCache(**kwargs))
+    cache.redis_client = fakeredis.FakeAsyncRedis(server=server)
+    cache.initialized = True
+    await cache.invalidation_bus.start(cache.redis_client)
+    return cache
+
+
+async def eventually(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.mark.unit
+class TestNearCache:
+    """Tests pour NearCache et son intégration à ProductionRedisCache."""
+
+    def test_bounded_by_bytes_and_ttl(self):
+        clock = FakeClock()
+        near = NearCache(max_bytes=250, ttl_seconds=5, max_entry_bytes=120, clock=clock)
+
+        assert near.put("a", b"x" * 100, near.fill_token())
+        assert near.put("b", b"y" * 100, near.fill_token())
+        assert not near.put("huge", b"z" * 200, near.fill_token())
+        near.get("a")  # "a" devient le plus récent
+        assert near.put("c", b"w" * 100, near.fill_token())
+
+        assert near.get("b") is None and near.get("a") == b"x" * 100
+        clock.now = 5
+        assert near.get("c") is None
+
+        metrics = near.get_metrics()
+        assert metrics['evictions'] == 1 and metrics['expirations'] == 1
+        assert metrics['bytes'] == 100 and metrics['hit_rate_percent'] == 50.0
+
+    def test_fill_started_before_invalidation_is_rejected(self):
+        near = NearCache()
+        token = near.fill_token()
+        near.invalidate(["session_data:s1"])
+
+        assert not near.put("session_data:s1", b"stale", token)
+        assert near.put("session_data:s2", b"other", token)
+        assert near.put("session_data:s1", b"fresh", near.fill_token())
+
+        token = near.fill_token()
+        near.invalidate_prefix("session_data:")
+        assert not near.put("session_data:s3", b"stale", token)
+        assert near.get_metrics()['rejected_fills'] == 2
+
+    @pytest.mark.asyncio
+    async def test_hot_keys_served_locally(self, redis_server):
+        cache = await replica(redis_server)
+        try:
+            await cache.set("s1", {"user": 1}, CacheType.SESSION_DATA)
+            await cache.set("r1", [1, 2], CacheType.RAG_RESULTS)
+
+            with patch.object(cache.redis_client, 'get', side_effect=AssertionError):
+                assert await cache.get("s1", CacheType.SESSION_DATA) == {"user": 1}
+                assert await cache.get_many(["s1"], CacheType.SESSION_DATA) == {"s1": {"user": 1}}
+            # Type hors L1 : lu dans Redis
+            assert await cache.get("r1", CacheType.RAG_RESULTS) == [1, 2]
+
+            metrics = (await cache.get_metrics())['near_cache']
+            assert metrics['hits'] == 2 and metrics['entries'] == 1
+        finally:
+            await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_writes_and_deletes_invalidate_other_replicas(self, redis_server):
+        first, second = await replica(redis_server), await replica(redis_server)
+        try:
+            await first.set("s1", {"v": 1}, CacheType.SESSION_DATA)
+            await eventually(lambda: second.invalidation_bus.metrics['received'] == 1)
+            assert await second.get("s1", CacheType.SESSION_DATA) == {"v": 1}
+
+            await first.set("s1", {"v": 2}, CacheType.SESSION_DATA)
+            await eventually(lambda: second.invalidation_bus.metrics['received'] == 2)
+            assert await second.get("s1", CacheType.SESSION_DATA) == {"v": 2}
+
+            await first.delete("s1", CacheType.SESSION_DATA)
+            await eventually(lambda: second.invalidation_bus.metrics['received'] == 3)
+            assert await second.get("s1", CacheType.SESSION_DATA) is None
+
+            # Ses propres écritures ne vident pas le L1 de l'émetteur
+            assert first.invalidation_bus.metrics['received'] == 0
+        finally:
+            await first.close()
+            await second.close()
+
+    @pytest.mark.asyncio
+    async def test_clear_by_type_invalidates_every_replica(self, redis_server):
+        replicas = [await replica(redis_server) for _ in range(3)]
+        try:
+            await replicas[0].set_many({"a": 1, "b": 2}, CacheType.AGENT_STATE)
+            for cache in replicas[1:]:
+                # Une lecture concurrente de l'invalidation de l'écriture ne serait pas conservée
+                await eventually(lambda: cache.invalidation_bus.metrics['received'] == 1)
+                assert await cache.get_many(["a", "b"], CacheType.AGENT_STATE) == {"a": 1, "b": 2}
+                assert cache.near_cache.get_metrics()['entries'] == 2
+
+            await replicas[0].clear_by_type(CacheType.AGENT_STATE)
+            for cache in replicas:
+                await eventually(lambda: cache.near_cache.get_metrics()['entries'] == 0)
+                assert await cache.get("a", CacheType.AGENT_STATE) is None
+        finally:
+            for cache in replicas:
+                await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_local_hits_reported_to_redis_counters_in_batches(self, redis_server, monkeypatch):
+        monkeypatch.setattr(redis_cache, "ACCESS_FLUSH_EVERY", 3)
+        cache = await replica(redis_server)
+        try:
+            await cache.set("s1", {"user": 1}, CacheType.SESSION_DATA)
+            for _ in range(2):
+                await cache.get("s1", CacheType.SESSION_DATA)
+            await asyncio.sleep(0.01)
+            assert (await cache.get_access_stats("s1", CacheType.SESSION_DATA))['access_count'] == 0
+
+            await cache.get("s1", CacheType.SESSION_DATA)
+            await asyncio.sleep(0.01)
+            assert (await cache.get_access_stats("s1", CacheType.SESSION_DATA))['access_count'] == 3
+        finally:
+            await cache.close()
@@ -0,0 +1,133 @@
+"""
+Tests unitaires pour les lots d'écriture/recherche de RAGService.
+ChromaDB éphémère avec une fonction d'embedding locale (sans téléchargement de modèle).
+"""
+
+import pytest
+import asyncio
+import zlib
+from unittest.mock import patch
+
+import chromadb
+from chromadb import Documents, EmbeddingFunction, Embeddings
+from fastapi.testclient import TestClient
+
+from memory_api.app.main import app
+from memory_api.app.models.schemas import MAX_BATCH_SIZE, MemoryBatchItem, SearchQuery
+from memory_api.app.services.embedding_service import CachedEmbedder, EmbeddingCache
+from memory_api.app.services.rag_service import COLLECTION_NAME, RAGService
+
+
+class HashingEmbeddingFunction(EmbeddingFunction):
+    """Embedding déterministe par hachage des mots (64 dimensions)."""
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input: Documents) -> Embeddings:
+        vectors = []
+        for document in input:
+            vector = [0.0] * 64
+            for word in document.lower().split():
+                vector[zlib.crc32(word.encode()) % 64] += 1.0
+            vectors.append(vector)
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "test-hashing"
+
+
+@pytest.fixture
+def rag_service():
+    client = chromadb.EphemeralClient()
+    try:
+        client.delete_collection(COLLECTION_NAME)
+    except Exception:
+        pass
+    embedder = CachedEmbedder(HashingEmbeddingFunction(), EmbeddingCache(path=""))
+    return RAGService(client=client, embedder=embedder)
+
+
+@pytest.mark.unit
+class TestRAGServiceBatch:
+    """Tests pour store_memory_batch / search_memory_batch."""
+
+    @pytest.mark.asyncio
+    async def test_store_batch_single_add_with_unique_ids(self, rag_service):
+        items = [MemoryBatchItem(content=f"chunk {i} of module", metadata={"path": f"f{i}.py"})
+                 for i in range(50)]
+        with patch.object(rag_service.collection, "add", wraps=rag_service.collection.add) as add:
+            stored = await rag_service.store_memory_batch(items, session_id="ingest")
+
+        assert add.call_count == 1
+        assert len({item.id for item in stored}) == 50
+        assert all(item.session_id == "ingest" for item in stored)
+        assert rag_service.collection.count() == 50
+
+    @pytest.mark.asyncio
+    async def test_store_batch_is_split_at_chroma_limit(self, rag_service):
+        rag_service.max_batch_size = 4
+        items = [MemoryBatchItem(content=f"doc {i}") for i in range(10)]
+        with patch.object(rag_service.collection, "add", wraps=rag_service.collection.add) as add:
+            await rag_service.store_memory_batch(items)
+
+        assert add.call_count == 3
+        assert rag_service.collection.count() == 10
+
+    @pytest.mark.asyncio
+    async def test_concurrent_single_stores_do_not_collide(self, rag_service):
+        await asyncio.gather(*(rag_service.store_memory(f"note {i}") for i in range(20)))
+        assert rag_service.collection.count() == 20
+
+    @pytest.mark.asyncio
+    async def test_search_batch_groups_by_session_and_keeps_order(self, rag_service):
+        await rag_service.store_memory_batch([
+            MemoryBatchItem(content="redis cache eviction policy", session_id="a"),
+            MemoryBatchItem(content="postgres connection pool", session_id="a"),
+            MemoryBatchItem(content="redis cluster failover", session_id="b"),
+        ])
+        queries = [
+            SearchQuery(query="redis cache", limit=1, session_id="a"),
+            SearchQuery(query="redis failover", limit=5, session_id="b"),
+            SearchQuery(query="connection pool", limit=2, session_id="a"),
+        ]
+        with patch.object(rag_service.collection, "query", wraps=rag_service.collection.query) as query:
+            results = await rag_service.search_memory_batch(queries)
+
+        assert query.call_count == 2
+        assert [r.total_count for r in results] == [1, 1, 2]
+        assert results[0].items[0].content == "redis cache eviction policy"
+        assert results[1].items[0].session_id == "b"
+        assert results[2].items[0].content == "postgres connection pool"
+
+
+@pytest.mark.unit
+class TestBatchEndpoints:
+    """Tests pour /memory/store_batch et /memory/search_batch."""
+
+    def test_store_then_search_batch(self, rag_service):
+        with patch("memory_api.app.main.rag_service", rag_service):
+            client = TestClient(app)
+            response = client.post("/memory/store_batch", json={
+                "session_id": "s1",
+                "items": [{"content": "alpha beta"}, {"content": "gamma delta", "metadata": {"k": 1}}]
+            })
+            assert response.status_code == 200
+            assert response.json()["stored"] == 2
+
+            response = client.post("/memory/search_batch", json={
+                "queries": [{"query": "alpha", "limit": 1, "session_id": "s1"}, {"query": "gamma", "limit": 1}]
+            })
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0]["items"][0]["content"] == "alpha beta"
+        assert results[1]["items"][0]["metadata"] == {"k": 1, "session_id": "s1"}
+
+    def test_batch_size_is_bounded(self, rag_service):
+        with patch("memory_api.app.main.rag_service", rag_service):
+            client = TestClient(app)
+            too_many = [{"content": "x"}] * (MAX_BATCH_SIZE + 1)
+            assert client.post("/memory/store_batch", json={"items": too_many}).status_code == 422
+            assert client.post("/memory/search_batch", json={"queries": []}).status_code == 422
@@ -0,0 +1,117 @@
+"""
+Tests unitaires pour /rag_query et retrieval_service.py
+Récupération hybride (ChromaDB + plein texte knowledge_base), rerank et budget de latence.
+"""
+
+import pytest
+import asyncio
+import time
+from unittest.mock import patch
+
+import chromadb
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from memory_api.app.main import app
+from memory_api.app.db.repositories import KnowledgeBaseRepository
+from memory_api.app.db.session import init_async_db
+from memory_api.app.models.schemas import MemoryBatchItem
+from memory_api.app.services.embedding_service import CachedEmbedder, EmbeddingCache
+from memory_api.app.services.rag_service import COLLECTION_NAME, RAGService
+from memory_api.app.services.retrieval_service import HybridRetriever, lexical_score, tokenize
+from tests.unit.test_rag_batch import HashingEmbeddingFunction
+
+
+@pytest.fixture
+def rag_service():
+    client = chromadb.EphemeralClient()
+    try:
+        client.delete_collection(COLLECTION_NAME)
+    except Exception:
+        pass
+    return RAGService(client=client, embedder=CachedEmbedder(HashingEmbeddingFunction(), EmbeddingCache(path="")))
+
+
+class SlowKnowledgeRepository:
+    """Source lexicale qui dépasse le budget de latence."""
+
+    async def search_text(self, query, limit):
+        await asyncio.sleep(2)
+        return []
+
+
+@pytest.mark.unit
+class TestRerank:
+    """Tests pour le score lexical du rerank."""
+
+    def test_lexical_score_rewards_coverage_and_proximity(self):
+        terms = tokenize("redis cache eviction")
+        assert lexical_score(terms, "Redis cache eviction policy") == pytest.approx(1.0)
+        assert lexical_score(terms, "eviction of a redis cache") < 1.0
+        assert lexical_score(terms, "postgres pool") == 0.0
+
+
+@pytest.mark.unit
+class TestHybridRetriever:
+    """Tests pour HybridRetriever."""
+
+    @pytest.mark.asyncio
+    async def test_merges_vector_and_knowledge_base_candidates(self, rag_service):
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool,
+                                     connect_args={"check_same_thread": False})
+        await init_async_db(engine)
+        try:
+            repository = KnowledgeBaseRepository(async_sessionmaker(engine, expire_on_commit=False))
+            await repository.add("Redis eviction", "Use allkeys-lru for redis cache eviction",
+                                 summary="redis cache tuning", category="best_practice")
+            await repository.add("Private note", "redis cache secrets", is_public=False)
+            await rag_service.store_memory_batch([
+                MemoryBatchItem(content="redis cache eviction with allkeys-lru"),
+                MemoryBatchItem(content="postgres connection pool sizing"),
+                MemoryBatchItem(content="unrelated frontend styling"),
+            ])
+
+            retriever = HybridRetriever(rag_service, repository, budget_ms=2000)
+            results, degraded = await retriever.query("redis cache eviction", top_k=3)
+        finally:
+            await engine.dispose()
+
+        assert not degraded
+        assert results[0].content == "redis cache eviction with allkeys-lru"
+        assert [r.score for r in results] == sorted((r.score for r in results), reverse=True)
+        knowledge = [r for r in results if r.source == "knowledge_base"]
+        assert [r.metadata["title"] for r in knowledge] == ["Redis eviction"]
+        assert knowledge[0].ranks.keys() == {"keyword"}
+
+    @pytest.mark.asyncio
+    async def test_slow_source_is_dropped_within_budget(self, rag_service):
+        await rag_service.store_memory("redis cache eviction")
+        retriever = HybridRetriever(rag_service, SlowKnowledgeRepository(), budget_ms=200)
+
+        started = time.perf_counter()
+        results, degraded = await retriever.query("redis cache", top_k=2)
+
+        assert time.perf_counter() - started < 1.0
+        assert degraded
+        assert [r.content for r in results] == ["redis cache eviction"]
+        assert retriever.get_metrics()["source_timeouts"] == 1
+
+
+@pytest.mark.unit
+class TestRagQueryEndpoint:
+    """Le contrat attendu par rag_code_search_tool : results[].content / score."""
+
+    def test_rag_query_contract(self, rag_service):
+        asyncio.run(rag_service.store_memory("def add(a, b): return a + b"))
+        with patch("memory_api.app.main.retriever", HybridRetriever(rag_service, budget_ms=2000)):
+            client = TestClient(app)
+            response = client.post("/rag_query", json={"query": "add function", "top_k": 3})
+            invalid = client.post("/rag_query", json={"query": "", "top_k": 3})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["results"][0]["content"] == "def add(a, b): return a + b"
+        assert 0.0 < body["results"][0]["score"] <= 1.0
+        assert body["results"][0]["source"] == "memory"
+        assert invalid.status_code == 422
@@ -0,0 +1,412 @@
+"""
+Tests unitaires pour redis_cache.py
+Enveloppe binaire, dictionnaires partagés entre réplicas, opérations par lots,
+compteurs d'accès, get_or_compute sans ruée à l'expiration et invalidation
+par génération (fakeredis).
+"""
+
+import pytest
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import fakeredis
+
+from unittest.mock import patch
+
+from orchestrator.app.performance import redis_cache
+from orchestrator.app.performance.cache_codec import CODEC_RAW, ENVELOPE_MAGIC, FORMAT_JSON, HEADER_V1
+from orchestrator.app.performance.redis_cache import CacheEntry, CacheType, ProductionRedisCache
+from orchestrator.app.performance.redis_cache_production import CacheStrategy, RedisProductionCache
+
+
+def replica(server, **kwargs):
+    cache = ProductionRedisCache(**kwargs)
+    cache.redis_client = fakeredis.FakeAsyncRedis(server=server)
+    cache.initialized = True
+    return cache
+
+
+def agent_state(i):
+    return {
+        "agent_id": f"agent-{i % 5}",
+        "status": ["running", "waiting", "completed"][i % 3],
+        "step": i % 17,
+        "context": {"task": f"review module number {i} and report issues", "session_id": f"session-{i}"},
+    }
+
+
+async def settle():
+    # Laisse s'exécuter les mises à jour d'accès lancées en arrière-plan
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.mark.unit
+class TestCacheEnvelope:
+    """Tests pour l'enveloppe binaire de ProductionRedisCache."""
+
+    @pytest.mark.asyncio
+    async def test_round_trip_and_large_payloads_compressed(self, redis_server):
+        cache = replica(redis_server, dictionary_types=())
+        small = {"answer": "ok", "tokens": 3}
+        large = "The orchestrator returned a long answer. " * 200
+
+        assert await cache.set("small", small, CacheType.API_RESPONSE)
+        assert await cache.set("large", large, CacheType.LLM_RESPONSE)
+
+        assert await cache.get("small", CacheType.API_RESPONSE) == small
+        assert await cache.get("large", CacheType.LLM_RESPONSE) == large
+        stored = await cache.redis_client.get("llm_response:large")
+        assert stored[2] != CODEC_RAW and len(stored) < len(large) // 10
+        assert cache.metrics['compression_saves'] == 1
+
+    @pytest.mark.asyncio
+    async def test_legacy_json_entries_stay_readable(self, redis_server):
+        cache = replica(redis_server)
+        now = datetime.utcnow()
+        legacy = CacheEntry("old", {"a": 1}, CacheType.SESSION_DATA, now, now + timedelta(hours=1))
+        legacy_data = json.dumps(legacy.to_dict())
+        await cache.redis_client.setex("session_data:old", 3600, legacy_data)
+
+        assert await cache.get("old", CacheType.SESSION_DATA) == {"a": 1}
+        assert await cache.get_many(["old"], CacheType.SESSION_DATA) == {"old": {"a": 1}}
+        await settle()
+
+        assert await cache.redis_client.get("session_data:old") == legacy_data.encode()
+        assert (await cache.get_access_stats("old", CacheType.SESSION_DATA))['access_count'] == 2
+
+    @pytest.mark.asyncio
+    async def test_version_1_envelopes_still_decode(self, redis_server):
+        cache = replica(redis_server)
+        now = datetime.utcnow().timestamp()
+        header = HEADER_V1.pack(ENVELOPE_MAGIC, 1, CODEC_RAW, FORMAT_JSON, 0, now, now + 3600, 4, now)
+        await cache.redis_client.setex("api_response:v1", 3600, header + b'{"ok":true}')
+
+        assert await cache.get("v1", CacheType.API_RESPONSE) == {"ok": True}
+
+    @pytest.mark.asyncio
+    async def test_dictionary_trained_for_small_similar_payloads(self, redis_server):
+        cache = replica(redis_server, dictionary_samples=50)
+        for i in range(50):
+            await cache.set(f"s{i}", agent_state(i), CacheType.AGENT_STATE)
+        without_dictionary = len(await cache.redis_client.get("agent_state:s49"))
+
+        assert "agent_state" in cache.codec.active
+        assert await cache.redis_client.get("cache_dict:agent_state:current") is not None
+
+        await cache.set("s50", agent_state(50), CacheType.AGENT_STATE)
+        with_dictionary = len(await cache.redis_client.get("agent_state:s50"))
+        assert with_dictionary < without_dictionary * 0.75
+        assert await cache.get("s50", CacheType.AGENT_STATE) == agent_state(50)
+
+    @pytest.mark.asyncio
+    async def test_other_replica_loads_shared_dictionary(self, redis_server):
+        writer = replica(redis_server, dictionary_samples=20)
+        for i in range(21):
+            await writer.set(f"s{i}", agent_state(i), CacheType.AGENT_STATE)
+
+        reader = replica(redis_server, dictionary_samples=20)
+        assert await reader.get("s20", CacheType.AGENT_STATE) == agent_state(20)
+
+        # Le second réplica adopte le dictionnaire publié au lieu d'en entraîner un autre
+        await reader.set("r1", agent_state(99), CacheType.AGENT_STATE)
+        assert reader.codec.active["agent_state"].dict_id == writer.codec.active["agent_state"].dict_id
+        assert await writer.get("r1", CacheType.AGENT_STATE) == agent_state(99)
+
+    @pytest.mark.asyncio
+    async def test_encoding_metrics_report_bytes_per_entry(self, redis_server):
+        cache = replica(redis_server)
+        for i in range(10):
+            await cache.set(f"llm{i}", f"Answer {i}: " + "lorem ipsum dolor " * 100, CacheType.LLM_RESPONSE)
+
+        metrics = await cache.get_metrics()
+        encoding = metrics['encoding']['per_type']['llm_response']
+        assert encoding['entries'] == 10 and encoding['compressed'] == 10
+        assert encoding['stored_bytes_per_entry'] < encoding['payload_bytes_per_entry']
+        assert metrics['encoding']['pending_samples'] == {'llm_response': 10}
+
+
+@pytest.mark.unit
+class TestBatchOperations:
+    """Tests pour get_many/set_many et les compteurs d'accès côté Redis."""
+
+    @pytest.mark.asyncio
+    async def test_set_many_and_get_many_use_one_round_trip(self, redis_server):
+        cache = replica(redis_server)
+        sessions = {f"s{i}": {"user": i} for i in range(30)}
+
+        with patch.object(cache.redis_client, 'setex', side_effect=AssertionError), \
+                patch.object(cache.redis_client, 'get', side_effect=AssertionError):
+            assert await cache.set_many(sessions, CacheType.SESSION_DATA)
+            found = await cache.get_many(["s1", "missing", "s29", "s1"], CacheType.SESSION_DATA)
+
+        assert found == {"s1": {"user": 1}, "s29": {"user": 29}}
+        assert cache.metrics['sets'] == 30
+        assert cache.metrics['hits'] == 2 and cache.metrics['misses'] == 1
+
+    @pytest.mark.asyncio
+    async def test_get_many_chunks_large_batches(self, redis_server, monkeypatch):
+        monkeypatch.setattr(redis_cache, "MGET_CHUNK_SIZE", 3)
+        cache = replica(redis_server)
+        await cache.set_many({f"r{i}": [i] for i in range(10)}, CacheType.RAG_RESULTS)
+
+        found = await cache.get_many([f"r{i}" for i in range(12)], CacheType.RAG_RESULTS)
+        assert found == {f"r{i}": [i] for i in range(10)}
+
+    @pytest.mark.asyncio
+    async def test_hits_update_counters_without_rewriting_value(self, redis_server):
+        cache = replica(redis_server)
+        await cache.set("k", "x" * 5000, CacheType.RAG_RESULTS)
+        before = await cache.redis_client.get("rag_results:k")
+
+        with patch.object(cache.redis_client, 'set', side_effect=AssertionError):
+            await cache.get("k", CacheType.RAG_RESULTS)
+            await cache.get_many(["k"], CacheType.RAG_RESULTS)
+            await settle()
+
+        assert await cache.redis_client.get("rag_results:k") == before
+        stats = await cache.get_access_stats("k", CacheType.RAG_RESULTS)
+        assert stats['access_count'] == 2 and stats['last_accessed'] is not None
+        assert await cache.redis_client.hget("cache_access:rag_results", "k") == b"2"
+
+    @pytest.mark.asyncio
+    async def test_set_and_delete_reset_access_stats(self, redis_server):
+        cache = replica(redis_server)
+        await cache.set("k", 1, CacheType.API_RESPONSE)
+        await cache.get("k", CacheType.API_RESPONSE)
+        await settle()
+
+        await cache.set("k", 2, CacheType.API_RESPONSE)
+        assert (await cache.get_access_stats("k", CacheType.API_RESPONSE))['access_count'] == 0
+
+        await cache.get("k", CacheType.API_RESPONSE)
+        await settle()
+        assert await cache.delete("k", CacheType.API_RESPONSE)
+        assert await cache.get_access_stats("k", CacheType.API_RESPONSE) == {'access_count': 0, 'last_accessed': None}
+
+    @pytest.mark.asyncio
+    async def test_stale_access_stats_are_pruned(self, redis_server, monkeypatch):
+        monkeypatch.setattr(redis_cache, "ACCESS_PRUNE_EVERY", 2)
+        cache = replica(redis_server)
+        # Statistiques d'une entrée expirée depuis longtemps
+        await cache.redis_client.hset("cache_access:api_response", "gone", 7)
+        await cache.redis_client.zadd("cache_last_access:api_response", {"gone": 1.0})
+
+        await cache.set_many({"a": 1, "b": 2}, CacheType.API_RESPONSE)
+        await cache.get_many(["a", "b"], CacheType.API_RESPONSE)
+        await settle()
+
+        assert await cache.redis_client.hkeys("cache_access:api_response") in ([b"a", b"b"], [b"b", b"a"])
+        assert await cache.redis_client.zscore("cache_last_access:api_response", "gone") is None
+
+    @pytest.mark.asyncio
+    async def test_batch_calls_without_redis_degrade_gracefully(self):
+        cache = ProductionRedisCache()
+
+        assert await cache.get_many(["a", "b"], CacheType.SESSION_DATA) == {}
+        assert not await cache.set_many({"a": 1}, CacheType.SESSION_DATA)
+        assert cache.metrics['misses'] == 2
+
+
+class CountingLoader:
+    """Calcul factice lent qui compte ses exécutions."""
+
+    def __init__(self, value, delay=0.05, error=None):
+        self.value = value
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.value
+
+
+@pytest.mark.unit
+class TestGetOrCompute:
+    """Tests pour get_or_compute : single-flight, verrou Redis et XFetch."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_compute_once(self, redis_server):
+        cache = replica(redis_server)
+        loader = CountingLoader(["doc1", "doc2"])
+
+        results = await asyncio.gather(*[
+            cache.get_or_compute("query", CacheType.RAG_RESULTS, loader) for _ in range(20)
+        ])
+
+        assert results == [["doc1", "doc2"]] * 20 and loader.calls == 1
+        assert cache.compute_metrics['coalesced'] == 19
+        assert await cache.get_or_compute("query", CacheType.RAG_RESULTS, loader) == ["doc1", "doc2"]
+        assert loader.calls == 1
+        assert await cache.redis_client.get("cache_lock:rag_results:query") is None
+
+    @pytest.mark.asyncio
+    async def test_replicas_share_one_computation(self, redis_server):
+        first, second = replica(redis_server), replica(redis_server)
+        loader = CountingLoader({"status": 200}, delay=0.1)
+
+        results = await asyncio.gather(
+            first.get_or_compute("endpoint", CacheType.API_RESPONSE, loader),
+            second.get_or_compute("endpoint", CacheType.API_RESPONSE, loader),
+        )
+
+        assert results == [{"status": 200}] * 2 and loader.calls == 1
+        assert first.compute_metrics['lock_waits'] + second.compute_metrics['lock_waits'] >= 1
+
+    @pytest.mark.asyncio
+    async def test_failed_holder_releases_lock_to_waiters(self, redis_server):
+        first, second = replica(redis_server), replica(redis_server)
+        failing = CountingLoader(None, delay=0.05, error=RuntimeError("vector store down"))
+        healthy = CountingLoader(["doc"], delay=0.01)
+
+        holder = asyncio.create_task(first.get_or_compute("q", CacheType.RAG_RESULTS, failing))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(second.get_or_compute("q", CacheType.RAG_RESULTS, healthy))
+
+        with pytest.raises(RuntimeError):
+            await holder
+        assert await waiter == ["doc"] and healthy.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_xfetch_refreshes_before_expiry_in_background(self, redis_server):
+        cache = replica(redis_server)
+        await cache.set_many({"q": "old"}, CacheType.RAG_RESULTS, timedelta(seconds=60), compute_seconds=30.0)
+        loader = CountingLoader("new", delay=0.01)
+
+        cache._random = lambda: 0.0  # -ln(1) = 0 : pas d'anticipation
+        assert await cache.get_or_compute("q", CacheType.RAG_RESULTS, loader) == "old"
+        assert loader.calls == 0
+
+        cache._random = lambda: 0.99  # Écart de 30 s * 4.6 > 60 s restantes
+        assert await cache.get_or_compute("q", CacheType.RAG_RESULTS, loader) == "old"
+        await asyncio.gather(*cache._flights.values())
+
+        assert loader.calls == 1 and cache.compute_metrics['early_refreshes'] == 1
+        assert await cache.get("q", CacheType.RAG_RESULTS) == "new"
+
+    @pytest.mark.asyncio
+    async def test_early_refresh_skipped_while_other_replica_holds_lock(self, redis_server):
+        cache = replica(redis_server)
+        cache._random = lambda: 0.99
+        await cache.set_many({"q": "old"}, CacheType.RAG_RESULTS, timedelta(seconds=60), compute_seconds=30.0)
+        await cache.redis_client.set("cache_lock:rag_results:q", "other-replica", px=5000)
+        loader = CountingLoader("new")
+
+        assert await cache.get_or_compute("q", CacheType.RAG_RESULTS, loader) == "old"
+        await asyncio.gather(*cache._flights.values())
+        assert loader.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_without_redis_loader_runs_and_none_is_not_cached(self, redis_server):
+        offline = ProductionRedisCache()
+        assert await offline.get_or_compute("k", CacheType.API_RESPONSE, CountingLoader(1, delay=0)) == 1
+
+        cache = replica(redis_server)
+        empty = CountingLoader(None, delay=0)
+        assert await cache.get_or_compute("k", CacheType.API_RESPONSE, empty) is None
+        assert await cache.get_or_compute("k", CacheType.API_RESPONSE, empty) is None
+        assert empty.calls == 2
+
+
+@pytest.mark.unit
+class TestGenerationInvalidation:
+    """Tests pour l'invalidation par génération (sans KEYS) et la récupération en arrière-plan."""
+
+    @pytest.mark.asyncio
+    async def test_clear_by_type_bumps_generation_without_keys(self, redis_server):
+        cache = replica(redis_server)
+        await cache.set_many({f"s{i}": {"user": i} for i in range(20)}, CacheType.SESSION_DATA)
+        await cache.set("r1", [1], CacheType.RAG_RESULTS)
+
+        with patch.object(cache.redis_client, 'keys', side_effect=AssertionError):
+            assert await cache.clear_by_type(CacheType.SESSION_DATA) == 1
+
+        assert await cache.get("s1", CacheType.SESSION_DATA) is None
+        assert await cache.get_many(["s1", "s2"], CacheType.SESSION_DATA) == {}
+        assert await cache.get("r1", CacheType.RAG_RESULTS) == [1]
+
+        await cache.set("s1", {"user": "new"}, CacheType.SESSION_DATA)
+        assert await cache.get("s1", CacheType.SESSION_DATA) == {"user": "new"}
+        assert await cache.redis_client.exists("session_data:g1:s1")
+        assert (await cache.get_metrics())['generations']['current']['session_data'] == 1
+
+    @pytest.mark.asyncio
+    async def test_other_replica_reads_new_generation(self, redis_server):
+        writer = replica(redis_server)
+        reader = replica(redis_server, generation_refresh_seconds=0)
+        await writer.set("k", "old", CacheType.API_RESPONSE)
+        assert await reader.get("k", CacheType.API_RESPONSE) == "old"
+
+        await writer.clear_by_type(CacheType.API_RESPONSE)
+        assert await reader.get("k", CacheType.API_RESPONSE) is None
+
+        await reader.set("k", "new", CacheType.API_RESPONSE)
+        assert await writer.get("k", CacheType.API_RESPONSE) == "new"
+        assert await reader.get_or_compute("k", CacheType.API_RESPONSE, CountingLoader("unused")) == "new"
+
+    @pytest.mark.asyncio
+    async def test_stale_generations_reclaimed_in_rate_limited_batches(self, redis_server, monkeypatch):
+        monkeypatch.setattr(redis_cache, "RECLAIM_SCAN_COUNT", 2)
+        cache = replica(redis_server)
+        await cache.set_many({f"a{i}": i for i in range(5)}, CacheType.AGENT_STATE)
+        await cache.clear_by_type(CacheType.AGENT_STATE)
+        await cache.set_many({f"b{i}": i for i in range(3)}, CacheType.AGENT_STATE)
+        await cache.set("other", 1, CacheType.RAG_RESULTS)
+
+        with patch.object(cache.redis_client, 'keys', side_effect=AssertionError):
+            await cache.clear_by_type(CacheType.AGENT_STATE)
+            await cache.set("c0", 0, CacheType.AGENT_STATE)
+            await asyncio.gather(*cache._reclaim_tasks.values())
+
+        remaining = sorted(key.decode() for key in await cache.redis_client.keys("agent_state:*"))
+        assert remaining == ["agent_state:g2:c0"]
+        assert await cache.redis_client.exists("rag_results:other")
+        assert cache.generation_metrics['reclaimed_keys'] == 8
+
+    @pytest.mark.asyncio
+    async def test_clear_all_keeps_shared_data(self, redis_server):
+        cache = replica(redis_server)
+        await cache.set("s1", {"user": 1}, CacheType.SESSION_DATA)
+        await cache.set("r1", [1], CacheType.RAG_RESULTS)
+        await cache.get("s1", CacheType.SESSION_DATA)
+        await settle()
+        await cache.redis_client.set("jobs:pending", "kept")
+
+        with patch.object(cache.redis_client, 'flushdb', side_effect=AssertionError):
+            assert await cache.clear_all()
+
+        assert await cache.get("s1", CacheType.SESSION_DATA) is None
+        assert await cache.get("r1", CacheType.RAG_RESULTS) is None
+        assert (await cache.get_access_stats("s1", CacheType.SESSION_DATA))['access_count'] == 0
+        assert await cache.redis_client.get("jobs:pending") == b"kept"
+
+    @pytest.mark.asyncio
+    async def test_production_cache_clears_strategy_by_generation(self, redis_server):
+        cache = RedisProductionCache()
+        cache.redis_client = fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+        cache.is_cluster_mode = False
+        await cache.set(CacheStrategy.RAG_RESULTS, "q", {"docs": [1]})
+
+        with patch.object(cache.redis_client, 'keys', side_effect=AssertionError):
+            assert await cache.clear_strategy(CacheStrategy.RAG_RESULTS) == 1
+            assert await cache.get(CacheStrategy.RAG_RESULTS, "q") is None
+            await cache.set(CacheStrategy.RAG_RESULTS, "q", {"docs": [2]})
+            assert await cache.get(CacheStrategy.RAG_RESULTS, "q") == {"docs": [2]}
+
+            assert await cache.clear_strategy(CacheStrategy.RAG_RESULTS) == 2
+            await asyncio.gather(*cache._reclaim_tasks)
+            assert not cache.redis_client.exists("orchestrator:rag_results:g1:q")
+
+            for i in range(7):
+                await cache.set(CacheStrategy.API_RESPONSES, f"bench_{i}", i)
+            assert await cache.clear_pattern("orchestrator:api_responses:bench_*") == 7
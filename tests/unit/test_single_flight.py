@@ -0,0 +1,197 @@
+"""
+Tests unitaires pour single_flight.py
+Coalescence des exécutions /invoke identiques, en processus et entre réplicas (fakeredis).
+"""
+
+import pytest
+import asyncio
+
+import fakeredis
+
+from orchestrator.app.performance.single_flight import (
+    LEASE_PREFIX,
+    LOST_LEADER_EVENT,
+    InvokeSingleFlight,
+    abort_on_failure,
+    request_key,
+)
+
+
+class CountingSource:
+    """Flux SSE factice qui compte ses exécutions."""
+
+    def __init__(self, lines, delay=0.02):
+        self.lines = lines
+        self.delay = delay
+        self.runs = 0
+
+    async def __call__(self):
+        self.runs += 1
+        for line in self.lines:
+            await asyncio.sleep(self.delay)
+            yield line
+
+
+async def collect(run):
+    return [line async for line in run.subscribe()]
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+def replica(server, **kwargs):
+    return InvokeSingleFlight(redis_client=fakeredis.FakeAsyncRedis(server=server), lease_seconds=1.0,
+                              poll_seconds=0.05, **kwargs)
+
+
+@pytest.mark.unit
+class TestInvokeSingleFlight:
+    """Tests pour InvokeSingleFlight."""
+
+    def test_request_key_normalizes_task(self):
+        assert request_key("Write  a Parser", "code") == request_key("write a parser ", "code")
+        assert request_key("write a parser", "code") != request_key("write a parser", "other code")
+        assert request_key("write a parser", None, "s1") != request_key("write a parser", None, "s2")
+
+    @pytest.mark.asyncio
+    async def test_local_duplicates_share_one_run(self):
+        flight = InvokeSingleFlight()
+        source = CountingSource(["data: 1\n\n", "data: 2\n\n", "data: done\n\n"])
+        key = request_key("same task")
+
+        is_leader, run = await flight.begin(key)
+        assert is_leader
+        flight.start(run, source())
+        leader_stream = asyncio.create_task(collect(run))
+        await asyncio.sleep(0.03)
+
+        is_leader, joined = await flight.begin(key)
+        assert not is_leader and joined is run
+        follower_lines = await collect(joined)
+
+        assert await leader_stream == follower_lines == source.lines
+        assert source.runs == 1
+        assert flight.get_metrics()["coalesced_local"] == 1
+        assert flight.get_metrics()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_duplicate_on_other_replica_follows_redis_stream(self, redis_server):
+        first, second = replica(redis_server), replica(redis_server)
+        source = CountingSource(["data: a\n\n", "data: b\n\n", "data: c\n\n"])
+        key = request_key("cross replica task")
+
+        is_leader, leader_run = await first.begin(key)
+        assert is_leader
+        first.start(leader_run, source())
+        await asyncio.sleep(0.03)
+
+        is_leader, remote_run = await second.begin(key)
+        assert not is_leader
+        assert await collect(remote_run) == source.lines
+        await leader_run.task
+
+        assert source.runs == 1
+        assert second.get_metrics()["coalesced_remote"] == 1
+        redis = fakeredis.FakeAsyncRedis(server=redis_server)
+        assert await redis.get(LEASE_PREFIX + key) is None
+
+        # Une fois terminé, une nouvelle requête relance une exécution sans rejouer l'ancienne
+        is_leader, rerun = await second.begin(key)
+        assert is_leader
+        second.start(rerun, CountingSource(["data: fresh\n\n"])())
+        assert await collect(rerun) == ["data: fresh\n\n"]
+
+    @pytest.mark.asyncio
+    async def test_follower_detects_lost_leader(self, redis_server):
+        first, second = replica(redis_server), replica(redis_server)
+        first.lease_seconds = 0.2
+        key = request_key("leader crashes")
+
+        is_leader, _ = await first.begin(key)  # exécutant qui ne démarre jamais ni ne renouvelle
+        assert is_leader
+        is_leader, remote_run = await second.begin(key)
+        assert not is_leader
+
+        assert await asyncio.wait_for(collect(remote_run), timeout=2) == [LOST_LEADER_EVENT]
+        assert second.get_metrics()["lost_leaders"] == 1
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_keeps_lease_for_long_runs(self, redis_server):
+        flight = replica(redis_server)
+        flight.lease_seconds = 0.15
+        key = request_key("long run")
+        source = CountingSource(["data: slow\n\n"], delay=0.5)
+
+        _, run = await flight.begin(key)
+        flight.start(run, source())
+        await asyncio.sleep(0.35)
+
+        redis = fakeredis.FakeAsyncRedis(server=redis_server)
+        assert (await redis.get(LEASE_PREFIX + key)).decode() == run.owner
+        await run.task
+        assert await redis.get(LEASE_PREFIX + key) is None
+
+    @pytest.mark.asyncio
+    async def test_failure_before_start_releases_duplicates(self):
+        flight = InvokeSingleFlight()
+        key = request_key("same task")
+
+        def build_initial_state():
+            raise RuntimeError("planner down")
+
+        is_leader, run = await flight.begin(key)
+        with pytest.raises(RuntimeError):
+            async with abort_on_failure(flight, run):
+                build_initial_state()
+        assert flight.get_metrics()["in_flight"] == 0
+
+        # Une requête identique ultérieure exécute à nouveau au lieu d'attendre un run mort
+        is_leader, run = await flight.begin(key)
+        assert is_leader
+        flight.start(run, CountingSource(["data: done\n\n"])())
+        assert await asyncio.wait_for(collect(run), timeout=1.0) == ["data: done\n\n"]
+
+    @pytest.mark.asyncio
+    async def test_cancellation_during_admission_wait_releases_duplicates(self):
+        flight = InvokeSingleFlight()
+        key = request_key("same task")
+        admission = asyncio.Event()
+
+        async def leader_request():
+            is_leader, run = await flight.begin(key)
+            async with abort_on_failure(flight, run):
+                await admission.wait()  # acquire() du contrôle d'admission
+            flight.start(run, CountingSource(["data: done\n\n"])())
+
+        leader = asyncio.create_task(leader_request())
+        await asyncio.sleep(0.01)
+        is_leader, joined = await flight.begin(key)
+        assert not is_leader
+        follower = asyncio.create_task(collect(joined))
+
+        leader.cancel()
+        assert await asyncio.wait_for(follower, timeout=1.0) == [LOST_LEADER_EVENT]
+        assert flight.get_metrics()["in_flight"] == 0
+        assert (await flight.begin(key))[0]
+
+    @pytest.mark.asyncio
+    async def test_cancellation_during_lease_acquisition_releases_duplicates(self, redis_server, monkeypatch):
+        flight = replica(redis_server)
+        key = request_key("same task")
+        lease_requested = asyncio.Event()
+
+        async def blocked_set(*args, **kwargs):
+            lease_requested.set()
+            await asyncio.Event().wait()
+
+        monkeypatch.setattr(flight.redis, "set", blocked_set)
+        leader = asyncio.create_task(flight.begin(key))
+        await lease_requested.wait()
+        is_leader, joined = await flight.begin(key)
+        assert not is_leader
+
+        leader.cancel()
+        assert await asyncio.wait_for(collect(joined), timeout=1.0) == [LOST_LEADER_EVENT]
+        assert flight.get_metrics()["in_flight"] == 0
@@ -0,0 +1,80 @@
+"""
+Tests unitaires pour StateCache (advanced_state_manager.py)
+LRU O(1) sur OrderedDict, TTL sur horloge monotone, bornes en entrées et en octets.
+"""
+
+import pytest
+import time
+from unittest.mock import patch
+
+from orchestrator.app.agents.advanced_state_manager import StateCache
+
+
+@pytest.mark.unit
+class TestStateCache:
+    """Tests pour StateCache."""
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self):
+        cache = StateCache(max_size=2)
+        await cache.set("a", {"v": 1})
+        await cache.set("b", {"v": 2})
+        await cache.get("a")
+        await cache.set("c", {"v": 3})
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == {"v": 1}
+        assert await cache.get("c") == {"v": 3}
+        assert cache.get_stats()["eviction_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_uses_monotonic_clock(self):
+        cache = StateCache(default_ttl=10)
+        with patch("orchestrator.app.agents.advanced_state_manager.time.monotonic", return_value=100.0):
+            await cache.set("default", {"v": 1})
+            await cache.set("short", {"v": 2}, ttl=1)
+        with patch("orchestrator.app.agents.advanced_state_manager.time.monotonic", return_value=105.0):
+            assert await cache.get("short") is None
+            assert await cache.get("default") == {"v": 1}
+        with patch("orchestrator.app.agents.advanced_state_manager.time.monotonic", return_value=111.0):
+            assert await cache.get("default") is None
+
+        stats = cache.get_stats()
+        assert stats["expiration_count"] == 2
+        assert stats["size"] == 0 and stats["size_bytes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_byte_bound(self):
+        cache = StateCache(max_bytes=1000)
+        for i in range(5):
+            await cache.set(f"s{i}", {"compressed_data": b"x" * 300})
+
+        stats = cache.get_stats()
+        assert stats["size"] == 3
+        assert stats["size_bytes"] <= 1000
+        assert await cache.get("s0") is None
+
+        await cache.set("huge", {"compressed_data": b"x" * 5000})
+        assert await cache.get("huge") is None
+        assert cache.get_stats()["size"] == 3
+
+    @pytest.mark.asyncio
+    async def test_overwrite_updates_byte_accounting(self):
+        cache = StateCache()
+        await cache.set("k", {"data": "x" * 100})
+        await cache.set("k", {"data": "x" * 10})
+        await cache.remove("k")
+        assert cache.get_stats()["size_bytes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_inserts_at_capacity_stay_constant_time(self):
+        """20 000 insertions à pleine capacité : aucun balayage linéaire par insertion."""
+        cache = StateCache(max_size=10000)
+        started = time.perf_counter()
+        for i in range(20000):
+            await cache.set(f"state:{i}", {"v": i})
+        elapsed = time.perf_counter() - started
+
+        assert len(cache.cache) == 10000
+        assert cache.get_stats()["eviction_count"] == 10000
+        assert elapsed < 2.0
@@ -231,4 +231,99 @@ class TestSupervisor:
         result = self.supervisor.create_plan(sample_agent_state)
         
         # ASSERT
-        assert result["next"] == expected_agent or expected_agent in result["plan"].lower() 
\ No newline at end of file
+        assert result["next"] == expected_agent or expected_agent in result["plan"].lower()
+
+
+@pytest.mark.unit
+class TestSupervisorParallelFanOut:
+    """Tests du mode fan-out : workers indépendants exécutés en parallèle."""
+    
+    def setup_method(self):
+        """Setup pour chaque test."""
+        self.supervisor = Supervisor()
+    
+    def _state(self, code_context="def add(a, b):\n    return a + b"):
+        from datetime import datetime
+        return AgentState(
+            messages=[], plan=None, next="supervisor", results={},
+            session_id="parallel-session", created_at=datetime.now(), updated_at=datetime.now(),
+            task_description="Review this python code and document it", task_status="pending",
+            code_context=code_context, working_memory=[], errors=[], logs=[], feedback=None
+        )
+    
+    def test_fan_out_when_code_context_provided(self):
+        """Test plan parallèle si le code est fourni et le mode activé."""
+        with patch("orchestrator.app.agents.supervisor.settings.PARALLEL_WORKERS_ENABLED", True):
+            result = self.supervisor.route(self._state())
+        
+        assert result["next"] == ["code_generation", "documentation"]
+    
+    def test_sequential_without_code_context(self):
+        """Test plan séquentiel si aucun code n'est fourni."""
+        with patch("orchestrator.app.agents.supervisor.settings.PARALLEL_WORKERS_ENABLED", True):
+            result = self.supervisor.route(self._state(code_context=None))
+        
+        assert result["next"] == "code_generation"
+    
+    def test_sequential_when_mode_disabled(self):
+        """Test comportement historique quand le mode parallèle est désactivé."""
+        with patch("orchestrator.app.agents.supervisor.settings.PARALLEL_WORKERS_ENABLED", False):
+            result = self.supervisor.route(self._state())
+        
+        assert result["next"] == "code_generation"
+    
+    def test_parallel_route_only_pending_then_finish(self):
+        """Test routage parallèle : nœuds restants puis fin."""
+        with patch("orchestrator.app.agents.supervisor.settings.PARALLEL_WORKERS_ENABLED", True):
+            state = self.supervisor.create_plan(self._state())
+            state["results"] = {"documentation": "docs"}
+            assert self.supervisor.route(state)["next"] == ["code_generation"]
+            
+            state["results"] = {"documentation": "docs", "code_generation": "review"}
+            assert self.supervisor.route(state)["next"] == "finish"
+    
+    def test_node_returns_partial_update(self):
+        """Test que le nœud LangGraph ne réécrit pas les canaux à reducer."""
+        update = self.supervisor.node(self._state())
+        
+        assert set(update.keys()) == {"plan", "next", "task_status"}
+    
+    @pytest.mark.asyncio
+    async def test_graph_runs_independent_workers_concurrently(self):
+        """Test d'un graphe réel : les deux workers tournent dans le même super-step."""
+        from functools import partial
+        from langgraph.graph import END, StateGraph
+        
+        async def fake_worker(state, agent_key):
+            await asyncio.sleep(0.2)
+            return {"results": {agent_key: f"{agent_key} done"}, "logs": [agent_key]}
+        
+        workflow = StateGraph(AgentState)
+        workflow.add_node("supervisor", self.supervisor.node)
+        workflow.add_node("code_generation", partial(fake_worker, agent_key="code_generation"))
+        workflow.add_node("documentation", partial(fake_worker, agent_key="documentation"))
+        workflow.add_node("finish", lambda s: {"task_status": "completed"})
+        workflow.set_entry_point("supervisor")
+        workflow.add_conditional_edges("supervisor", lambda x: x["next"], {
+            "code_generation": "code_generation",
+            "documentation": "documentation",
+            "finish": "finish"
+        })
+        workflow.add_edge("code_generation", "supervisor")
+        workflow.add_edge("documentation", "supervisor")
+        workflow.add_edge("finish", END)
+        app = workflow.compile()
+        
+        import time
+        with patch("orchestrator.app.agents.supervisor.settings.PARALLEL_WORKERS_ENABLED", True):
+            start = time.perf_counter()
+            final_state = await app.ainvoke(self._state())
+            elapsed = time.perf_counter() - start
+        
+        assert final_state["results"] == {
+            "code_generation": "code_generation done",
+            "documentation": "documentation done"
+        }
+        assert sorted(final_state["logs"]) == ["code_generation", "documentation"]
+        assert final_state["task_status"] == "completed"
+        assert elapsed < 0.35  # Séquentiel : >= 0.4s
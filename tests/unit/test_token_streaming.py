@@ -0,0 +1,137 @@
+"""
+Tests unitaires pour streaming.py
+Relais des tokens LLM (LangChain et Ollama) vers le flux SSE de /invoke.
+"""
+
+import pytest
+import asyncio
+import json
+import httpx
+from functools import partial
+from typing import Dict, List
+from unittest.mock import patch
+
+from langchain_core.language_models.chat_models import agenerate_from_stream
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, StateGraph
+from typing_extensions import TypedDict
+
+from orchestrator.app.agents import ollama_worker
+from orchestrator.app.agents.ollama_worker import OllamaLocalWorker
+from orchestrator.app.agents.streaming import TokenStream, get_token_stream
+
+
+class StreamingFakeChatModel(GenericFakeChatModel):
+    """Modèle factice se comportant comme ChatOpenAI(streaming=True)."""
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return await agenerate_from_stream(self._astream(messages, stop=stop, run_manager=run_manager, **kwargs))
+
+
+class StreamState(TypedDict):
+    task: str
+    output: str
+
+
+async def fake_llm_node(state: StreamState, agent_key: str) -> Dict[str, str]:
+    """Nœud qui reproduit le câblage de worker_node_wrapper."""
+    model = StreamingFakeChatModel(messages=iter([AIMessage(content="hello streaming world")]))
+    token_stream = get_token_stream()
+    config = {"callbacks": [token_stream.callback_handler(agent_key, model="fake")]} if token_stream else None
+    message = await model.ainvoke(state["task"], config=config)
+    return {"output": message.content}
+
+
+def build_graph():
+    workflow = StateGraph(StreamState)
+    workflow.add_node("code_generation", partial(fake_llm_node, agent_key="code_generation"))
+    workflow.set_entry_point("code_generation")
+    workflow.add_edge("code_generation", END)
+    return workflow.compile()
+
+
+@pytest.mark.unit
+class TestTokenStream:
+    """Tests pour TokenStream."""
+
+    @pytest.mark.asyncio
+    async def test_tokens_precede_node_output(self):
+        """Les tokens du nœud arrivent avant sa sortie complète."""
+        graph = build_graph()
+        stream = TokenStream()
+
+        events = [e async for e in stream.events(graph.astream({"task": "hi", "output": ""}))]
+
+        kinds = [kind for kind, _ in events]
+        assert kinds[-1] == "chunk"
+        assert kinds.count("token") >= 3
+        tokens = [payload for kind, payload in events if kind == "token"]
+        assert "".join(t["token"] for t in tokens) == "hello streaming world"
+        assert tokens[0] == {"type": "token", "node": "code_generation", "agent": "code_generation",
+                             "token": tokens[0]["token"], "model": "fake"}
+        assert events[-1][1] == {"code_generation": {"output": "hello streaming world"}}
+        assert stream.metrics["first_token_latency"] is not None
+
+    @pytest.mark.asyncio
+    async def test_no_stream_outside_request(self):
+        """Hors d'une requête streamée, aucun TokenStream n'est lié."""
+        assert get_token_stream() is None
+        result = await build_graph().ainvoke({"task": "hi", "output": ""})
+        assert result["output"] == "hello streaming world"
+
+    @pytest.mark.asyncio
+    async def test_graph_errors_are_reraised(self):
+        """Une erreur du graphe est propagée au consommateur du flux."""
+        async def failing():
+            yield {"supervisor": {}}
+            raise RuntimeError("boom")
+
+        received = []
+        with pytest.raises(RuntimeError, match="boom"):
+            async for event in TokenStream().events(failing()):
+                received.append(event)
+        assert received == [("chunk", {"supervisor": {}})]
+
+
+@pytest.mark.unit
+class TestOllamaStreaming:
+    """Tests pour le streaming de OllamaLocalWorker._call_ollama."""
+
+    def _patch_client(self, lines: List[dict], seen: List[dict]):
+        body = "\n".join(json.dumps(line) for line in lines).encode()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(json.loads(request.content))
+            return httpx.Response(200, content=body)
+
+        real_client = httpx.AsyncClient
+        return patch.object(ollama_worker.httpx, "AsyncClient",
+                            lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw))
+
+    @pytest.mark.asyncio
+    async def test_call_ollama_streams_tokens(self):
+        """Les fragments NDJSON d'Ollama sont relayés puis concaténés."""
+        lines = [{"response": "Bon", "done": False}, {"response": "jour", "done": False},
+                 {"response": "", "done": True, "eval_count": 2, "eval_duration": 1_000_000}]
+        seen: List[dict] = []
+        worker = OllamaLocalWorker(type("Cfg", (), {"OLLAMA_BASE_URL": "http://ollama"})())
+
+        async def run_call():
+            yield await worker._call_ollama("llama3:8b-instruct-q6_k", "Dis bonjour")
+
+        with self._patch_client(lines, seen):
+            events = [e async for e in TokenStream().events(run_call())]
+
+        assert seen[0]["stream"] is True
+        assert [p["token"] for k, p in events if k == "token"] == ["Bon", "jour"]
+        assert events[-1] == ("chunk", "Bonjour")
+        assert events[0][1]["model"] == "llama3:8b-instruct-q6_k"
+
+    @pytest.mark.asyncio
+    async def test_call_ollama_without_stream_returns_text(self):
+        """Sans TokenStream lié, le texte complet est retourné."""
+        lines = [{"response": "ok", "done": True}]
+        worker = OllamaLocalWorker(type("Cfg", (), {"OLLAMA_BASE_URL": "http://ollama"})())
+        with self._patch_client(lines, []):
+            assert await worker._call_ollama("mini", "test") == "ok"
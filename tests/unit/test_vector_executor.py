@@ -0,0 +1,121 @@
+"""
+Tests unitaires pour vector_executor.py
+Exécuteur borné des appels ChromaDB : boucle asyncio libre, métriques, backpressure 503.
+"""
+
+import pytest
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from memory_api.app.main import app
+from memory_api.app.services.vector_executor import VectorStoreExecutor, VectorStoreSaturated
+
+
+@pytest.mark.unit
+class TestVectorStoreExecutor:
+    """Tests pour VectorStoreExecutor."""
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_does_not_stall_event_loop(self):
+        """Un appel bloquant de 0.3s laisse la boucle traiter d'autres tâches."""
+        executor = VectorStoreExecutor(max_workers=1, max_queue=0)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.create_task(ticker())
+        result = await executor.run(lambda: time.sleep(0.3) or "done")
+        ticker_task.cancel()
+
+        assert result == "done"
+        assert ticks >= 10
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_saturation_rejects_and_records_metrics(self):
+        """Au-delà de workers + file, les appels sont refusés immédiatement."""
+        executor = VectorStoreExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        running = asyncio.create_task(executor.run(release.wait, 5))
+        queued = asyncio.create_task(executor.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+
+        assert executor.get_metrics()["queue_depth"] == 1
+        with pytest.raises(VectorStoreSaturated):
+            await executor.run(lambda: "rejected")
+
+        release.set()
+        assert await running is True
+        assert await queued == "queued"
+        metrics = executor.get_metrics()
+        assert metrics["rejected"] == 1
+        assert metrics["completed"] == 2
+        assert metrics["max_queue_depth"] == 1
+        assert metrics["max_wait_seconds"] >= 0.04
+        assert metrics["in_flight"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_errors_are_propagated(self):
+        executor = VectorStoreExecutor(max_workers=2, max_queue=2)
+
+        def boom():
+            raise ValueError("chroma failure")
+
+        with pytest.raises(ValueError, match="chroma failure"):
+            await executor.run(boom)
+        assert executor.get_metrics()["failed"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_keeps_slot_until_thread_finishes(self):
+        """Annuler l'appelant ne libère pas la place d'un appel Chroma encore en cours."""
+        executor = VectorStoreExecutor(max_workers=1, max_queue=0)
+        started, release = threading.Event(), threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+
+        caller = asyncio.create_task(executor.run(blocking))
+        await asyncio.to_thread(started.wait, 5)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+
+        assert executor.get_metrics()["in_flight"] == 1
+        with pytest.raises(VectorStoreSaturated):
+            await executor.run(lambda: "over capacity")
+
+        release.set()
+        executor.shutdown()
+        assert executor.get_metrics()["in_flight"] == 0
+        assert executor.metrics["completed"] == 1
+
+
+@pytest.mark.unit
+class TestBackpressureEndpoint:
+    """Le saturation du vector store est exposée en HTTP 503."""
+
+    def test_saturated_search_returns_503_with_retry_after(self):
+        client = TestClient(app)
+        with patch("memory_api.app.main.rag_service") as rag_service:
+            rag_service.search_memory.side_effect = VectorStoreSaturated(36, 36)
+            response = client.post("/memory/search", json={"query": "x"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+    def test_vector_store_metrics_endpoint(self):
+        response = TestClient(app).get("/metrics/vector_store")
+        assert response.status_code == 200
+        assert {"queue_depth", "rejected", "avg_wait_seconds"} <= set(response.json())